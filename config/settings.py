@@ -37,6 +37,12 @@ class Settings:
     UAP_UAI_FOCUSED_PASS_INTERVAL: int = 2
     UAP_UAI_FOCUSED_PASS_CONF: float = 0.12
     UAP_UAI_FOCUSED_PASS_IMG_SIZE: int = 1280
+    # roi: öngörülen iniş alanları çevresinde tam çözünürlüklü kırpıntılar (absent_streak'te tam kare)
+    UAP_UAI_FOCUSED_PASS_MODE: str = "roi"  # roi | full
+    UAP_UAI_ROI_SIZE: int = 640  # En küçük ROI kenarı (px) ve imgsz; daha büyük ROI kendi boyutunda (en çok odaklı geçiş imgsz'i) işlenir
+    UAP_UAI_ROI_PAD_RATIO: float = 0.5  # alan kenarının bu oranı kadar dolgu
+    UAP_UAI_ROI_MAX_CROPS: int = 4  # aşılırsa tam kare geçişe dönülür
+    UAP_UAI_ROI_MAX_AGE_FRAMES: int = 15  # görülmeyen alanın öngörüsü bu kadar kare tutulur
     UAP_UAI_RESCUE_ENABLED: bool = True
     UAP_UAI_RESCUE_ABSENT_STREAK: int = 2
     UAP_UAI_RESCUE_MIN_CONF: float = 0.16
@@ -47,6 +53,20 @@ class Settings:
     NMS_MODE: str = "class_aware"  # class_aware|agnostic|hybrid
     HYBRID_NMS_IOU_THRESHOLD: float = 0.65
     DEVICE: str = "cuda"
+    # CPU çıkarım arka ucu: torch | onnx | openvino (CUDA varken her zaman torch)
+    INFERENCE_BACKEND: str = os.getenv("AIA_INFERENCE_BACKEND", "torch").strip().lower()
+    # predict() yerine AutoBackend üzerinde yalın letterbox + forward + NMS yolu
+    LEAN_PREDICTOR_ENABLED: bool = True
+    # CPU model kopya havuzu: SAHI tile / ROI parçaları N kopyaya dağıtılır (1 = kapalı)
+    REPLICA_POOL_SIZE: int = 1
+    REPLICA_POOL_THREADS: int = 1  # kopya başına torch intra-op thread sayısı
+    REPLICA_POOL_FIXED_ASSIGNMENT: bool = False  # parça i → kopya i % N (parallel profili açar)
+    # INT8 CPU profili: none | int8_dynamic | int8_static (ONNX Runtime, CUDA'da yok sayılır)
+    INFERENCE_QUANTIZATION: str = os.getenv("AIA_INFERENCE_QUANTIZATION", "none").strip().lower()
+    QUANT_CALIBRATION_FRAMES: int = 64  # int8_static kalibrasyonu (datasets/ karesi)
+    QUANT_VALIDATION_FRAMES: int = 32  # FP32↔INT8 uyum kontrolü (kalibrasyondan ayrık)
+    QUANT_AGREEMENT_IOU: float = 0.5
+    QUANT_MIN_AGREEMENT: float = 0.90  # altında INT8 reddedilir, FP32 kullanılır
     HALF_PRECISION: bool = True
     INFERENCE_SIZE: int = 1280
     AGNOSTIC_NMS: bool = True  # Legacy fallback; NMS_MODE ayarı varken yok sayılır
@@ -58,6 +78,18 @@ class Settings:
     CLAHE_ENABLED: bool = True
     CLAHE_CLIP_LIMIT: float = 2.0
     CLAHE_TILE_SIZE: int = 8
+    # Çözünürlük farkındalıklı ön-işleme: tam kare geçişi imgsz'ye küçültülmüş girdi,
+    # SAHI tile'ları talep üzerine tam çözünürlükte iyileştirilir
+    PREPROCESS_RESOLUTION_AWARE: bool = True
+    PREPROCESS_THUMBNAIL_WIDTH: int = 160  # Termal/parlaklık sınıflandırma thumbnail genişliği
+    PREPROCESS_SHARPEN_SIGMA: float = 2.0  # Tam çözünürlükte unsharp-mask bulanıklık sigması
+    # Mod önbelleği: termal/düşük kontrast kararı histerezisle tutulur, N karede bir
+    # veya sahne kesmesinde yeniden değerlendirilir
+    PREPROCESS_MODE_CACHE_ENABLED: bool = True
+    PREPROCESS_MODE_REEVAL_FRAMES: int = 30
+    PREPROCESS_SCENE_CUT_THRESHOLD: float = 30.0  # 32x18 gri prob ortalama farkı (0-255)
+    PREPROCESS_BRIGHTNESS_HYSTERESIS: float = 8.0  # Düşük kontrast moddan çıkış payı
+    PREPROCESS_CHANNEL_HYSTERESIS: float = 1.0  # Termal moddan çıkış payı (kanal farkı)
     MIN_BBOX_SIZE: int = 20
     MIN_BBOX_SIZE_FLOOR: int = 8  # Yüksek irtifada min_size bu değerin altına düşmez
     CLASS_ADAPTIVE_FILTERS: dict = {
@@ -90,6 +122,19 @@ class Settings:
     SAHI_SLICE_SIZE: int = 640
     SAHI_OVERLAP_RATIO: float = 0.35
     SAHI_MERGE_IOU: float = 0.25
+    SAHI_BATCH_SIZE: int = 8  # Tek model çağrısında işlenen tile sayısı (CPU'da 4-8 yeterli)
+    # Adaptif tile seçimi: yalnızca küçük nesne ipucu olan tile'lar + dönen keşif penceresi
+    SAHI_ADAPTIVE_ENABLED: bool = True
+    SAHI_ADAPTIVE_SMALL_OBJECT_PX: float = 64.0  # Uzun kenarı bunun altındaki tespit = küçük nesne ipucu
+    SAHI_ADAPTIVE_LOW_CONF: float = 0.35  # Tam kare geçişinde bunun altındaki güven = ipucu
+    SAHI_ADAPTIVE_MAX_STALE_FRAMES: int = 6  # Her tile en geç K karede bir çalıştırılır
+    # Tile sonuç önbelleği (hover): değişmeyen tile'da önceki tespitler kaydırılarak kullanılır
+    SAHI_TILE_REUSE_ENABLED: bool = True
+    SAHI_REUSE_CHANGE_THRESHOLD: float = 4.0  # Kayma telafili ortalama gri fark (0-255) eşiği
+    SAHI_REUSE_MAX_AGE_FRAMES: int = 4  # Bir tile sonucu en fazla bu kadar kare yeniden kullanılır
+    SAHI_REUSE_FORCE_REFRESH_FRAMES: int = 15  # Bu periyotta tüm tile'lar zorla yeniden çalışır
+    SAHI_REUSE_MAX_SHIFT_PX: float = 48.0  # Biriken kayma bunu aşarsa tile yeniden çalışır
+    SAHI_REUSE_DOWNSCALE: float = 0.125  # Değişim skoru için küçültme oranı
 
     WARMUP_ITERATIONS: int = 3
 
@@ -227,6 +272,9 @@ class Settings:
     SIMULATION_PAUSE_ON_GPS_LOSS: bool = False
     # True: Simülasyonda GPS=1 olsa bile gps_health=0 simüle et (görsel odometri her zaman çalışsın)
     SIMULATION_FORCE_GPS_UNHEALTHY: bool = True
+    # Çevrim dışı batch: simülasyonda N karenin tam kare geçişi tek model çağrısında
+    # (1 = kapalı). SAHI/odaklı geçiş/zamansal filtre kare sırasıyla çalışır.
+    SIMULATION_BATCH_SIZE: int = 1
 
     # Performans
     FPS_REPORT_INTERVAL: int = 10
@@ -254,6 +302,34 @@ class Settings:
     PROTECTIVE_LOG_INTERVAL: int = 25
     PROTECTIVE_DEGRADE_SEND_INTERVAL_FRAMES: int = 8
     PROTECTIVE_DISABLE_SAHI: bool = True
+    # Zamanlayıcının protective_quant basamağında CPU'da geçilecek nicemleme modu ("none" = yok)
+    PROTECTIVE_INFERENCE_QUANTIZATION: str = "none"
+    # Kare bütçeli zamanlayıcı: her kare için plan seçer (kapalıyken low-FPS guard çalışır)
+    SCHEDULER_ENABLED: bool = True
+    # "measured": ölçülen süre EMA'sı; "static": SCHEDULER_STATIC_COSTS_MS (max/parallel seçer)
+    SCHEDULER_COST_SOURCE: str = "measured"
+    # Statik plan maliyetleri (ms); referans donanımdaki InferenceScheduler.stats()["measured"]
+    # çıktısından kalibre edilir (oturum sonunda loglanır)
+    SCHEDULER_STATIC_COSTS_MS: dict = {
+        "primary@1280": 45.0,
+        "tile": 9.0,
+        "focused": 40.0,
+        "detect_other": 15.0,
+        "task3": 60.0,
+        "vo": 8.0,
+        "io": 150.0,
+    }
+    SCHEDULER_MIN_FPS: float = 1.0  # bütçe = 1000 / MIN_FPS ms (ağ payı düşülür)
+    SCHEDULER_SAFETY_MARGIN: float = 0.15
+    SCHEDULER_COST_EMA_ALPHA: float = 0.2
+    SCHEDULER_QUANT_COST_RATIO: float = 0.6  # INT8 varyantı ölçülene kadar FP32 maliyetine çarpan
+    # Anahtar kare modu: tespit yalnızca anahtar karelerde, arada LK akışıyla kutu taşıma
+    KEYFRAME_MODE_ENABLED: bool = False
+    KEYFRAME_MAX_PROPAGATION_FRAMES: int = 2  # anahtar kare başına en fazla taşınan kare
+    KEYFRAME_CONF_DECAY: float = 0.9  # taşınan her karede güven çarpanı
+    KEYFRAME_MAX_RESIDUAL_PX: float = 6.0  # kutu içi akış artığı sınırı (tam çözünürlük px)
+    KEYFRAME_MIN_TRACKED_RATIO: float = 0.5  # altında sahne değişimi sayılır
+    KEYFRAME_MIN_BOX_POINTS: int = 3
     LIGHT_PROFILE_INFERENCE_SIZE: int = 960
     LIGHT_PROFILE_MAX_DETECTIONS: int = 180
     LIGHT_PROFILE_CONFIDENCE_THRESHOLD: float = 0.50
@@ -261,6 +337,10 @@ class Settings:
     LIGHT_PROFILE_SAHI_ENABLED: bool = False
     DETERMINISM_SEED: int = 42
     DETERMINISM_CPU_THREADS: int = 1
+    # deterministic-profile=parallel: sabit iş bölümlü model kopyaları (0 = cpu_count / intra-op)
+    DETERMINISM_PARALLEL_WORKERS: int = 0
+    DETERMINISM_PARALLEL_MAX_WORKERS: int = 8
+    DETERMINISM_PARALLEL_INTRAOP_THREADS: int = 1  # >1 ise determinism self-test ile doğrulayın
     MOTION_FIELD_NAME: str = "motion_status"
     PAYLOAD_CLS_AS_INT: bool = False
     PAYLOAD_STATUS_TYPE_PROFILE: str = "string"  # int|string
@@ -289,6 +369,14 @@ class Settings:
     MOTION_COMP_DOWNSCALE: float = 0.60
     MOTION_COMP_FB_MAX_ERROR: float = 1.50
     MOTION_COMP_MAX_SHIFT_PX: float = 120.0
+    # Nokta tohumlama: grid (FAST/AGAST, hücre başına sınır, yalnızca boş hücreler) | gftt (eski)
+    MOTION_COMP_SEED_METHOD: str = "grid"
+    MOTION_COMP_SEED_DETECTOR: str = "fast"  # fast | agast
+    MOTION_COMP_SEED_FAST_THRESHOLD: int = 20
+    MOTION_COMP_SEED_GRID_COLS: int = 8
+    MOTION_COMP_SEED_GRID_ROWS: int = 6
+    MOTION_COMP_SEED_PER_CELL: int = 4
+    MOTION_COMP_SEED_MAX_CELLS: int = 24  # Çağrı başına hücre bütçesi (0=sınırsız); kalanlar sonraki tohumlamaya
 
     # Visual Odometry (GPS=0): piksel→metre işaret düzeltmesi (drift azaltma)
     # İleri gidince haritada geri görünüyorsa VO_SIGN_Y veya VO_SIGN_X'i 1 yapın
@@ -299,6 +387,12 @@ class Settings:
     VO_ROTATION_DOT_THRESHOLD: float = 0.4  # Bu altında = rotasyon, güncelleme yapma
     VO_MAX_DISPLACEMENT_PER_FRAME: float = 1.0  # Kare başına max metre (drift sınırlama)
     VO_OUTLIER_IQR_FACTOR: float = 1.5  # IQR çarpanı; 0 = devre dışı
+    # Öteleme + ölçek akış seviyesinde (MOTION_COMP_DOWNSCALE) benzerlik dönüşümü
+    # uydurularak bulunur (estimateAffinePartial2D); uydurma başarısızsa medyan kayma.
+    # Seviye kamera kompanzasyonuyla bilerek ortaktır: kare başına tek LK akışı
+    VO_SIMILARITY_METHOD: str = "ransac"  # ransac | lmeds
+    VO_SIMILARITY_REPROJ_PX: float = 0.8  # Tam çözünürlük pikselinde inlier eşiği (akış seviyesine ölçeklenir)
+    VO_SIMILARITY_MIN_INLIERS: int = 8
     # Şartname: GPS=0'da yalnızca görsel ölçüm kullanılır; ölçüm yoksa pozisyon değiştirme
     GPS_ZERO_POSITION_FREEZE: bool = True  # True = ölçüm yoksa pozisyon dondur
 
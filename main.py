@@ -8,6 +8,7 @@ import signal
 import sys
 import time
 from collections import Counter, deque
+from itertools import islice
 from typing import Any, Dict, List, Optional, Tuple
 
 import cv2
@@ -21,6 +22,10 @@ if PROJECT_ROOT not in sys.path:
 
 from config.settings import Settings  # noqa: E402
 from src.detection import ObjectDetector  # noqa: E402
+from src.detection_batch import DetectionBatch  # noqa: E402
+from src.frame_motion import FrameMotionService  # noqa: E402
+from src.frame_scheduler import InferenceScheduler  # noqa: E402
+from src.keyframe_propagation import KeyframePropagator  # noqa: E402
 from src.localization import VisualOdometry  # noqa: E402
 from src.movement import MovementEstimator  # noqa: E402
 from src.competition_contract import (  # noqa: E402
@@ -47,6 +52,9 @@ from src.task3_reference_policy import (  # noqa: E402
     canonicalize_task3_references,
 )
 
+# Yarışma modunda kabul edilen determinizm profilleri (ikisi de bit-kararlı)
+_COMPETITION_PROFILES = {"max", "parallel"}
+
 BANNER = """
 ╔══════════════════════════════════════════════════════════════╗
 ║     🛩️  TEKNOFEST 2026 - HAVACILIKTA YAPAY ZEKA YARIŞMASI    ║
@@ -64,6 +72,8 @@ def print_system_info(log: Logger, runtime_mode_label: str) -> None:
     log.info(f"Debug            : {'ON' if Settings.DEBUG else 'OFF'}")
     log.info(f"Model            : {Settings.MODEL_PATH}")
     log.info(f"Device           : {Settings.DEVICE}")
+    log.info(f"Backend          : {getattr(Settings, 'INFERENCE_BACKEND', 'torch')}")
+    log.info(f"Quantization     : {getattr(Settings, 'INFERENCE_QUANTIZATION', 'none')}")
     log.info(f"FP16             : {'ON' if Settings.HALF_PRECISION else 'OFF'}")
     log.info(f"TTA              : {'ON' if Settings.AUGMENTED_INFERENCE else 'OFF'}")
 
@@ -115,6 +125,8 @@ def run_simulation(
         detector = ObjectDetector()
         odometry = VisualOdometry()
         movement = MovementEstimator()
+        # Hareket ve odometri kare başına tek optik akış sonucunu paylaşır
+        motion_service = FrameMotionService()
         fps_counter = FPSCounter(report_interval=Settings.FPS_REPORT_INTERVAL)
 
         image_matcher = None
@@ -152,38 +164,57 @@ def run_simulation(
 
     fullscreen_done: List[bool] = [False] if show else []
 
-    try:
-        for frame_info in loader:
-            if not running:
-                break
+    batch_size = max(1, int(getattr(Settings, "SIMULATION_BATCH_SIZE", 1)))
+    if batch_size > 1:
+        log.info(f"Offline batch mode: {batch_size} frames per full-frame forward")
+    frames_iter = iter(loader)
+    should_stop = False
 
+    try:
+        while running and not should_stop:
             if fps_counter.frame_count >= Settings.MAX_FRAMES:
                 log.success(f"Max frame limit reached ({Settings.MAX_FRAMES})")
                 break
 
-            try:
-                should_stop = _process_simulation_step(
-                    log,
-                    frame_info,
-                    detector,
-                    movement,
-                    odometry,
-                    image_matcher,
-                    visualizer,
-                    show,
-                    save,
-                    fullscreen_done=fullscreen_done,
-                )
-                if should_stop:
+            remaining = Settings.MAX_FRAMES - fps_counter.frame_count
+            chunk = list(islice(frames_iter, max(1, min(batch_size, remaining))))
+            if not chunk:
+                break
+            contexts = [
+                FrameContext(info["frame"], motion_service=motion_service) for info in chunk
+            ]
+            # Durumsuz tam kare geçişi batch'lenir; durumlu aşamalar aşağıda kare sırasıyla
+            prefetched = detector.prefetch_primary(contexts) if len(chunk) > 1 else []
+
+            for i, frame_info in enumerate(chunk):
+                if not running:
                     break
-                fps_counter.tick()
+                try:
+                    should_stop = _process_simulation_step(
+                        log,
+                        frame_info,
+                        detector,
+                        movement,
+                        odometry,
+                        image_matcher,
+                        visualizer,
+                        show,
+                        save,
+                        fullscreen_done=fullscreen_done,
+                        prefetched=prefetched[i] if i < len(prefetched) else None,
+                        frame_ctx=contexts[i],
+                    )
+                    if should_stop:
+                        break
+                    fps_counter.tick()
 
-            except Exception as exc:
-                log.error(f"Frame {frame_info.get('frame_idx', '?')} error: {exc}")
-                continue
+                except Exception as exc:
+                    log.error(f"Frame {frame_info.get('frame_idx', '?')} error: {exc}")
+                    continue
 
     finally:
         log.info("Cleaning resources...")
+        detector.close()
         if show:
             cv2.destroyAllWindows()
             cv2.waitKey(1)
@@ -204,20 +235,30 @@ def _process_simulation_step(
     show: bool,
     save: bool,
     fullscreen_done: Optional[List[bool]] = None,
+    prefetched: Any = None,
+    frame_ctx: Optional[FrameContext] = None,
 ) -> bool:
     frame = frame_info["frame"]
     frame_idx = frame_info["frame_idx"]
     server_data = frame_info["server_data"]
     gps_health = frame_info["gps_health"]
 
-    frame_ctx = FrameContext(frame)
+    if frame_ctx is None:
+        frame_ctx = FrameContext(frame)
     position = odometry.update(frame_ctx, server_data)
     current_z = position.get("z", 50.0) if position else 50.0
-    detected_objects = detector.detect(frame, altitude=current_z)
+    detect_fn = getattr(detector, "detect_batch", None) or detector.detect
+    detect_kwargs = {} if prefetched is None else {"prefetched": prefetched}
+    detected_objects = detect_fn(
+        frame_ctx,
+        altitude=current_z,
+        camera_shift=_current_camera_shift(movement, frame_ctx),
+        **detect_kwargs,
+    )
     detected_objects = movement.annotate(detected_objects, frame_ctx=frame_ctx)
 
     if image_matcher is not None:
-        _ = image_matcher.match(frame)
+        _ = image_matcher.match(frame_ctx)
 
     _print_simulation_result(log, frame_idx, detected_objects, position, gps_health)
 
@@ -360,6 +401,22 @@ def _safe_gps_health(frame_data: Dict[str, Any]) -> Optional[int]:
     return value
 
 
+def _current_camera_shift(movement: Any, frame_ctx: FrameContext) -> Tuple[float, float]:
+    """Önceki kare → bu kare kamera kayması, tespitten önce; desteklenmiyorsa (0, 0).
+
+    SAHI ipuçları, tile önbelleği ve ROI öngörüsü önceki karenin tespitlerini bu
+    kayma ile öteler; son annotate() kayması bir kare geride kalırdı.
+    """
+    getter = getattr(movement, "camera_shift_for", None)
+    if not callable(getter):
+        return 0.0, 0.0
+    shift = getter(frame_ctx)
+    try:
+        return float(shift[0]), float(shift[1])
+    except (TypeError, ValueError, IndexError):
+        return 0.0, 0.0
+
+
 def _assert_camera_calibration_ready(log: Logger) -> None:
     if not bool(getattr(Settings, "CAMERA_CALIBRATION_GUARD_ENABLED", True)):
         return
@@ -652,6 +709,18 @@ def _maybe_toggle_low_fps_guard(
     log.info(f"event=fps_guard_recovered rolling_fps={rolling_fps:.2f}")
 
 
+def _build_inference_scheduler() -> Optional[InferenceScheduler]:
+    """SCHEDULER_ENABLED ise kare bütçeli zamanlayıcı; değilse None (low-FPS guard çalışır).
+
+    Zamanlayıcı açıkken kare planı per-call uygulanır; low-FPS guard Settings'e
+    dokunmaz. max/parallel determinizm profilleri SCHEDULER_COST_SOURCE="static"
+    seçer; plan duvar saatine bağlı olmadığından yarışmada da açık kalır.
+    """
+    if not bool(getattr(Settings, "SCHEDULER_ENABLED", True)):
+        return None
+    return InferenceScheduler()
+
+
 def _run_periodic_gpu_maintenance(
     log: Logger,
     processed_frames: int,
@@ -792,6 +861,7 @@ def run_competition(log: Logger) -> None:
         "objects": [],
         "age": 10**9,
     }
+    frame_gap_state: Dict[str, Any] = {"next_index": 0, "pending_shift": (0.0, 0.0)}
     degrade_fallback_window: deque = deque(
         maxlen=max(5, int(getattr(Settings, "DEGRADE_FALLBACK_RATIO_WINDOW", 40)))
     )
@@ -810,6 +880,12 @@ def run_competition(log: Logger) -> None:
         "orig_json_interval": int(Settings.JSON_LOG_EVERY_N_FRAMES),
         "orig_degrade_interval": int(Settings.DEGRADE_SEND_INTERVAL_FRAMES),
     }
+    scheduler = _build_inference_scheduler()
+    propagator: Optional[KeyframePropagator] = (
+        KeyframePropagator() if bool(getattr(Settings, "KEYFRAME_MODE_ENABLED", False)) else None
+    )
+    # Hareket, odometri ve anahtar kare taşıma kare başına tek optik akış sonucunu paylaşır
+    motion_service = FrameMotionService()
 
     valid_transitions = {
         FrameLifecycleState.IDLE: {
@@ -1052,12 +1128,15 @@ def run_competition(log: Logger) -> None:
                             rolling_fps=rolling_fps,
                             kpi_counters=kpi_counters,
                         )
-                        _maybe_toggle_low_fps_guard(
-                            log=log,
-                            rolling_fps=rolling_fps,
-                            guard_state=low_fps_guard_state,
-                            kpi_counters=kpi_counters,
-                        )
+                        if scheduler is not None:
+                            scheduler.observe_cycle(cycle_sec * 1000.0)
+                        else:
+                            _maybe_toggle_low_fps_guard(
+                                log=log,
+                                rolling_fps=rolling_fps,
+                                guard_state=low_fps_guard_state,
+                                kpi_counters=kpi_counters,
+                            )
 
                     fps_counter.tick()
                     _run_periodic_gpu_maintenance(
@@ -1110,6 +1189,10 @@ def run_competition(log: Logger) -> None:
                             transient_budget,
                             degrade_replay_state,
                             degrade_fallback_window,
+                            scheduler,
+                            propagator,
+                            motion_service,
+                            frame_gap_state,
                         )
 
                     if fetch_future.done():
@@ -1231,7 +1314,11 @@ def run_competition(log: Logger) -> None:
 
     finally:
         resilience_stats = resilience.finalize()
+        if scheduler is not None:
+            # SCHEDULER_STATIC_COSTS_MS kalibrasyonu için ölçülen aşama maliyetleri
+            log.info(f"event=scheduler_costs stats={scheduler.stats()}")
         log.info("Cleaning resources...")
+        detector.close()
         if Settings.DEBUG and visualizer is not None:
             cv2.destroyAllWindows()
             cv2.waitKey(1)
@@ -1535,9 +1622,12 @@ def parse_args() -> argparse.Namespace:
     )
     parser.add_argument(
         "--deterministic-profile",
-        choices=["off", "balanced", "max"],
+        choices=["off", "balanced", "max", "parallel"],
         default="balanced",
-        help="Runtime determinism profile",
+        help=(
+            "Runtime determinism profile "
+            "(parallel = max + fixed-partition replica pool across CPU cores)"
+        ),
     )
     parser.add_argument(
         "--base-url",
@@ -1559,6 +1649,24 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="Deterministik simülasyon için rastgele seed",
     )
+    parser.add_argument(
+        "--backend",
+        choices=["torch", "onnx", "openvino"],
+        default=None,
+        help="CPU inference backend override (or use AIA_INFERENCE_BACKEND env var)",
+    )
+    parser.add_argument(
+        "--quantization",
+        choices=["none", "int8_dynamic", "int8_static"],
+        default=None,
+        help="CPU INT8 model profile (or use AIA_INFERENCE_QUANTIZATION env var)",
+    )
+    parser.add_argument(
+        "--offline-batch",
+        type=int,
+        default=None,
+        help="Simülasyonda tam kare geçişini N karelik batch'lerle çalıştır (SIMULATION_BATCH_SIZE)",
+    )
     parser.add_argument(
         "--sequence",
         type=str,
@@ -1587,6 +1695,27 @@ def apply_runtime_overrides(args: argparse.Namespace, log: Logger) -> None:
         src = "CLI --team-name" if team_name_cli else "ENV AIA_TEAM_NAME"
         log.info(f"Runtime override: TEAM_NAME <- {Settings.TEAM_NAME} ({src})")
 
+    backend_cli = (getattr(args, "backend", None) or "").strip().lower()
+    if backend_cli:
+        Settings.INFERENCE_BACKEND = backend_cli
+        log.info(f"Runtime override: INFERENCE_BACKEND <- {Settings.INFERENCE_BACKEND} (CLI --backend)")
+
+    offline_batch = getattr(args, "offline_batch", None)
+    if offline_batch is not None:
+        Settings.SIMULATION_BATCH_SIZE = max(1, int(offline_batch))
+        log.info(
+            f"Runtime override: SIMULATION_BATCH_SIZE <- {Settings.SIMULATION_BATCH_SIZE} "
+            "(CLI --offline-batch)"
+        )
+
+    quantization_cli = (getattr(args, "quantization", None) or "").strip().lower()
+    if quantization_cli:
+        Settings.INFERENCE_QUANTIZATION = quantization_cli
+        log.info(
+            f"Runtime override: INFERENCE_QUANTIZATION <- {Settings.INFERENCE_QUANTIZATION} "
+            "(CLI --quantization)"
+        )
+
 
 def main() -> None:
     log = Logger("Main")
@@ -1598,10 +1727,10 @@ def main() -> None:
     if (
         not args.interactive
         and args.mode == Settings.COMPETITION_RUNTIME_MODE
-        and requested_profile != "max"
+        and requested_profile not in _COMPETITION_PROFILES
     ):
         log.warn(
-            "Competition mode requires deterministic-profile=max; "
+            "Competition mode requires deterministic-profile=max|parallel; "
             f"overriding requested profile '{requested_profile}' -> 'max'"
         )
         effective_profile = "max"
@@ -1641,9 +1770,9 @@ def main() -> None:
             }
 
     simulate = choices["mode"] == "simulate"
-    if not simulate and effective_profile != "max":
+    if not simulate and effective_profile not in _COMPETITION_PROFILES:
         log.warn(
-            "Competition mode requires deterministic-profile=max; "
+            "Competition mode requires deterministic-profile=max|parallel; "
             f"overriding requested profile '{requested_profile}' -> 'max'"
         )
         effective_profile = "max"
@@ -1678,6 +1807,10 @@ def _fetch_competition_step(
     transient_budget: int,
     degrade_replay_state: Dict[str, Any],
     degrade_fallback_window: deque,
+    scheduler: Optional[InferenceScheduler] = None,
+    propagator: Optional[KeyframePropagator] = None,
+    motion_service: Optional[FrameMotionService] = None,
+    frame_gap_state: Optional[Dict[str, Any]] = None,
 ):
     from src.network import FrameFetchStatus
     import time
@@ -1725,6 +1858,12 @@ def _fetch_competition_step(
     degrade_mode = Settings.DEGRADE_FETCH_ONLY_ENABLED and resilience.is_degraded()
     frame_id = frame_data.get("frame_id", "unknown")
     frame_fetch_monotonic = time.monotonic()
+    # Oturum kare indeksi: dedektörün çağrılmadığı kareler (taşınan/degrade) indeks
+    # boşluğu bırakır; tile önbelleği bu boşlukta kendini sıfırlar
+    if frame_gap_state is None:
+        frame_gap_state = {}
+    frame_index = int(frame_gap_state.get("next_index", 0))
+    frame_gap_state["next_index"] = frame_index + 1
 
     if degrade_replay_state.get("objects"):
         degrade_replay_state["age"] = int(degrade_replay_state.get("age", 0)) + 1
@@ -1884,14 +2023,54 @@ def _fetch_competition_step(
             "used_detection_replay": replay_used,
         }
     else:
-        frame_ctx = FrameContext(frame)
+        frame_ctx = FrameContext(frame, motion_service=motion_service)
         detect_profile = "light" if degrade_mode else "default"
-        try:
-            detected_objects = detector.detect(frame, runtime_profile=detect_profile)
-        except TypeError:
-            detected_objects = detector.detect(frame)
-        _accumulate_detection_pipeline_metrics(kpi_counters, detector)
+        # detect_batch varsa sütunlu çıktı annotate() sınırına kadar dict'e çevrilmez.
+        detect_fn = getattr(detector, "detect_batch", None) or detector.detect
+        # Anahtar kare modu: ara karelerde son tespitler optik akışla taşınır
+        # (annotate() bu kareyi işlemeden önce; önceki karenin akış referansı gerekir)
+        propagated = None
+        if propagator is not None:
+            if degrade_mode:
+                propagator.reset()
+            elif hasattr(movement, "flow_reference"):
+                propagated = propagator.propagate(frame_ctx, movement)
+        plan = None
+        if propagated is not None:
+            detected_objects = propagated
+            # Dedektör bu kareyi görmez; kayma bir sonraki anahtar kareye devredilir
+            shift_x, shift_y = _current_camera_shift(movement, frame_ctx)
+            pending_x, pending_y = frame_gap_state.get("pending_shift", (0.0, 0.0))
+            frame_gap_state["pending_shift"] = (pending_x + shift_x, pending_y + shift_y)
+            kpi_counters["keyframe_propagated_frames"] = (
+                int(kpi_counters.get("keyframe_propagated_frames", 0)) + 1
+            )
+        else:
+            # Degrade modu sabit "light" profilde kalır; aksi halde zamanlayıcı kare planını seçer
+            plan = scheduler.plan() if scheduler is not None and not degrade_mode else None
+            detect_kwargs: Dict[str, Any] = {
+                "runtime_profile": plan if plan is not None else detect_profile,
+                "frame_index": frame_index,
+            }
+            if hasattr(movement, "camera_shift_for"):
+                # Adaptif SAHI: son tespitli karenin tespitleri, aradaki taşınan
+                # karelerin kaymaları dahil toplam kaymayla ötelenir
+                shift_x, shift_y = _current_camera_shift(movement, frame_ctx)
+                pending_x, pending_y = frame_gap_state.get("pending_shift", (0.0, 0.0))
+                detect_kwargs["camera_shift"] = (pending_x + shift_x, pending_y + shift_y)
+            frame_gap_state["pending_shift"] = (0.0, 0.0)
+            try:
+                detected_objects = detect_fn(frame_ctx, **detect_kwargs)
+            except TypeError:
+                detected_objects = detect_fn(frame)
+            _accumulate_detection_pipeline_metrics(kpi_counters, detector)
+            if propagator is not None and not degrade_mode and isinstance(
+                detected_objects, DetectionBatch
+            ):
+                propagator.remember_keyframe(detected_objects)
+        t_vo = time.perf_counter()
         detected_objects = movement.annotate(detected_objects, frame_ctx=frame_ctx)
+        vo_ms = (time.perf_counter() - t_vo) * 1000.0
         if detected_objects:
             max_objects = max(1, int(getattr(Settings, "DEGRADE_REPLAY_MAX_OBJECTS", 40)))
             degrade_replay_state["objects"] = [
@@ -1899,9 +2078,18 @@ def _fetch_competition_step(
             ]
             degrade_replay_state["age"] = 0
         undefined_objects = []
+        task3_ms: Optional[float] = None
         if image_matcher is not None:
-            undefined_objects = image_matcher.match(frame)
+            t_task3 = time.perf_counter()
+            undefined_objects = image_matcher.match(frame_ctx)
+            task3_ms = (time.perf_counter() - t_task3) * 1000.0
+        t_vo = time.perf_counter()
         position = odometry.update(frame_ctx, frame_data)
+        vo_ms += (time.perf_counter() - t_vo) * 1000.0
+        if plan is not None and hasattr(detector, "get_last_stage_timings"):
+            scheduler.observe_frame(
+                plan, detector.get_last_stage_timings(), task3_ms=task3_ms, vo_ms=vo_ms
+            )
         runtime_meta = (
             odometry.get_runtime_meta()
             if hasattr(odometry, "get_runtime_meta")
@@ -3,18 +3,49 @@ Model COCO/VisDrone vb. eğitilmiş olabilir; sınıflar TEKNOFEST (0,1,2,3) for
 
 import logging
 import os
+import time
 import unicodedata
-from collections import Counter
-from typing import Any, Dict, List, Optional, Tuple
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
-import cv2
 import numpy as np
 import torch
-from ultralytics import YOLO
 
 from config.settings import Settings
 from src.class_contract import CompetitionClassContract
-from src.utils import Logger
+from src.detection_batch import LANDING_UNSET, DetectionBatch
+from src.frame_scheduler import FramePlan
+from src.inference_backend import BACKEND_TORCH, load_model
+from src.landing_zone_roi import LandingZoneRoiPlanner
+from src.lean_predictor import LeanPredictor
+from src.quantization import QUANT_NONE, SUPPORTED_QUANTIZATION
+from src.preprocessing import FramePreprocessor, PreparedFrame
+from src.replica_pool import ReplicaPool
+from src.sahi_tiling import AdaptiveTilePlanner, TileReuseCache
+from src.utils import FrameContext, Logger
+
+
+def _as_numpy(values: Any) -> np.ndarray:
+    """torch.Tensor / ndarray → ndarray (tek seferde host'a kopyalar)."""
+    if hasattr(values, "cpu"):
+        values = values.cpu()
+    if hasattr(values, "numpy"):
+        values = values.numpy()
+    return np.asarray(values)
+
+
+@dataclass(frozen=True)
+class PrefetchedPrimary:
+    """Çevrim dışı batch'te önceden çalıştırılmış tam kare geçişi (tek kare).
+
+    Kutular trace ID'siz dizi olarak tutulur; DetectionBatch kare sırasıyla
+    detect_batch içinde kurulur (trace ID'ler kare başına yolla aynı kalır).
+    """
+
+    prepared: PreparedFrame
+    arrays: Dict[str, np.ndarray]
+    imgsz: int
+    primary_ms: float
 
 
 class ObjectDetector:
@@ -22,21 +53,7 @@ class ObjectDetector:
 
     def __init__(self) -> None:
         self.log = Logger("Detector")
-        self._frame_count: int = 0
-        self._trace_seq: int = 0
-        self._last_guardrail_stats: Dict[str, int] = {}
-        self._last_pipeline_metrics: Dict[str, Any] = {}
-        self._temporal_filter: Optional[Any] = None
-        self._use_half: bool = False
-        self._class_map_mode: str = "unknown"
-        self._model_class_map: Dict[int, int] = {}
-        self._uap_uai_model_class_ids: List[int] = []
-        self._uap_uai_absent_streak: int = 0
-        self._uap_uai_absent_streak_max: int = 0
-        self._last_uap_uai_missing_landing_status_count: int = 0
-        self._prev_raw_has_uap_uai: bool = False
-        self._warned_nms_mode_invalid: bool = False
-        self._warned_nms_mode_legacy: bool = False
+        self._init_state()
 
         if Settings.DEVICE == "cuda" and torch.cuda.is_available():
             self.device = "cuda"
@@ -54,9 +71,22 @@ class ObjectDetector:
                     f"Model dosyası bulunamadı: {Settings.MODEL_PATH}\n"
                     f"  → 'models/' dizinine {os.path.basename(Settings.MODEL_PATH)} dosyasını kopyalayın."
                 )
-            self.model = YOLO(Settings.MODEL_PATH)
-            self.model.to(self.device)
+            self._requested_quantization = self._settings_quantization()
+            self.model, self.inference_backend, self.inference_quantization = (
+                self._load_model_variant(self._requested_quantization)
+            )
             self._configure_class_mapping()
+            if self.inference_backend != BACKEND_TORCH:
+                self.log.info(
+                    f"Çıkarım arka ucu: {self.inference_backend} (CPU, "
+                    f"nicemleme={self.inference_quantization}) ✓"
+                )
+            protective_quant = str(
+                getattr(Settings, "PROTECTIVE_INFERENCE_QUANTIZATION", QUANT_NONE)
+            ).strip().lower()
+            if self.device == "cpu" and protective_quant != QUANT_NONE:
+                # Low-FPS guard geçişinde export/kalibrasyon beklememek için önceden hazırla
+                self._load_model_variant(protective_quant)
 
             if self.device == "cuda" and Settings.HALF_PRECISION:
                 self._use_half = True
@@ -68,6 +98,9 @@ class ObjectDetector:
             raise RuntimeError(f"YOLOv8 modeli yüklenemedi: {e}")
 
         self._warmup()
+        self._replica_pool = self._build_replica_pool()
+        if self._replica_pool is not None:
+            self._replica_pools[self._replica_pool.quantization] = self._replica_pool
 
         uap_uai_conf = getattr(Settings, "CONFIDENCE_THRESHOLD_UAP_UAI", None)
         if uap_uai_conf is not None:
@@ -75,17 +108,182 @@ class ObjectDetector:
                 f"UAP/UAİ conf eşiği: {uap_uai_conf} (Taşıt/İnsan: {Settings.CONFIDENCE_THRESHOLD})"
             )
 
-        if Settings.CLAHE_ENABLED:
-            self._clahe = cv2.createCLAHE(
-                clipLimit=Settings.CLAHE_CLIP_LIMIT,
-                tileGridSize=(
-                    Settings.CLAHE_TILE_SIZE,
-                    Settings.CLAHE_TILE_SIZE,
-                ),
-            )
+        if self._preprocessor.clahe_enabled:
             self.log.info("CLAHE kontrast iyileştirme aktif ✓")
-        else:
-            self._clahe = None
+
+    def _init_state(self) -> None:
+        """Model yüklemeden bağımsız alanlar: sayaçlar, planlayıcılar, önbellekler, yalın yol."""
+        self._frame_count: int = 0
+        self._trace_seq: int = 0
+        self._last_guardrail_stats: Dict[str, int] = {}
+        self._last_pipeline_metrics: Dict[str, Any] = {}
+        self._last_sahi_stats: Dict[str, Any] = {}
+        self._last_stage_timings: Dict[str, Any] = {}
+        self._temporal_filter: Optional[Any] = None
+        self._tile_planner: Optional[AdaptiveTilePlanner] = None
+        self._landing_zone_planner: Optional[LandingZoneRoiPlanner] = None
+        self._tile_cache: Optional[TileReuseCache] = None
+        self._sahi_tile_ms_ema: Optional[float] = None
+        self._use_half: bool = False
+        self.inference_backend: str = BACKEND_TORCH
+        self.inference_quantization: str = QUANT_NONE
+        self._requested_quantization: str = QUANT_NONE
+        self._model_variants: Dict[str, Tuple[Any, str, str]] = {}
+        self._lean_predictor: Optional[LeanPredictor] = None
+        self._lean_pending: bool = bool(getattr(Settings, "LEAN_PREDICTOR_ENABLED", True))
+        # LeanPredictor.begin_frame belirteci; kare içi ham çıktı paylaşımı buna bağlı
+        self._lean_frame_token: Optional[int] = None
+        self._replica_pool: Optional[ReplicaPool] = None
+        # Nicemleme varyantı başına kurulan havuzlar; varyant geri döndüğünde yeniden kullanılır
+        self._replica_pools: Dict[str, ReplicaPool] = {}
+        self._class_map_mode: str = "unknown"
+        self._model_class_map: Dict[int, int] = {}
+        self._class_lut: Optional[np.ndarray] = None
+        self._uap_uai_model_class_ids: List[int] = []
+        self._uap_uai_absent_streak: int = 0
+        self._uap_uai_absent_streak_max: int = 0
+        self._last_uap_uai_missing_landing_status_count: int = 0
+        self._prev_raw_has_uap_uai: bool = False
+        self._warned_nms_mode_invalid: bool = False
+        self._warned_nms_mode_legacy: bool = False
+        self._preprocessor: FramePreprocessor = FramePreprocessor()
+
+    @staticmethod
+    def _settings_quantization() -> str:
+        mode = str(getattr(Settings, "INFERENCE_QUANTIZATION", QUANT_NONE)).strip().lower()
+        return mode if mode in SUPPORTED_QUANTIZATION else QUANT_NONE
+
+    def _load_model_variant(self, quantization: str) -> Tuple[Any, str, str]:
+        """(model, arka uç, etkin nicemleme); nicemleme moduna göre önbelleklenir."""
+        variant = self._model_variants.get(quantization)
+        if variant is None:
+            variant = load_model(
+                Settings.MODEL_PATH,
+                self.device,
+                getattr(Settings, "INFERENCE_BACKEND", BACKEND_TORCH),
+                quantization,
+            )
+            self._model_variants[quantization] = variant
+        return variant
+
+    def _sync_model_variant(self, requested: Optional[str] = None) -> None:
+        """İstenen nicemleme (kare planı veya Settings.INFERENCE_QUANTIZATION; ör. low-FPS
+        guard) etkin varyanttan farklıysa modeli değiştirir."""
+        if requested is None or requested not in SUPPORTED_QUANTIZATION:
+            requested = self._settings_quantization()
+        if requested == self._requested_quantization:
+            return
+        self._requested_quantization = requested
+        try:
+            model, backend, quant = self._load_model_variant(requested)
+        except Exception as exc:
+            self.log.warn(f"Model varyantı yüklenemedi ({requested}): {exc}")
+            return
+        if model is not self.model:
+            self.model, self.inference_backend, self.inference_quantization = model, backend, quant
+            # Yeni modelin AutoBackend'i ilk predict() ile kurulur
+            self._lean_predictor = None
+            self._lean_pending = bool(getattr(Settings, "LEAN_PREDICTOR_ENABLED", True))
+            self._lean_frame_token = None
+            self._switch_replica_pool(quant)
+            self.log.info(
+                f"event=model_variant_switched backend={backend} quantization={quant}"
+            )
+
+    def _switch_replica_pool(self, quantization: str) -> None:
+        """Havuz kullanılıyorsa etkin varyantın havuzunu seçer (gerekirse kurar)."""
+        if not self._replica_pools:
+            return
+        if quantization not in self._replica_pools:
+            pool = self._build_replica_pool()
+            if pool is None:
+                self._replica_pool = None
+                return
+            self._replica_pools[quantization] = pool
+        self._replica_pool = self._replica_pools[quantization]
+
+    def _predict(self, source: Any, **kwargs: Any) -> List[Any]:
+        """Model çağrısı: uygunsa LeanPredictor (RawDetections), değilse predict() (Results).
+
+        Yalın yol, predict() ile kurulan AutoBackend'i kullandığından ilk çağrı
+        (warmup) her zaman predict() üzerinden yapılır. TTA (augment) yalnızca
+        predict() ile desteklenir.
+        """
+        lean = self._lean_predictor
+        if (
+            lean is not None
+            and not kwargs.get("augment", False)
+            and bool(getattr(Settings, "LEAN_PREDICTOR_ENABLED", True))
+        ):
+            try:
+                return lean.predict(source, frame_token=self._lean_frame_token, **kwargs)
+            except Exception as exc:
+                self.log.warn(f"Yalın çıkarım yolu kapatıldı, predict() kullanılacak: {exc}")
+                self._lean_predictor = None
+
+        results = self.model.predict(source=source, **kwargs)
+        if self._lean_pending:
+            self._lean_pending = False
+            self._lean_predictor = LeanPredictor.from_model(self.model, self.device)
+            if self._lean_predictor is not None:
+                self.log.info("Yalın çıkarım yolu (LeanPredictor) aktif ✓")
+        return results
+
+    def _build_replica_pool(self) -> Optional[ReplicaPool]:
+        """REPLICA_POOL_SIZE > 1 ise CPU'da SAHI/ROI parçaları için model kopyaları."""
+        size = int(getattr(Settings, "REPLICA_POOL_SIZE", 1))
+        if size <= 1 or self.device != "cpu":
+            return None
+        quantization = self.inference_quantization
+        try:
+            pool = ReplicaPool(
+                factory=lambda: load_model(
+                    Settings.MODEL_PATH,
+                    self.device,
+                    getattr(Settings, "INFERENCE_BACKEND", BACKEND_TORCH),
+                    quantization,
+                )[0],
+                size=size,
+                threads_per_replica=int(getattr(Settings, "REPLICA_POOL_THREADS", 1)),
+                device=self.device,
+                quantization=quantization,
+                fixed_assignment=bool(getattr(Settings, "REPLICA_POOL_FIXED_ASSIGNMENT", False)),
+            )
+            pool.warmup(
+                source=np.zeros((640, 640, 3), dtype=np.uint8),
+                imgsz=int(Settings.SAHI_SLICE_SIZE),
+                conf=Settings.CONFIDENCE_THRESHOLD,
+                classes=None,
+                device=self.device,
+                verbose=False,
+                save=False,
+                half=False,
+            )
+        except Exception as exc:
+            self.log.warn(f"Model kopya havuzu kurulamadı, tek model kullanılacak: {exc}")
+            return None
+        self.log.success(
+            f"Model kopya havuzu aktif: {pool.size} kopya × "
+            f"{max(1, int(getattr(Settings, 'REPLICA_POOL_THREADS', 1)))} thread ✓"
+        )
+        return pool
+
+    def close(self) -> None:
+        """Model kopya havuzlarının thread'lerini kapatır; oturum sonunda çağrılır."""
+        pools = list(self._replica_pools.values())
+        if self._replica_pool is not None and self._replica_pool not in pools:
+            pools.append(self._replica_pool)
+        for pool in pools:
+            pool.close()
+        self._replica_pools = {}
+        self._replica_pool = None
+
+    def _active_replica_pool(self) -> Optional[ReplicaPool]:
+        """Havuz yalnızca ana modelle aynı nicemleme varyantındayken kullanılır."""
+        pool = self._replica_pool
+        if pool is None or pool.quantization != self.inference_quantization:
+            return None
+        return pool
 
     def _warmup(self) -> None:
         self.log.info(f"Model ısınması başlıyor ({Settings.WARMUP_ITERATIONS} iterasyon)...")
@@ -93,7 +291,7 @@ class ObjectDetector:
             dummy = np.zeros((640, 640, 3), dtype=np.uint8)
             with torch.no_grad():
                 for i in range(Settings.WARMUP_ITERATIONS):
-                    self.model.predict(
+                    self._predict(
                         source=dummy,
                         imgsz=Settings.INFERENCE_SIZE,
                         conf=Settings.CONFIDENCE_THRESHOLD,
@@ -206,6 +404,7 @@ class ObjectDetector:
         if not has_uai:
             self.log.warn("⚠ Model UAİ (class 3) sınıfı İÇERMİYOR — UAİ tespiti yapılamaz!")
 
+        self._class_lut = self._build_class_lut(self._model_class_map)
         self._uap_uai_model_class_ids = sorted(
             model_cls
             for model_cls, tf_cls in self._model_class_map.items()
@@ -220,6 +419,27 @@ class ObjectDetector:
     def _map_model_class_to_teknofest(self, model_cls_id: int) -> int:
         return self._model_class_map.get(model_cls_id, -1)
 
+    @staticmethod
+    def _build_class_lut(class_map: Dict[int, int]) -> np.ndarray:
+        """Model sınıf ID → TEKNOFEST ID lookup tablosu (eşlenmeyenler -1)."""
+        valid_ids = [int(k) for k in class_map.keys() if int(k) >= 0]
+        lut = np.full(max(valid_ids) + 1 if valid_ids else 1, -1, dtype=np.int64)
+        for model_cls, tf_cls in class_map.items():
+            if int(model_cls) >= 0:
+                lut[int(model_cls)] = int(tf_cls)
+        return lut
+
+    def _map_model_classes_to_teknofest(self, model_cls_ids: np.ndarray) -> np.ndarray:
+        lut = self._class_lut
+        if lut is None:
+            lut = self._build_class_lut(self._model_class_map)
+            self._class_lut = lut
+        ids = np.asarray(model_cls_ids, dtype=np.int64)
+        tf_ids = np.full(ids.shape, -1, dtype=np.int64)
+        in_range = (ids >= 0) & (ids < lut.shape[0])
+        tf_ids[in_range] = lut[ids[in_range]]
+        return tf_ids
+
     def _resolve_nms_mode(self) -> str:
         mode = str(getattr(Settings, "NMS_MODE", "")).strip().lower()
         legacy_agnostic = bool(getattr(Settings, "AGNOSTIC_NMS", False))
@@ -241,7 +461,10 @@ class ObjectDetector:
             self._warned_nms_mode_invalid = True
         return fallback
 
-    def _build_inference_config(self, runtime_profile: str) -> Dict[str, Any]:
+    def _build_inference_config(self, runtime_profile: Union[str, FramePlan]) -> Dict[str, Any]:
+        if isinstance(runtime_profile, FramePlan):
+            # Zamanlayıcı planı yalnızca bu kareye uygulanır; Settings'e yazılmaz
+            return runtime_profile.inference_config()
         profile = str(runtime_profile or "default").strip().lower()
         if profile == "light":
             return {
@@ -302,107 +525,208 @@ class ObjectDetector:
             "hybrid_iou": float(getattr(Settings, "HYBRID_NMS_IOU_THRESHOLD", 0.65)),
         }
 
-    def detect(self, frame: np.ndarray, runtime_profile: str = "default", **kwargs) -> List[Dict]:
+    def prefetch_primary(
+        self,
+        frames: Sequence[Union[np.ndarray, FrameContext]],
+        runtime_profile: Union[str, FramePlan] = "default",
+    ) -> List[PrefetchedPrimary]:
+        """Çevrim dışı mod: karelerin tam kare geçişini tek model çağrısında çalıştırır.
+
+        Yalnızca kareden kareye durum taşımayan kısım (ön-işleme + tam kare
+        çıkarım) öne alınır. SAHI tile seçimi, odaklı geçiş, zamansal filtre ve
+        iniş durumu önceki karenin çıktısına bağlı olduğundan her kare için
+        detect_batch(..., prefetched=...) ile kare sırasıyla çalışır.
+        Hata durumunda boş liste döner; çağıran kare başına yola düşer.
+        """
+        if not frames:
+            return []
         try:
             inference_cfg = self._build_inference_config(runtime_profile)
-            processed = self._preprocess(frame)
+            if self._model_variants:
+                self._sync_model_variant(inference_cfg.get("quantization"))
+            lean = self._lean_predictor
+            self._lean_frame_token = lean.begin_frame() if lean is not None else None
+            imgsz = int(inference_cfg["imgsz"])
+            prepared_frames: List[PreparedFrame] = []
+            sources: List[np.ndarray] = []
+            scales: List[Optional[Tuple[float, float]]] = []
+            for frame in frames:
+                # Ön-işleme tamponu kareler arasında paylaşılır; batch için kopya tutulur
+                prepared = self._prepare_frame(frame)
+                prepared.full(imgsz)
+                prepared.detach()
+                source, scale = self._full_frame_source(prepared.frame, imgsz, prepared)
+                prepared_frames.append(prepared)
+                sources.append(source)
+                scales.append(scale)
+
+            t0 = time.perf_counter()
+            with torch.no_grad():
+                results = self._predict(
+                    source=sources,
+                    imgsz=imgsz,
+                    conf=float(inference_cfg["conf"]),
+                    iou=float(inference_cfg["iou"]),
+                    classes=None,
+                    device=self.device,
+                    verbose=False,
+                    save=False,
+                    half=self._use_half,
+                    agnostic_nms=self._resolve_nms_mode() == "agnostic",
+                    max_det=int(inference_cfg["max_det"]),
+                    augment=bool(inference_cfg["augment"]),
+                )
+            share_ms = round((time.perf_counter() - t0) * 1000.0 / len(frames), 2)
+            return [
+                PrefetchedPrimary(
+                    prepared=prepared,
+                    arrays=self._parse_result_arrays([result], scale=scale),
+                    imgsz=imgsz,
+                    primary_ms=share_ms,
+                )
+                for prepared, result, scale in zip(prepared_frames, results, scales)
+            ]
+        except (SystemExit, KeyboardInterrupt):
+            raise
+        except Exception as exc:
+            self.log.warn(f"Batch tam kare çıkarımı başarısız, kare başına yol kullanılacak: {exc}")
+            return []
+
+    def detect(
+        self,
+        frame: Union[np.ndarray, FrameContext],
+        runtime_profile: Union[str, FramePlan] = "default",
+        **kwargs,
+    ) -> List[Dict]:
+        """Yarışma şemasında dict listesi döndürür (detect_batch + tek seferlik dönüşüm)."""
+        return self.detect_batch(
+            frame, runtime_profile=runtime_profile, **kwargs
+        ).to_competition_dicts()
+
+    def detect_batch(
+        self,
+        frame: Union[np.ndarray, FrameContext],
+        runtime_profile: Union[str, FramePlan] = "default",
+        **kwargs,
+    ) -> DetectionBatch:
+        """Tespit zincirini sütunlu DetectionBatch üzerinde çalıştırır.
+
+        Her aşama maske/indeks üretir; dict'e dönüşüm MovementEstimator.annotate
+        veya detect() sınırında yapılır. FrameContext verilirse küçültmeler ve
+        gri dönüşüm diğer modüllerle paylaşılır.
+        """
+        frame_ctx = FrameContext.wrap(frame)
+        frame = frame_ctx.frame
+        t_start = time.perf_counter()
+        self._last_stage_timings = {}
+        frame_index = kwargs.get("frame_index")
+        if frame_index is not None:
+            # Oturum kare indeksi: atlanan kareler tile önbelleğinin süreklilik
+            # denetiminde boşluk olarak görünür
+            self._frame_count = int(frame_index)
+        try:
+            inference_cfg = self._build_inference_config(runtime_profile)
+            if self._model_variants:
+                self._sync_model_variant(inference_cfg.get("quantization"))
+            lean = self._lean_predictor
+            # Birincil ve odaklı geçiş aynı boyuttaysa ham çıktı bu kare içinde paylaşılır
+            self._lean_frame_token = lean.begin_frame() if lean is not None else None
+            if self._replica_pool is not None:
+                self._replica_pool.begin_frame()
+            roi_mode = (
+                str(getattr(Settings, "UAP_UAI_FOCUSED_PASS_MODE", "roi")).strip().lower() == "roi"
+            )
+            if roi_mode and self._landing_zone_planner is None:
+                self._landing_zone_planner = LandingZoneRoiPlanner()
+            elif not roi_mode:
+                self._landing_zone_planner = None
+            if self._landing_zone_planner is not None:
+                self._landing_zone_planner.advance(
+                    self._coerce_camera_shift(kwargs.get("camera_shift"))
+                )
+            self._last_sahi_stats = {}
+            prefetched = kwargs.get("prefetched")
+            if not (
+                isinstance(prefetched, PrefetchedPrimary)
+                and prefetched.prepared.frame is frame
+                and prefetched.imgsz == int(inference_cfg["imgsz"])
+            ):
+                prefetched = None
+            prepared = (
+                prefetched.prepared if prefetched is not None else self._prepare_frame(frame_ctx)
+            )
             stage_trace: List[Dict[str, Any]] = []
             if inference_cfg["sahi_enabled"]:
-                primary_detections = self._sahi_detect(processed, inference_cfg=inference_cfg)
+                primary = self._sahi_detect(
+                    frame,
+                    inference_cfg=inference_cfg,
+                    camera_shift=kwargs.get("camera_shift"),
+                    prepared=prepared,
+                    prefetched=prefetched,
+                )
             else:
-                primary_detections = self._standard_inference(
-                    processed, inference_cfg=inference_cfg
+                primary = self._standard_inference(
+                    frame, inference_cfg=inference_cfg, prepared=prepared, prefetched=prefetched
                 )
-            self._collect_stage_stats(stage_trace, "raw_model_primary", primary_detections)
-
-            raw_detections = list(primary_detections)
-            focused_dets = self._focused_uap_uai_inference(
-                processed,
-                inference_cfg=inference_cfg,
-                primary_detections=primary_detections,
-            )
-            if focused_dets:
-                raw_detections.extend(focused_dets)
-            self._collect_stage_stats(stage_trace, "raw_model_output", raw_detections)
-            self._track_uap_uai_absence(raw_detections)
+            self._collect_stage_stats(stage_trace, "raw_model_primary", primary)
+
+            if inference_cfg.get("focused_pass", True):
+                focused = self._focused_uap_uai_inference(
+                    frame,
+                    inference_cfg=inference_cfg,
+                    primary_detections=primary,
+                    prepared=prepared,
+                )
+            else:
+                focused = DetectionBatch.empty()
+            batch = DetectionBatch.concat([primary, focused])
+            self._collect_stage_stats(stage_trace, "raw_model_output", batch)
+            self._track_uap_uai_absence(batch)
 
-            raw_detections = self._filter_by_confidence(raw_detections)
-            self._collect_stage_stats(stage_trace, "confidence_filter", raw_detections)
+            batch = batch.select(self._confidence_keep_mask(batch))
+            self._collect_stage_stats(stage_trace, "confidence_filter", batch)
 
             nms_mode = self._resolve_nms_mode()
             if nms_mode == "agnostic":
-                self._log_nms_mode_comparison(raw_detections, inference_cfg)
-            raw_detections = self._apply_runtime_nms(
-                raw_detections, inference_cfg=inference_cfg
-            )
-            self._collect_stage_stats(stage_trace, f"nms_{nms_mode}", raw_detections)
-            raw_detections = self._suppress_landing_zone_class_conflicts(raw_detections)
-            self._collect_stage_stats(stage_trace, "uap_uai_conflict_suppress", raw_detections)
-            raw_detections = self._post_filter(raw_detections, altitude=kwargs.get("altitude"))
-            self._collect_stage_stats(stage_trace, "min_size_post_filter", raw_detections)
-            
+                self._log_nms_mode_comparison(batch, inference_cfg)
+            batch = batch.select(self._runtime_nms_indices(batch, inference_cfg=inference_cfg))
+            self._collect_stage_stats(stage_trace, f"nms_{nms_mode}", batch)
+            batch = batch.select(self._landing_zone_conflict_keep_mask(batch))
+            self._collect_stage_stats(stage_trace, "uap_uai_conflict_suppress", batch)
+            batch = batch.select(self._post_filter_mask(batch, altitude=kwargs.get("altitude")))
+            self._collect_stage_stats(stage_trace, "min_size_post_filter", batch)
+
             try:
-                from src.postprocess import apply_guardrails
-                raw_detections, self._last_guardrail_stats = apply_guardrails(raw_detections)
+                from src.postprocess import apply_guardrails_batch
+                keep, self._last_guardrail_stats = apply_guardrails_batch(batch)
+                batch = batch.select(keep)
             except ImportError:
                 self._last_guardrail_stats = {}
-            self._collect_stage_stats(stage_trace, "guardrails", raw_detections)
+            self._collect_stage_stats(stage_trace, "guardrails", batch)
 
             if getattr(Settings, "TEMPORAL_FILTER_ENABLED", True):
                 try:
                     from src.temporal_filter import TemporalConsistencyFilter
                     if self._temporal_filter is None:
                         self._temporal_filter = TemporalConsistencyFilter()
-                    raw_detections = self._temporal_filter.filter(raw_detections)
+                    batch = batch.select(self._temporal_filter.keep_mask(batch))
                 except ImportError:
                     pass
-            self._collect_stage_stats(stage_trace, "temporal_filter", raw_detections)
+            self._collect_stage_stats(stage_trace, "temporal_filter", batch)
 
             frame_h, frame_w = frame.shape[:2]
             try:
-                from src.uap_uai import determine_landing_status
-                final_detections = determine_landing_status(
-                    raw_detections, frame_w, frame_h, frame
-                )
+                from src.uap_uai import determine_landing_status_batch
+                determine_landing_status_batch(batch, frame_w, frame_h, frame)
             except ImportError:
-                final_detections = raw_detections
-            self._collect_stage_stats(stage_trace, "landing_status", final_detections)
-
-            output: List[Dict] = []
-            conf_tasit_insan = float(Settings.CONFIDENCE_THRESHOLD)
-            missing_landing_status_count = 0
-            for det in final_detections:
-                if det["cls_int"] == -1:
-                    continue
-                if det["cls_int"] in (Settings.CLASS_TASIT, Settings.CLASS_INSAN):
-                    if det["confidence"] < conf_tasit_insan:
-                        continue
-                # Şartname: motion_status → Taşıt(0)=0/1, İnsan(1)=-1, UAP(2)=-1, UAİ(3)=-1
-                # Varsayılan -1; MovementEstimator.annotate() taşıtlar için sonra günceller
-                cls_id = det["cls_int"]
-                default_motion = "-1"
-                if cls_id in (Settings.CLASS_UAP, Settings.CLASS_UAI):
-                    landing_status = str(det.get("landing_status", "0"))
-                    if landing_status not in {"0", "1"}:
-                        landing_status = "0"
-                else:
-                    landing_status = "-1"
-                if cls_id in (Settings.CLASS_UAP, Settings.CLASS_UAI) and "landing_status" not in det:
-                    self.log.warn(
-                        "UAP/UAİ detection missing landing_status; defaulting to 0"
-                    )
-                    missing_landing_status_count += 1
-                output.append({
-                    "cls": det["cls"],
-                    "landing_status": landing_status,
-                    "motion_status": default_motion,
-                    "top_left_x": det["top_left_x"],
-                    "top_left_y": det["top_left_y"],
-                    "bottom_right_x": det["bottom_right_x"],
-                    "bottom_right_y": det["bottom_right_y"],
-                    "confidence": det["confidence"],
-                    "trace_id": det.get("trace_id", ""),
-                })
+                pass
+            self._collect_stage_stats(stage_trace, "landing_status", batch)
+
+            output, missing_landing_status_count = self._finalize_output(batch)
+            if self._tile_planner is not None:
+                self._tile_planner.remember(output)
+            if self._landing_zone_planner is not None:
+                self._landing_zone_planner.remember(output)
 
             self._collect_stage_stats(stage_trace, "final_json_candidates", output)
             self._last_uap_uai_missing_landing_status_count = int(missing_landing_status_count)
@@ -410,10 +734,13 @@ class ObjectDetector:
             self._last_pipeline_metrics["uap_uai_missing_landing_status_count"] = int(
                 missing_landing_status_count
             )
+            if self._last_sahi_stats:
+                self._last_pipeline_metrics["sahi"] = dict(self._last_sahi_stats)
+            self._last_pipeline_metrics["preprocess"] = self._preprocessor.stats()
             self._log_stage_trace(stage_trace)
 
             if Settings.DEBUG:
-                cls_counts = Counter(d["cls"] for d in output)
+                cls_counts = output.class_counts()
                 self.log.debug(
                     f"Tespit: {len(output)} nesne "
                     f"(Taşıt: {cls_counts.get('0', 0)}, "
@@ -429,6 +756,10 @@ class ObjectDetector:
                     f"imgsz={inference_cfg['imgsz']} conf={inference_cfg['conf']:.2f}"
                 )
 
+            if inference_cfg["sahi_enabled"]:
+                self._last_stage_timings["tiles_run"] = int(self._last_sahi_stats.get("tile_count", 0))
+                self._last_stage_timings["tiles_ms"] = float(self._last_sahi_stats.get("total_ms", 0.0))
+            self._last_stage_timings["total_ms"] = round((time.perf_counter() - t_start) * 1000.0, 2)
             self._frame_count += 1
 
             return output
@@ -451,7 +782,7 @@ class ObjectDetector:
                 "uap_uai_absent_streak_max": int(self._uap_uai_absent_streak_max),
                 "uap_uai_missing_landing_status_count": 0,
             }
-            return []
+            return DetectionBatch.empty()
         except Exception as e:
             self.log.error(f"Tespit hatası: {e}")
             self._last_pipeline_metrics = {
@@ -465,16 +796,45 @@ class ObjectDetector:
                 "uap_uai_absent_streak_max": int(self._uap_uai_absent_streak_max),
                 "uap_uai_missing_landing_status_count": 0,
             }
-            return []
+            return DetectionBatch.empty()
+
+    def _finalize_output(self, batch: DetectionBatch) -> Tuple[DetectionBatch, int]:
+        """Yarışma çıktısı adayları: sınıf/güven filtresi + durum alanlarının normalizasyonu."""
+        conf_tasit_insan = float(Settings.CONFIDENCE_THRESHOLD)
+        vehicle_human = np.isin(batch.cls_ids, (Settings.CLASS_TASIT, Settings.CLASS_INSAN))
+        keep = (batch.cls_ids != -1) & ~(vehicle_human & (batch.scores < conf_tasit_insan))
+        output = batch.select(keep)
+
+        # Şartname: motion_status → Taşıt(0)=0/1, İnsan(1)=-1, UAP(2)=-1, UAİ(3)=-1
+        # Varsayılan -1; MovementEstimator.annotate() taşıtlar için sonra günceller
+        landing_zone = np.isin(output.cls_ids, (Settings.CLASS_UAP, Settings.CLASS_UAI))
+        missing = int(np.count_nonzero(landing_zone & (output.landing_status == LANDING_UNSET)))
+        if missing:
+            self.log.warn(
+                f"UAP/UAİ detection missing landing_status ({missing}); defaulting to 0"
+            )
+        binary = (output.landing_status == 0) | (output.landing_status == 1)
+        output.landing_status = np.where(
+            landing_zone, np.where(binary, output.landing_status, 0), -1
+        ).astype(np.int8)
+        output.motion_status = np.full(len(output), -1, dtype=np.int8)
+        return output, missing
 
     def _standard_inference(
         self,
         frame: np.ndarray,
         inference_cfg: Dict[str, Any],
-    ) -> List[Dict]:
+        prepared: Optional[PreparedFrame] = None,
+        prefetched: Optional[PrefetchedPrimary] = None,
+    ) -> DetectionBatch:
+        if prefetched is not None:
+            self._last_stage_timings["primary_ms"] = prefetched.primary_ms
+            return self._batch_from_arrays(prefetched.arrays)
+        t0 = time.perf_counter()
+        source, scale = self._full_frame_source(frame, int(inference_cfg["imgsz"]), prepared)
         with torch.no_grad():
-            results = self.model.predict(
-                source=frame,
+            results = self._predict(
+                source=source,
                 imgsz=int(inference_cfg["imgsz"]),
                 conf=float(inference_cfg["conf"]),
                 iou=float(inference_cfg["iou"]),
@@ -487,24 +847,37 @@ class ObjectDetector:
                 max_det=int(inference_cfg["max_det"]),
                 augment=bool(inference_cfg["augment"]),
             )
-        return self._parse_results(results)
+        parsed = self._parse_results(results, scale=scale)
+        self._last_stage_timings["primary_ms"] = round((time.perf_counter() - t0) * 1000.0, 2)
+        return parsed
+
+    @staticmethod
+    def _full_frame_source(
+        frame: np.ndarray, imgsz: int, prepared: Optional[PreparedFrame]
+    ) -> Tuple[np.ndarray, Optional[Tuple[float, float]]]:
+        """Tam kare geçişi girdisi; önceden küçültülmüşse kutu ölçeğiyle birlikte."""
+        if prepared is None:
+            return frame, None
+        source, scale = prepared.full(imgsz)
+        return source, (None if scale == (1.0, 1.0) else scale)
 
     def _focused_uap_uai_inference(
         self,
         frame: np.ndarray,
         inference_cfg: Dict[str, Any],
-        primary_detections: Optional[List[Dict]] = None,
-    ) -> List[Dict]:
+        primary_detections: Optional[DetectionBatch] = None,
+        prepared: Optional[PreparedFrame] = None,
+    ) -> DetectionBatch:
         if not bool(getattr(Settings, "UAP_UAI_FOCUSED_PASS_ENABLED", False)):
-            return []
+            return DetectionBatch.empty()
         if not self._uap_uai_model_class_ids:
-            return []
+            return DetectionBatch.empty()
 
         should_run, trigger_reason = self._should_run_uap_uai_focused_pass(
-            primary_detections or []
+            primary_detections
         )
         if not should_run:
-            return []
+            return DetectionBatch.empty()
 
         base_focus_conf = float(
             getattr(
@@ -527,29 +900,71 @@ class ObjectDetector:
             int(getattr(Settings, "UAP_UAI_FOCUSED_PASS_IMG_SIZE", inference_cfg["imgsz"])),
         )
 
-        with torch.no_grad():
-            results = self.model.predict(
-                source=frame,
-                imgsz=focus_imgsz,
-                conf=focus_conf,
-                iou=float(inference_cfg["iou"]),
-                device=self.device,
-                verbose=False,
-                save=False,
-                half=self._use_half,
-                classes=list(self._uap_uai_model_class_ids),
-                agnostic_nms=False,
-                max_det=int(inference_cfg["max_det"]),
-                augment=False,
-            )
-        focused = self._parse_results(results)
-        if bool(getattr(Settings, "DEBUG", False)) and focused:
-            cls_counts = Counter(str(d.get("cls", "")) for d in focused)
+        predict_kwargs = dict(
+            conf=focus_conf,
+            iou=float(inference_cfg["iou"]),
+            device=self.device,
+            verbose=False,
+            save=False,
+            half=self._use_half,
+            classes=list(self._uap_uai_model_class_ids),
+            agnostic_nms=False,
+            max_det=int(inference_cfg["max_det"]),
+            augment=False,
+        )
+
+        # ROI modu: öngörülen iniş alanları çevresinde tam çözünürlüklü kırpıntılar.
+        # absent_streak (alan uzun süredir yok) her zaman tam kareye bakar.
+        rois: Optional[List[Tuple[int, int, int, int]]] = None
+        planner = self._landing_zone_planner
+        if planner is not None and trigger_reason != "absent_streak":
+            rois = planner.plan(frame.shape, primary_detections)
+
+        t0 = time.perf_counter()
+        if rois is not None:
+            if prepared is not None:
+                sources = [prepared.tile(x1, y1, x2, y2) for x1, y1, x2, y2 in rois]
+            else:
+                sources = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in rois]
+            # Büyük alan ROI'leri focus_imgsz'e kadar küçültülmez; aynı imgsz'li kırpıntılar bir batch'te
+            sizes = [planner.inference_size(roi, max_size=focus_imgsz) for roi in rois]
+            pool = self._active_replica_pool()
+            results: List[Any] = [None] * len(rois)
+            for size in sorted(set(sizes)):
+                index = [i for i, s in enumerate(sizes) if s == size]
+                group = [sources[i] for i in index]
+                if pool is not None and len(group) > 1:
+                    # Kırpıntılar kopyalara dağıtılır; sonuçlar ROI sırasıyla birleşir
+                    group_results = [
+                        result
+                        for chunk, _ in pool.predict_sharded(
+                            group, max_batch=len(group), imgsz=size, **predict_kwargs
+                        )
+                        for result in chunk
+                    ]
+                else:
+                    with torch.no_grad():
+                        group_results = self._predict(source=group, imgsz=size, **predict_kwargs)
+                for i, result in zip(index, group_results):
+                    results[i] = result
+            focused = self._parse_results(results, offsets=[(x1, y1) for x1, y1, _, _ in rois])
+        else:
+            # focus_imgsz birincil geçişle aynıysa kaynak da aynı nesnedir; LeanPredictor
+            # ağı yeniden çalıştırmaz, ham çıktıyı bu geçişin eşik/sınıf filtresiyle işler.
+            source, scale = self._full_frame_source(frame, focus_imgsz, prepared)
+            with torch.no_grad():
+                results = self._predict(source=source, imgsz=focus_imgsz, **predict_kwargs)
+            focused = self._parse_results(results, scale=scale)
+        self._last_stage_timings["focused_ms"] = round((time.perf_counter() - t0) * 1000.0, 2)
+        if bool(getattr(Settings, "DEBUG", False)) and len(focused):
+            cls_counts = focused.class_counts()
             self.log.debug(
                 "FocusedPass(UAP/UAİ) "
                 f"total={len(focused)} uap={cls_counts.get('2', 0)} "
                 f"uai={cls_counts.get('3', 0)} conf={focus_conf:.2f} "
-                f"imgsz={focus_imgsz} trigger={trigger_reason}"
+                f"imgsz={focus_imgsz} trigger={trigger_reason} "
+                f"rois={'full' if rois is None else len(rois)} "
+                f"fused={self._lean_predictor is not None and self._lean_predictor.last_forward_reused}"
             )
         return focused
 
@@ -557,126 +972,331 @@ class ObjectDetector:
         self,
         frame: np.ndarray,
         inference_cfg: Dict[str, Any],
-    ) -> List[Dict]:
+        camera_shift: Optional[Tuple[float, float]] = None,
+        prepared: Optional[PreparedFrame] = None,
+        prefetched: Optional[PrefetchedPrimary] = None,
+    ) -> DetectionBatch:
         # Full-frame + parçalı inference birleştir, NMS ile duplikasyonu temizle
-        all_detections: List[Dict] = []
-        full_dets = self._standard_inference(frame, inference_cfg=inference_cfg)
-        all_detections.extend(full_dets)
-        slice_dets = self._sliced_inference(frame, inference_cfg=inference_cfg)
-        all_detections.extend(slice_dets)
-        return all_detections
+        full_dets = self._standard_inference(
+            frame, inference_cfg=inference_cfg, prepared=prepared, prefetched=prefetched
+        )
+        h, w = frame.shape[:2]
+        tiles = self._plan_sahi_tiles(h, w, Settings.SAHI_SLICE_SIZE, Settings.SAHI_OVERLAP_RATIO)
+        shift = self._coerce_camera_shift(camera_shift)
+
+        tile_stats: Dict[str, Any] = {}
+        if bool(getattr(Settings, "SAHI_ADAPTIVE_ENABLED", True)):
+            if self._tile_planner is None:
+                self._tile_planner = AdaptiveTilePlanner()
+            selected, tile_stats = self._tile_planner.select(tiles, full_dets, camera_shift=shift)
+            tiles = [tiles[i] for i in selected]
+
+        cache: Optional[TileReuseCache] = None
+        reused = DetectionBatch.empty()
+        if bool(getattr(Settings, "SAHI_TILE_REUSE_ENABLED", True)):
+            if self._tile_cache is None:
+                self._tile_cache = TileReuseCache()
+            cache = self._tile_cache
+            cache.begin_frame(
+                prepared.context if prepared is not None else frame,
+                shift,
+                signature=self._tile_cache_signature(frame, inference_cfg),
+                frame_index=self._frame_count,
+            )
+            tiles, reused, reuse_stats = cache.partition(tiles)
+            tile_stats.update(reuse_stats)
+
+        max_tiles = inference_cfg.get("max_sahi_tiles")
+        if max_tiles is not None and len(tiles) > int(max_tiles):
+            # Zamanlayıcı bütçesi: önbellekten karşılanamayan tile'lar sınırlanır
+            planner = self._tile_planner
+            capped = (
+                planner.limit(tiles, int(max_tiles))
+                if planner is not None
+                else list(tiles[: int(max_tiles)])
+            )
+            tile_stats["tiles_budget_dropped"] = len(tiles) - len(capped)
+            tiles = capped
+
+        tile_dets = self._sliced_inference_per_tile(
+            frame, inference_cfg=inference_cfg, tiles=tiles, prepared=prepared
+        )
+        if cache is not None:
+            cache.store(tiles, tile_dets)
+
+        if tile_stats:
+            ran = int(self._last_sahi_stats.get("tile_count", 0))
+            if ran > 0:
+                per_tile = float(self._last_sahi_stats["total_ms"]) / ran
+                ema = self._sahi_tile_ms_ema
+                self._sahi_tile_ms_ema = per_tile if ema is None else 0.8 * ema + 0.2 * per_tile
+            avoided = int(tile_stats.get("tiles_skipped", 0)) + int(tile_stats.get("tiles_reused", 0))
+            tile_stats["saved_ms"] = round(avoided * (self._sahi_tile_ms_ema or 0.0), 2)
+            self._last_sahi_stats.update(tile_stats)
+        if len(reused) > 0:
+            # Önbellekteki satırlar önceki karenin kimliklerini taşır; her kare yeni kimlik alır
+            trace_ids = np.empty(len(reused), dtype=object)
+            trace_ids[:] = self._next_trace_ids(len(reused))
+            reused.trace_ids = trace_ids
+        return DetectionBatch.concat([full_dets, DetectionBatch.concat(tile_dets), reused])
+
+    def _tile_cache_signature(
+        self, frame: np.ndarray, inference_cfg: Dict[str, Any]
+    ) -> Tuple[Any, ...]:
+        """Önbellekteki tile sonuçlarını geçersiz kılan ayarlar (profil ve model varyantı dahil)."""
+        return (
+            self.inference_backend,
+            self.inference_quantization,
+            frame.shape[:2],
+            int(Settings.SAHI_SLICE_SIZE),
+            float(inference_cfg["conf"]),
+            float(inference_cfg["iou"]),
+            int(inference_cfg["max_det"]),
+            bool(inference_cfg["augment"]),
+        )
+
+    @staticmethod
+    def _coerce_camera_shift(camera_shift: Any) -> Tuple[float, float]:
+        try:
+            dx, dy = (float(v) for v in camera_shift)
+        except (TypeError, ValueError):
+            return 0.0, 0.0
+        if not (np.isfinite(dx) and np.isfinite(dy)):
+            return 0.0, 0.0
+        return dx, dy
+
+    @staticmethod
+    def _plan_sahi_tiles(
+        frame_h: int,
+        frame_w: int,
+        slice_size: int,
+        overlap: float,
+    ) -> List[Tuple[int, int, int, int]]:
+        """Tile ızgarasını (x1, y1, x2, y2) olarak satır-sütun sırasıyla üretir.
+
+        Yarım tile'dan küçük kenar parçaları atlanır (eski döngüyle birebir aynı küme).
+        """
+        step = max(1, int(slice_size * (1 - overlap)))
+        min_side = slice_size // 2
+        tiles: List[Tuple[int, int, int, int]] = []
+        for y_start in range(0, frame_h, step):
+            y_end = min(y_start + slice_size, frame_h)
+            if (y_end - y_start) < min_side:
+                continue
+            for x_start in range(0, frame_w, step):
+                x_end = min(x_start + slice_size, frame_w)
+                if (x_end - x_start) < min_side:
+                    continue
+                tiles.append((x_start, y_start, x_end, y_end))
+        return tiles
 
     def _sliced_inference(
         self,
         frame: np.ndarray,
         inference_cfg: Dict[str, Any],
-    ) -> List[Dict]:
-        h, w = frame.shape[:2]
-        slice_size = Settings.SAHI_SLICE_SIZE
-        overlap = Settings.SAHI_OVERLAP_RATIO
-        step = int(slice_size * (1 - overlap))
+        tiles: Optional[List[Tuple[int, int, int, int]]] = None,
+        prepared: Optional[PreparedFrame] = None,
+    ) -> DetectionBatch:
+        return DetectionBatch.concat(
+            self._sliced_inference_per_tile(
+                frame, inference_cfg=inference_cfg, tiles=tiles, prepared=prepared
+            )
+        )
 
-        all_slice_dets: List[Dict] = []
+    def _sliced_inference_per_tile(
+        self,
+        frame: np.ndarray,
+        inference_cfg: Dict[str, Any],
+        tiles: Optional[List[Tuple[int, int, int, int]]] = None,
+        prepared: Optional[PreparedFrame] = None,
+    ) -> List[DetectionBatch]:
+        """Tile başına bir DetectionBatch (tiles sırasında, kare koordinatlarında).
 
-        with torch.no_grad():
-            for y_start in range(0, h, step):
-                for x_start in range(0, w, step):
-                    x_end = min(x_start + slice_size, w)
-                    y_end = min(y_start + slice_size, h)
-
-                    if (x_end - x_start) < slice_size // 2 or \
-                       (y_end - y_start) < slice_size // 2:
-                        continue
-
-                    tile = frame[y_start:y_end, x_start:x_end]
-
-                    results = self.model.predict(
-                        source=tile,
-                        imgsz=slice_size,
-                        conf=float(inference_cfg["conf"]),
-                        iou=float(inference_cfg["iou"]),
-                        classes=None,
-                        device=self.device,
-                        verbose=False,
-                        save=False,
-                        half=self._use_half,
-                        agnostic_nms=self._resolve_nms_mode() == "agnostic",
-                        max_det=int(inference_cfg["max_det"]),
-                        augment=bool(inference_cfg["augment"]),
+        prepared verilirse yalnızca çalıştırılan tile'lar tam çözünürlükte iyileştirilir.
+        """
+        slice_size = Settings.SAHI_SLICE_SIZE
+        if tiles is None:
+            h, w = frame.shape[:2]
+            tiles = self._plan_sahi_tiles(h, w, slice_size, Settings.SAHI_OVERLAP_RATIO)
+        batch_size = max(1, int(getattr(Settings, "SAHI_BATCH_SIZE", 8)))
+        agnostic_nms = self._resolve_nms_mode() == "agnostic"
+
+        tile_dets: List[DetectionBatch] = []
+        batch_ms: List[float] = []
+
+        predict_kwargs = dict(
+            imgsz=slice_size,
+            conf=float(inference_cfg["conf"]),
+            iou=float(inference_cfg["iou"]),
+            classes=None,
+            device=self.device,
+            verbose=False,
+            save=False,
+            half=self._use_half,
+            agnostic_nms=agnostic_nms,
+            max_det=int(inference_cfg["max_det"]),
+            augment=bool(inference_cfg["augment"]),
+        )
+        pool = self._active_replica_pool()
+        t_start = time.perf_counter()
+        if pool is not None and len(tiles) > 1:
+            # Tile parçaları kopyalara dağıtılır; ayrıştırma tile sırasıyla bu thread'de
+            # yapılır (trace id'ler ve çıktı sırası zamanlamadan bağımsız)
+            if prepared is not None:
+                sources = [prepared.tile(x1, y1, x2, y2) for x1, y1, x2, y2 in tiles]
+            else:
+                sources = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in tiles]
+            chunk_results = pool.predict_sharded(sources, max_batch=batch_size, **predict_kwargs)
+            results = [result for chunk, _ in chunk_results for result in chunk]
+            for result, (x1, y1, _, _) in zip(results, tiles):
+                tile_dets.append(self._parse_results([result], offsets=[(x1, y1)]))
+            batch_ms = [ms for _, ms in chunk_results]
+        else:
+            # Tile'lar tek tek değil, SAHI_BATCH_SIZE'lık gruplar halinde modele verilir:
+            # letterbox/upload/NMS maliyeti batch başına bir kez ödenir.
+            with torch.no_grad():
+                for start in range(0, len(tiles), batch_size):
+                    batch_tiles = tiles[start:start + batch_size]
+                    if prepared is not None:
+                        sources = [prepared.tile(x1, y1, x2, y2) for x1, y1, x2, y2 in batch_tiles]
+                    else:
+                        sources = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in batch_tiles]
+
+                    t0 = time.perf_counter()
+                    results = self._predict(source=sources, **predict_kwargs)
+
+                    for result, (x1, y1, _, _) in zip(results, batch_tiles):
+                        tile_dets.append(self._parse_results([result], offsets=[(x1, y1)]))
+                    batch_ms.append(round((time.perf_counter() - t0) * 1000.0, 2))
+
+        self._last_sahi_stats = {
+            "tile_count": len(tiles),
+            "batch_size": batch_size,
+            "batch_count": len(batch_ms),
+            "batch_ms": batch_ms,
+            "total_ms": round(float(sum(batch_ms)), 2),
+        }
+        if pool is not None and len(tiles) > 1:
+            # Paralel parçalarda toplam süre duvar saatidir (parça süreleri örtüşür)
+            self._last_sahi_stats["replicas"] = pool.size
+            self._last_sahi_stats["total_ms"] = round((time.perf_counter() - t_start) * 1000.0, 2)
+        if bool(getattr(Settings, "DEBUG", False)) and batch_ms:
+            self.log.debug(
+                f"SAHI tiles={len(tiles)} batches={len(batch_ms)} "
+                f"total={self._last_sahi_stats['total_ms']:.1f}ms "
+                f"max_batch={max(batch_ms):.1f}ms"
+            )
+        return tile_dets
+
+    def _parse_result_arrays(
+        self,
+        results,
+        offsets: Optional[List[Tuple[int, int]]] = None,
+        scale: Optional[Tuple[float, float]] = None,
+    ) -> Dict[str, np.ndarray]:
+        """Model çıktısını tek transferde dizilere çevirir.
+
+        Dönen sözlük: ``boxes`` (ham/ofsetli float64 kutular), ``coords``
+        (payload'a giden 2 haneye yuvarlanmış kutular), ``conf`` (4 haneye
+        kesilmiş güven), ``source_cls`` ve ``cls`` (TEKNOFEST ID).
+        ``offsets`` verilirse her result için (x, y) tile ofseti eklenir; eski
+        davranışla uyumlu olarak ofset yuvarlanmış koordinata eklenir.
+        ``scale`` = (sx, sy) verilirse kutular önceden küçültülmüş girdiden kare
+        ölçeğine geri çevrilir.
+        """
+        box_parts: List[np.ndarray] = []
+        conf_parts: List[np.ndarray] = []
+        cls_parts: List[np.ndarray] = []
+        offset_parts: List[np.ndarray] = []
+        for res_idx, result in enumerate(results):
+            # Results.boxes (predict) veya doğrudan RawDetections (LeanPredictor)
+            boxes = getattr(result, "boxes", result)
+            if boxes is None or len(boxes) == 0:
+                continue
+            xyxy = _as_numpy(boxes.xyxy).astype(np.float64).reshape(-1, 4)
+            box_parts.append(xyxy)
+            conf_parts.append(_as_numpy(boxes.conf).astype(np.float64).reshape(-1))
+            cls_parts.append(_as_numpy(boxes.cls).astype(np.int64).reshape(-1))
+            if offsets is not None:
+                x_off, y_off = offsets[res_idx]
+                offset_parts.append(
+                    np.tile(
+                        np.array([x_off, y_off, x_off, y_off], dtype=np.float64),
+                        (xyxy.shape[0], 1),
                     )
+                )
 
-                    tile_dets = self._parse_results(results)
-                    for det in tile_dets:
-                        det["top_left_x"] += x_start
-                        det["top_left_y"] += y_start
-                        det["bottom_right_x"] += x_start
-                        det["bottom_right_y"] += y_start
-                        det["bbox"] = (
-                            det["top_left_x"],
-                            det["top_left_y"],
-                            det["bottom_right_x"],
-                            det["bottom_right_y"],
-                        )
-                    all_slice_dets.extend(tile_dets)
+        if not box_parts:
+            empty_f = np.zeros((0,), dtype=np.float64)
+            empty_i = np.zeros((0,), dtype=np.int64)
+            return {
+                "boxes": np.zeros((0, 4), dtype=np.float64),
+                "coords": np.zeros((0, 4), dtype=np.float64),
+                "conf": empty_f,
+                "source_cls": empty_i,
+                "cls": empty_i.copy(),
+            }
 
-        return all_slice_dets
+        boxes_arr = np.concatenate(box_parts, axis=0)
+        if scale is not None:
+            sx, sy = scale
+            boxes_arr = boxes_arr / np.array([sx, sy, sx, sy], dtype=np.float64)
+        coords = np.round(boxes_arr, 2)
+        if offsets is not None:
+            coords = coords + np.concatenate(offset_parts, axis=0)
+            boxes_arr = coords
+        model_cls = np.concatenate(cls_parts, axis=0)
+        return {
+            "boxes": boxes_arr,
+            "coords": coords,
+            "conf": np.trunc(np.concatenate(conf_parts, axis=0) * 10000) / 10000,
+            "source_cls": model_cls,
+            "cls": self._map_model_classes_to_teknofest(model_cls),
+        }
 
-    def _parse_results(self, results) -> List[Dict]:
-        detections: List[Dict] = []
-        for result in results:
-            if result.boxes is None:
-                continue
-            for box in result.boxes:
-                model_cls_id = int(box.cls[0].item())
-                conf = float(box.conf[0].item())
-                coords = box.xyxy[0].tolist()
-                x1, y1, x2, y2 = (
-                    float(coords[0]), float(coords[1]),
-                    float(coords[2]), float(coords[3]),
-                )
+    def _parse_results(
+        self,
+        results,
+        offsets: Optional[List[Tuple[int, int]]] = None,
+        scale: Optional[Tuple[float, float]] = None,
+    ) -> DetectionBatch:
+        return self._batch_from_arrays(
+            self._parse_result_arrays(results, offsets=offsets, scale=scale)
+        )
 
-                tf_id = self._map_model_class_to_teknofest(model_cls_id)
-
-                detections.append({
-                    "trace_id": self._next_trace_id(),
-                    "cls_int": tf_id,
-                    "cls": str(tf_id),
-                    "class_label": CompetitionClassContract.display_name(tf_id),
-                    "source_cls_id": model_cls_id,
-                    "confidence": int(conf * 10000) / 10000,
-                    "top_left_x": round(x1, 2),
-                    "top_left_y": round(y1, 2),
-                    "bottom_right_x": round(x2, 2),
-                    "bottom_right_y": round(y2, 2),
-                    "bbox": (x1, y1, x2, y2),
-                })
-        return detections
-
-    def _next_trace_id(self) -> str:
-        self._trace_seq += 1
-        return f"f{self._frame_count:06d}-d{self._trace_seq:08d}"
+    def _batch_from_arrays(self, arrays: Dict[str, np.ndarray]) -> DetectionBatch:
+        return DetectionBatch.from_arrays(
+            boxes=arrays["boxes"],
+            coords=arrays["coords"],
+            scores=arrays["conf"],
+            cls_ids=arrays["cls"],
+            source_cls_ids=arrays["source_cls"],
+            trace_ids=self._next_trace_ids(int(arrays["conf"].shape[0])),
+        )
+
+    def _next_trace_ids(self, count: int) -> List[str]:
+        first = self._trace_seq + 1
+        self._trace_seq += count
+        return [
+            f"f{self._frame_count:06d}-d{seq:08d}"
+            for seq in range(first, self._trace_seq + 1)
+        ]
 
     @staticmethod
-    def _filter_by_confidence(detections: List[Dict]) -> List[Dict]:
+    def _confidence_keep_mask(batch: DetectionBatch) -> np.ndarray:
         conf_global = float(Settings.CONFIDENCE_THRESHOLD)
         conf_uap_uai = getattr(Settings, "CONFIDENCE_THRESHOLD_UAP_UAI", None)
         if conf_uap_uai is None:
             conf_uap_uai = conf_global
         conf_uap_uai = float(conf_uap_uai)
 
-        filtered: List[Dict] = []
-        for det in detections:
-            cls_int = int(det.get("cls_int", -1))
-            conf = float(det.get("confidence", 0.0))
-            threshold = conf_uap_uai if cls_int in (Settings.CLASS_UAP, Settings.CLASS_UAI) else conf_global
-            if conf >= threshold:
-                filtered.append(det)
-        return filtered
-
-    def _track_uap_uai_absence(self, detections: List[Dict]) -> None:
-        has_uap_uai = any(
-            int(det.get("cls_int", -1)) in (Settings.CLASS_UAP, Settings.CLASS_UAI)
-            for det in detections
+        is_landing_zone = np.isin(batch.cls_ids, (Settings.CLASS_UAP, Settings.CLASS_UAI))
+        thresholds = np.where(is_landing_zone, conf_uap_uai, conf_global)
+        return batch.scores >= thresholds
+
+    def _track_uap_uai_absence(self, detections: DetectionBatch) -> None:
+        has_uap_uai = bool(
+            np.any(np.isin(detections.cls_ids, (Settings.CLASS_UAP, Settings.CLASS_UAI)))
         )
         self._prev_raw_has_uap_uai = has_uap_uai
         if has_uap_uai:
@@ -696,37 +1316,15 @@ class ObjectDetector:
             )
 
     @staticmethod
-    def _class_counts(detections: List[Dict]) -> Dict[str, int]:
-        canonical_ids = tuple(CompetitionClassContract.valid_id_strings())
-        counts: Counter = Counter()
-        for det in detections:
-            raw_cls = det.get("cls")
-            if raw_cls is None:
-                raw_cls = det.get("cls_int", -1)
-            counts[str(raw_cls)] += 1
-
-        class_counts: Dict[str, int] = {
-            cls_id: int(counts.get(cls_id, 0)) for cls_id in canonical_ids
-        }
-        class_counts["unknown"] = int(
-            sum(v for k, v in counts.items() if str(k) not in class_counts)
-        )
-        return class_counts
-
-    @staticmethod
-    def _uap_uai_count_and_max_conf(detections: List[Dict]) -> Tuple[int, float]:
-        count = 0
-        max_conf = 0.0
-        for det in detections:
-            cls_int = int(det.get("cls_int", -1))
-            if cls_int not in (Settings.CLASS_UAP, Settings.CLASS_UAI):
-                continue
-            count += 1
-            max_conf = max(max_conf, float(det.get("confidence", 0.0)))
-        return count, max_conf
+    def _uap_uai_count_and_max_conf(detections: DetectionBatch) -> Tuple[int, float]:
+        mask = np.isin(detections.cls_ids, (Settings.CLASS_UAP, Settings.CLASS_UAI))
+        count = int(np.count_nonzero(mask))
+        if count == 0:
+            return 0, 0.0
+        return count, max(0.0, float(detections.scores[mask].max()))
 
     def _should_run_uap_uai_focused_pass(
-        self, primary_detections: List[Dict]
+        self, primary_detections: Optional[DetectionBatch]
     ) -> Tuple[bool, str]:
         interval = max(1, int(getattr(Settings, "UAP_UAI_FOCUSED_PASS_INTERVAL", 2)))
         if self._frame_count % interval == 0:
@@ -741,7 +1339,9 @@ class ObjectDetector:
         if int(self._uap_uai_absent_streak) >= rescue_streak:
             return True, "absent_streak"
 
-        raw_count, raw_max_conf = self._uap_uai_count_and_max_conf(primary_detections)
+        raw_count, raw_max_conf = self._uap_uai_count_and_max_conf(
+            DetectionBatch.coerce(primary_detections)
+        )
         rescue_min_conf = float(
             getattr(
                 Settings,
@@ -764,11 +1364,11 @@ class ObjectDetector:
         self,
         stage_trace: List[Dict[str, Any]],
         stage: str,
-        detections: List[Dict],
+        detections: DetectionBatch,
     ) -> None:
         if not bool(getattr(Settings, "PIPELINE_STAGE_METRICS_ENABLED", True)):
             return
-        counts = self._class_counts(detections)
+        counts = detections.class_counts()
         stage_trace.append(
             {
                 "stage": stage,
@@ -844,6 +1444,10 @@ class ObjectDetector:
     def get_last_pipeline_metrics(self) -> Dict[str, Any]:
         return dict(self._last_pipeline_metrics)
 
+    def get_last_stage_timings(self) -> Dict[str, Any]:
+        """Son karenin aşama süreleri (ms): primary, tiles, focused, total."""
+        return dict(self._last_stage_timings)
+
     def _log_stage_trace(self, stage_trace: List[Dict[str, Any]]) -> None:
         if not bool(getattr(Settings, "DEBUG", False)) or not stage_trace:
             return
@@ -873,18 +1477,22 @@ class ObjectDetector:
 
     def _log_nms_mode_comparison(
         self,
-        detections: List[Dict],
+        detections: DetectionBatch,
         inference_cfg: Dict[str, Any],
     ) -> None:
-        if not bool(getattr(Settings, "DEBUG", False)):
+        if not bool(getattr(Settings, "DEBUG", False)) or len(detections) == 0:
             return
-        class_aware = self._merge_detections_nms(detections)
-        agnostic = self._merge_detections_nms_agnostic(
-            detections,
+        class_aware = self._class_aware_nms_indices(
+            detections.boxes, detections.scores, detections.cls_ids
+        )
+        agnostic = self._agnostic_nms_indices(
+            detections.boxes,
+            detections.scores,
+            detections.cls_ids,
             iou_threshold=float(inference_cfg["merge_iou"]),
         )
-        aware_ids = {d.get("trace_id") for d in class_aware}
-        agnostic_ids = {d.get("trace_id") for d in agnostic}
+        aware_ids = set(detections.trace_ids[class_aware].tolist())
+        agnostic_ids = set(detections.trace_ids[agnostic].tolist())
         cross_class_drop = len(aware_ids - agnostic_ids)
         self.log.debug(
             "NMSCompare mode=agnostic "
@@ -892,133 +1500,154 @@ class ObjectDetector:
             f"cross_class_drop={cross_class_drop}"
         )
 
-    def _apply_runtime_nms(
+    def _runtime_nms_indices(
         self,
-        detections: List[Dict],
+        detections: DetectionBatch,
         inference_cfg: Dict[str, Any],
-    ) -> List[Dict]:
-        if not detections:
-            return []
+    ) -> np.ndarray:
+        if len(detections) == 0:
+            return np.zeros((0,), dtype=np.int64)
 
+        boxes, scores, cls_ids = detections.boxes, detections.scores, detections.cls_ids
         mode = self._resolve_nms_mode()
         if mode == "agnostic":
-            return self._merge_detections_nms_agnostic(
-                detections, iou_threshold=float(inference_cfg["merge_iou"])
+            return self._agnostic_nms_indices(
+                boxes, scores, cls_ids, iou_threshold=float(inference_cfg["merge_iou"])
             )
         if mode == "hybrid":
-            class_aware = self._merge_detections_nms(detections)
-            return self._merge_detections_nms_agnostic(
-                class_aware,
-                iou_threshold=float(inference_cfg["hybrid_iou"]),
-            )
-        return self._merge_detections_nms(detections)
+            class_aware = self._class_aware_nms_indices(boxes, scores, cls_ids)
+            return class_aware[
+                self._agnostic_nms_indices(
+                    boxes[class_aware],
+                    scores[class_aware],
+                    cls_ids[class_aware],
+                    iou_threshold=float(inference_cfg["hybrid_iou"]),
+                )
+            ]
+        return self._class_aware_nms_indices(boxes, scores, cls_ids)
 
     @staticmethod
-    def _merge_detections_nms(detections: List[Dict]) -> List[Dict]:
-        if not detections:
-            return detections
-
-        boxes = np.array([d["bbox"] for d in detections], dtype=np.float32)
-        scores = np.array([d["confidence"] for d in detections], dtype=np.float32)
-
-        class_ids = np.array([d["cls_int"] for d in detections], dtype=np.int32)
-        unique_classes = np.unique(class_ids)
+    def _class_aware_nms_indices(
+        boxes: np.ndarray,
+        scores: np.ndarray,
+        class_ids: np.ndarray,
+    ) -> np.ndarray:
+        """Sınıf bazlı NMS + kapsama bastırma; korunan satır indeksleri."""
+        if len(scores) == 0:
+            return np.zeros((0,), dtype=np.int64)
+
+        boxes32 = boxes.astype(np.float32)
+        scores32 = scores.astype(np.float32)
 
         keep_indices: List[int] = []
-        for cls_id in unique_classes:
-            cls_mask = class_ids == cls_id
-            cls_indices = np.where(cls_mask)[0]
-
-            if len(cls_indices) == 0:
-                continue
-
-            cls_boxes = boxes[cls_indices]
-            cls_scores = scores[cls_indices]
-
+        for cls_id in np.unique(class_ids):
+            cls_indices = np.where(class_ids == cls_id)[0]
             nms_keep = ObjectDetector._nms_greedy(
-                cls_boxes, cls_scores, Settings.SAHI_MERGE_IOU
+                boxes32[cls_indices], scores32[cls_indices], Settings.SAHI_MERGE_IOU
             )
-            nms_indices = cls_indices[nms_keep]
-            keep_indices.extend(nms_indices.tolist())
+            keep_indices.extend(cls_indices[nms_keep].tolist())
 
-        nms_results = [detections[i] for i in keep_indices]
-
-        return ObjectDetector._suppress_contained(nms_results)
+        keep = np.asarray(keep_indices, dtype=np.int64)
+        return keep[ObjectDetector._suppress_contained(boxes[keep], class_ids[keep])]
 
     @staticmethod
-    def _merge_detections_nms_agnostic(
-        detections: List[Dict],
+    def _agnostic_nms_indices(
+        boxes: np.ndarray,
+        scores: np.ndarray,
+        class_ids: np.ndarray,
         iou_threshold: float,
-    ) -> List[Dict]:
-        if not detections:
-            return []
-        boxes = np.array([d["bbox"] for d in detections], dtype=np.float32)
-        scores = np.array([d["confidence"] for d in detections], dtype=np.float32)
-        keep = ObjectDetector._nms_greedy(boxes, scores, float(iou_threshold))
-        return ObjectDetector._suppress_contained([detections[i] for i in keep])
+    ) -> np.ndarray:
+        if len(scores) == 0:
+            return np.zeros((0,), dtype=np.int64)
+        keep = np.asarray(
+            ObjectDetector._nms_greedy(
+                boxes.astype(np.float32), scores.astype(np.float32), float(iou_threshold)
+            ),
+            dtype=np.int64,
+        )
+        return keep[ObjectDetector._suppress_contained(boxes[keep], class_ids[keep])]
 
     @staticmethod
-    def _suppress_contained(detections: List[Dict], threshold: float = 0.85) -> List[Dict]:
-        if not detections:
-            return []
+    def _suppress_contained(
+        boxes: np.ndarray,
+        cls_ints: np.ndarray,
+        threshold: float = 0.85,
+        block_size: int = 256,
+    ) -> np.ndarray:
+        """Aynı sınıfta büyük kutunun içinde kalan küçük kutuları bastırır.
+
+        Kutular alana göre büyükten küçüğe işlenir; i, kendisinden sonra gelen
+        aynı sınıftaki j'yi inter/area_j > eşik ise bastırır. Intersection-over-area
+        matrisi her sınıf için ``block_size`` satırlık bloklar halinde hesaplanır
+        (bellek sınıf_boyu×block), iniş alanı kuralı boolean maske olarak
+        uygulanır. Python döngüsü yalnızca en az bir kutuyu kapsayan satırlar
+        üzerinde döner.
 
-        boxes = np.array([d["bbox"] for d in detections])
-        areas = np.maximum((boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1]), 1e-6)
-        cls_ints = np.array([d["cls_int"] for d in detections])
+        Returns:
+            Korunan satır indeksleri (alan büyükten küçüğe işlem sırasıyla).
+        """
+        n = len(boxes)
+        if n == 0:
+            return np.zeros((0,), dtype=np.int64)
 
+        boxes = np.asarray(boxes, dtype=np.float64)
+        areas = np.maximum((boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1]), 1e-6)
         order = np.argsort(areas, kind="stable")[::-1]
-        keep: List[int] = []
-        is_suppressed = np.zeros(len(detections), dtype=bool)
-        landing_zone_ids = {Settings.CLASS_UAP, Settings.CLASS_UAI}
-
-        for i_idx, i in enumerate(order):
-            if is_suppressed[i]:
-                continue
-            keep.append(int(i))
 
-            remaining_indices = order[i_idx + 1:]
-            valid_mask = ~is_suppressed[remaining_indices] & (cls_ints[remaining_indices] == cls_ints[i])
-            valid_remaining = remaining_indices[valid_mask]
+        o_boxes = boxes[order]
+        o_areas = areas[order]
+        o_cls = np.asarray(cls_ints)[order]
+        is_landing_zone = np.isin(o_cls, (Settings.CLASS_UAP, Settings.CLASS_UAI))
+        row_threshold = np.where(
+            is_landing_zone, float(Settings.LANDING_ZONE_CONTAINMENT_IOU), float(threshold)
+        )
 
-            if len(valid_remaining) == 0:
+        # Farklı sınıflar birbirini bastırmaz → matris her sınıf için ayrı kurulur.
+        is_suppressed = np.zeros(n, dtype=bool)
+        block = max(1, int(block_size))
+        for cls_id in np.unique(o_cls):
+            pos = np.flatnonzero(o_cls == cls_id)
+            m = pos.size
+            if m < 2:
                 continue
+            c_boxes = o_boxes[pos]
+            c_areas = o_areas[pos]
+            c_landing = is_landing_zone[pos]
+            c_threshold = row_threshold[pos]
+
+            # contains[r] → r'nin bastırabileceği (sırada kendisinden sonraki) pozisyonlar
+            contains: Dict[int, np.ndarray] = {}
+            for start in range(0, m, block):
+                stop = min(m, start + block)
+                a = c_boxes[start:stop]
+                b = c_boxes[start:]
+
+                inter_w = np.maximum(
+                    0.0,
+                    np.minimum(a[:, None, 2], b[None, :, 2]) - np.maximum(a[:, None, 0], b[None, :, 0]),
+                )
+                inter_h = np.maximum(
+                    0.0,
+                    np.minimum(a[:, None, 3], b[None, :, 3]) - np.maximum(a[:, None, 1], b[None, :, 1]),
+                )
+                ios = (inter_w * inter_h) / c_areas[None, start:]
 
-            box_a = boxes[i]
-            boxes_b = boxes[valid_remaining]
-            areas_b = areas[valid_remaining]
-
-            inter_x1 = np.maximum(box_a[0], boxes_b[:, 0])
-            inter_y1 = np.maximum(box_a[1], boxes_b[:, 1])
-            inter_x2 = np.minimum(box_a[2], boxes_b[:, 2])
-            inter_y2 = np.minimum(box_a[3], boxes_b[:, 3])
-
-            inter_w = np.maximum(0.0, inter_x2 - inter_x1)
-            inter_h = np.maximum(0.0, inter_y2 - inter_y1)
-            inter_area = inter_w * inter_h
-
-            ios = inter_area / areas_b
-
-            effective_threshold = (
-                Settings.LANDING_ZONE_CONTAINMENT_IOU
-                if cls_ints[i] in landing_zone_ids
-                else threshold
-            )
-
-            suppress_mask = np.zeros(len(valid_remaining), dtype=bool)
-
-            for idx_b, b_idx in enumerate(valid_remaining):
-                if ios[idx_b] > effective_threshold:
-                    cls_a = cls_ints[i]
-                    cls_b = cls_ints[b_idx]
-
-                    if cls_a in landing_zone_ids and cls_b not in landing_zone_ids:
-                        continue
+                hit = ios > c_threshold[start:stop, None]
+                # İniş alanı, iniş alanı olmayan kutuyu bastırmaz.
+                hit &= ~(c_landing[start:stop, None] & ~c_landing[None, start:])
+                # Yalnızca sırada sonra gelenler (üst üçgen)
+                hit &= np.arange(stop - start)[:, None] < np.arange(m - start)[None, :]
 
-                    suppress_mask[idx_b] = True
+                for r in np.flatnonzero(hit.any(axis=1)).tolist():
+                    contains[start + r] = start + np.flatnonzero(hit[r])
 
-            is_suppressed[valid_remaining[suppress_mask]] = True
+            c_suppressed = np.zeros(m, dtype=bool)
+            for r in sorted(contains):
+                if not c_suppressed[r]:
+                    c_suppressed[contains[r]] = True
+            is_suppressed[pos] = c_suppressed
 
-        return [detections[i] for i in keep]
+        return order[~is_suppressed].astype(np.int64)
 
     @staticmethod
     def _nms_greedy(
@@ -1057,52 +1686,21 @@ class ObjectDetector:
 
         return keep
 
-    def _preprocess(self, frame: np.ndarray) -> np.ndarray:
-        result = frame
-        
-        # Otonom Adaptif CLAHE ve Termal/RGB kontrolü
-        if self._clahe is not None:
-            # Check if thermal (single channel disguised as 3 or actually 1)
-            is_thermal = False
-            if len(frame.shape) == 2:
-                is_thermal = True
-            elif len(frame.shape) == 3 and frame.shape[2] == 3:
-                # If R, G, B channels are highly correlated/identical, it's likely grayscale/thermal
-                b, g, r = cv2.split(frame)
-                diff_bg = cv2.absdiff(b, g)
-                diff_gr = cv2.absdiff(g, r)
-                if cv2.mean(diff_bg)[0] < 2.0 and cv2.mean(diff_gr)[0] < 2.0:
-                    is_thermal = True
-
-            mean_brightness = np.mean(frame)
-            # Apply CLAHE if it's thermal OR if it's RGB but too dark/foggy (low contrast)
-            if is_thermal:
-                gray = cv2.cvtColor(result, cv2.COLOR_BGR2GRAY) if len(frame.shape) == 3 else result
-                enhanced = self._clahe.apply(gray)
-                result = cv2.cvtColor(enhanced, cv2.COLOR_GRAY2BGR)
-            elif mean_brightness < 90.0 or mean_brightness > 200.0: # Too dark (night) or too washed out (fog/snow)
-                lab = cv2.cvtColor(result, cv2.COLOR_BGR2LAB)
-                l_channel, a_channel, b_channel = cv2.split(lab)
-                l_enhanced = self._clahe.apply(l_channel)
-                lab_enhanced = cv2.merge([l_enhanced, a_channel, b_channel])
-                result = cv2.cvtColor(lab_enhanced, cv2.COLOR_LAB2BGR)
-            
-            # If RGB and normal brightness, skip CLAHE to save CPU and prevent artifacts
-
-        # Hafif keskinleştirme (bulanklık toleransı - FR-007)
-        blurred = cv2.GaussianBlur(result, (0, 0), sigmaX=2.0)
-        result = cv2.addWeighted(result, 1.3, blurred, -0.3, 0)
-
-        return result
+    def _prepare_frame(self, frame: Union[np.ndarray, FrameContext]) -> PreparedFrame:
+        """Kare sınıflandırması (thumbnail) + tüketici bazlı tembel ön-işleme."""
+        return self._preprocessor.begin_frame(frame)
 
     @staticmethod
-    def _post_filter(detections: List[Dict], altitude: Optional[float] = None) -> List[Dict]:
-        filtered: List[Dict] = []
+    def _post_filter_mask(batch: DetectionBatch, altitude: Optional[float] = None) -> np.ndarray:
+        keep = np.zeros(len(batch), dtype=bool)
+        if len(batch) == 0:
+            return keep
         class_filters = getattr(Settings, "CLASS_ADAPTIVE_FILTERS", {}) or {}
         default_min_size = max(1, int(Settings.MIN_BBOX_SIZE))
         default_max_size = max(default_min_size, int(getattr(Settings, "MAX_BBOX_SIZE", 9999)))
         default_max_aspect = 4.5
-        
+        default_min_floor = max(1, int(getattr(Settings, "MIN_BBOX_SIZE_FLOOR", 8)))
+
         # Scale thresholds based on altitude (reference 50m)
         # Closer to ground (lower altitude) = larger boxes expected
         scale_factor = 1.0
@@ -1110,37 +1708,30 @@ class ObjectDetector:
             ref_altitude = getattr(Settings, "DEFAULT_ALTITUDE", 50.0)
             scale_factor = ref_altitude / max(5.0, altitude)
 
-        post_filter_exempt = frozenset(str(c) for c in getattr(Settings, "GUARDRAIL_EXEMPT_CLASSES", ("2", "3")))
-        for det in detections:
-            cls_key = str(det.get("cls_int", det.get("cls", "")))
-            if cls_key in post_filter_exempt:
-                filtered.append(det)
-                continue
-
-            x1, y1, x2, y2 = det["bbox"]
-            w = x2 - x1
-            h = y2 - y1
+        exempt = batch.class_mask(getattr(Settings, "GUARDRAIL_EXEMPT_CLASSES", ("2", "3")))
+        keep[exempt] = True
 
-            cfg = class_filters.get(cls_key, {})
+        w = batch.boxes[:, 2] - batch.boxes[:, 0]
+        h = batch.boxes[:, 3] - batch.boxes[:, 1]
+        for cls_id in np.unique(batch.cls_ids[~exempt]).tolist():
+            rows = ~exempt & (batch.cls_ids == cls_id)
+            cfg = class_filters.get(str(cls_id), {})
             base_min = max(1, int(cfg.get("min_size", default_min_size)))
             base_max = max(base_min, int(cfg.get("max_size", default_max_size)))
-            min_size = base_min * scale_factor
-            default_min_floor = max(1, int(getattr(Settings, "MIN_BBOX_SIZE_FLOOR", 8)))
             min_floor = max(1, int(cfg.get("min_floor", default_min_floor)))
-            min_size = max(min_floor, min_size)
+            min_size = max(min_floor, base_min * scale_factor)
             max_size = base_max * scale_factor
             max_aspect = float(cfg.get("max_aspect", default_max_aspect))
 
-            if w < min_size or h < min_size:
-                continue
-            if w > max_size or h > max_size:
-                continue
-            aspect = max(w, h) / max(min(w, h), 1)
-            if aspect > max_aspect:
-                continue
-            filtered.append(det)
+            rw, rh = w[rows], h[rows]
+            aspect = np.maximum(rw, rh) / np.maximum(np.minimum(rw, rh), 1)
+            keep[rows] = (
+                (rw >= min_size) & (rh >= min_size)
+                & (rw <= max_size) & (rh <= max_size)
+                & (aspect <= max_aspect)
+            )
 
-        return filtered
+        return keep
 
     @staticmethod
     def _bbox_iou(
@@ -1169,12 +1760,19 @@ class ObjectDetector:
     ) -> List[Dict]:
         if not detections:
             return []
+        keep_mask = self._landing_zone_conflict_keep_mask(DetectionBatch.from_dicts(detections))
+        return [det for det, keep in zip(detections, keep_mask.tolist()) if keep]
+
+    def _landing_zone_conflict_keep_mask(self, batch: DetectionBatch) -> np.ndarray:
+        keep_mask = np.ones(len(batch), dtype=bool)
+        if len(batch) == 0:
+            return keep_mask
 
         threshold = float(
             getattr(Settings, "UAP_UAI_CONFLICT_IOU_THRESHOLD", 0.55)
         )
         if threshold <= 0.0:
-            return detections
+            return keep_mask
         min_conf_gap = max(
             0.0, float(getattr(Settings, "UAP_UAI_CONFLICT_MIN_CONF_GAP", 0.12))
         )
@@ -1182,35 +1780,22 @@ class ObjectDetector:
             1.0, float(getattr(Settings, "UAP_UAI_CONFLICT_MIN_AREA_RATIO", 1.30))
         )
 
-        landing_zone_ids = {Settings.CLASS_UAP, Settings.CLASS_UAI}
-        candidate_indices = [
-            idx
-            for idx, det in enumerate(detections)
-            if int(det.get("cls_int", -1)) in landing_zone_ids
-        ]
+        candidate_indices = np.flatnonzero(
+            np.isin(batch.cls_ids, (Settings.CLASS_UAP, Settings.CLASS_UAI))
+        ).tolist()
         if len(candidate_indices) < 2:
-            return detections
+            return keep_mask
 
-        def _bbox(det: Dict) -> Tuple[float, float, float, float]:
-            if "bbox" in det and len(det["bbox"]) == 4:
-                x1, y1, x2, y2 = det["bbox"]
-            else:
-                x1 = float(det.get("top_left_x", 0.0))
-                y1 = float(det.get("top_left_y", 0.0))
-                x2 = float(det.get("bottom_right_x", x1 + 1.0))
-                y2 = float(det.get("bottom_right_y", y1 + 1.0))
-            return (float(x1), float(y1), float(x2), float(y2))
+        boxes = batch.boxes.tolist()
+        confs = batch.scores.tolist()
+        cls_ids = batch.cls_ids.tolist()
 
-        def _area(box: Tuple[float, float, float, float]) -> float:
+        def _area(box: List[float]) -> float:
             return max(0.0, box[2] - box[0]) * max(0.0, box[3] - box[1])
 
-        keep_mask = np.ones(len(detections), dtype=bool)
         ranked_indices = sorted(
             candidate_indices,
-            key=lambda idx: (
-                float(detections[idx].get("confidence", 0.0)),
-                _area(_bbox(detections[idx])),
-            ),
+            key=lambda idx: (confs[idx], _area(boxes[idx])),
             reverse=True,
         )
 
@@ -1218,24 +1803,21 @@ class ObjectDetector:
         for rank_pos, idx in enumerate(ranked_indices):
             if not keep_mask[idx]:
                 continue
-            det_i = detections[idx]
-            cls_i = int(det_i.get("cls_int", -1))
-            box_i = _bbox(det_i)
+            cls_i = cls_ids[idx]
+            box_i = boxes[idx]
             area_i = _area(box_i)
-            conf_i = float(det_i.get("confidence", 0.0))
+            conf_i = confs[idx]
             for jdx in ranked_indices[rank_pos + 1 :]:
                 if not keep_mask[jdx]:
                     continue
-                det_j = detections[jdx]
-                cls_j = int(det_j.get("cls_int", -1))
-                if cls_i == cls_j:
+                if cls_i == cls_ids[jdx]:
                     continue
-                box_j = _bbox(det_j)
+                box_j = boxes[jdx]
                 if self._bbox_iou(box_i, box_j) < threshold:
                     continue
 
                 area_j = _area(box_j)
-                conf_j = float(det_j.get("confidence", 0.0))
+                conf_j = confs[jdx]
                 conf_gap = abs(conf_i - conf_j)
                 area_ratio = max(area_i, area_j) / max(min(area_i, area_j), 1e-6)
 
@@ -1262,7 +1844,7 @@ class ObjectDetector:
                 f"min_conf_gap={min_conf_gap:.2f} min_area_ratio={min_area_ratio:.2f}"
             )
 
-        return [det for idx, det in enumerate(detections) if bool(keep_mask[idx])]
+        return keep_mask
 
     # =========================================================================
 
@@ -0,0 +1,267 @@
+"""Task 1 tespitleri için sütunlu (struct-of-arrays) taşıyıcı.
+
+Inference sonrası tüm post-process zinciri (güven filtresi, NMS, çakışma
+bastırma, boyut filtresi, guardrails, zamansal filtre, iniş durumu) dict
+listesi yerine bu yapıyı maske/indeks ile daraltır. Yarışma dict'lerine
+dönüşüm yalnızca MovementEstimator.annotate / payload sınırında yapılır.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Sequence, Union
+
+import numpy as np
+
+from src.class_contract import CompetitionClassContract
+
+# landing_status henüz hesaplanmadı (determine_landing_status çalışmadı)
+LANDING_UNSET: int = -2
+
+
+def _cls_int(det: Dict) -> int:
+    for key in ("cls_int", "cls"):
+        value = det.get(key)
+        if value is None:
+            continue
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            continue
+    return -1
+
+
+def class_ids_from_keys(keys: Iterable[Any]) -> np.ndarray:
+    """("2", "3") gibi Settings sınıf anahtarlarını int ID dizisine çevirir."""
+    ids: List[int] = []
+    for key in keys:
+        try:
+            ids.append(int(str(key).strip()))
+        except ValueError:
+            continue
+    return np.array(sorted(set(ids)), dtype=np.int64)
+
+
+@dataclass
+class DetectionBatch:
+    """N tespitin sütunlu gösterimi.
+
+    Attributes:
+        boxes: (N, 4) float64 — NMS/boyut filtrelerinin kullandığı ham kutu ("bbox").
+        coords: (N, 4) float64 — payload koordinatları (2 haneye yuvarlanmış).
+        scores: (N,) float64 — 4 haneye kesilmiş güven.
+        cls_ids: (N,) int64 — TEKNOFEST sınıf ID (-1 = eşlenmedi).
+        source_cls_ids: (N,) int64 — modelin kendi sınıf ID'si.
+        trace_ids: (N,) object — tespit izleme kimlikleri.
+        landing_status: (N,) int8 — -1/0/1, LANDING_UNSET = hesaplanmadı.
+        motion_status: (N,) int8 — -1/0/1 (annotate öncesi -1).
+    """
+
+    boxes: np.ndarray
+    coords: np.ndarray
+    scores: np.ndarray
+    cls_ids: np.ndarray
+    source_cls_ids: np.ndarray
+    trace_ids: np.ndarray
+    landing_status: np.ndarray
+    motion_status: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.scores.shape[0])
+
+    # ── Kurucular ────────────────────────────────────────────────────────────
+
+    @classmethod
+    def empty(cls) -> "DetectionBatch":
+        return cls.from_arrays(
+            boxes=np.zeros((0, 4), dtype=np.float64),
+            coords=np.zeros((0, 4), dtype=np.float64),
+            scores=np.zeros((0,), dtype=np.float64),
+            cls_ids=np.zeros((0,), dtype=np.int64),
+            source_cls_ids=np.zeros((0,), dtype=np.int64),
+            trace_ids=[],
+        )
+
+    @classmethod
+    def from_arrays(
+        cls,
+        boxes: np.ndarray,
+        coords: np.ndarray,
+        scores: np.ndarray,
+        cls_ids: np.ndarray,
+        source_cls_ids: np.ndarray,
+        trace_ids: Sequence[str],
+    ) -> "DetectionBatch":
+        n = int(np.asarray(scores).shape[0])
+        trace_arr = np.empty(n, dtype=object)
+        trace_arr[:] = list(trace_ids)
+        return cls(
+            boxes=np.asarray(boxes, dtype=np.float64).reshape(-1, 4),
+            coords=np.asarray(coords, dtype=np.float64).reshape(-1, 4),
+            scores=np.asarray(scores, dtype=np.float64).reshape(-1),
+            cls_ids=np.asarray(cls_ids, dtype=np.int64).reshape(-1),
+            source_cls_ids=np.asarray(source_cls_ids, dtype=np.int64).reshape(-1),
+            trace_ids=trace_arr,
+            landing_status=np.full(n, LANDING_UNSET, dtype=np.int8),
+            motion_status=np.full(n, -1, dtype=np.int8),
+        )
+
+    @classmethod
+    def from_dicts(cls, detections: Sequence[Dict]) -> "DetectionBatch":
+        """Eski List[Dict] arayüzünden gelen tespitleri sütunlara çevirir."""
+        if not detections:
+            return cls.empty()
+        coords = np.array(
+            [
+                (
+                    float(d.get("top_left_x", 0.0)),
+                    float(d.get("top_left_y", 0.0)),
+                    float(d.get("bottom_right_x", 0.0)),
+                    float(d.get("bottom_right_y", 0.0)),
+                )
+                for d in detections
+            ],
+            dtype=np.float64,
+        )
+        boxes = np.array(
+            [
+                tuple(float(v) for v in d["bbox"])
+                if "bbox" in d and len(d["bbox"]) == 4
+                else tuple(coords[i])
+                for i, d in enumerate(detections)
+            ],
+            dtype=np.float64,
+        )
+        batch = cls.from_arrays(
+            boxes=boxes,
+            coords=coords,
+            scores=[float(d.get("confidence", 0.0)) for d in detections],
+            cls_ids=[_cls_int(d) for d in detections],
+            source_cls_ids=[int(d.get("source_cls_id", -1)) for d in detections],
+            trace_ids=[str(d.get("trace_id", "")) for d in detections],
+        )
+        for i, d in enumerate(detections):
+            if "landing_status" in d:
+                batch.landing_status[i] = int(d["landing_status"])
+            if "motion_status" in d:
+                batch.motion_status[i] = int(d["motion_status"])
+        return batch
+
+    @classmethod
+    def coerce(cls, detections: Union["DetectionBatch", Sequence[Dict], None]) -> "DetectionBatch":
+        if isinstance(detections, DetectionBatch):
+            return detections
+        return cls.from_dicts(detections or [])
+
+    @staticmethod
+    def concat(batches: Sequence["DetectionBatch"]) -> "DetectionBatch":
+        parts = [b for b in batches if len(b) > 0]
+        if not parts:
+            return DetectionBatch.empty()
+        if len(parts) == 1:
+            return parts[0]
+        return DetectionBatch(
+            boxes=np.concatenate([b.boxes for b in parts], axis=0),
+            coords=np.concatenate([b.coords for b in parts], axis=0),
+            scores=np.concatenate([b.scores for b in parts], axis=0),
+            cls_ids=np.concatenate([b.cls_ids for b in parts], axis=0),
+            source_cls_ids=np.concatenate([b.source_cls_ids for b in parts], axis=0),
+            trace_ids=np.concatenate([b.trace_ids for b in parts], axis=0),
+            landing_status=np.concatenate([b.landing_status for b in parts], axis=0),
+            motion_status=np.concatenate([b.motion_status for b in parts], axis=0),
+        )
+
+    # ── Maske / indeks işlemleri ─────────────────────────────────────────────
+
+    def select(self, index: Union[np.ndarray, Sequence[int]]) -> "DetectionBatch":
+        """Bool maske veya indeks dizisiyle alt küme (indeks sırası korunur)."""
+        idx = np.asarray(index)
+        if idx.dtype != bool:
+            idx = idx.astype(np.int64, copy=False)
+        return DetectionBatch(
+            boxes=self.boxes[idx],
+            coords=self.coords[idx],
+            scores=self.scores[idx],
+            cls_ids=self.cls_ids[idx],
+            source_cls_ids=self.source_cls_ids[idx],
+            trace_ids=self.trace_ids[idx],
+            landing_status=self.landing_status[idx],
+            motion_status=self.motion_status[idx],
+        )
+
+    def class_mask(self, class_keys: Iterable[Any]) -> np.ndarray:
+        return np.isin(self.cls_ids, class_ids_from_keys(class_keys))
+
+    def class_counts(self) -> Dict[str, int]:
+        canonical_ids = tuple(CompetitionClassContract.valid_id_strings())
+        counts: Dict[str, int] = {cls_id: 0 for cls_id in canonical_ids}
+        unknown = 0
+        if len(self) > 0:
+            values, freq = np.unique(self.cls_ids, return_counts=True)
+            for value, count in zip(values.tolist(), freq.tolist()):
+                key = str(value)
+                if key in counts:
+                    counts[key] = int(count)
+                else:
+                    unknown += int(count)
+        counts["unknown"] = unknown
+        return counts
+
+    # ── Dict sınırı ──────────────────────────────────────────────────────────
+
+    def to_dicts(self) -> List[Dict]:
+        """İç şema (eski _parse_results çıktısı) ile dict listesi."""
+        out: List[Dict] = []
+        labels: Dict[int, str] = {}
+        for cls_id, src_id, conf, coords, bbox, trace_id, landing in zip(
+            self.cls_ids.tolist(),
+            self.source_cls_ids.tolist(),
+            self.scores.tolist(),
+            self.coords.tolist(),
+            self.boxes.tolist(),
+            self.trace_ids.tolist(),
+            self.landing_status.tolist(),
+        ):
+            if cls_id not in labels:
+                labels[cls_id] = CompetitionClassContract.display_name(cls_id)
+            det = {
+                "trace_id": trace_id,
+                "cls_int": cls_id,
+                "cls": str(cls_id),
+                "class_label": labels[cls_id],
+                "source_cls_id": src_id,
+                "confidence": conf,
+                "top_left_x": coords[0],
+                "top_left_y": coords[1],
+                "bottom_right_x": coords[2],
+                "bottom_right_y": coords[3],
+                "bbox": tuple(bbox),
+            }
+            if landing != LANDING_UNSET:
+                det["landing_status"] = str(landing)
+            out.append(det)
+        return out
+
+    def to_competition_dicts(self) -> List[Dict]:
+        """Yarışma çıktı şeması (detect() dönüşü / payload girdisi)."""
+        out: List[Dict] = []
+        for cls_id, landing, motion, coords, conf, trace_id in zip(
+            self.cls_ids.tolist(),
+            self.landing_status.tolist(),
+            self.motion_status.tolist(),
+            self.coords.tolist(),
+            self.scores.tolist(),
+            self.trace_ids.tolist(),
+        ):
+            out.append({
+                "cls": str(cls_id),
+                # Hesaplanmamış iniş durumu telde "-1" (iniş alanı değil) olarak gider
+                "landing_status": str(-1 if landing == LANDING_UNSET else landing),
+                "motion_status": str(motion),
+                "top_left_x": coords[0],
+                "top_left_y": coords[1],
+                "bottom_right_x": coords[2],
+                "bottom_right_y": coords[3],
+                "confidence": conf,
+                "trace_id": trace_id or "",
+            })
+        return out
+
@@ -0,0 +1,148 @@
+"""Determinizm self-test: yarışma adımını aynı dizi üzerinde tekrar tekrar koşturur.
+
+Kareler yerel bir ReplayNetwork üzerinden main._fetch_competition_step'e
+verilir. Böylece yarışma akışının tamamı koşar: zamanlayıcı planı, FrameContext,
+paylaşılan FrameMotionService, anahtar kare taşıma ve kopya havuzlu ROI/SAHI
+geçişleri. Her kare için NetworkManager.build_competition_payload ile yarışma
+payload'ı üretilir.
+
+run_isolated her tekrarı ayrı bir Python sürecinde çalıştırır. Modüller, model
+ve global durum her tekrarda sıfırdan kurulur. Payload'lar JSON dosyasından
+okunur ve diff_payload_runs ile birebir karşılaştırılır.
+
+Gecikme kompanzasyonu (LATENCY_COMP_*) gönderim anındaki duvar saatine
+bağlıdır ve tasarım gereği koşudan koşuya değişir. Bu yüzden karşılaştırılan
+konum, kompanzasyon öncesi detected_translation'dır.
+"""
+
+import json
+import os
+import subprocess
+import tempfile
+from collections import defaultdict, deque
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from config.settings import Settings
+from src.network import FrameFetchResult, FrameFetchStatus, NetworkManager
+from src.runtime_profile import diff_payload_runs
+from src.utils import Logger
+
+
+class ReplayNetwork:
+    """_fetch_competition_step için yerel kare kaynağı (DatasetLoader kareleri)."""
+
+    def __init__(self, frames: Iterable[Dict[str, Any]]) -> None:
+        self._frames = iter(frames)
+        self._images: Dict[Any, np.ndarray] = {}
+
+    def get_frame(self) -> FrameFetchResult:
+        frame_info = next(self._frames, None)
+        if frame_info is None:
+            return FrameFetchResult(status=FrameFetchStatus.END_OF_STREAM)
+        frame_data = dict(frame_info["server_data"])
+        frame_data.setdefault("frame_id", frame_info["frame_idx"])
+        self._images[frame_data["frame_id"]] = frame_info["frame"]
+        return FrameFetchResult(status=FrameFetchStatus.OK, frame_data=frame_data)
+
+    def download_image(self, frame_data: Dict[str, Any]) -> Optional[np.ndarray]:
+        return self._images.pop(frame_data.get("frame_id"), None)
+
+    @staticmethod
+    def consume_timeout_counters() -> Dict[str, int]:
+        return {}
+
+
+def collect_payloads(
+    frames: Iterable[Dict[str, Any]],
+    detector: Any,
+    max_frames: int,
+    image_matcher: Any = None,
+) -> List[Dict[str, Any]]:
+    """Kareleri yarışma adımından geçirir; kare başına yarışma payload'ı."""
+    import main
+    from src.frame_motion import FrameMotionService
+    from src.keyframe_propagation import KeyframePropagator
+    from src.localization import VisualOdometry
+    from src.movement import MovementEstimator
+    from src.resilience import SessionResilienceController
+
+    log = Logger("Selftest")
+    network = ReplayNetwork(frames)
+    movement = MovementEstimator()
+    odometry = VisualOdometry()
+    resilience = SessionResilienceController(log=log)
+    scheduler = main._build_inference_scheduler()
+    propagator = (
+        KeyframePropagator() if bool(getattr(Settings, "KEYFRAME_MODE_ENABLED", False)) else None
+    )
+    motion_service = FrameMotionService()
+    kpi_counters: Dict[str, Any] = defaultdict(int)
+    degrade_replay_state: Dict[str, Any] = {"objects": [], "age": 10**9}
+    frame_gap_state: Dict[str, Any] = {"next_index": 0, "pending_shift": (0.0, 0.0)}
+
+    payloads: List[Dict[str, Any]] = []
+    while len(payloads) < max_frames:
+        pending, _, action, _ = main._fetch_competition_step(
+            log,
+            network,
+            detector,
+            movement,
+            odometry,
+            image_matcher,
+            resilience,
+            kpi_counters,
+            0,
+            1,
+            degrade_replay_state,
+            deque(maxlen=5),
+            scheduler,
+            propagator,
+            motion_service,
+            frame_gap_state,
+        )
+        if action == "break":
+            break
+        if pending is None:
+            continue
+        payloads.append(
+            NetworkManager.build_competition_payload(
+                pending["frame_id"],
+                pending["detected_objects"],
+                pending["detected_translation"],
+                frame_data=pending["frame_data"],
+                frame_shape=pending["frame_shape"],
+                detected_undefined_objects=pending.get("detected_undefined_objects"),
+            )
+        )
+    return payloads
+
+
+def run_isolated(
+    worker_argv: Sequence[str], repetitions: int = 2, timeout_s: Optional[float] = None
+) -> List[List[Dict[str, Any]]]:
+    """worker_argv + ["--worker-output", yol] komutunu her tekrar için ayrı süreçte çalıştırır."""
+    runs: List[List[Dict[str, Any]]] = []
+    with tempfile.TemporaryDirectory(prefix="determinism_") as tmp:
+        for rep in range(max(2, int(repetitions))):
+            out_path = os.path.join(tmp, f"run_{rep}.json")
+            subprocess.run(
+                [*worker_argv, "--worker-output", out_path], check=True, timeout=timeout_s
+            )
+            with open(out_path, encoding="utf-8") as handle:
+                runs.append(json.load(handle))
+    return runs
+
+
+def compare_runs(runs: Sequence[List[Dict[str, Any]]]) -> List[str]:
+    """İlk koşuyu diğerleriyle karşılaştırır; fark satırları (boş = bit-özdeş)."""
+    diffs: List[str] = []
+    for idx, other in enumerate(runs[1:], start=1):
+        diffs.extend(f"run {idx}: {line}" for line in diff_payload_runs(runs[0], other))
+    return diffs
+
+
+def write_payloads(path: str, payloads: List[Dict[str, Any]]) -> None:
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(payloads, handle)
@@ -0,0 +1,308 @@
+"""Kare başına paylaşılan optik akış servisi (hareket + görsel odometri).
+
+MovementEstimator (kamera kayması) ve VisualOdometry (GPS=0 yer değiştirme /
+ölçek) aynı kare çifti üzerinde ayrı gri kare, ayrı goodFeaturesToTrack
+kümesi ve ayrı calcOpticalFlowPyrLK çalıştırıyordu. FrameMotionService oturum
+boyunca tek bir izlenen nokta kümesi tutar:
+
+- Gri kare MOTION_COMP_DOWNSCALE ölçeğine kare başına bir kez küçültülür ve
+  bir sonraki karede önceki kare olarak yeniden kullanılır. (Python OpenCV
+  bağlaması calcOpticalFlowPyrLK'ya hazır piramit verilmesini kabul etmez;
+  piramit LK içinde kurulur.)
+- İleri-geri doğrulanmış nokta çiftleri FrameMotion sonucunda tutulur. Sonuç
+  FrameContext üzerinde saklanır; aynı karede ikinci tüketici akışı yeniden
+  hesaplamaz.
+- Akış tembel hesaplanır: kareyi yalnızca referans olarak gören tüketici (ör.
+  GPS sağlıklıyken VO) LK maliyeti ödemez.
+- İzlenen nokta sayısı MOTION_COMP_MIN_FEATURES altına düşünce GridFeatureSeeder
+  yalnızca izlenen noktası kalmamış grid hücrelerini FAST/AGAST ile doldurur;
+  hayatta kalan izler korunur ve noktalar kareye eşit yayılır.
+
+Servis FrameContext(frame, motion_service=...) ile paylaşılır; bağlamda servis
+yoksa her tüketici kendi özel servisini kullanır (eski bağımsız davranış).
+"""
+
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+import cv2
+import numpy as np
+
+from config.settings import Settings
+
+if TYPE_CHECKING:
+    from src.utils import FrameContext
+
+_PYRAMID_LEVELS = 3
+_MIN_PAIRS = 5
+
+
+def prepare_flow_gray(frame_ctx: "FrameContext") -> Tuple[np.ndarray, float]:
+    """MOTION_COMP_DOWNSCALE ölçeğindeki gri seviye (FrameContext önbelleği); (görüntü, ters ölçek)."""
+    scale = float(getattr(Settings, "MOTION_COMP_DOWNSCALE", 1.0))
+    if scale >= 1.0 or scale <= 0.1:
+        return frame_ctx.gray, 1.0
+
+    h, w = frame_ctx.shape[:2]
+    target_w = max(64, int(w * scale))
+    target_h = max(64, int(h * scale))
+    if target_w >= w or target_h >= h:
+        return frame_ctx.gray, 1.0
+
+    return frame_ctx.gray_level((target_w, target_h), cv2.INTER_AREA), w / float(target_w)
+
+
+def _empty_pairs() -> Tuple[np.ndarray, np.ndarray]:
+    empty = np.zeros((0, 2), dtype=np.float32)
+    return empty, empty.copy()
+
+
+class GridFeatureSeeder:
+    """Grid kovalı FAST/AGAST nokta tohumlayıcı.
+
+    Kare MOTION_COMP_SEED_GRID_COLS × ROWS hücreye bölünür; yalnızca izlenen
+    noktası olmayan hücrelerde dedektör çalışır ve hücre başına en güçlü
+    MOTION_COMP_SEED_PER_CELL nokta (MOTION_COMP_MIN_DISTANCE aralıklı) alınır.
+    Tam kare goodFeaturesToTrack'e göre ucuzdur ve noktaları dokulu bölgelere
+    yığmaz. Çağrı başına en fazla MOTION_COMP_SEED_MAX_CELLS hücre işlenir
+    (0 = sınırsız); kalanlar bir sonraki tohumlamaya kalır. Bütçe süreye değil
+    hücre sayısına bağlıdır ki aynı kare her koşuda aynı noktaları üretsin
+    (max/parallel determinizm profilleri). Başlangıç hücresi her çağrıda döner
+    ki bütçe hep aynı bölgeyi aç bırakmasın.
+    """
+
+    def __init__(self) -> None:
+        self._cols = max(1, int(getattr(Settings, "MOTION_COMP_SEED_GRID_COLS", 8)))
+        self._rows = max(1, int(getattr(Settings, "MOTION_COMP_SEED_GRID_ROWS", 6)))
+        self._per_cell = max(1, int(getattr(Settings, "MOTION_COMP_SEED_PER_CELL", 4)))
+        self._max_points = max(1, int(Settings.MOTION_COMP_MAX_CORNERS))
+        self._min_distance = float(Settings.MOTION_COMP_MIN_DISTANCE)
+        self._max_cells = max(0, int(getattr(Settings, "MOTION_COMP_SEED_MAX_CELLS", 24)))
+        threshold = int(getattr(Settings, "MOTION_COMP_SEED_FAST_THRESHOLD", 20))
+        if str(getattr(Settings, "MOTION_COMP_SEED_DETECTOR", "fast")).strip().lower() == "agast":
+            self._detector = cv2.AgastFeatureDetector_create(threshold=threshold)
+        else:
+            self._detector = cv2.FastFeatureDetector_create(threshold=threshold)
+        self._start_cell = 0
+        self.budget_hits = 0
+        self.cells_seeded = 0
+
+    def seed(self, gray: np.ndarray, existing: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """Mevcut noktalar + boş hücrelere eklenen yeni noktalar, (N, 1, 2) float32."""
+        h, w = gray.shape[:2]
+        occupied = np.zeros(self._rows * self._cols, dtype=bool)
+        kept = np.zeros((0, 2), dtype=np.float32)
+        if existing is not None and len(existing):
+            kept = existing.reshape(-1, 2).astype(np.float32)
+            occupied[np.unique(self._cell_index(kept, w, h))] = True
+
+        empty = np.flatnonzero(~occupied)
+        if len(empty):
+            empty = np.roll(empty, -(self._start_cell % len(empty)))
+            self._start_cell += 1
+        added: List[np.ndarray] = []
+        room = self._max_points - len(kept)
+        for i, cell in enumerate(empty):
+            if room <= 0:
+                break
+            if self._max_cells and i >= self._max_cells:
+                self.budget_hits += 1
+                break
+            points = self._detect_cell(gray, int(cell), w, h)[:room]
+            if len(points):
+                added.append(points)
+                room -= len(points)
+                self.cells_seeded += 1
+
+        if added:
+            kept = np.concatenate([kept] + added)
+        return kept.reshape(-1, 1, 2) if len(kept) else None
+
+    def _cell_index(self, points: np.ndarray, w: int, h: int) -> np.ndarray:
+        col = np.clip((points[:, 0] * self._cols / w).astype(np.int64), 0, self._cols - 1)
+        row = np.clip((points[:, 1] * self._rows / h).astype(np.int64), 0, self._rows - 1)
+        return row * self._cols + col
+
+    def _detect_cell(self, gray: np.ndarray, cell: int, w: int, h: int) -> np.ndarray:
+        row, col = divmod(cell, self._cols)
+        x1, x2 = (col * w) // self._cols, ((col + 1) * w) // self._cols
+        y1, y2 = (row * h) // self._rows, ((row + 1) * h) // self._rows
+        keypoints = self._detector.detect(gray[y1:y2, x1:x2])
+        if not keypoints:
+            return np.zeros((0, 2), dtype=np.float32)
+        keypoints = sorted(keypoints, key=lambda kp: kp.response, reverse=True)
+        picked: List[Tuple[float, float]] = []
+        min_dist_sq = self._min_distance * self._min_distance
+        for kp in keypoints:
+            x, y = kp.pt
+            if all((x - px) ** 2 + (y - py) ** 2 >= min_dist_sq for px, py in picked):
+                picked.append((x, y))
+                if len(picked) >= self._per_cell:
+                    break
+        return np.asarray(picked, dtype=np.float32) + np.float32([x1, y1])
+
+
+class _FlowFrame:
+    """Akış ölçeğindeki gri kare ve kareden izlenecek noktalar."""
+
+    __slots__ = ("gray", "inv_scale", "points")
+
+    def __init__(self, gray: np.ndarray, inv_scale: float) -> None:
+        self.gray = gray
+        self.inv_scale = inv_scale
+        self.points: Optional[np.ndarray] = None  # (N, 1, 2) float32
+
+
+class FrameMotion:
+    """Önceki kare → bu kare akış sonucu; nokta çiftleri ilk istekte hesaplanır."""
+
+    def __init__(
+        self,
+        service: "FrameMotionService",
+        prev: Optional[_FlowFrame],
+        current: _FlowFrame,
+    ) -> None:
+        self._service = service
+        self.prev = prev
+        self.current = current
+        self.source_count = 0
+        self._pairs: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._frame_diff: Optional[float] = None
+
+    @property
+    def gray(self) -> np.ndarray:
+        return self.current.gray
+
+    @property
+    def inv_scale(self) -> float:
+        return self.current.inv_scale
+
+    @property
+    def has_reference(self) -> bool:
+        return self.prev is not None
+
+    def pairs(self) -> Tuple[np.ndarray, np.ndarray]:
+        """İleri-geri doğrulanmış (eski, yeni) noktalar, akış ölçeğinde (N, 2)."""
+        if self._pairs is None:
+            self._pairs = self._service._track(self)
+        return self._pairs
+
+    def pairs_full_res(self) -> Tuple[np.ndarray, np.ndarray]:
+        """pairs() tam çözünürlük piksel koordinatlarında."""
+        old, new = self.pairs()
+        return old * self.inv_scale, new * self.inv_scale
+
+    def frame_diff(self) -> float:
+        """Önceki kareyle ortalama mutlak gri fark (donmuş kare tespiti); ilk karede inf."""
+        if self._frame_diff is None:
+            self._frame_diff = (
+                float("inf")
+                if self.prev is None
+                else float(cv2.absdiff(self.prev.gray, self.current.gray).mean())
+            )
+        return self._frame_diff
+
+    def tracked_points(self) -> Optional[np.ndarray]:
+        """Bu kareden sonraki kareye izlenecek noktalar (gerekirse şimdi tespit edilir)."""
+        self.pairs()
+        return self._service._ensure_points(self.current)
+
+
+class FrameMotionService:
+    """Oturum boyu tek nokta kümesi; kare başına bir küçültme ve bir ileri-geri LK."""
+
+    def __init__(self) -> None:
+        self._win = int(Settings.MOTION_COMP_WIN_SIZE)
+        self._lk_criteria = (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 30, 0.01)
+        self._last: Optional[FrameMotion] = None
+        self._stats: Dict[str, int] = {"frames": 0, "flow_runs": 0, "feature_detects": 0}
+        self._seeder: Optional[GridFeatureSeeder] = (
+            GridFeatureSeeder()
+            if str(getattr(Settings, "MOTION_COMP_SEED_METHOD", "grid")).strip().lower() == "grid"
+            else None
+        )
+
+    def step(self, frame_ctx: "FrameContext") -> FrameMotion:
+        """Servisi bu kareye ilerletir; aynı FrameContext için aynı sonucu döndürür."""
+        return frame_ctx.derive("frame_motion", lambda: self._advance(frame_ctx), key=id(self))
+
+    def stats(self) -> Dict[str, int]:
+        out = dict(self._stats)
+        if self._seeder is not None:
+            out["seed_cells"] = self._seeder.cells_seeded
+            out["seed_budget_hits"] = self._seeder.budget_hits
+        return out
+
+    def _advance(self, frame_ctx: "FrameContext") -> FrameMotion:
+        gray, inv_scale = prepare_flow_gray(frame_ctx)
+        prev = self._last.current if self._last is not None else None
+        if prev is not None and prev.gray.shape != gray.shape:
+            prev = None  # çözünürlük değişti: referans yok
+        motion = FrameMotion(self, prev, _FlowFrame(gray, inv_scale))
+        self._last = motion
+        self._stats["frames"] += 1
+        return motion
+
+    def _detect(self, gray: np.ndarray, existing: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        self._stats["feature_detects"] += 1
+        if self._seeder is not None:
+            return self._seeder.seed(gray, existing)
+        return cv2.goodFeaturesToTrack(
+            gray,
+            maxCorners=Settings.MOTION_COMP_MAX_CORNERS,
+            qualityLevel=Settings.MOTION_COMP_QUALITY_LEVEL,
+            minDistance=Settings.MOTION_COMP_MIN_DISTANCE,
+        )
+
+    def _ensure_points(self, frame: _FlowFrame) -> Optional[np.ndarray]:
+        """Nokta kümesi MOTION_COMP_MIN_FEATURES altına düştüyse karede yeniden tespit.
+
+        Grid tohumlamada hayatta kalan izler korunur; gftt tüm kümeyi yeniler.
+        """
+        if frame.points is None or len(frame.points) < Settings.MOTION_COMP_MIN_FEATURES:
+            frame.points = self._detect(frame.gray, frame.points)
+        return frame.points
+
+    def _lk(self, src: _FlowFrame, dst: _FlowFrame, points: np.ndarray):
+        return cv2.calcOpticalFlowPyrLK(
+            src.gray,
+            dst.gray,
+            points,
+            None,
+            winSize=(self._win, self._win),
+            maxLevel=_PYRAMID_LEVELS,
+            criteria=self._lk_criteria,
+        )
+
+    def _track(self, motion: FrameMotion) -> Tuple[np.ndarray, np.ndarray]:
+        prev, cur = motion.prev, motion.current
+        if prev is None:
+            return _empty_pairs()
+        prev_points = self._ensure_points(prev)
+        if prev_points is None or len(prev_points) < _MIN_PAIRS:
+            return _empty_pairs()
+        motion.source_count = len(prev_points)
+
+        self._stats["flow_runs"] += 1
+        next_pts, status, _ = self._lk(prev, cur, prev_points)
+        if next_pts is None or status is None:
+            return _empty_pairs()
+
+        valid = status.flatten() == 1
+        old = prev_points[valid].reshape(-1, 2)
+        new = next_pts[valid].reshape(-1, 2)
+        fb_max_error = float(getattr(Settings, "MOTION_COMP_FB_MAX_ERROR", 1.5))
+        if len(new) >= _MIN_PAIRS and fb_max_error > 0.0:
+            back_pts, back_status, _ = self._lk(cur, prev, new.reshape(-1, 1, 2))
+            if back_pts is not None and back_status is not None:
+                fb_error = np.linalg.norm(back_pts.reshape(-1, 2) - old, axis=1)
+                fb_keep = (back_status.flatten() == 1) & (fb_error <= fb_max_error)
+                if np.count_nonzero(fb_keep) >= _MIN_PAIRS:
+                    old = old[fb_keep]
+                    new = new[fb_keep]
+
+        if len(new) < _MIN_PAIRS:
+            return _empty_pairs()
+        if self._seeder is not None or len(new) >= Settings.MOTION_COMP_MIN_FEATURES // 2:
+            # Aksi halde (gftt) bir sonraki karede bu karenin gri görüntüsünde yeniden tespit
+            cur.points = new.reshape(-1, 1, 2)
+        return old, new
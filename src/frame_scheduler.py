@@ -0,0 +1,313 @@
+"""Kare bütçesine göre çıkarım planı seçen zamanlayıcı (deadline-aware scheduler).
+
+Low-FPS guard global Settings alanlarını (SAHI_ENABLED, INFERENCE_SIZE, ...)
+ikili ve gecikmeli biçimde değiştiriyordu; bu alanlar worker thread'lerle
+paylaşıldığından yarışa açıktı. InferenceScheduler bunun yerine her kare için
+değişmez bir FramePlan üretir ve ObjectDetector.detect(runtime_profile=plan)
+ile yalnızca o kareye uygular.
+
+Maliyet modeli aşamaların ölçülen sürelerinin EMA'sıdır: tam kare geçişi
+(imgsz başına), SAHI tile başı maliyet, odaklı UAP/UAİ geçişi, tespit sonrası
+işlemler, Görev 3 eşleştirme, görsel odometri ve ağ (fetch/submit) payı.
+Bütçe 1000 / SCHEDULER_MIN_FPS ms'den güvenlik payı ve ağ payı düşülerek
+bulunur; merdivenden bütçeye sığan en zengin plan seçilir. Merdivenin son
+basamağı PROTECTIVE_INFERENCE_QUANTIZATION ile INT8 varyantına geçer. Görev 3
+hiçbir basamakta kapatılmaz.
+
+SCHEDULER_COST_SOURCE="static" (max/parallel determinizm profilleri) iken
+aşama süreleri duvar saatinden değil SCHEDULER_STATIC_COSTS_MS tablosundan
+gelir; plan yalnızca içerikten türeyen sayımlara (tile talebi) bağlı kalır ve
+aynı girdi koşudan koşuya aynı planları üretir. Ölçülen süreler bu modda da
+izlenir (stats()["measured"]) ve tabloyu kalibre etmek için kullanılır.
+"""
+
+import math
+import threading
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional
+
+from config.settings import Settings
+from src.quantization import QUANT_NONE, SUPPORTED_QUANTIZATION
+from src.utils import Logger
+
+
+def _quantization_setting(name: str) -> str:
+    mode = str(getattr(Settings, name, QUANT_NONE)).strip().lower()
+    return mode if mode in SUPPORTED_QUANTIZATION else QUANT_NONE
+
+
+@dataclass(frozen=True)
+class FramePlan:
+    """Tek kare için değişmez çıkarım planı."""
+
+    name: str
+    imgsz: int
+    conf: float
+    iou: float
+    max_det: int
+    augment: bool
+    sahi_enabled: bool
+    max_sahi_tiles: Optional[int]  # None = adaptif planlayıcının seçtiği tüm tile'lar
+    focused_pass: bool
+    quantization: str = QUANT_NONE  # ObjectDetector bu kare için ilgili model varyantına geçer
+    budget_ms: float = 0.0
+    predicted_ms: float = 0.0
+
+    def inference_config(self) -> Dict[str, Any]:
+        """ObjectDetector._build_inference_config ile aynı anahtarlar + plan sınırları."""
+        return {
+            "imgsz": int(self.imgsz),
+            "conf": float(self.conf),
+            "iou": float(self.iou),
+            "max_det": int(self.max_det),
+            "augment": bool(self.augment),
+            "sahi_enabled": bool(self.sahi_enabled),
+            "merge_iou": float(Settings.SAHI_MERGE_IOU),
+            "hybrid_iou": float(getattr(Settings, "HYBRID_NMS_IOU_THRESHOLD", 0.65)),
+            "max_sahi_tiles": self.max_sahi_tiles,
+            "focused_pass": bool(self.focused_pass),
+            "quantization": str(self.quantization),
+        }
+
+    def __str__(self) -> str:
+        tiles = "all" if self.max_sahi_tiles is None else self.max_sahi_tiles
+        return (
+            f"{self.name}(imgsz={self.imgsz} sahi={'on' if self.sahi_enabled else 'off'} "
+            f"tiles={tiles} focused={'on' if self.focused_pass else 'off'} "
+            f"quant={self.quantization} "
+            f"pred={self.predicted_ms:.0f}/{self.budget_ms:.0f}ms)"
+        )
+
+
+class StageCostModel:
+    """Aşama başına EMA süre (ms)."""
+
+    def __init__(self, alpha: float) -> None:
+        self._alpha = min(1.0, max(0.01, float(alpha)))
+        self._ema: Dict[str, float] = {}
+
+    def update(self, stage: str, value_ms: float) -> None:
+        value = max(0.0, float(value_ms))
+        prev = self._ema.get(stage)
+        self._ema[stage] = value if prev is None else (1.0 - self._alpha) * prev + self._alpha * value
+
+    def seed(self, costs: Dict[str, float]) -> None:
+        """Sabit maliyet tablosu (ms); EMA'sız doğrudan yazılır."""
+        for stage, value in costs.items():
+            self._ema[str(stage)] = max(0.0, float(value))
+
+    def get(self, stage: str, default: float = 0.0) -> float:
+        return float(self._ema.get(stage, default))
+
+    @staticmethod
+    def primary_key(imgsz: int, quantization: str = QUANT_NONE) -> str:
+        suffix = "" if quantization == QUANT_NONE else f"/{quantization}"
+        return f"primary@{int(imgsz)}{suffix}"
+
+    def primary(self, imgsz: int, quantization: str = QUANT_NONE, quant_ratio: float = 1.0) -> float:
+        """Görülmemiş imgsz için bilinen en yakın boyuttan piksel oranıyla ölçekler.
+
+        Nicemlenmiş varyant hiç ölçülmediyse FP32 tahmini quant_ratio ile çarpılır.
+        """
+        key = self.primary_key(imgsz, quantization)
+        if key in self._ema:
+            return self._ema[key]
+        suffix = key[len(f"primary@{int(imgsz)}"):]
+        known = []
+        for name, value in self._ema.items():
+            size, _, quant = name.partition("@")[2].partition("/")
+            if name.startswith("primary@") and (f"/{quant}" if quant else "") == suffix:
+                known.append((int(size), value))
+        if not known:
+            if quantization != QUANT_NONE:
+                return self.primary(imgsz) * quant_ratio
+            return 0.0
+        size, cost = min(known, key=lambda kv: abs(kv[0] - int(imgsz)))
+        return cost * (float(imgsz) / float(size)) ** 2
+
+    def snapshot(self) -> Dict[str, float]:
+        return {k: round(v, 2) for k, v in sorted(self._ema.items())}
+
+
+class InferenceScheduler:
+    """Bütçeye sığan en zengin FramePlan'ı seçer; ölçümlerle maliyetleri günceller.
+
+    Thread güvenlidir: plan() fetch worker'ında, observe_cycle() ana döngüde
+    çağrılır. Statik modda plan maliyetleri sabit tablodan gelir; ölçümler
+    yalnızca raporlanır.
+    """
+
+    def __init__(self) -> None:
+        self.log = Logger("Scheduler")
+        self._lock = threading.Lock()
+        self._last_plan_name: Optional[str] = None
+        self._costs = StageCostModel(getattr(Settings, "SCHEDULER_COST_EMA_ALPHA", 0.2))
+        self._static = (
+            str(getattr(Settings, "SCHEDULER_COST_SOURCE", "measured")).strip().lower() == "static"
+        )
+        # Plan kararının okuduğu model; ölçümlü modda ölçülen EMA ile aynıdır
+        self._plan_costs = self._costs
+        if self._static:
+            self._plan_costs = StageCostModel(getattr(Settings, "SCHEDULER_COST_EMA_ALPHA", 0.2))
+            self._plan_costs.seed(dict(getattr(Settings, "SCHEDULER_STATIC_COSTS_MS", {}) or {}))
+        self._min_fps = max(0.1, float(getattr(Settings, "SCHEDULER_MIN_FPS", 1.0)))
+        self._margin = min(0.9, max(0.0, float(getattr(Settings, "SCHEDULER_SAFETY_MARGIN", 0.15))))
+        self._last_compute_ms: Optional[float] = None
+        # Temel profil oturum başında bir kez okunur; sonrasında Settings'e yazılmaz
+        conf_global = float(Settings.CONFIDENCE_THRESHOLD)
+        conf_uap_uai = getattr(Settings, "CONFIDENCE_THRESHOLD_UAP_UAI", None)
+        self._base = FramePlan(
+            name="full",
+            imgsz=int(Settings.INFERENCE_SIZE),
+            conf=min(conf_global, float(conf_uap_uai)) if conf_uap_uai is not None else conf_global,
+            iou=float(Settings.NMS_IOU_THRESHOLD),
+            max_det=int(Settings.MAX_DETECTIONS),
+            augment=bool(Settings.AUGMENTED_INFERENCE),
+            sahi_enabled=bool(Settings.SAHI_ENABLED),
+            max_sahi_tiles=None,
+            focused_pass=bool(getattr(Settings, "UAP_UAI_FOCUSED_PASS_ENABLED", True)),
+            quantization=_quantization_setting("INFERENCE_QUANTIZATION"),
+        )
+        self._protective_quant = _quantization_setting("PROTECTIVE_INFERENCE_QUANTIZATION")
+        self._quant_ratio = min(
+            1.0, max(0.05, float(getattr(Settings, "SCHEDULER_QUANT_COST_RATIO", 0.6)))
+        )
+        self._protective_imgsz = min(
+            self._base.imgsz, max(256, int(getattr(Settings, "PROTECTIVE_INFERENCE_SIZE", 960)))
+        )
+        self._protective_conf = max(
+            self._base.conf, float(getattr(Settings, "PROTECTIVE_CONFIDENCE_THRESHOLD", 0.50))
+        )
+        self._protective_max_det = min(
+            self._base.max_det, max(1, int(getattr(Settings, "PROTECTIVE_MAX_DETECTIONS", 180)))
+        )
+
+    # ------------------------------------------------------------------ ölçüm
+    def observe_frame(
+        self,
+        plan: FramePlan,
+        detector_timings: Dict[str, Any],
+        task3_ms: Optional[float] = None,
+        vo_ms: Optional[float] = None,
+    ) -> None:
+        """Bir karenin aşama sürelerini maliyet modeline işler."""
+        with self._lock:
+            detect_ms = float(detector_timings.get("total_ms", 0.0))
+            accounted = 0.0
+            primary_ms = detector_timings.get("primary_ms")
+            if primary_ms is not None:
+                self._costs.update(
+                    self._costs.primary_key(plan.imgsz, plan.quantization), primary_ms
+                )
+                accounted += float(primary_ms)
+            tiles = int(detector_timings.get("tiles_run", 0))
+            tiles_ms = float(detector_timings.get("tiles_ms", 0.0))
+            if tiles > 0:
+                self._costs.update("tile", tiles_ms / tiles)
+                accounted += tiles_ms
+            if plan.sahi_enabled and plan.max_sahi_tiles is None and "tiles_run" in detector_timings:
+                # Sınırsız planda adaptif seçim + önbellek sonrası gerçek talep (içerikten türer)
+                self._costs.update("tiles_demand", tiles)
+                if self._static:
+                    self._plan_costs.update("tiles_demand", tiles)
+            focused_ms = detector_timings.get("focused_ms")
+            if focused_ms is not None:
+                self._costs.update("focused", focused_ms)
+                accounted += float(focused_ms)
+            self._costs.update("detect_other", max(0.0, detect_ms - accounted))
+            compute = detect_ms
+            if task3_ms is not None:
+                self._costs.update("task3", task3_ms)
+                compute += float(task3_ms)
+            if vo_ms is not None:
+                self._costs.update("vo", vo_ms)
+                compute += float(vo_ms)
+            self._last_compute_ms = compute
+
+    def observe_cycle(self, cycle_ms: float) -> None:
+        """Fetch→ack döngü süresi; hesaplama dışı pay (ağ, bekleme) ayrıştırılır."""
+        with self._lock:
+            if self._last_compute_ms is None:
+                return
+            self._costs.update("io", max(0.0, float(cycle_ms) - self._last_compute_ms))
+
+    # ------------------------------------------------------------------ plan
+    def budget_ms(self) -> float:
+        cycle = 1000.0 / self._min_fps
+        return max(0.0, cycle * (1.0 - self._margin) - self._plan_costs.get("io"))
+
+    def _predict(self, plan: FramePlan, tiles: float) -> float:
+        costs = self._plan_costs
+        cost = (
+            costs.primary(plan.imgsz, plan.quantization, self._quant_ratio)
+            + costs.get("detect_other")
+            + costs.get("vo")
+            + costs.get("task3")
+        )
+        if plan.sahi_enabled:
+            cost += tiles * costs.get("tile")
+        if plan.focused_pass:
+            cost += costs.get("focused")
+        return cost
+
+    def _ladder(self, budget: float) -> List[FramePlan]:
+        base = self._base
+        ladder = [base]
+        if base.sahi_enabled:
+            fixed = self._predict(replace(base, sahi_enabled=False), 0.0)
+            tile_cost = self._plan_costs.get("tile")
+            if tile_cost > 0.0:
+                fit = int(math.floor((budget - fixed) / tile_cost))
+                if fit >= 1:
+                    ladder.append(replace(base, name="tiles_capped", max_sahi_tiles=fit))
+            ladder.append(replace(base, name="no_sahi", sahi_enabled=False))
+        reduced = replace(base, name="no_sahi", sahi_enabled=False)
+        if base.focused_pass:
+            reduced = replace(reduced, name="no_focused", focused_pass=False)
+            ladder.append(reduced)
+        protective = replace(
+            reduced,
+            name="protective",
+            imgsz=self._protective_imgsz,
+            conf=self._protective_conf,
+            max_det=self._protective_max_det,
+            augment=False,
+        )
+        ladder.append(protective)
+        if self._protective_quant not in (QUANT_NONE, base.quantization):
+            ladder.append(
+                replace(protective, name="protective_quant", quantization=self._protective_quant)
+            )
+        return ladder
+
+    def plan(self) -> FramePlan:
+        """Bütçeye sığan ilk (en zengin) plan; hiçbiri sığmazsa en hafifi."""
+        with self._lock:
+            budget = self.budget_ms()
+            tiles_demand = self._plan_costs.get("tiles_demand")
+            chosen: Optional[FramePlan] = None
+            ladder = self._ladder(budget)
+            for candidate in ladder:
+                tiles = (
+                    tiles_demand
+                    if candidate.max_sahi_tiles is None
+                    else min(tiles_demand, candidate.max_sahi_tiles)
+                )
+                predicted = self._predict(candidate, tiles)
+                if predicted <= budget or candidate is ladder[-1]:
+                    chosen = replace(candidate, budget_ms=round(budget, 1), predicted_ms=round(predicted, 1))
+                    break
+            assert chosen is not None
+            if chosen.name != self._last_plan_name:
+                self.log.info(f"Inference plan -> {chosen}")
+                self._last_plan_name = chosen.name
+            return chosen
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "budget_ms": round(self.budget_ms(), 1),
+                "cost_source": "static" if self._static else "measured",
+                "costs": self._plan_costs.snapshot(),
+                "measured": self._costs.snapshot(),
+            }
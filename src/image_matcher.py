@@ -1,14 +1,14 @@
 """Task 3 reference-object matching (ORB/SIFT) with robust input validation."""
 
 import os
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import cv2
 import numpy as np
 
 from config.settings import Settings
 from src.task3_reference_policy import canonicalize_task3_references
-from src.utils import Logger
+from src.utils import FrameContext, Logger
 
 
 class ReferenceObject:
@@ -290,12 +290,13 @@ class ImageMatcher:
             )
         return self.load_references(ref_list)
 
-    def match(self, frame: np.ndarray) -> List[Dict[str, Any]]:
+    def match(self, frame: Union[np.ndarray, FrameContext]) -> List[Dict[str, Any]]:
+        """Referansları karede arar; FrameContext verilirse gri kare diğer modüllerle paylaşılır."""
         self._frame_counter += 1
         if not self.references:
             return []
 
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if len(frame.shape) == 3 else frame
+        gray = FrameContext.wrap(frame).gray
         frame_kp, frame_desc = self._extract_features(gray, self.detector)
 
         should_try_domain_fallback = (
@@ -0,0 +1,123 @@
+"""Görev 1 çıkarım arka ucu seçimi: PyTorch, ONNX Runtime veya OpenVINO.
+
+Ultralytics, dışa aktarılmış grafikleri (``.onnx`` / ``*_openvino_model/``)
+aynı ``YOLO(...).predict`` arayüzüyle yükler; dönen Results nesneleri ve
+``model.names`` meta verisi aynıdır. Bu nedenle ObjectDetector'ın
+``_parse_results`` ve sınıf eşleme davranışı arka uçtan bağımsızdır.
+
+``.pt`` modeli bir kez dışa aktarılır ve MODEL_PATH'in yanına önbelleklenir;
+``.pt`` dosyası daha yeniyse yeniden dışa aktarılır. ONNX/OpenVINO yalnızca
+CPU'da kullanılır (CUDA varken PyTorch + FP16 daha hızlıdır).
+
+INFERENCE_QUANTIZATION ``int8_*`` ise ONNX grafiği ayrıca INT8'e nicemlenir
+(bkz. src/quantization.py); nicemleme yalnızca ONNX Runtime ile çalışır.
+"""
+
+import os
+from typing import Any, Tuple
+
+from ultralytics import YOLO
+
+from config.settings import Settings
+from src.quantization import QUANT_NONE, ensure_quantized, resolve_quantization
+from src.utils import Logger
+
+log = Logger("InferenceBackend")
+
+BACKEND_TORCH = "torch"
+BACKEND_ONNX = "onnx"
+BACKEND_OPENVINO = "openvino"
+SUPPORTED_BACKENDS = (BACKEND_TORCH, BACKEND_ONNX, BACKEND_OPENVINO)
+
+
+def resolve_backend(requested: str, device: str) -> str:
+    """İstenen arka ucu doğrular; CUDA cihazında veya bilinmeyen değerde torch döner."""
+    backend = str(requested or BACKEND_TORCH).strip().lower()
+    if backend not in SUPPORTED_BACKENDS:
+        log.warn(f"Bilinmeyen INFERENCE_BACKEND='{requested}'; torch kullanılıyor")
+        return BACKEND_TORCH
+    if backend != BACKEND_TORCH and device == "cuda":
+        log.info(f"CUDA aktif: INFERENCE_BACKEND={backend} yok sayıldı, torch kullanılıyor")
+        return BACKEND_TORCH
+    return backend
+
+
+def exported_model_path(model_path: str, backend: str) -> str:
+    """Ultralytics export adlandırması: ``<stem>.onnx`` / ``<stem>_openvino_model``."""
+    stem, _ = os.path.splitext(model_path)
+    if backend == BACKEND_ONNX:
+        return stem + ".onnx"
+    if backend == BACKEND_OPENVINO:
+        return stem + "_openvino_model"
+    return model_path
+
+
+def _is_fresh(exported: str, model_path: str) -> bool:
+    if not os.path.exists(exported):
+        return False
+    try:
+        return os.path.getmtime(exported) >= os.path.getmtime(model_path)
+    except OSError:
+        return False
+
+
+def ensure_exported(model_path: str, backend: str) -> str:
+    """Önbellekteki dışa aktarılmış grafiği döndürür; yoksa/eskiyse bir kez üretir."""
+    exported = exported_model_path(model_path, backend)
+    if backend == BACKEND_TORCH or _is_fresh(exported, model_path):
+        return exported
+
+    log.info(f"Model {backend} formatına aktarılıyor (tek seferlik): {exported}")
+    # dynamic=True: runtime profilleri (1280/960), SAHI tile'ları (640) ve tile
+    # batch'leri aynı grafikle çalışır.
+    written = YOLO(model_path).export(
+        format=backend,
+        imgsz=int(Settings.INFERENCE_SIZE),
+        dynamic=True,
+        half=False,
+        simplify=backend == BACKEND_ONNX,
+    )
+    # Ultralytics çıktıyı .pt'nin yanına yazar; farklı bir yol bildirirse o kullanılır
+    written = str(written or "")
+    return written if written and os.path.exists(written) else exported
+
+
+def load_model(
+    model_path: str,
+    device: str,
+    requested_backend: str,
+    quantization: str = QUANT_NONE,
+) -> Tuple[Any, str, str]:
+    """(YOLO modeli, etkin arka uç, etkin nicemleme).
+
+    Dışa aktarma/yükleme başarısızsa torch'a, INT8 doğruluk korumasını
+    geçemezse FP32 grafiğe düşer.
+    """
+    backend = resolve_backend(requested_backend, device)
+    quant = resolve_quantization(quantization)
+    if quant != QUANT_NONE and device == "cuda":
+        log.info(f"CUDA aktif: INFERENCE_QUANTIZATION={quant} yok sayıldı")
+        quant = QUANT_NONE
+    if quant != QUANT_NONE and backend != BACKEND_ONNX:
+        # INT8 grafiği ONNX Runtime ile üretilir ve çalıştırılır
+        log.info(f"INFERENCE_QUANTIZATION={quant}: arka uç {backend} → {BACKEND_ONNX}")
+        backend = BACKEND_ONNX
+
+    if backend != BACKEND_TORCH:
+        try:
+            exported = ensure_exported(model_path, backend)
+            if quant != QUANT_NONE:
+                try:
+                    quantized = ensure_quantized(exported, quant, YOLO)
+                except Exception as exc:  # onnxruntime.quantization eksik vb.
+                    log.warn(f"INT8 nicemleme başarısız ({exc}); FP32 grafik kullanılıyor")
+                    quantized = None
+                if quantized is not None:
+                    return YOLO(quantized, task="detect"), backend, quant
+            return YOLO(exported, task="detect"), backend, QUANT_NONE
+        except Exception as exc:  # export bağımlılığı eksik / bozuk grafik
+            log.warn(f"{backend} arka ucu yüklenemedi ({exc}); torch kullanılıyor")
+
+    model = YOLO(model_path)
+    model.to(device)
+    return model, BACKEND_TORCH, QUANT_NONE
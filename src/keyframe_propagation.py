@@ -0,0 +1,191 @@
+"""Anahtar kare tespiti + ara karelerde optik akışla kutu taşıma.
+
+Tam tespit zinciri yetişemediğinde ObjectDetector yalnızca anahtar karelerde
+çalışır; aradaki karelerde son anahtar karenin kutuları seyrek LK akışıyla
+taşınır. Akış, MovementEstimator'ın kamera kayması için zaten izlediği
+öznitelikleri (aynı küçültülmüş gri görüntü üzerinde) yeniden kullanır; kutu
+içinde yeterli öznitelik yoksa kutu içi ızgara noktaları eklenir.
+
+Bayatlamaya karşı sınırlar:
+- Güven her taşınan karede KEYFRAME_CONF_DECAY ile çarpılır; sınıf eşiğinin
+  altına düşen kutular bırakılır.
+- En fazla KEYFRAME_MAX_PROPAGATION_FRAMES kare taşınır, sonra tespit zorunlu.
+- Kutu içi akış artığı (noktaların medyan kaymadan sapması) büyükse veya
+  kamera öznitelikleri büyük oranda kaybolduysa (sahne değişimi) taşıma
+  reddedilir ve tespit zorlanır.
+
+Taşınan karelerde iniş durumu kutuların yeni konumuyla yeniden hesaplanır;
+hareket durumu MovementEstimator.annotate ile her zamanki gibi atanır.
+"""
+
+from typing import Any, Dict, Optional
+
+import cv2
+import numpy as np
+
+from config.settings import Settings
+from src.detection_batch import DetectionBatch
+from src.utils import Logger
+
+# Kutu içi yedek ızgara (kutu boyunun oranı olarak)
+_GRID = np.array([0.2, 0.5, 0.8], dtype=np.float32)
+
+
+class KeyframePropagator:
+    """Son anahtar karenin tespitlerini saklar ve ara karelere taşır."""
+
+    def __init__(self) -> None:
+        self.log = Logger("Keyframe")
+        self._max_frames = max(0, int(getattr(Settings, "KEYFRAME_MAX_PROPAGATION_FRAMES", 2)))
+        self._decay = min(1.0, max(0.0, float(getattr(Settings, "KEYFRAME_CONF_DECAY", 0.9))))
+        self._max_residual = float(getattr(Settings, "KEYFRAME_MAX_RESIDUAL_PX", 6.0))
+        self._min_tracked_ratio = float(getattr(Settings, "KEYFRAME_MIN_TRACKED_RATIO", 0.5))
+        self._min_box_points = max(1, int(getattr(Settings, "KEYFRAME_MIN_BOX_POINTS", 3)))
+        self._last: Optional[DetectionBatch] = None
+        self._age = 0
+        self._stats: Dict[str, Any] = {"keyframes": 0, "propagated": 0, "forced": {}}
+
+    def reset(self) -> None:
+        self._last = None
+        self._age = 0
+
+    def remember_keyframe(self, detections: DetectionBatch) -> None:
+        """Tam tespit çıktısını (annotate öncesi) bir sonraki taşıma için saklar."""
+        self._last = detections.select(np.arange(len(detections)))
+        self._age = 0
+        self._stats["keyframes"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "forced": dict(self._stats["forced"])}
+
+    def _force(self, reason: str) -> None:
+        """Taşımayı reddeder (sayaç + debug log); çağıran tespit çalıştırır."""
+        forced = self._stats["forced"]
+        forced[reason] = forced.get(reason, 0) + 1
+        if bool(getattr(Settings, "DEBUG", False)):
+            self.log.debug(f"Keyframe forced: {reason} (age={self._age})")
+        return None
+
+    def propagate(self, frame_ctx: Any, movement: Any) -> Optional[DetectionBatch]:
+        """Son anahtar kareyi bu kareye taşır; None → tespit çalıştırılmalı.
+
+        movement.annotate() bu kare için çağrılmadan önce kullanılmalıdır:
+        flow_reference() önceki karenin gri görüntüsünü ve özniteliklerini verir.
+        """
+        if self._last is None:
+            return self._force("no_keyframe")
+        if self._age >= self._max_frames:
+            return self._force("max_length")
+        prev_gray, prev_points, inv_scale = movement.flow_reference()
+        if prev_gray is None:
+            return self._force("no_flow_reference")
+        gray, cur_inv_scale = movement.flow_gray(frame_ctx)
+        if gray.shape != prev_gray.shape or cur_inv_scale != inv_scale:
+            return self._force("resolution_change")
+
+        boxes = self._last.boxes / inv_scale
+        global_pts = (
+            np.zeros((0, 2), dtype=np.float32)
+            if prev_points is None
+            else prev_points.reshape(-1, 2).astype(np.float32)
+        )
+        points = [global_pts]
+        owners = [np.full(len(global_pts), -1, dtype=np.int64)]
+        for i, (x1, y1, x2, y2) in enumerate(boxes):
+            inside = (
+                (global_pts[:, 0] >= x1) & (global_pts[:, 0] <= x2)
+                & (global_pts[:, 1] >= y1) & (global_pts[:, 1] <= y2)
+            )
+            owned = global_pts[inside]
+            if owned.shape[0] < self._min_box_points:
+                gx = x1 + _GRID * (x2 - x1)
+                gy = y1 + _GRID * (y2 - y1)
+                owned = np.stack(np.meshgrid(gx, gy), axis=-1).reshape(-1, 2).astype(np.float32)
+            points.append(owned)
+            owners.append(np.full(len(owned), i, dtype=np.int64))
+        old = np.concatenate(points, axis=0)
+        owner = np.concatenate(owners)
+        if old.shape[0] == 0:
+            return self._force("no_features")
+
+        valid, delta = self._track(prev_gray, gray, old)
+        is_global = owner == -1
+        if np.count_nonzero(is_global) and (
+            np.count_nonzero(valid & is_global) < self._min_tracked_ratio * np.count_nonzero(is_global)
+        ):
+            return self._force("scene_change")
+        # Kamera kayması: izlenen kamera öznitelikleri, yoksa tüm geçerli noktalar
+        reference = valid & is_global if np.count_nonzero(valid & is_global) else valid
+        if not np.count_nonzero(reference):
+            return self._force("no_features")
+        camera = np.median(delta[reference], axis=0)
+
+        shifts = np.zeros((len(boxes), 2), dtype=np.float64)
+        for i in range(len(boxes)):
+            own = valid & (owner == i)
+            if np.count_nonzero(own) < self._min_box_points:
+                # Kutu izlenemiyor: kamera kaymasıyla taşınır (sabit nesne varsayımı)
+                shifts[i] = camera
+                continue
+            d = delta[own]
+            med = np.median(d, axis=0)
+            residual = float(np.median(np.linalg.norm(d - med, axis=1))) * inv_scale
+            if residual > self._max_residual:
+                return self._force("flow_residual")
+            shifts[i] = med
+        shifts *= inv_scale
+
+        frame = frame_ctx.frame
+        out = self._moved(self._last, shifts, frame.shape)
+        try:
+            from src.uap_uai import determine_landing_status_batch
+            determine_landing_status_batch(out, frame.shape[1], frame.shape[0], frame)
+        except ImportError:
+            pass
+        self._age += 1
+        self._last = out
+        self._stats["propagated"] += 1
+        return out.select(np.arange(len(out)))
+
+    @staticmethod
+    def _track(prev_gray: np.ndarray, gray: np.ndarray, old: np.ndarray):
+        """İleri-geri LK; (geçerli maske, kayma) döndürür."""
+        win = int(Settings.MOTION_COMP_WIN_SIZE)
+        lk = dict(
+            winSize=(win, win),
+            maxLevel=3,
+            criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 30, 0.01),
+        )
+        p0 = old.reshape(-1, 1, 2)
+        p1, st, _ = cv2.calcOpticalFlowPyrLK(prev_gray, gray, p0, None, **lk)
+        if p1 is None or st is None:
+            return np.zeros(len(old), dtype=bool), np.zeros((len(old), 2), dtype=np.float32)
+        back, st_back, _ = cv2.calcOpticalFlowPyrLK(gray, prev_gray, p1, None, **lk)
+        valid = st.reshape(-1) == 1
+        if back is not None and st_back is not None:
+            fb_error = np.linalg.norm(back.reshape(-1, 2) - old, axis=1)
+            fb_max = float(getattr(Settings, "MOTION_COMP_FB_MAX_ERROR", 1.5))
+            valid &= (st_back.reshape(-1) == 1) & (fb_error <= max(fb_max, 1e-3))
+        return valid, p1.reshape(-1, 2) - old
+
+    def _moved(self, batch: DetectionBatch, shifts: np.ndarray, frame_shape) -> DetectionBatch:
+        """Kutuları öteler, güveni söndürür, kare dışına çıkan/eşik altı kutuları bırakır."""
+        h, w = int(frame_shape[0]), int(frame_shape[1])
+        offset = np.tile(shifts, 2)
+        out = batch.select(np.arange(len(batch)))
+        out.boxes = batch.boxes + offset
+        coords = batch.coords + offset
+        coords[:, [0, 2]] = np.clip(coords[:, [0, 2]], 0.0, w)
+        coords[:, [1, 3]] = np.clip(coords[:, [1, 3]], 0.0, h)
+        out.coords = np.round(coords, 2)
+        out.scores = np.round(batch.scores * self._decay, 4)
+
+        conf_floor = np.full(len(out), float(Settings.CONFIDENCE_THRESHOLD))
+        conf_uap_uai = getattr(Settings, "CONFIDENCE_THRESHOLD_UAP_UAI", None)
+        if conf_uap_uai is not None:
+            zone = np.isin(out.cls_ids, (Settings.CLASS_UAP, Settings.CLASS_UAI))
+            conf_floor[zone] = float(conf_uap_uai)
+        visible = (out.coords[:, 2] - out.coords[:, 0] > 1.0) & (out.coords[:, 3] - out.coords[:, 1] > 1.0)
+        out = out.select(visible & (out.scores >= conf_floor))
+        out.motion_status = np.full(len(out), -1, dtype=np.int8)
+        return out
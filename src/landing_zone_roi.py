@@ -0,0 +1,131 @@
+"""Odaklı UAP/UAİ geçişi için iniş alanı ROI planlayıcısı.
+
+İniş alanları yere sabit nesnelerdir: kare içindeki konumları son görüldükleri
+yer + kamera kaymasıyla (MovementEstimator) öngörülebilir. Planlayıcı bu
+öngörülen kutuların ve birincil geçişteki UAP/UAİ adaylarının çevresinde
+dolgulu kare ROI'ler üretir; ROI'ler tam çözünürlükte (küçültmeden) tek
+batch'te modele verilir. Küçük/uzak alanlar tam kare 1280 küçültmesinde
+kaybolduğu için bu hem maliyeti düşürür hem küçük alan recall'unu artırır.
+Dolgulu kutusu UAP_UAI_ROI_SIZE'ı aşan büyük alanların ROI'si büyür. Bu
+ROI'ler de küçültülmesin diye her kırpıntı kendi kenarının stride katına
+yuvarlanmış boyutuyla çıkarıma girer (inference_size). Boyut odaklı geçişin
+imgsz'i ile sınırlıdır: daha büyük kırpıntı yalnız kendisi o boyuta
+küçültülür, böylece bir kırpıntı tam kare geçişten pahalı olamaz.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config.settings import Settings
+from src.detection_batch import DetectionBatch
+
+Roi = Tuple[int, int, int, int]
+
+_MODEL_STRIDE = 32  # YOLO en büyük stride; imgsz bu katlara yuvarlanır
+
+
+def _landing_zone_rows(batch: DetectionBatch) -> np.ndarray:
+    return (batch.cls_ids == Settings.CLASS_UAP) | (batch.cls_ids == Settings.CLASS_UAI)
+
+
+class LandingZoneRoiPlanner:
+    """Son görülen iniş alanlarını kamera kaymasıyla taşır ve ROI listesi üretir."""
+
+    def __init__(self) -> None:
+        self._roi_size = max(64, int(getattr(Settings, "UAP_UAI_ROI_SIZE", 640)))
+        self._pad_ratio = max(0.0, float(getattr(Settings, "UAP_UAI_ROI_PAD_RATIO", 0.5)))
+        self._max_crops = max(1, int(getattr(Settings, "UAP_UAI_ROI_MAX_CROPS", 4)))
+        self._max_age = max(0, int(getattr(Settings, "UAP_UAI_ROI_MAX_AGE_FRAMES", 15)))
+        self._boxes = np.zeros((0, 4), dtype=np.float64)  # öngörülen kare koordinatları
+        self._ages = np.zeros((0,), dtype=np.int64)
+
+    @property
+    def roi_size(self) -> int:
+        return self._roi_size
+
+    def inference_size(self, roi: Roi, max_size: Optional[int] = None) -> int:
+        """Kırpıntının tam çözünürlükte işlenmesi için imgsz (en az roi_size, stride katı).
+
+        max_size (odaklı geçiş imgsz'i) verilirse üst sınırdır; aşan kırpıntı küçültülür.
+        """
+        x1, y1, x2, y2 = roi
+        side = max(self._roi_size, x2 - x1, y2 - y1)
+        if max_size is not None:
+            side = min(side, int(max_size))
+        return int(np.ceil(side / _MODEL_STRIDE) * _MODEL_STRIDE)
+
+    def reset(self) -> None:
+        self._boxes = np.zeros((0, 4), dtype=np.float64)
+        self._ages = np.zeros((0,), dtype=np.int64)
+
+    def advance(self, camera_shift: Tuple[float, float]) -> None:
+        """Kare başı: izlenen alanları kamera kaymasıyla öteler ve yaşlandırır."""
+        if self._boxes.shape[0] == 0:
+            return
+        self._boxes = self._boxes + np.tile(np.asarray(camera_shift, dtype=np.float64), 2)
+        self._ages = self._ages + 1
+        alive = self._ages <= self._max_age
+        self._boxes, self._ages = self._boxes[alive], self._ages[alive]
+
+    def remember(self, detections: DetectionBatch) -> None:
+        """Karenin nihai UAP/UAİ tespitleriyle izlenen alanları tazeler.
+
+        Yeniden görülen alanın (merkezi yeni kutunun içinde kalan) eski kaydı
+        yeni kutuyla değiştirilir; görülmeyenler yaş sınırına kadar tutulur.
+        """
+        seen = detections.coords[_landing_zone_rows(detections)].astype(np.float64)
+        if seen.shape[0] == 0:
+            return
+        if self._boxes.shape[0]:
+            centers = (self._boxes[:, :2] + self._boxes[:, 2:]) * 0.5
+            inside = (
+                (centers[:, None, 0] >= seen[None, :, 0]) & (centers[:, None, 0] <= seen[None, :, 2])
+                & (centers[:, None, 1] >= seen[None, :, 1]) & (centers[:, None, 1] <= seen[None, :, 3])
+            ).any(axis=1)
+            self._boxes, self._ages = self._boxes[~inside], self._ages[~inside]
+        self._boxes = np.concatenate([seen, self._boxes], axis=0)
+        self._ages = np.concatenate([np.zeros(seen.shape[0], dtype=np.int64), self._ages])
+
+    def plan(
+        self, frame_shape: Sequence[int], primary: Optional[DetectionBatch] = None
+    ) -> Optional[List[Roi]]:
+        """Kırpılacak ROI'ler; öngörü yoksa veya sınır aşılırsa None (tam kare).
+
+        Birincil geçişin bu karedeki UAP/UAİ adayları (düşük güvenli olanlar
+        dahil) öngörülen kutulardan önce gelir.
+        """
+        hints = [self._boxes]
+        if primary is not None and len(primary):
+            hints.insert(0, primary.coords[_landing_zone_rows(primary)].astype(np.float64))
+        boxes = np.concatenate(hints, axis=0)
+        if boxes.shape[0] == 0:
+            return None
+
+        h, w = int(frame_shape[0]), int(frame_shape[1])
+        rois: List[Roi] = []
+        for x1, y1, x2, y2 in boxes:
+            pad = self._pad_ratio * max(x2 - x1, y2 - y1)
+            # Kutu + dolgu zaten bir ROI'nin içindeyse yeni kırpıntı gerekmez
+            need = (x1 - pad, y1 - pad, x2 + pad, y2 + pad)
+            if any(
+                rx1 <= max(0.0, need[0]) and ry1 <= max(0.0, need[1])
+                and rx2 >= min(w, need[2]) and ry2 >= min(h, need[3])
+                for rx1, ry1, rx2, ry2 in rois
+            ):
+                continue
+            if x2 <= 0 or y2 <= 0 or x1 >= w or y1 >= h:
+                continue  # öngörü kare dışına çıktı
+            side = int(np.ceil(max(self._roi_size, need[2] - need[0], need[3] - need[1])))
+            rois.append(self._square(0.5 * (x1 + x2), 0.5 * (y1 + y2), side, w, h))
+            if len(rois) > self._max_crops:
+                return None
+        return rois or None
+
+    @staticmethod
+    def _square(cx: float, cy: float, side: int, w: int, h: int) -> Roi:
+        """Merkez etrafında kare ROI; kare içine kaydırılır (kenarda kırpılmaz)."""
+        side_x, side_y = min(side, w), min(side, h)
+        x1 = int(round(min(max(cx - side_x / 2.0, 0.0), w - side_x)))
+        y1 = int(round(min(max(cy - side_y / 2.0, 0.0), h - side_y)))
+        return x1, y1, x1 + side_x, y1 + side_y
@@ -0,0 +1,338 @@
+"""Görev 1 yalın çıkarım yolu: ultralytics ``predict()`` çağrı başı yükü olmadan.
+
+``model.predict`` her çağrıda argümanları yeniden doğrular, kaynak işleyiciyi
+(LoadPilAndNumpy) kurar ve kutu başına Results/Boxes nesneleri üretir. SAHI
+ile kare başına 10+ çağrıda bu sabit maliyet belirginleşir.
+
+LeanPredictor ilk ``predict()`` (warmup) sırasında ultralytics'in kurduğu
+AutoBackend'i (füzyon, FP16, cihaz ve ONNX/OpenVINO arka uçları hazır) doğrudan
+kullanır:
+
+1. Letterbox, ultralytics LetterBox ile aynı geometriyle giriş boyutu başına
+   önceden ayrılmış uint8 host tamponuna yazılır; dolgu yalnızca geometri
+   değişince yenilenir.
+2. Tampon tek kopyayla önceden ayrılmış cihaz tensörüne aktarılır (BGR→RGB,
+   NCHW, /255) ve ağ ``torch.inference_mode()`` altında çalıştırılır.
+3. Güven/sınıf filtresi ve NMS tüm batch için tek ``batched_nms`` çağrısıyla
+   yapılır; kutular kaynak koordinatlarına çevrilip tek transferle host'a alınır.
+
+Çıktı ``RawDetections`` (xyxy/conf/cls dizileri) listesidir; ObjectDetector'ın
+``_parse_result_arrays`` akışı Results yerine bunları doğrudan tüketir.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+import torch
+import torchvision
+
+# ultralytics.utils.ops.non_max_suppression ile aynı aday sınırı
+_MAX_NMS = 30000
+_PAD_VALUE = 114
+
+
+@dataclass
+class RawDetections:
+    """Tek görüntünün NMS sonrası çıktısı (kaynak görüntü koordinatlarında)."""
+
+    xyxy: np.ndarray  # (N, 4) float32
+    conf: np.ndarray  # (N,) float32
+    cls: np.ndarray  # (N,) float32 — model sınıf ID'si
+
+    def __len__(self) -> int:
+        return int(self.xyxy.shape[0])
+
+
+def letterbox_params(
+    src_hw: Tuple[int, int], dst_hw: Tuple[int, int], auto: bool, stride: int
+) -> Tuple[Tuple[int, int], Tuple[int, int], Tuple[int, int]]:
+    """ultralytics LetterBox geometrisi: ((new_w, new_h), (top, left), (out_h, out_w))."""
+    h, w = src_hw
+    r = min(dst_hw[0] / h, dst_hw[1] / w)
+    new_w, new_h = int(round(w * r)), int(round(h * r))
+    dw, dh = dst_hw[1] - new_w, dst_hw[0] - new_h
+    if auto:
+        dw, dh = int(np.mod(dw, stride)), int(np.mod(dh, stride))
+    dw, dh = dw / 2, dh / 2
+    top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+    left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+    return (new_w, new_h), (top, left), (new_h + top + bottom, new_w + left + right)
+
+
+def scale_boxes_to_source(
+    boxes: np.ndarray, input_hw: Tuple[int, int], src_hw: Tuple[int, int]
+) -> np.ndarray:
+    """ultralytics ops.scale_boxes + clip_boxes (yerinde, float dizi)."""
+    gain = min(input_hw[0] / src_hw[0], input_hw[1] / src_hw[1])
+    pad_x = round((input_hw[1] - src_hw[1] * gain) / 2 - 0.1)
+    pad_y = round((input_hw[0] - src_hw[0] * gain) / 2 - 0.1)
+    boxes[:, [0, 2]] -= pad_x
+    boxes[:, [1, 3]] -= pad_y
+    boxes[:, :4] /= gain
+    boxes[:, [0, 2]] = np.clip(boxes[:, [0, 2]], 0, src_hw[1])
+    boxes[:, [1, 3]] = np.clip(boxes[:, [1, 3]], 0, src_hw[0])
+    return boxes
+
+
+@dataclass
+class _InputBuffer:
+    """Tek giriş boyutu için önceden ayrılmış host + cihaz tamponu."""
+
+    host: np.ndarray  # (B, H, W, 3) uint8
+    tensor: Any  # (B, 3, H, W) cihaz tensörü, normalize edilmiş
+    geometry: List[Optional[Tuple[int, int, int, int]]]
+    sources: List[Optional[np.ndarray]]  # slot'a bu karede yazılan kaynak (kimlik karşılaştırması)
+    token: Optional[int] = None  # sources'ın yazıldığı kare belirteci
+
+
+@dataclass
+class ForwardPass:
+    """Ağın ham çıktısı; farklı güven/sınıf rejimleriyle tekrar son işlenebilir."""
+
+    preds: Any  # (B, 4 + nc, A)
+    input_hw: Tuple[int, int]
+    source_hw: List[Tuple[int, int]]
+
+
+class LeanPredictor:
+    """AutoBackend üzerinde predict() eşdeğeri (TTA hariç).
+
+    Kare içi önbellek, begin_frame'in döndürdüğü kare belirtecine bağlıdır:
+    aynı belirteçle aynı kaynak dizisi aynı giriş boyutunda tekrar verilirse ağ
+    yeniden çalıştırılmaz, ham çıktı yeni güven/sınıf filtresiyle son işlenir
+    (birincil + odaklı UAP/UAİ geçişi). Boyutlar farklıysa her boyutun
+    letterbox tamponu ayrı tutulur; aynı kaynak o boyutta tekrar gelirse
+    letterbox/yükleme atlanır.
+
+    Kimlik karşılaştırması yalnızca belirteç içinde geçerlidir: havuzlu
+    ön-işleme tamponları kareler arasında aynı nesneyle yeni piksel taşır.
+    Belirteç verilmeyen çağrılar önbelleğe hiç dokunmaz; eski belirteç
+    çağıranın kare sınırını kaçırdığı anlamına gelir ve AssertionError verir.
+    """
+
+    def __init__(self, backend: Any, device: str) -> None:
+        self._backend = backend
+        self._device = torch.device(device)
+        self._stride = int(max(int(getattr(backend, "stride", 32)), 1))
+        self._rect = bool(getattr(backend, "pt", False))
+        self._dtype = torch.float16 if bool(getattr(backend, "fp16", False)) else torch.float32
+        self._buffers: Dict[Tuple[int, int], _InputBuffer] = {}
+        self._forwards: Dict[int, Tuple[int, List[np.ndarray], ForwardPass]] = {}
+        self._frame_token = 0
+        self.last_forward_reused: bool = False
+        self._counters = {"forward_calls": 0, "forward_reused": 0, "letterbox_reused": 0}
+
+    @classmethod
+    def from_model(cls, model: Any, device: str) -> Optional["LeanPredictor"]:
+        """ultralytics YOLO nesnesinden; predictor henüz kurulmadıysa None."""
+        predictor = getattr(model, "predictor", None)
+        backend = getattr(predictor, "model", None)
+        if backend is None or not callable(backend):
+            return None
+        return cls(backend, device)
+
+    def begin_frame(self) -> int:
+        """Kare sınırı: yeni kare belirteci; ham çıktı ve letterbox önbelleği geçersiz."""
+        self._frame_token += 1
+        self._forwards.clear()
+        for buf in self._buffers.values():
+            buf.sources = [None] * len(buf.sources)
+            buf.token = None
+        return self._frame_token
+
+    def _check_token(self, frame_token: Optional[int]) -> None:
+        assert frame_token is None or frame_token == self._frame_token, (
+            f"eski kare belirteci {frame_token} (güncel {self._frame_token})"
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self._counters)
+
+    def _input_size(self, imgsz: int) -> int:
+        # ultralytics check_imgsz: stride katına yukarı yuvarlama
+        return int(math.ceil(int(imgsz) / self._stride) * self._stride)
+
+    def _buffer(self, batch: int, out_h: int, out_w: int) -> _InputBuffer:
+        buf = self._buffers.get((out_h, out_w))
+        if buf is None or buf.host.shape[0] < batch:
+            self._buffers[(out_h, out_w)] = buf = _InputBuffer(
+                host=np.full((batch, out_h, out_w, 3), _PAD_VALUE, dtype=np.uint8),
+                tensor=torch.empty((batch, 3, out_h, out_w), dtype=self._dtype, device=self._device),
+                geometry=[None] * batch,
+                sources=[None] * batch,
+            )
+        return buf
+
+    def _letterbox_into(
+        self, images: Sequence[np.ndarray], size: int, frame_token: Optional[int] = None
+    ) -> Tuple[Any, Tuple[int, int]]:
+        """Batch'i tampona yazar; normalize edilmiş cihaz tensör görünümünü döndürür."""
+        same_shape = len({img.shape[:2] for img in images}) == 1
+        auto = same_shape and self._rect
+        plans = [letterbox_params(img.shape[:2], (size, size), auto, self._stride) for img in images]
+        out_h, out_w = plans[0][2]
+        batch = len(images)
+        buf = self._buffer(batch, out_h, out_w)
+        tensor = buf.tensor[:batch]
+        if (
+            frame_token is not None
+            and buf.token == frame_token
+            and all(buf.sources[i] is img for i, img in enumerate(images))
+        ):
+            # Bu karede aynı boyutta zaten yüklendi
+            self._counters["letterbox_reused"] += 1
+            return tensor, (out_h, out_w)
+
+        for slot, (img, ((new_w, new_h), (top, left), _)) in enumerate(zip(images, plans)):
+            canvas = buf.host[slot]
+            geometry = (new_w, new_h, top, left)
+            if buf.geometry[slot] != geometry:
+                canvas.fill(_PAD_VALUE)
+                buf.geometry[slot] = geometry
+            region = canvas[top:top + new_h, left:left + new_w]
+            if img.shape[1] == new_w and img.shape[0] == new_h:
+                region[...] = img
+            else:
+                region[...] = cv2.resize(img, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+            buf.sources[slot] = img
+        buf.token = frame_token
+
+        with torch.inference_mode():
+            host = torch.from_numpy(buf.host[:batch])
+            # BGR HWC uint8 → RGB CHW (dtype dönüşümü copy_ içinde)
+            tensor.copy_(host.to(self._device, non_blocking=True).permute(0, 3, 1, 2).flip(1))
+            tensor.div_(255.0)
+        return tensor, (out_h, out_w)
+
+    def forward(self, source: Any, imgsz: int, frame_token: Optional[int] = None) -> ForwardPass:
+        """Letterbox + ağ çalıştırma; aynı belirteçle aynı girdi için önbellekten döner."""
+        self._check_token(frame_token)
+        images = list(source) if isinstance(source, (list, tuple)) else [source]
+        size = self._input_size(imgsz)
+        cached = self._forwards.get(size) if frame_token is not None else None
+        if (
+            cached is not None
+            and cached[0] == frame_token
+            and len(cached[1]) == len(images)
+            and all(a is b for a, b in zip(cached[1], images))
+        ):
+            self._counters["forward_reused"] += 1
+            self.last_forward_reused = True
+            return cached[2]
+
+        tensor, input_hw = self._letterbox_into(images, size, frame_token)
+        with torch.inference_mode():
+            preds = self._backend(tensor)
+        if isinstance(preds, (list, tuple)):
+            preds = preds[0]
+        fwd = ForwardPass(preds=preds, input_hw=input_hw, source_hw=[img.shape[:2] for img in images])
+        # Boyut başına yalnızca son geçiş tutulur (SAHI batch'leri birbirini ezer)
+        if frame_token is not None:
+            self._forwards[size] = (frame_token, images, fwd)
+        self._counters["forward_calls"] += 1
+        self.last_forward_reused = False
+        return fwd
+
+    def postprocess(
+        self,
+        fwd: ForwardPass,
+        conf: float,
+        iou: float,
+        classes: Optional[Sequence[int]] = None,
+        agnostic_nms: bool = False,
+        max_det: int = 300,
+    ) -> List[RawDetections]:
+        batch = len(fwd.source_hw)
+        with torch.inference_mode():
+            keep_rows, image_idx = self._nms(
+                fwd.preds, conf, iou, classes, agnostic_nms, max_det, batch
+            )
+            rows = keep_rows.float().cpu().numpy()
+            owners = image_idx.cpu().numpy()
+
+        out: List[RawDetections] = []
+        for i, src_hw in enumerate(fwd.source_hw):
+            sel = rows[owners == i]
+            boxes = scale_boxes_to_source(sel[:, :4].astype(np.float32), fwd.input_hw, src_hw)
+            out.append(RawDetections(xyxy=boxes, conf=sel[:, 4].copy(), cls=sel[:, 5].copy()))
+        return out
+
+    def predict(
+        self,
+        source: Any,
+        imgsz: int,
+        conf: float,
+        iou: float,
+        classes: Optional[Sequence[int]] = None,
+        agnostic_nms: bool = False,
+        max_det: int = 300,
+        frame_token: Optional[int] = None,
+        **_: Any,
+    ) -> List[RawDetections]:
+        if isinstance(source, (list, tuple)) and not source:
+            return []
+        return self.postprocess(
+            self.forward(source, imgsz, frame_token), conf, iou, classes, agnostic_nms, max_det
+        )
+
+    @staticmethod
+    def _nms(
+        preds: torch.Tensor,
+        conf: float,
+        iou: float,
+        classes: Optional[Sequence[int]],
+        agnostic: bool,
+        max_det: int,
+        batch: int,
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """(K, 6) [x1, y1, x2, y2, conf, cls] satırları ve görüntü indeksleri.
+
+        ultralytics non_max_suppression (multi_label=False) ile aynı karar
+        kuralı; görüntü ve sınıf grupları tek batched_nms çağrısında işlenir.
+        """
+        preds = preds.transpose(-1, -2)  # (B, A, 4 + nc)
+        scores, labels = preds[..., 4:].max(dim=-1)
+        candidate = scores > conf
+        if classes is not None:
+            allowed = torch.as_tensor(list(classes), device=preds.device)
+            candidate &= (labels[..., None] == allowed).any(-1)
+        image_idx, anchor_idx = candidate.nonzero(as_tuple=True)
+        if image_idx.numel() == 0:
+            return preds.new_zeros((0, 6)), image_idx
+
+        xywh = preds[image_idx, anchor_idx, :4]
+        half_wh = xywh[:, 2:4] / 2
+        boxes = torch.cat((xywh[:, :2] - half_wh, xywh[:, :2] + half_wh), dim=1)
+        scores = scores[image_idx, anchor_idx]
+        labels = labels[image_idx, anchor_idx]
+
+        # Görüntü başına en yüksek _MAX_NMS aday (ultralytics ile aynı kesme)
+        counts = torch.bincount(image_idx, minlength=batch)
+        if int(counts.max()) > _MAX_NMS:
+            order = torch.argsort(scores, descending=True)
+            order = order[torch.argsort(image_idx[order], stable=True)]
+            rank = torch.arange(order.numel(), device=order.device) - torch.repeat_interleave(
+                torch.cumsum(counts, 0) - counts, counts
+            )
+            order = order[rank < _MAX_NMS]
+            image_idx, boxes, scores, labels = image_idx[order], boxes[order], scores[order], labels[order]
+
+        num_classes = preds.shape[-1] - 4
+        groups = image_idx if agnostic else image_idx * num_classes + labels
+        keep = torchvision.ops.batched_nms(boxes.float(), scores.float(), groups, iou)
+        # keep skor sırasında; görüntü başına ilk max_det
+        kept_img = image_idx[keep]
+        order = torch.argsort(kept_img, stable=True)
+        keep, kept_img = keep[order], kept_img[order]
+        counts = torch.bincount(kept_img, minlength=batch)
+        rank = torch.arange(keep.numel(), device=keep.device) - torch.repeat_interleave(
+            torch.cumsum(counts, 0) - counts, counts
+        )
+        keep, kept_img = keep[rank < max_det], kept_img[rank < max_det]
+        rows = torch.cat(
+            (boxes[keep], scores[keep, None], labels[keep, None].to(boxes.dtype)), dim=1
+        )
+        return rows, kept_img
@@ -1,16 +1,18 @@
 """Hibrit konum kestirimi: GPS=1 ise sunucu verisi, GPS=0 ise Lucas-Kanade optik akış.
-Piksel kayması focal_length ve irtifa ile metreye çevrilir."""
+Akış, hareket kestirimiyle paylaşılan FrameMotionService'ten (src/frame_motion.py)
+akış seviyesinde (MOTION_COMP_DOWNSCALE) alınır. Öteleme ve irtifa değişimi
+(ölçek) o seviyedeki nokta çiftlerine uydurulan sağlam benzerlik dönüşümünden
+gelir; piksel kayması ters ölçek, focal_length ve irtifa ile metreye çevrilir."""
 
-from typing import Dict, Optional, Tuple, TYPE_CHECKING
+from typing import Dict, Optional, Tuple
 import time
 
-if TYPE_CHECKING:
-    from src.utils import FrameContext
-
 import cv2
 import numpy as np
 
 from config.settings import Settings
+from src.frame_motion import FrameMotion, FrameMotionService
+from src.utils import FrameContext
 from src.utils import normalize_gps_health
 from src.utils import Logger
 
@@ -165,25 +167,8 @@ class VisualOdometry:
 
         self._last_of_position: Dict[str, float] = {"x": 0.0, "y": 0.0, "z": 0.0}
 
-        self._prev_gray: Optional[np.ndarray] = None
-        self._prev_points: Optional[np.ndarray] = None
-        self._initial_point_count: int = 0
-
-        self._feature_params = dict(
-            maxCorners=100,
-            qualityLevel=0.01,
-            minDistance=40,
-            blockSize=7,
-        )
-        self._lk_params = dict(
-            winSize=(21, 21),
-            maxLevel=3,
-            criteria=(
-                cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT,
-                30,
-                0.01,
-            ),
-        )
+        # FrameContext paylaşılan servis taşımıyorsa kullanılan özel akış servisi
+        self._own_motion = FrameMotionService()
 
         self.log.info("Visual Odometry başlatıldı — Başlangıç: (0, 0, 0)")
         if Settings.FOCAL_LENGTH_PX == 800.0:
@@ -196,27 +181,33 @@ class VisualOdometry:
         self,
         frame_ctx: "FrameContext",
         server_data: Dict,
+        sample_monotonic: Optional[float] = None,
     ) -> Dict[str, float]:
+        """Kare başına konum güncellemesi.
+
+        sample_monotonic verilirse hız kestirimi duvar saati yerine bu zamanı
+        kullanır (çevrim dışı replay: kare zamanı = kare indeksi / fps).
+        """
         gps_health, _ = normalize_gps_health(
             server_data.get("gps_health"),
             gps_health_status=server_data.get("gps_health_status"),
         )
-        now_mono = time.monotonic()
+        now_mono = time.monotonic() if sample_monotonic is None else float(sample_monotonic)
         if self._last_update_monotonic is None:
             self._last_update_monotonic = now_mono
 
         if isinstance(frame_ctx, np.ndarray):
-            gray = cv2.cvtColor(frame_ctx, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = frame_ctx.gray
+            frame_ctx = FrameContext(frame_ctx)
+        # GPS sağlıklıyken de servis ilerletilir (referans kare); akış yalnızca istenirse hesaplanır
+        service = getattr(frame_ctx, "motion_service", None) or self._own_motion
+        motion = service.step(frame_ctx)
 
         if gps_health == 1:
-            # GPS sağlıklı: sunucu verisini kullan, gri kareyi referans için sakla
+            # GPS sağlıklı: sunucu verisini kullan
             self._update_from_gps(
                 server_data,
                 soft_reanchor=not self._was_gps_healthy,
             )
-            self._prev_gray = gray
             self._was_gps_healthy = True
             self._mode = "GPS_FUSED"
             self._runtime_meta = {
@@ -227,19 +218,16 @@ class VisualOdometry:
             }
 
         else:
-            # GPS kapalı: optik akış. İlk geçişte referans kare oluştur
+            # GPS kapalı: optik akış. Referans, servisteki önceki karedir
             if self._was_gps_healthy:
-                self._update_reference_frame(
-                    self._prev_gray if self._prev_gray is not None else gray
-                )
                 self._was_gps_healthy = False
                 self._ema_dx = 0.0
                 self._ema_dy = 0.0
 
-                self.log.info("GPS → Optik Akış geçişi — referans kare oluşturuldu, EMA resetlendi.")
+                self.log.info("GPS → Optik Akış geçişi — önceki kare referans, EMA resetlendi.")
 
-            if self._prev_gray is not None and self._prev_points is not None:
-                updated = self._update_from_optical_flow(gray, server_data)
+            if motion.has_reference:
+                updated = self._update_from_optical_flow(motion, server_data)
                 if updated:
                     self._mode = "VISION_ONLY"
                     self._runtime_meta = {
@@ -252,19 +240,20 @@ class VisualOdometry:
                     self.predict_without_measurement(
                         reason_code="optical_flow_unavailable",
                         gps_health=0 if gps_health == 0 else -1,
+                        sample_monotonic=sample_monotonic,
                     )
             else:
                 self.log.warn(
                     "GPS mevcut değil ve henüz referans kare oluşmadı — "
                     "GPS yok, referans kare henüz oluşmadı — pozisyon (0,0,0) korunuyor."
                 )
-                self._update_reference_frame(gray)
                 self.predict_without_measurement(
                     reason_code="missing_reference_frame",
                     gps_health=0 if gps_health == 0 else -1,
+                    sample_monotonic=sample_monotonic,
                 )
 
-        self._latency_comp.update_velocity(self.position)
+        self._latency_comp.update_velocity(self.position, sample_monotonic=sample_monotonic)
         self._last_update_monotonic = now_mono
         return self.get_position()
 
@@ -312,44 +301,25 @@ class VisualOdometry:
 
     def _update_from_optical_flow(
         self,
-        gray: np.ndarray,
+        motion: FrameMotion,
         server_data: Dict,
     ) -> bool:
-        if self._prev_points is None or len(self._prev_points) < 10:
-            self._update_reference_frame(gray)
-            self.log.warn("Yetersiz köşe noktası — yeniden tespit ediliyor")
-            return False
-
-        next_points, status, err = cv2.calcOpticalFlowPyrLK(
-            self._prev_gray, gray, self._prev_points, None, **self._lk_params
-        )
-
-        if next_points is None or status is None:
-            self._update_reference_frame(gray)
-            self.log.warn("Optik Akış başarısız — referans kare yenileniyor")
-            return False
-
-        mask = status.flatten() == 1
-
-        if self._prev_points is None:
-            return False
-
-        good_old = self._prev_points[mask].reshape(-1, 2)
-        good_new = next_points[mask].reshape(-1, 2)
+        # Akış seviyesi koordinatları; metreye çevirirken inv_scale ile tam çözünürlüğe
+        good_old, good_new = motion.pairs()
+        inv_scale = motion.inv_scale
 
         if len(good_new) < 5:
-            self._update_reference_frame(gray)
             self.log.warn("Başarılı takip sayısı az — referans yenileniyor")
             return False
 
         displacements_x = good_new[:, 0] - good_old[:, 0]
         displacements_y = good_new[:, 1] - good_old[:, 1]
+        h_img, w_img = motion.gray.shape[:2]
+        cx, cy = w_img / 2.0, h_img / 2.0
 
         # Rotasyon (pan/yaw) tespiti: kamera sağa/sola dönüyorsa pozisyon güncelleme
         is_rotation = False
         if getattr(Settings, "VO_ROTATION_SUPPRESS_ENABLED", True) and len(good_old) >= 6:
-            h_img, w_img = gray.shape[:2]
-            cx, cy = w_img / 2.0, h_img / 2.0
             rx = good_old[:, 0] - cx
             ry = good_old[:, 1] - cy
             dot = np.abs(displacements_x * rx + displacements_y * ry)
@@ -357,25 +327,21 @@ class VisualOdometry:
             r_norm = np.sqrt(rx ** 2 + ry ** 2 + 1e-9)
             radial_ratio = dot / (flow_norm * r_norm + 1e-9)
             thresh = float(getattr(Settings, "VO_ROTATION_DOT_THRESHOLD", 0.4))
-            if float(np.median(radial_ratio)) < thresh and float(np.median(flow_norm)) > 0.5:
+            # Akış eşiği tam çözünürlükte 0.5 piksel
+            if (
+                float(np.median(radial_ratio)) < thresh
+                and float(np.median(flow_norm)) * inv_scale > 0.5
+            ):
                 is_rotation = True
 
-        dx_pixels, dy_pixels = self._robust_displacement(
-            displacements_x, displacements_y
-        )
-
-        scale_ratio = 1.0
-        if len(good_new) >= 3:
-            good_old_pts = good_old[:, np.newaxis, :]
-            good_new_pts = good_new[:, np.newaxis, :]
-            dist_old = np.sqrt(np.sum((good_old_pts - good_old[np.newaxis, :, :]) ** 2, axis=-1))
-            dist_new = np.sqrt(np.sum((good_new_pts - good_new[np.newaxis, :, :]) ** 2, axis=-1))
-            iu = np.triu_indices(len(good_old), k=1)
-            old_vals = dist_old[iu]
-            new_vals = dist_new[iu]
-            valid = old_vals > 5.0
-            if np.any(valid):
-                scale_ratio = float(np.median(new_vals[valid] / old_vals[valid]))
+        fit = self._fit_similarity(good_old, good_new, (cx, cy), inv_scale=inv_scale)
+        if fit is not None:
+            dx_pixels, dy_pixels, scale_ratio = fit
+        else:
+            dx_pixels, dy_pixels = self._robust_displacement(
+                displacements_x, displacements_y
+            )
+            scale_ratio = self._centroid_scale(good_old, good_new)
 
         raw_alt = server_data.get("translation_z", None)
         try:
@@ -388,7 +354,9 @@ class VisualOdometry:
         if altitude <= 0:
             altitude = self._last_gps_altitude
 
-        dx_meters, dy_meters = self._pixel_to_meter(dx_pixels, dy_pixels, altitude)
+        dx_meters, dy_meters = self._pixel_to_meter(
+            dx_pixels * inv_scale, dy_pixels * inv_scale, altitude
+        )
         alpha = self._ema_alpha
         self._ema_dx = alpha * dx_meters + (1 - alpha) * self._ema_dx
         self._ema_dy = alpha * dy_meters + (1 - alpha) * self._ema_dy
@@ -408,22 +376,69 @@ class VisualOdometry:
         rot_tag = " [ROT]"
         self.log.debug(
             f"Optik Akış → dX:{dx_meters:.3f}m dY:{dy_meters:.3f}m dZ:{0.0 if is_rotation else (1.0 - scale_ratio) * max(altitude, 1.0):.3f}m | "
-            f"Piksel: ({dx_pixels:.1f}, {dy_pixels:.1f}) | Scale: {scale_ratio:.3f} | "
+            f"Piksel: ({dx_pixels * inv_scale:.1f}, {dy_pixels * inv_scale:.1f}) | "
+            f"Scale: {scale_ratio:.4f}{'' if fit is not None else ' (medyan)'} | "
             f"İrtifa: {altitude:.1f}m | "
-            f"Takip: {len(good_new)}/{len(self._prev_points)} nokta{rot_tag if is_rotation else ''}"
+            f"Takip: {len(good_new)}/{motion.source_count} nokta{rot_tag if is_rotation else ''}"
         )
 
-        if (
-            self._initial_point_count > 0
-            and len(good_new) < self._initial_point_count * 0.5
-        ):
-            self._update_reference_frame(gray)
-            self.log.debug("Köşe noktası kaybı %50 üzeri — referans yenilendi")
-        else:
-            self._prev_gray = gray.copy()
-            self._prev_points = good_new.reshape(-1, 1, 2)
         return True
 
+    @staticmethod
+    def _fit_similarity(
+        old: np.ndarray,
+        new: np.ndarray,
+        center: Tuple[float, float],
+        inv_scale: float = 1.0,
+    ) -> Optional[Tuple[float, float, float]]:
+        """Sağlam benzerlik dönüşümü (öteleme + dönme + eş ölçek); (dx, dy, ölçek).
+
+        Öteleme görüntü merkezinin kaymasıdır: irtifa değişiminde (yakınlaşma)
+        merkezden uzak noktaların radyal akışı ötelemeye karışmaz. O(n); eski
+        ikili uzaklık matrisinin (N×N×2) yerine geçer. Uydurma başarısızsa None.
+        Noktalar akış seviyesindedir; VO_SIMILARITY_REPROJ_PX tam çözünürlük
+        pikselidir ve inv_scale ile akış seviyesine çevrilir.
+        """
+        min_inliers = max(3, int(getattr(Settings, "VO_SIMILARITY_MIN_INLIERS", 8)))
+        if len(old) < min_inliers:
+            return None
+        method_name = str(getattr(Settings, "VO_SIMILARITY_METHOD", "ransac")).strip().lower()
+        # estimateAffinePartial2D USAC bayraklarını kabul etmez (yalnızca RANSAC / LMEDS)
+        method = cv2.LMEDS if method_name == "lmeds" else cv2.RANSAC
+        try:
+            matrix, inliers = cv2.estimateAffinePartial2D(
+                old.reshape(-1, 1, 2).astype(np.float32),
+                new.reshape(-1, 1, 2).astype(np.float32),
+                method=method,
+                ransacReprojThreshold=float(getattr(Settings, "VO_SIMILARITY_REPROJ_PX", 0.8))
+                / max(float(inv_scale), 1e-6),
+                maxIters=2000,
+                confidence=0.995,
+            )
+        except cv2.error:
+            return None
+        if matrix is None or inliers is None or int(inliers.sum()) < min_inliers:
+            return None
+        scale = float(np.hypot(matrix[0, 0], matrix[1, 0]))
+        if not np.isfinite(scale) or scale <= 0.0:
+            return None
+        cx, cy = center
+        dx = float(matrix[0, 0] * cx + matrix[0, 1] * cy + matrix[0, 2] - cx)
+        dy = float(matrix[1, 0] * cx + matrix[1, 1] * cy + matrix[1, 2] - cy)
+        return dx, dy, scale
+
+    @staticmethod
+    def _centroid_scale(old: np.ndarray, new: np.ndarray) -> float:
+        """Ağırlık merkezine uzaklık oranlarının medyanı (uydurma başarısızsa, O(n))."""
+        if len(old) < 3:
+            return 1.0
+        old_r = np.linalg.norm(old - np.median(old, axis=0), axis=1)
+        new_r = np.linalg.norm(new - np.median(new, axis=0), axis=1)
+        valid = old_r > 5.0
+        if not np.any(valid):
+            return 1.0
+        return float(np.median(new_r[valid] / old_r[valid]))
+
     def _robust_displacement(
         self,
         dx_arr: np.ndarray,
@@ -470,16 +485,6 @@ class VisualOdometry:
 
         return dx_m, dy_m
 
-    def _update_reference_frame(self, gray: np.ndarray) -> None:
-        self._prev_gray = gray.copy()
-        self._prev_points = cv2.goodFeaturesToTrack(
-            gray, **self._feature_params
-        )
-
-        n_points = len(self._prev_points) if self._prev_points is not None else 0
-        self._initial_point_count = n_points
-        self.log.debug(f"Referans kare güncellendi — {n_points} köşe noktası")
-
     def get_position(self) -> Dict[str, float]:
         return {
             "x": round(self.position["x"], 4),
@@ -512,8 +517,9 @@ class VisualOdometry:
         self,
         reason_code: str,
         gps_health: int = 0,
+        sample_monotonic: Optional[float] = None,
     ) -> Dict[str, float]:
-        now_mono = time.monotonic()
+        now_mono = time.monotonic() if sample_monotonic is None else float(sample_monotonic)
         freeze = bool(getattr(Settings, "GPS_ZERO_POSITION_FREEZE", True))
 
         if freeze and gps_health == 0:
@@ -573,9 +579,6 @@ class VisualOdometry:
     def reset(self) -> None:
         self.position = {"x": 0.0, "y": 0.0, "z": 0.0}
         self._last_of_position = {"x": 0.0, "y": 0.0, "z": 0.0}
-        self._prev_gray = None
-        self._prev_points = None
         self._last_gps_position = None
-        self._initial_point_count = 0
         self._latency_comp.reset()
         self.log.info("Visual Odometry sıfırlandı → (0, 0, 0)")
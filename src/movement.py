@@ -3,7 +3,7 @@ Merkez takibi + kamera kayması kompanzasyonu ile yer değiştirme hesaplanır."
 
 from collections import deque
 from dataclasses import dataclass, field
-from typing import Deque, Dict, List, Optional, Tuple, TYPE_CHECKING
+from typing import Deque, Dict, List, Optional, Tuple, TYPE_CHECKING, Union
 
 if TYPE_CHECKING:
     from src.utils import FrameContext
@@ -11,6 +11,8 @@ if TYPE_CHECKING:
 import cv2
 import numpy as np
 from config.settings import Settings
+from src.detection_batch import DetectionBatch
+from src.frame_motion import FrameMotion, FrameMotionService
 
 
 @dataclass
@@ -27,9 +29,10 @@ class MovementEstimator:
     def __init__(self) -> None:
         self._tracks: Dict[int, _Track] = {}
         self._next_track_id: int = 1
-        self._prev_gray: Optional[np.ndarray] = None
-        self._prev_points: Optional[np.ndarray] = None
-        self._flow_inv_scale: float = 1.0
+        # FrameContext paylaşılan servis taşımıyorsa kullanılan özel akış servisi
+        self._own_motion = FrameMotionService()
+        self._last_motion: Optional[FrameMotion] = None
+        self._shift_memo: Optional[Tuple[FrameMotion, Tuple[float, float]]] = None
         self._cam_shift_hist: Deque[Tuple[float, float]] = deque(
             maxlen=Settings.MOVEMENT_WINDOW_FRAMES
         )
@@ -39,7 +42,14 @@ class MovementEstimator:
         self._is_frozen_frame: bool = False
         self._frame_diff: float = float("inf")
 
-    def annotate(self, detections: List[Dict], frame_ctx: Optional["FrameContext"] = None) -> List[Dict]:
+    def annotate(
+        self,
+        detections: Union[List[Dict], DetectionBatch],
+        frame_ctx: Optional["FrameContext"] = None,
+    ) -> List[Dict]:
+        # Sütunlu tespitler yarışma dict'lerine burada (tek sefer) dönüştürülür.
+        if isinstance(detections, DetectionBatch):
+            detections = detections.to_competition_dicts()
         if frame_ctx is not None:
             if isinstance(frame_ctx, np.ndarray):
                 self._frame_width = frame_ctx.shape[1]
@@ -96,6 +106,49 @@ class MovementEstimator:
 
         return detections
 
+    def flow_reference(self) -> Tuple[Optional[np.ndarray], Optional[np.ndarray], float]:
+        """Son annotate() karesinin küçültülmüş gri görüntüsü, LK öznitelikleri ve ölçek çarpanı.
+
+        Bir sonraki kare annotate() edilmeden önce okunmalıdır (KeyframePropagator).
+        """
+        motion = self._last_motion
+        if motion is None:
+            return None, None, 1.0
+        return motion.gray, motion.tracked_points(), motion.inv_scale
+
+    def flow_gray(self, frame_ctx: "FrameContext") -> Tuple[np.ndarray, float]:
+        """Kareyi kamera kayması akışıyla aynı ölçekte gri görüntüye çevirir."""
+        motion = self._motion_for(frame_ctx)
+        return motion.gray, motion.inv_scale
+
+    def _motion_for(self, frame_ctx: Union["FrameContext", np.ndarray]) -> FrameMotion:
+        from src.utils import FrameContext
+
+        if isinstance(frame_ctx, np.ndarray):
+            frame_ctx = FrameContext(frame_ctx)
+        service = getattr(frame_ctx, "motion_service", None) or self._own_motion
+        return service.step(frame_ctx)
+
+    def camera_shift_for(self, frame_ctx: "FrameContext") -> Tuple[float, float]:
+        """Önceki kare → bu kare kamera kayması (px, tam çözünürlük).
+
+        Tespitten önce okunabilir (SAHI ipuçları, tile önbelleği, ROI öngörüsü);
+        annotate() aynı kare için aynı değeri yeniden hesaplamadan kullanır.
+        """
+        if not Settings.MOTION_COMP_ENABLED:
+            return 0.0, 0.0
+        return self._shift_of(self._motion_for(frame_ctx))
+
+    def get_last_camera_shift(self) -> Tuple[float, float]:
+        """Son annotate() çağrısında kestirilen kamera kayması (px, tam çözünürlük).
+
+        Bir sonraki kare annotate() edilmeden önce okunursa bir kare geridedir;
+        yeni kare için camera_shift_for kullanılmalıdır.
+        """
+        if not self._cam_shift_hist:
+            return 0.0, 0.0
+        return self._cam_shift_hist[-1]
+
     def _status(
         self,
         history: Deque[Tuple[float, float, float, float]],
@@ -223,31 +276,6 @@ class MovementEstimator:
             (float(det.get("top_left_y", 0)) + float(det.get("bottom_right_y", 0))) / 2.0,
         )
 
-    @staticmethod
-    def _prepare_flow_gray(gray: np.ndarray) -> Tuple[np.ndarray, float]:
-        scale = float(getattr(Settings, "MOTION_COMP_DOWNSCALE", 1.0))
-        if scale >= 1.0 or scale <= 0.1:
-            return gray, 1.0
-
-        h, w = gray.shape[:2]
-        target_w = max(64, int(w * scale))
-        target_h = max(64, int(h * scale))
-        if target_w >= w or target_h >= h:
-            return gray, 1.0
-
-        resized = cv2.resize(gray, (target_w, target_h), interpolation=cv2.INTER_AREA)
-        inv_scale = w / float(target_w)
-        return resized, inv_scale
-
-    @staticmethod
-    def _detect_features(gray: np.ndarray) -> Optional[np.ndarray]:
-        return cv2.goodFeaturesToTrack(
-            gray,
-            maxCorners=Settings.MOTION_COMP_MAX_CORNERS,
-            qualityLevel=Settings.MOTION_COMP_QUALITY_LEVEL,
-            minDistance=Settings.MOTION_COMP_MIN_DISTANCE,
-        )
-
     @staticmethod
     def _robust_median_shift(
         old: np.ndarray,
@@ -268,70 +296,19 @@ class MovementEstimator:
         return float(np.median(dx)), float(np.median(dy))
 
     def _estimate_camera_shift(self, frame_ctx: "FrameContext") -> Tuple[float, float]:
-        if isinstance(frame_ctx, np.ndarray):
-            from src.utils import FrameContext
-            frame_ctx = FrameContext(frame_ctx)
-        gray, self._flow_inv_scale = self._prepare_flow_gray(frame_ctx.gray)
-
-        if self._prev_gray is None:
-            self._prev_gray = gray
-            self._prev_points = self._detect_features(gray)
-            self._frame_diff = float("inf")
-            return 0.0, 0.0
-
-        self._frame_diff = float(cv2.absdiff(self._prev_gray, gray).mean())
-
-        if self._prev_points is None or len(self._prev_points) < Settings.MOTION_COMP_MIN_FEATURES:
-            self._prev_points = self._detect_features(self._prev_gray)
-            if self._prev_points is None or len(self._prev_points) < 5:
-                self._prev_gray = gray
-                self._prev_points = self._detect_features(gray)
-                return 0.0, 0.0
-
-        if self._prev_points is None:
-            return 0.0, 0.0
-
-        win = Settings.MOTION_COMP_WIN_SIZE
-        next_pts, status, _ = cv2.calcOpticalFlowPyrLK(
-            self._prev_gray,
-            gray,
-            self._prev_points,
-            None,
-            winSize=(win, win),
-            maxLevel=3,
-            criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 30, 0.01),
-        )
-        if next_pts is None or status is None:
-            self._prev_gray = gray
-            self._prev_points = self._detect_features(gray)
-            return 0.0, 0.0
-
-        valid = status.flatten() == 1
-        old = self._prev_points[valid].reshape(-1, 2)
-        new = next_pts[valid].reshape(-1, 2)
-        fb_max_error = float(getattr(Settings, "MOTION_COMP_FB_MAX_ERROR", 1.5))
-        if len(new) >= 5 and fb_max_error > 0.0:
-            back_pts, back_status, _ = cv2.calcOpticalFlowPyrLK(
-                gray,
-                self._prev_gray,
-                new.reshape(-1, 1, 2),
-                None,
-                winSize=(win, win),
-                maxLevel=3,
-                criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 30, 0.01),
-            )
-            if back_pts is not None and back_status is not None:
-                back_ok = back_status.flatten() == 1
-                back = back_pts.reshape(-1, 2)
-                fb_error = np.linalg.norm(back - old, axis=1)
-                fb_keep = back_ok & (fb_error <= fb_max_error)
-                if np.count_nonzero(fb_keep) >= 5:
-                    old = old[fb_keep]
-                    new = new[fb_keep]
-
+        motion = self._motion_for(frame_ctx)
+        self._last_motion = motion
+        self._frame_diff = motion.frame_diff()
+        return self._shift_of(motion)
+
+    def _shift_of(self, motion: FrameMotion) -> Tuple[float, float]:
+        if self._shift_memo is None or self._shift_memo[0] is not motion:
+            self._shift_memo = (motion, self._shift_from_motion(motion))
+        return self._shift_memo[1]
+
+    def _shift_from_motion(self, motion: FrameMotion) -> Tuple[float, float]:
+        old, new = motion.pairs()
         if len(new) < 5:
-            self._prev_gray = gray
-            self._prev_points = self._detect_features(gray)
             return 0.0, 0.0
 
         # Calculate shift based on chosen algorithm
@@ -356,8 +333,8 @@ class MovementEstimator:
             # Standard median optical flow (fallback/default)
             cam_dx, cam_dy = self._robust_median_shift(old, new)
 
-        cam_dx *= self._flow_inv_scale
-        cam_dy *= self._flow_inv_scale
+        cam_dx *= motion.inv_scale
+        cam_dy *= motion.inv_scale
         max_shift = float(getattr(Settings, "MOTION_COMP_MAX_SHIFT_PX", 0.0))
         if max_shift > 0.0:
             cam_dx = max(-max_shift, min(max_shift, cam_dx))
@@ -366,12 +343,4 @@ class MovementEstimator:
             cam_dx = 0.0
         if not np.isfinite(cam_dy):
             cam_dy = 0.0
-
-        self._prev_gray = gray
-        self._prev_points = new.reshape(-1, 1, 2)
-        if len(self._prev_points) < Settings.MOTION_COMP_MIN_FEATURES // 2:
-            self._prev_points = self._detect_features(gray)
-            if self._prev_points is None:
-                self._prev_points = None  # Açık atama, sonraki frame L210'da yakalar
-
         return cam_dx, cam_dy
@@ -6,9 +6,11 @@ ASSUMPTION: Guardrail eşikleri deneysel olarak belirlenmiştir;
 config ile kapatılabilir (GUARDRAILS_ENABLED=False).
 """
 import logging
-from typing import Dict, List, Tuple
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
 import numpy as np
 from config.settings import Settings
+from src.detection_batch import DetectionBatch, class_ids_from_keys
 from src.utils import Logger
 
 log = Logger("Postprocess")
@@ -20,6 +22,33 @@ def _cfg(attr: str, default):
     return getattr(Settings, attr, default)
 
 
+@dataclass(frozen=True)
+class _GuardrailConfig:
+    """Kare başına bir kez okunan guardrail eşikleri (döngülerde getattr yok)."""
+
+    exempt_ids: np.ndarray
+    overlap_area_ratio: float
+    overlap_iou: float
+    scene_outlier_factor: float
+    scene_min_samples: int
+    crowd_threshold: int
+    crowd_conf_boost: float
+    base_conf: float
+
+    @classmethod
+    def from_settings(cls) -> "_GuardrailConfig":
+        return cls(
+            exempt_ids=class_ids_from_keys(_cfg("GUARDRAIL_EXEMPT_CLASSES", ("2", "3"))),
+            overlap_area_ratio=float(_cfg("GUARDRAIL_OVERLAP_AREA_RATIO", 5.0)),
+            overlap_iou=float(_cfg("GUARDRAIL_OVERLAP_IOU", 0.15)),
+            scene_outlier_factor=float(_cfg("GUARDRAIL_SCENE_OUTLIER_FACTOR", 8.0)),
+            scene_min_samples=int(_cfg("GUARDRAIL_SCENE_MIN_SAMPLES", 3)),
+            crowd_threshold=int(_cfg("GUARDRAIL_CROWD_THRESHOLD", 30)),
+            crowd_conf_boost=float(_cfg("GUARDRAIL_CROWD_CONF_BOOST", 0.15)),
+            base_conf=float(_cfg("CONFIDENCE_THRESHOLD", 0.40)),
+        )
+
+
 # ─── IoU helper ──────────────────────────────────────────────────────────────
 
 def _iou(a: Tuple[float, ...], b: Tuple[float, ...]) -> float:
@@ -36,12 +65,6 @@ def _iou(a: Tuple[float, ...], b: Tuple[float, ...]) -> float:
     return inter / (area_a + area_b - inter)
 
 
-def _area(det: Dict) -> float:
-    w = float(det["bottom_right_x"]) - float(det["top_left_x"])
-    h = float(det["bottom_right_y"]) - float(det["top_left_y"])
-    return max(1.0, w * h)
-
-
 def _bbox(det: Dict) -> Tuple[float, float, float, float]:
     return (
         float(det["top_left_x"]),
@@ -57,29 +80,41 @@ def apply_guardrails(detections: List[Dict]) -> Tuple[List[Dict], Dict[str, int]
     """Return (filtered detections, stats dict with elimination reasons).
 
     Stats keys: 'overlap_suppressed', 'scene_outlier', 'crowd_trimmed', 'total_input'.
+    List[Dict] uyumluluk sarmalayıcısı; asıl iş apply_guardrails_batch'te yapılır.
     """
     if not _cfg("GUARDRAILS_ENABLED", True):
         return detections, {"total_input": len(detections)}
+    keep, stats = apply_guardrails_batch(DetectionBatch.from_dicts(detections))
+    return [detections[i] for i in keep.tolist()], stats
+
 
+def apply_guardrails_batch(batch: DetectionBatch) -> Tuple[np.ndarray, Dict[str, int]]:
+    """DetectionBatch üzerinde guardrails; (korunan satır indeksleri, stats) döner."""
+    keep = np.arange(len(batch), dtype=np.int64)
+    if not _cfg("GUARDRAILS_ENABLED", True):
+        return keep, {"total_input": len(batch)}
+
+    cfg = _GuardrailConfig.from_settings()
     stats: Dict[str, int] = {
-        "total_input": len(detections),
+        "total_input": len(batch),
         "overlap_suppressed": 0,
         "scene_outlier": 0,
         "crowd_trimmed": 0,
     }
 
-    result = detections
-
     # 1. Overlap Resolution: dev taşıt bbox + normal insan bbox → büyük olan bastırılır
-    result, n_overlap = _overlap_resolution(result)
+    mask, n_overlap = _overlap_resolution(batch, cfg)
+    keep = keep[mask]
     stats["overlap_suppressed"] = n_overlap
 
     # 2. Scene Consistency: aynı sınıf içinde outlier boyut → bastır
-    result, n_outlier = _scene_consistency(result)
+    mask, n_outlier = _scene_consistency(batch.select(keep), cfg)
+    keep = keep[mask]
     stats["scene_outlier"] = n_outlier
 
     # 3. Crowd Adaptivity: çok fazla tespit → düşük conf olanları kes
-    result, n_crowd = _crowd_adaptivity(result)
+    mask, n_crowd = _crowd_adaptivity(batch.select(keep), cfg)
+    keep = keep[mask]
     stats["crowd_trimmed"] = n_crowd
 
     total_removed = n_overlap + n_outlier + n_crowd
@@ -89,109 +124,123 @@ def apply_guardrails(detections: List[Dict]) -> Tuple[List[Dict], Dict[str, int]
             f"(overlap={n_overlap}, outlier={n_outlier}, crowd={n_crowd})"
         )
 
-    return result, stats
+    return keep, stats
 
 
 # ─── Internal rules ──────────────────────────────────────────────────────────
 
-def _overlap_resolution(detections: List[Dict]) -> Tuple[List[Dict], int]:
+def _areas(batch: DetectionBatch) -> np.ndarray:
+    w = batch.coords[:, 2] - batch.coords[:, 0]
+    h = batch.coords[:, 3] - batch.coords[:, 1]
+    return np.maximum(1.0, w * h)
+
+
+def _exempt_mask(batch: DetectionBatch, cfg: _GuardrailConfig) -> np.ndarray:
+    return np.isin(batch.cls_ids, cfg.exempt_ids)
+
+
+def _overlap_candidates(
+    coords: np.ndarray, areas: np.ndarray, exempt: np.ndarray, cfg: _GuardrailConfig
+) -> np.ndarray:
+    """(N, N) üst üçgen aday matrisi: IoU ve alan oranı eşiklerini geçen çiftler."""
+    inter_w = np.maximum(
+        0.0, np.minimum(coords[:, None, 2], coords[None, :, 2]) - np.maximum(coords[:, None, 0], coords[None, :, 0])
+    )
+    inter_h = np.maximum(
+        0.0, np.minimum(coords[:, None, 3], coords[None, :, 3]) - np.maximum(coords[:, None, 1], coords[None, :, 1])
+    )
+    inter = inter_w * inter_h
+    iou = inter / (areas[:, None] + areas[None, :] - inter)
+
+    big = np.maximum(areas[:, None], areas[None, :])
+    small = np.maximum(np.minimum(areas[:, None], areas[None, :]), 1.0)
+    candidates = (iou >= cfg.overlap_iou) & (big / small >= cfg.overlap_area_ratio)
+    candidates &= ~exempt[:, None] & ~exempt[None, :]
+    return np.triu(candidates, k=1)
+
+
+def _overlap_resolution(
+    batch: DetectionBatch, cfg: Optional[_GuardrailConfig] = None
+) -> Tuple[np.ndarray, int]:
     """İnsan bbox'u düzgünken dev Taşıt bbox'ı aynı bölgede → büyüğünü bastır.
 
     Şartname: Satır 149-150 - motosiklet sürücüsü Taşıt olmalı.
     Burada sadece MANTIK DIŞI boyut farkı olan çakışmayı çözeriz.
+
+    Çift matrisi tek seferde hesaplanır; bastırma sırası eski i<j döngüsüyle
+    aynıdır: satır başında bastırılmış i atlanır, satır içinde i bastırılsa
+    bile kalan j'ler değerlendirilmeye devam eder.
     """
-    area_ratio_threshold = float(_cfg("GUARDRAIL_OVERLAP_AREA_RATIO", 5.0))
-    iou_threshold = float(_cfg("GUARDRAIL_OVERLAP_IOU", 0.15))
+    cfg = cfg or _GuardrailConfig.from_settings()
+    n = len(batch)
+    keep = np.ones(n, dtype=bool)
+    if n < 2:
+        return keep, 0
+
+    areas = _areas(batch)
+    candidates = _overlap_candidates(batch.coords, areas, _exempt_mask(batch, cfg), cfg)
+    rows = np.flatnonzero(candidates.any(axis=1))
+    if rows.size == 0:
+        return keep, 0
+
+    suppressed = np.zeros(n, dtype=bool)
+    for i in rows.tolist():
+        if suppressed[i]:
+            continue
+        cand = candidates[i] & ~suppressed
+        if not cand.any():
+            continue
+        i_loses = areas[i] > areas
+        suppressed |= cand & ~i_loses
+        if np.any(cand & i_loses):
+            suppressed[i] = True
 
-    suppress_ids = set()
-    n = len(detections)
+    keep[suppressed] = False
+    return keep, int(np.count_nonzero(suppressed))
 
-    exempt = frozenset(str(c) for c in _cfg("GUARDRAIL_EXEMPT_CLASSES", ("2", "3")))
-    for i in range(n):
-        if i in suppress_ids:
-            continue
-        for j in range(i + 1, n):
-            if j in suppress_ids:
-                continue
-            di, dj = detections[i], detections[j]
-            if str(di.get("cls", "")) in exempt or str(dj.get("cls", "")) in exempt:
-                continue
-            bi, bj = _bbox(di), _bbox(dj)
-            overlap = _iou(bi, bj)
-            if overlap < iou_threshold:
-                continue
-            ai, aj = _area(di), _area(dj)
-            ratio = max(ai, aj) / max(min(ai, aj), 1.0)
-            if ratio >= area_ratio_threshold:
-                if ai > aj:
-                    suppress_ids.add(i)
-                else:
-                    suppress_ids.add(j)
-
-    removed = len(suppress_ids)
-    if removed:
-        detections = [d for idx, d in enumerate(detections) if idx not in suppress_ids]
-    return detections, removed
-
-
-def _scene_consistency(detections: List[Dict]) -> Tuple[List[Dict], int]:
+
+def _scene_consistency(
+    batch: DetectionBatch, cfg: Optional[_GuardrailConfig] = None
+) -> Tuple[np.ndarray, int]:
     """Aynı sınıf içinde median alanın N katını aşan tespit → outlier.
 
     Örnek: 4 araba ~2000px², biri 50000px² → outlier.
     """
-    outlier_factor = float(_cfg("GUARDRAIL_SCENE_OUTLIER_FACTOR", 8.0))
-    min_samples = int(_cfg("GUARDRAIL_SCENE_MIN_SAMPLES", 3))
-
-    # Sınıf bazında alanları topla
-    class_areas: Dict[str, List[Tuple[int, float]]] = {}
-    for idx, det in enumerate(detections):
-        cls = str(det.get("cls", ""))
-        a = _area(det)
-        class_areas.setdefault(cls, []).append((idx, a))
-
-    exempt = frozenset(str(c) for c in _cfg("GUARDRAIL_EXEMPT_CLASSES", ("2", "3")))
-    suppress_ids = set()
-    for cls, items in class_areas.items():
-        if cls in exempt:
+    cfg = cfg or _GuardrailConfig.from_settings()
+    outlier_factor = cfg.scene_outlier_factor
+    min_samples = cfg.scene_min_samples
+
+    keep = np.ones(len(batch), dtype=bool)
+    if len(batch) == 0:
+        return keep, 0
+
+    areas = _areas(batch)
+    exempt = _exempt_mask(batch, cfg)
+    for cls_id in np.unique(batch.cls_ids[~exempt]):
+        rows = batch.cls_ids == cls_id
+        if int(np.count_nonzero(rows)) < min_samples:
             continue
-        if len(items) < min_samples:
-            continue
-        areas = [a for _, a in items]
-        median_area = float(np.median(areas))
+        median_area = float(np.median(areas[rows]))
         if median_area < 1.0:
             continue
-        threshold = median_area * outlier_factor
-        for idx, a in items:
-            if a > threshold:
-                suppress_ids.add(idx)
+        keep[rows & (areas > median_area * outlier_factor)] = False
 
-    removed = len(suppress_ids)
-    if removed:
-        detections = [d for idx, d in enumerate(detections) if idx not in suppress_ids]
-    return detections, removed
+    return keep, int(np.count_nonzero(~keep))
 
 
-def _crowd_adaptivity(detections: List[Dict]) -> Tuple[List[Dict], int]:
+def _crowd_adaptivity(
+    batch: DetectionBatch, cfg: Optional[_GuardrailConfig] = None
+) -> Tuple[np.ndarray, int]:
     """Tespit sayısı çok fazlaysa düşük conf olanları kes.
 
     Şartname max limit: RESULT_MAX_OBJECTS = 100 (per frame).
     Bunun altında bile olsa 30+ taşıt → gürültü olabilir.
     """
-    crowd_threshold = int(_cfg("GUARDRAIL_CROWD_THRESHOLD", 30))
-    crowd_conf_boost = float(_cfg("GUARDRAIL_CROWD_CONF_BOOST", 0.15))
-
-    if len(detections) <= crowd_threshold:
-        return detections, 0
-
-    exempt = frozenset(str(c) for c in _cfg("GUARDRAIL_EXEMPT_CLASSES", ("2", "3")))
-    base_conf = float(_cfg("CONFIDENCE_THRESHOLD", 0.40))
-    elevated_conf = base_conf + crowd_conf_boost
-
-    before = len(detections)
-    detections = [
-        d for d in detections
-        if str(d.get("cls", "")) in exempt
-        or float(d.get("confidence", 1.0)) >= elevated_conf
-    ]
-    removed = before - len(detections)
-    return detections, removed
+    cfg = cfg or _GuardrailConfig.from_settings()
+    if len(batch) <= cfg.crowd_threshold:
+        return np.ones(len(batch), dtype=bool), 0
+
+    elevated_conf = cfg.base_conf + cfg.crowd_conf_boost
+
+    keep = _exempt_mask(batch, cfg) | (batch.scores >= elevated_conf)
+    return keep, int(np.count_nonzero(~keep))
@@ -0,0 +1,380 @@
+"""Görev 1 ön-işleme: çözünürlük farkındalıklı CLAHE + keskinleştirme.
+
+Her tüketici ihtiyacı olan çözünürlükte işlenmiş görüntü alır:
+    - Termal/parlaklık sınıflandırması küçük bir thumbnail üzerinde yapılır.
+    - Tam kare geçişi, model girdisi boyutuna (imgsz) önceden küçültülmüş ve
+      o çözünürlükte iyileştirilmiş görüntüyü alır; kutular kare ölçeğine
+      geri çevrilir.
+    - SAHI tile'ları ham kareden tam çözünürlüklü kırpılır ve yalnızca
+      gerçekten çalıştırılan tile'lar (talep üzerine) iyileştirilir.
+Tam kare tamponları kareler arasında yeniden kullanılır. Küçültmeler ve gri
+dönüşüm karenin FrameContext önbelleğinden alınır; termal tile'lar tam kare
+griden (hareket kestirimiyle paylaşılan) kırpılır.
+
+PREPROCESS_RESOLUTION_AWARE=False eski davranışa döner: tüm kare tam
+çözünürlükte bir kez iyileştirilir, tüm tüketiciler onu kullanır.
+"""
+
+from typing import Any, Dict, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from config.settings import Settings
+from src.utils import FrameContext
+
+MODE_NORMAL = "normal"
+MODE_THERMAL = "thermal"
+MODE_LOW_CONTRAST = "low_contrast"  # gece / sis / kar: L kanalında CLAHE
+
+# Tek kare eşikleri (eski _preprocess ile aynı)
+_THERMAL_CHANNEL_DIFF = 2.0
+_DARK_BRIGHTNESS = 90.0
+_WASHED_BRIGHTNESS = 200.0
+
+
+def decide_mode(
+    diff_bg: float,
+    diff_gr: float,
+    mean_brightness: float,
+    current: Optional[str] = None,
+    channel_hysteresis: float = 0.0,
+    brightness_hysteresis: float = 0.0,
+) -> str:
+    """Ölçümlerden mod kararı; current verilirse o moddan çıkmak için histerezis aşılmalı."""
+    thermal_limit = _THERMAL_CHANNEL_DIFF
+    if current == MODE_THERMAL:
+        thermal_limit += channel_hysteresis
+    # Kanallar neredeyse özdeşse gri/termal görüntü
+    if diff_bg < thermal_limit and diff_gr < thermal_limit:
+        return MODE_THERMAL
+
+    dark, washed = _DARK_BRIGHTNESS, _WASHED_BRIGHTNESS
+    if current == MODE_LOW_CONTRAST:
+        dark += brightness_hysteresis
+        washed -= brightness_hysteresis
+    # Çok karanlık (gece) veya çok soluk (sis/kar) → L kanalında CLAHE
+    if mean_brightness < dark or mean_brightness > washed:
+        return MODE_LOW_CONTRAST
+    # Normal parlaklıkta RGB: CLAHE atlanır (CPU + artefakt)
+    return MODE_NORMAL
+
+
+class FramePreprocessor:
+    """CLAHE/termal sınıflandırma ve keskinleştirme; tampon havuzu kareler arasında yaşar."""
+
+    def __init__(self) -> None:
+        self._clahe_enabled = bool(getattr(Settings, "CLAHE_ENABLED", True))
+        self._clip_limit = float(getattr(Settings, "CLAHE_CLIP_LIMIT", 2.0))
+        self._grid = max(1, int(getattr(Settings, "CLAHE_TILE_SIZE", 8)))
+        self._thumb_width = max(16, int(getattr(Settings, "PREPROCESS_THUMBNAIL_WIDTH", 160)))
+        self._sharpen_sigma = float(getattr(Settings, "PREPROCESS_SHARPEN_SIGMA", 2.0))
+        self._clahe_by_grid: Dict[Tuple[int, int], Any] = {}
+        self._buffers: Dict[Tuple[str, Tuple[int, ...]], np.ndarray] = {}
+        self._mode_cache = SceneModeClassifier(self)
+        self._frames = 0
+        self._clahe_frames = 0  # en az bir kez CLAHE uygulanan kare sayısı
+        self._clahe_calls_frame = 0
+        self._last_mode = MODE_NORMAL
+
+    @property
+    def clahe_enabled(self) -> bool:
+        return self._clahe_enabled
+
+    def begin_frame(self, frame: Union[np.ndarray, FrameContext]) -> "PreparedFrame":
+        """Kareyi sınıflandırır; girdiler PreparedFrame üzerinden tembel üretilir."""
+        frame_ctx = FrameContext.wrap(frame)
+        resolution_aware = bool(getattr(Settings, "PREPROCESS_RESOLUTION_AWARE", True))
+        if resolution_aware and bool(getattr(Settings, "PREPROCESS_MODE_CACHE_ENABLED", True)):
+            mode = self._mode_cache.update(frame_ctx)
+        else:
+            mode = self.classify(frame_ctx, thumbnail=resolution_aware)
+        self._frames += 1
+        self._clahe_calls_frame = 0
+        self._last_mode = mode
+        return PreparedFrame(self, frame_ctx, mode, resolution_aware)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pipeline metrikleri için mod önbelleği ve CLAHE sayaçları."""
+        out = self._mode_cache.stats()
+        out.update(
+            {
+                "mode": self._last_mode,
+                "frames": int(self._frames),
+                "clahe_frames": int(self._clahe_frames),
+                "clahe_calls_last_frame": int(self._clahe_calls_frame),
+            }
+        )
+        return out
+
+    # ── Sınıflandırma ────────────────────────────────────────────────────────
+
+    def classify(self, frame: Union[np.ndarray, FrameContext], thumbnail: bool = True) -> str:
+        """Termal / düşük kontrast / normal (histerezissiz, tek kare kararı)."""
+        if not self._clahe_enabled:
+            return MODE_NORMAL
+        frame_ctx = FrameContext.wrap(frame)
+        sample = self._thumbnail(frame_ctx) if thumbnail else frame_ctx.frame
+        return decide_mode(*self.measure(sample))
+
+    def measure(self, sample: np.ndarray) -> Tuple[float, float, float]:
+        """(|B-G| ortalaması, |G-R| ortalaması, ortalama parlaklık); gri girdide kanal farkı 0."""
+        if sample.ndim == 3 and sample.shape[2] == 3:
+            b, g, r = cv2.split(sample)
+            diff_bg = cv2.mean(cv2.absdiff(b, g))[0]
+            diff_gr = cv2.mean(cv2.absdiff(g, r))[0]
+        else:
+            diff_bg = diff_gr = 0.0
+        return float(diff_bg), float(diff_gr), float(np.mean(sample))
+
+    def _thumbnail(self, frame_ctx: FrameContext) -> np.ndarray:
+        h, w = frame_ctx.shape[:2]
+        if w <= self._thumb_width:
+            return frame_ctx.frame
+        th = max(1, int(round(h * self._thumb_width / w)))
+        frame = frame_ctx.frame
+        dst = self._buffer("thumb", (th, self._thumb_width) + frame.shape[2:], frame.dtype)
+        return frame_ctx.resized((self._thumb_width, th), cv2.INTER_NEAREST, dst=dst)
+
+    # ── İyileştirme ──────────────────────────────────────────────────────────
+
+    def enhance(
+        self,
+        image: np.ndarray,
+        mode: str,
+        clahe_grid: Optional[Tuple[int, int]] = None,
+        sigma: Optional[float] = None,
+        buffer_key: Optional[str] = None,
+        gray: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Moda göre CLAHE + hafif keskinleştirme (bulanıklık toleransı - FR-007).
+
+        buffer_key verilirse bulanık/çıktı tamponları kareler arasında yeniden kullanılır;
+        dönen dizi bir sonraki aynı anahtarlı çağrıda üzerine yazılır. gray, image'ın
+        önceden hesaplanmış gri karşılığıdır (termal modda dönüşüm atlanır).
+        """
+        result = image
+        if mode != MODE_NORMAL and self._clahe_enabled:
+            if self._clahe_calls_frame == 0:
+                self._clahe_frames += 1
+            self._clahe_calls_frame += 1
+            clahe = self._clahe(clahe_grid or (self._grid, self._grid))
+            if mode == MODE_THERMAL:
+                if gray is None:
+                    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+                result = cv2.cvtColor(clahe.apply(gray), cv2.COLOR_GRAY2BGR)
+            else:
+                lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
+                l_channel, a_channel, b_channel = cv2.split(lab)
+                lab = cv2.merge([clahe.apply(l_channel), a_channel, b_channel])
+                result = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
+
+        sigma = self._sharpen_sigma if sigma is None else sigma
+        blurred_dst = out_dst = None
+        if buffer_key is not None:
+            blurred_dst = self._buffer(buffer_key + ":blur", result.shape, result.dtype)
+            out_dst = self._buffer(buffer_key + ":out", result.shape, result.dtype)
+        blurred = cv2.GaussianBlur(result, (0, 0), sigmaX=sigma, dst=blurred_dst)
+        return cv2.addWeighted(result, 1.3, blurred, -0.3, 0, dst=out_dst)
+
+    def resize_for_model(
+        self, frame: Union[np.ndarray, FrameContext], target: int
+    ) -> Tuple[np.ndarray, Tuple[float, float]]:
+        """Uzun kenarı target olacak şekilde küçültür (büyütmez); (görüntü, (sx, sy))."""
+        frame_ctx = FrameContext.wrap(frame)
+        frame = frame_ctx.frame
+        h, w = frame.shape[:2]
+        ratio = min(1.0, float(target) / float(max(h, w)))
+        if ratio >= 1.0:
+            return frame, (1.0, 1.0)
+        new_w = max(1, int(round(w * ratio)))
+        new_h = max(1, int(round(h * ratio)))
+        dst = self._buffer(f"resize{target}", (new_h, new_w) + frame.shape[2:], frame.dtype)
+        # Ultralytics LetterBox ile aynı enterpolasyon
+        resized = frame_ctx.resized((new_w, new_h), cv2.INTER_LINEAR, dst=dst)
+        return resized, (new_w / float(w), new_h / float(h))
+
+    def _clahe(self, grid: Tuple[int, int]) -> Any:
+        clahe = self._clahe_by_grid.get(grid)
+        if clahe is None:
+            clahe = cv2.createCLAHE(clipLimit=self._clip_limit, tileGridSize=grid)
+            self._clahe_by_grid[grid] = clahe
+        return clahe
+
+    def _buffer(self, name: str, shape: Tuple[int, ...], dtype: Any) -> np.ndarray:
+        key = (name, tuple(shape))
+        buf = self._buffers.get(key)
+        if buf is None or buf.dtype != dtype:
+            # Çözünürlük değişince eski boyuttaki tampon bırakılır
+            for stale in [k for k in self._buffers if k[0] == name]:
+                del self._buffers[stale]
+            buf = np.empty(shape, dtype=dtype)
+            self._buffers[key] = buf
+        return buf
+
+
+class PreparedFrame:
+    """Bir karenin tüketici bazlı (tam kare / tile) model girdileri."""
+
+    def __init__(
+        self,
+        preprocessor: FramePreprocessor,
+        frame: Union[np.ndarray, FrameContext],
+        mode: str,
+        resolution_aware: bool = True,
+    ) -> None:
+        self.context = FrameContext.wrap(frame)
+        self.frame = self.context.frame
+        self.mode = mode
+        self.resolution_aware = resolution_aware
+        self._pre = preprocessor
+        self._full: Dict[int, Tuple[np.ndarray, Tuple[float, float]]] = {}
+        self._legacy: Optional[np.ndarray] = None
+
+    def full(self, target: int) -> Tuple[np.ndarray, Tuple[float, float]]:
+        """Tam kare geçişi girdisi ve kutuları kareye geri çevirecek (sx, sy) ölçeği."""
+        if not self.resolution_aware:
+            return self._legacy_enhanced(), (1.0, 1.0)
+        target = int(target)
+        cached = self._full.get(target)
+        if cached is not None:
+            return cached
+
+        resized, scale = self._pre.resize_for_model(self.context, target)
+        # Keskinleştirme yarıçapı görüntüyle birlikte ölçeklenir (CLAHE ızgarası zaten göreli)
+        sigma = max(0.5, self._pre._sharpen_sigma * min(scale))
+        image = self._pre.enhance(resized, self.mode, sigma=sigma, buffer_key=f"full{target}")
+        self._full[target] = (image, scale)
+        return self._full[target]
+
+    def detach(self) -> "PreparedFrame":
+        """Önbellekteki tam kare girdilerini paylaşılan tampondan ayırır.
+
+        full() çıktısı kareler arası tampona yazılır; birden çok kare birlikte
+        tutulacaksa (çevrim dışı batch) sonraki karenin ezmemesi için kopyalanır.
+        """
+        self._full = {target: (image.copy(), scale) for target, (image, scale) in self._full.items()}
+        return self
+
+    def tile(self, x1: int, y1: int, x2: int, y2: int) -> np.ndarray:
+        """Tam çözünürlüklü tile kırpıntısı; yalnızca çağrıldığında iyileştirilir."""
+        if not self.resolution_aware:
+            return self._legacy_enhanced()[y1:y2, x1:x2]
+        crop = self.frame[y1:y2, x1:x2]
+        h, w = self.frame.shape[:2]
+        grid = self._pre._grid
+        # Tile'daki CLAHE hücresi tam karedeki hücreyle aynı piksel boyutunda olsun
+        clahe_grid = (
+            max(1, int(round(grid * (x2 - x1) / float(w)))),
+            max(1, int(round(grid * (y2 - y1) / float(h)))),
+        )
+        gray = None
+        if self.mode == MODE_THERMAL and self._pre.clahe_enabled:
+            gray = self.context.gray[y1:y2, x1:x2]
+        return self._pre.enhance(crop, self.mode, clahe_grid=clahe_grid, gray=gray)
+
+    def _legacy_enhanced(self) -> np.ndarray:
+        if self._legacy is None:
+            self._legacy = self._pre.enhance(self.frame, self.mode)
+        return self._legacy
+
+
+class SceneModeClassifier:
+    """Oturum boyu mod önbelleği: karar histerezisle tutulur.
+
+    Kamera profili ve ışık bir video içinde nadiren değişir. Karar her
+    PREPROCESS_MODE_REEVAL_FRAMES karede bir ya da sahne kesmesi algılandığında
+    thumbnail üzerinde yeniden verilir. Sahne kesmesi her karede 32x18'lik gri
+    bir prob ile (önceki proba ortalama mutlak fark) denetlenir.
+    Histerezis: termal moddan çıkmak için kanal farkı eşiği
+    PREPROCESS_CHANNEL_HYSTERESIS, düşük kontrast moddan çıkmak için parlaklık
+    PREPROCESS_BRIGHTNESS_HYSTERESIS kadar aşılmalıdır.
+    """
+
+    _PROBE_SIZE = (32, 18)
+
+    def __init__(self, preprocessor: FramePreprocessor) -> None:
+        self._pre = preprocessor
+        self._reeval_every = max(1, int(getattr(Settings, "PREPROCESS_MODE_REEVAL_FRAMES", 30)))
+        self._scene_cut_threshold = float(getattr(Settings, "PREPROCESS_SCENE_CUT_THRESHOLD", 30.0))
+        self._brightness_hysteresis = float(getattr(Settings, "PREPROCESS_BRIGHTNESS_HYSTERESIS", 8.0))
+        self._channel_hysteresis = float(getattr(Settings, "PREPROCESS_CHANNEL_HYSTERESIS", 1.0))
+        profile = str(getattr(Settings, "CAMERA_PROFILE", "rgb")).strip().lower()
+        # Termal kamera profili başlangıç kararını termal yönde tutar
+        self._mode: Optional[str] = MODE_THERMAL if profile == "thermal" else None
+        self._frames_since_eval = 0
+        self._probe: Optional[np.ndarray] = None
+        self._evaluations = 0
+        self._scene_cuts = 0
+        self._mode_switches = 0
+        self._last_reason = "none"
+
+    @property
+    def mode(self) -> Optional[str]:
+        return self._mode
+
+    def update(self, frame: Union[np.ndarray, FrameContext]) -> str:
+        frame_ctx = FrameContext.wrap(frame)
+        frame = frame_ctx.frame
+        if not self._pre.clahe_enabled:
+            self._last_reason = "clahe_disabled"
+            return MODE_NORMAL
+        if frame.ndim == 2:
+            self._last_reason = "single_channel"
+            return self._set_mode(MODE_THERMAL)
+
+        scene_cut = self._check_scene_cut(frame)
+        self._frames_since_eval += 1
+        if self._evaluations == 0:
+            reason = "initial"
+        elif scene_cut:
+            reason = "scene_cut"
+        elif self._frames_since_eval >= self._reeval_every:
+            reason = "interval"
+        else:
+            self._last_reason = "cached"
+            return self._mode or MODE_NORMAL
+
+        self._frames_since_eval = 0
+        self._evaluations += 1
+        self._last_reason = reason
+        # Sahne kesmesinde eski karar geçersiz: histerezis uygulanmaz
+        current = None if scene_cut else self._mode
+        diff_bg, diff_gr, mean_brightness = self._pre.measure(self._pre._thumbnail(frame_ctx))
+        return self._set_mode(
+            decide_mode(
+                diff_bg,
+                diff_gr,
+                mean_brightness,
+                current=current,
+                channel_hysteresis=self._channel_hysteresis,
+                brightness_hysteresis=self._brightness_hysteresis,
+            )
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode_reason": self._last_reason,
+            "mode_evaluations": int(self._evaluations),
+            "scene_cuts": int(self._scene_cuts),
+            "mode_switches": int(self._mode_switches),
+        }
+
+    def _set_mode(self, mode: str) -> str:
+        if self._mode is not None and mode != self._mode:
+            self._mode_switches += 1
+        self._mode = mode
+        return mode
+
+    def _check_scene_cut(self, frame: np.ndarray) -> bool:
+        # Adımlı görünüm + INTER_AREA: prob pikseli başına ~8 örnek, 4K'da <0.5 ms
+        stride = max(1, frame.shape[1] // (self._PROBE_SIZE[0] * 8))
+        probe = cv2.resize(frame[::stride, ::stride], self._PROBE_SIZE, interpolation=cv2.INTER_AREA)
+        probe = cv2.cvtColor(probe, cv2.COLOR_BGR2GRAY)
+        previous, self._probe = self._probe, probe
+        if previous is None:
+            return False
+        if float(cv2.absdiff(previous, probe).mean()) < self._scene_cut_threshold:
+            return False
+        self._scene_cuts += 1
+        return True
@@ -0,0 +1,334 @@
+"""Görev 1 INT8 nicemlenmiş (quantized) CPU model profili ve doğruluk koruması.
+
+Dışa aktarılmış FP32 ONNX grafiği ONNX Runtime ile INT8'e çevrilir:
+
+- ``int8_dynamic``: ağırlıklar INT8, aktivasyonlar çalışma anında nicemlenir;
+  kalibrasyon gerektirmez.
+- ``int8_static``: aktivasyon aralıkları ``datasets/`` altındaki karelerle
+  kalibre edilir (QDQ formatı); CPU'da genellikle daha hızlıdır.
+
+Nicemleme tek seferliktir ve sonuç MODEL_PATH'in yanına önbelleklenir. Hemen
+ardından FP32 ve INT8 grafikleri kalibrasyonda kullanılmayan kareler üzerinde
+karşılaştırılır; uyum raporu ``<model>.json`` olarak saklanır ve uyum oranı
+QUANT_MIN_AGREEMENT altındaysa INT8 modeli yüklenmez (FP32'ye düşülür).
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import cv2
+import numpy as np
+
+from config.settings import Settings
+from src.utils import Logger
+
+log = Logger("Quantization")
+
+QUANT_NONE = "none"
+QUANT_INT8_DYNAMIC = "int8_dynamic"
+QUANT_INT8_STATIC = "int8_static"
+SUPPORTED_QUANTIZATION = (QUANT_NONE, QUANT_INT8_DYNAMIC, QUANT_INT8_STATIC)
+
+
+def resolve_quantization(requested: Optional[str]) -> str:
+    """Bilinmeyen değerlerde ``none`` döner."""
+    mode = str(requested or QUANT_NONE).strip().lower()
+    if mode not in SUPPORTED_QUANTIZATION:
+        log.warn(f"Bilinmeyen INFERENCE_QUANTIZATION='{requested}'; nicemleme kapalı")
+        return QUANT_NONE
+    return mode
+
+
+def quantized_model_path(onnx_path: str, mode: str) -> str:
+    """``best.onnx`` → ``best_int8_dynamic.onnx`` / ``best_int8_static.onnx``."""
+    stem, _ = os.path.splitext(onnx_path)
+    return f"{stem}_{mode}.onnx"
+
+
+def agreement_report_path(quantized_path: str) -> str:
+    return os.path.splitext(quantized_path)[0] + ".json"
+
+
+def list_dataset_images(root: Optional[str] = None) -> List[str]:
+    """datasets/ altındaki görüntüleri (recursive, sıralı) listeler."""
+    root = root or Settings.DATASETS_DIR
+    extensions = tuple(ext.lower() for ext in Settings.IMAGE_EXTENSIONS)
+    paths: List[str] = []
+    for dirpath, _, filenames in os.walk(root):
+        paths.extend(
+            os.path.join(dirpath, name)
+            for name in filenames
+            if name.lower().endswith(extensions)
+        )
+    return sorted(paths)
+
+
+def split_calibration_images(
+    paths: Sequence[str], calibration_count: int, validation_count: int
+) -> tuple:
+    """Diziden eşit aralıklı örnekler; kalibrasyon ve doğrulama kümeleri ayrıktır."""
+    total = calibration_count + validation_count
+    if not paths or total <= 0:
+        return [], []
+    picks = np.unique(np.linspace(0, len(paths) - 1, num=min(total, len(paths))).astype(int))
+    sampled = [paths[i] for i in picks]
+    # Dönüşümlü dağıtım: iki küme de dizinin tamamını kapsar
+    validation_every = max(2, int(round(len(sampled) / max(1, validation_count))))
+    validation = sampled[validation_every - 1::validation_every][:validation_count]
+    chosen = set(validation)
+    calibration = [p for p in sampled if p not in chosen][:calibration_count]
+    return calibration, validation
+
+
+def letterbox_tensor(image: np.ndarray, imgsz: int) -> np.ndarray:
+    """Ultralytics ön işlemesiyle aynı: oran koruyan resize + 114 dolgu, RGB, NCHW float32."""
+    h, w = image.shape[:2]
+    ratio = min(imgsz / h, imgsz / w)
+    new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+    resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    top = (imgsz - new_h) // 2
+    left = (imgsz - new_w) // 2
+    canvas[top:top + new_h, left:left + new_w] = resized
+    tensor = canvas[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+    return tensor[None]
+
+
+def _iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.maximum(0.0, x2 - x1) * np.maximum(0.0, y2 - y1)
+    area_a = np.maximum(1e-6, (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1]))
+    area_b = np.maximum(1e-6, (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1]))
+    return inter / (area_a[:, None] + area_b[None, :] - inter)
+
+
+def detection_agreement(
+    ref_boxes: np.ndarray,
+    ref_cls: np.ndarray,
+    test_boxes: np.ndarray,
+    test_cls: np.ndarray,
+    iou_threshold: float = 0.5,
+) -> Dict[str, Any]:
+    """Tek kare için FP32 (referans) ve INT8 tespit uyumu.
+
+    Sınıftan bağımsız açgözlü IoU eşleştirmesi yapılır; eşleşen çiftlerde
+    sınıf uyumu ayrıca sayılır. ``agreement`` = aynı sınıfla eşleşen kutular /
+    max(referans, test) — kaçan ve fazladan kutular ikisi de cezalandırılır.
+    """
+    n_ref, n_test = int(len(ref_boxes)), int(len(test_boxes))
+    ious: List[float] = []
+    class_hits = 0
+    if n_ref and n_test:
+        iou = _iou_matrix(
+            np.asarray(ref_boxes, dtype=np.float64).reshape(-1, 4),
+            np.asarray(test_boxes, dtype=np.float64).reshape(-1, 4),
+        )
+        ref_cls = np.asarray(ref_cls).reshape(-1)
+        test_cls = np.asarray(test_cls).reshape(-1)
+        order = np.argsort(-iou, axis=None, kind="stable")
+        used_ref = np.zeros(n_ref, dtype=bool)
+        used_test = np.zeros(n_test, dtype=bool)
+        for flat in order:
+            r, t = divmod(int(flat), n_test)
+            if iou[r, t] < iou_threshold:
+                break
+            if used_ref[r] or used_test[t]:
+                continue
+            used_ref[r] = used_test[t] = True
+            ious.append(float(iou[r, t]))
+            class_hits += int(ref_cls[r] == test_cls[t])
+    return {
+        "ref_count": n_ref,
+        "test_count": n_test,
+        "matched": len(ious),
+        "class_matched": class_hits,
+        "iou_sum": float(sum(ious)),
+    }
+
+
+def summarize_agreement(frames: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Kare bazlı detection_agreement çıktılarını tek rapora toplar."""
+    totals = {"frames": 0, "ref_count": 0, "test_count": 0, "matched": 0, "class_matched": 0}
+    iou_sum = 0.0
+    for item in frames:
+        totals["frames"] += 1
+        for key in ("ref_count", "test_count", "matched", "class_matched"):
+            totals[key] += int(item[key])
+        iou_sum += float(item["iou_sum"])
+    denom = max(totals["ref_count"], totals["test_count"])
+    matched = totals["matched"]
+    return {
+        **totals,
+        "match_rate": round(matched / denom, 4) if denom else 1.0,
+        "class_match_rate": round(totals["class_matched"] / matched, 4) if matched else 1.0,
+        "mean_iou": round(iou_sum / matched, 4) if matched else 1.0,
+        "agreement": round(totals["class_matched"] / denom, 4) if denom else 1.0,
+    }
+
+
+def _result_arrays(result: Any) -> tuple:
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return np.zeros((0, 4), dtype=np.float64), np.zeros((0,), dtype=np.int64)
+
+    def _np(values: Any) -> np.ndarray:
+        if hasattr(values, "cpu"):
+            values = values.cpu()
+        if hasattr(values, "numpy"):
+            values = values.numpy()
+        return np.asarray(values)
+
+    return (
+        _np(boxes.xyxy).astype(np.float64).reshape(-1, 4),
+        _np(boxes.cls).astype(np.int64).reshape(-1),
+    )
+
+
+def compare_models(
+    reference_model: Any,
+    candidate_model: Any,
+    frames: Iterable[np.ndarray],
+    imgsz: int,
+    conf: float,
+    iou_threshold: float = 0.5,
+) -> Dict[str, Any]:
+    """İki modeli aynı karelerde çalıştırıp summarize_agreement raporu döndürür."""
+    per_frame = []
+    for frame in frames:
+        ref = reference_model.predict(source=frame, imgsz=imgsz, conf=conf, verbose=False, save=False)
+        cand = candidate_model.predict(source=frame, imgsz=imgsz, conf=conf, verbose=False, save=False)
+        per_frame.append(
+            detection_agreement(*_result_arrays(ref[0]), *_result_arrays(cand[0]), iou_threshold)
+        )
+    return summarize_agreement(per_frame)
+
+
+def _read_frames(paths: Iterable[str]) -> List[np.ndarray]:
+    frames = (cv2.imread(path) for path in paths)
+    return [frame for frame in frames if frame is not None]
+
+
+def _quantize(onnx_path: str, output_path: str, mode: str, calibration: Sequence[str]) -> None:
+    # Opsiyonel bağımlılık: yalnızca nicemleme istendiğinde yüklenir
+    import onnx
+    from onnxruntime.quantization import (
+        CalibrationDataReader,
+        QuantFormat,
+        QuantType,
+        quantize_dynamic,
+        quantize_static,
+    )
+
+    if mode == QUANT_INT8_DYNAMIC:
+        quantize_dynamic(onnx_path, output_path, weight_type=QuantType.QInt8)
+    else:
+        imgsz = int(Settings.INFERENCE_SIZE)
+        input_name = onnx.load(onnx_path, load_external_data=False).graph.input[0].name
+
+        class _DatasetReader(CalibrationDataReader):
+            def __init__(self) -> None:
+                self._paths = iter(calibration)
+
+            def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+                for path in self._paths:
+                    image = cv2.imread(path)
+                    if image is not None:
+                        return {input_name: letterbox_tensor(image, imgsz)}
+                return None
+
+        quantize_static(
+            onnx_path,
+            output_path,
+            _DatasetReader(),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=True,
+        )
+
+    # Ultralytics sınıf isimlerini/imgsz'yi ONNX metadata'sından okur; nicemleme
+    # sonrası korunması _configure_class_mapping davranışını aynı tutar.
+    source = onnx.load(onnx_path, load_external_data=False)
+    target = onnx.load(output_path)
+    del target.metadata_props[:]
+    target.metadata_props.extend(source.metadata_props)
+    onnx.save(target, output_path)
+
+
+def _is_fresh(path: str, source: str) -> bool:
+    try:
+        return os.path.getmtime(path) >= os.path.getmtime(source)
+    except OSError:
+        return False
+
+
+def load_agreement_report(quantized_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(agreement_report_path(quantized_path), "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def report_passes(report: Optional[Dict[str, Any]]) -> bool:
+    if not report:
+        return False
+    min_agreement = float(getattr(Settings, "QUANT_MIN_AGREEMENT", 0.90))
+    return float(report.get("agreement", 0.0)) >= min_agreement
+
+
+def ensure_quantized(onnx_path: str, mode: str, yolo_factory: Any) -> Optional[str]:
+    """INT8 grafiğini üretir/doğrular; doğruluk korumasını geçemezse None döner.
+
+    ``yolo_factory`` (ultralytics.YOLO) FP32/INT8 grafiklerini karşılaştırma
+    için yüklemekte kullanılır.
+    """
+    quantized = quantized_model_path(onnx_path, mode)
+    report = load_agreement_report(quantized) if _is_fresh(quantized, onnx_path) else None
+
+    if report is None:
+        calib_count = max(1, int(getattr(Settings, "QUANT_CALIBRATION_FRAMES", 64)))
+        valid_count = max(1, int(getattr(Settings, "QUANT_VALIDATION_FRAMES", 32)))
+        calibration, validation = split_calibration_images(
+            list_dataset_images(), calib_count, valid_count
+        )
+        if mode == QUANT_INT8_STATIC and not calibration:
+            log.warn(f"Kalibrasyon karesi bulunamadı ({Settings.DATASETS_DIR}); INT8 atlandı")
+            return None
+        if not validation:
+            log.warn("Doğrulama karesi yok; INT8 doğruluk koruması çalıştırılamaz, atlandı")
+            return None
+
+        log.info(
+            f"INT8 nicemleme ({mode}) başlıyor: kalibrasyon={len(calibration)} "
+            f"doğrulama={len(validation)} kare"
+        )
+        _quantize(onnx_path, quantized, mode, calibration)
+        report = compare_models(
+            yolo_factory(onnx_path, task="detect"),
+            yolo_factory(quantized, task="detect"),
+            _read_frames(validation),
+            imgsz=int(Settings.INFERENCE_SIZE),
+            conf=float(Settings.CONFIDENCE_THRESHOLD),
+            iou_threshold=float(getattr(Settings, "QUANT_AGREEMENT_IOU", 0.5)),
+        )
+        report["mode"] = mode
+        with open(agreement_report_path(quantized), "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+
+    log.info(
+        f"INT8 uyum ({mode}): agreement={report.get('agreement')} "
+        f"match={report.get('match_rate')} class={report.get('class_match_rate')} "
+        f"mean_iou={report.get('mean_iou')}"
+    )
+    if not report_passes(report):
+        log.warn(
+            f"INT8 doğruluk koruması geçilemedi (agreement={report.get('agreement')} < "
+            f"{getattr(Settings, 'QUANT_MIN_AGREEMENT', 0.90)}); FP32 kullanılacak"
+        )
+        return None
+    return quantized
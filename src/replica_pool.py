@@ -0,0 +1,154 @@
+"""CPU'da eşzamanlı çıkarım için model kopyası (replica) havuzu.
+
+Tek ObjectDetector tek model tutar; DETERMINISM_CPU_THREADS=1 ile bir torch
+çağrısı çok çekirdekli CPU'yu doyurmaz. Havuz N bağımsız model kopyası ve N
+worker thread'i tutar; SAHI tile batch'leri ve odaklı geçiş ROI kırpıntıları
+parçalara bölünüp kopyalara dağıtılır.
+
+Thread tercih edildi: torch / ONNX Runtime / OpenVINO çıkarım sırasında GIL'i
+bırakır ve kareyi süreçler arasında kopyalama gerekmez. Her worker başlangıçta
+torch.set_num_threads(REPLICA_POOL_THREADS) çağırır (OpenMP derlemelerinde
+intra-op iş parçacığı sayısı çağıran thread'e özgüdür).
+
+Determinizm: parça sınırları yalnızca tile sayısı, SAHI_BATCH_SIZE ve havuz
+boyutundan hesaplanır; sonuçlar gönderim sırasıyla döner ve ObjectDetector
+tarafından tile sırasıyla ayrıştırılır. Varsayılan olarak parça boşta olan
+kopyada çalışır; fixed_assignment (deterministic-profile=parallel) ile parça i
+her zaman kopya i % N'de, o kopyanın tek worker'ında çalışır — kopyalar
+arasında bir fark (ör. birinde yalın yolun kapanması) olsa bile atama
+zamanlamadan bağımsız kalır.
+"""
+
+import math
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+import torch
+
+from config.settings import Settings
+from src.lean_predictor import LeanPredictor
+from src.utils import Logger
+
+
+class ModelReplica:
+    """Tek model kopyası + kendi LeanPredictor tamponları (thread'ler arası paylaşılmaz)."""
+
+    def __init__(self, model: Any, device: str) -> None:
+        self.log = Logger("ReplicaPool")
+        self.model = model
+        self.device = device
+        self._lean: Optional[LeanPredictor] = None
+        self._lean_pending = bool(getattr(Settings, "LEAN_PREDICTOR_ENABLED", True))
+        self._frame_token: Optional[int] = None
+
+    def begin_frame(self) -> None:
+        self._frame_token = self._lean.begin_frame() if self._lean is not None else None
+
+    def predict(self, source: Any, **kwargs: Any) -> List[Any]:
+        """ObjectDetector._predict ile aynı yol seçimi; no_grad thread'e özgü olduğundan burada açılır."""
+        with torch.no_grad():
+            if self._lean is not None and not kwargs.get("augment", False):
+                try:
+                    return self._lean.predict(source, frame_token=self._frame_token, **kwargs)
+                except Exception as exc:
+                    self.log.warn(f"Kopyada yalın çıkarım yolu kapatıldı: {exc}")
+                    self._lean = None
+            results = self.model.predict(source=source, **kwargs)
+        if self._lean_pending:
+            self._lean_pending = False
+            self._lean = LeanPredictor.from_model(self.model, self.device)
+        return results
+
+
+def _init_worker(threads: int) -> None:
+    try:
+        torch.set_num_threads(max(1, int(threads)))
+    except Exception:
+        pass
+
+
+class ReplicaPool:
+    """N model kopyası; görevler boşta olan kopyada çalışır, sonuçlar sırayla döner."""
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        size: int,
+        threads_per_replica: int,
+        device: str,
+        quantization: str,
+        fixed_assignment: bool = False,
+    ) -> None:
+        self.log = Logger("ReplicaPool")
+        self.size = max(1, int(size))
+        self.quantization = quantization
+        self.fixed_assignment = bool(fixed_assignment)
+        self._replicas = [ModelReplica(factory(), device) for _ in range(self.size)]
+        self._idle: "queue.Queue[ModelReplica]" = queue.Queue()
+        for replica in self._replicas:
+            self._idle.put(replica)
+        # Sabit atamada kopya başına tek worker; aksi halde ortak N worker
+        self._executors = [
+            ThreadPoolExecutor(
+                max_workers=1 if self.fixed_assignment else self.size,
+                thread_name_prefix=f"replica{i}" if self.fixed_assignment else "replica",
+                initializer=_init_worker,
+                initargs=(threads_per_replica,),
+            )
+            for i in range(self.size if self.fixed_assignment else 1)
+        ]
+
+    def warmup(self, **predict_kwargs: Any) -> None:
+        """Her kopyayı bir kez predict() ile ısıtır (AutoBackend + LeanPredictor kurulumu)."""
+        for replica in self._replicas:
+            replica.predict(**predict_kwargs)
+
+    def begin_frame(self) -> None:
+        for replica in self._replicas:
+            replica.begin_frame()
+
+    def chunks(self, count: int, max_batch: int) -> List[Tuple[int, int]]:
+        """[start, end) parçaları: kopyalara eşit yayılır, batch boyutunu aşmaz."""
+        if count <= 0:
+            return []
+        step = max(1, min(int(max_batch), int(math.ceil(count / self.size))))
+        return [(start, min(start + step, count)) for start in range(0, count, step)]
+
+    def _execute(self, task: Callable[[ModelReplica], Any]) -> Tuple[Any, float]:
+        replica = self._idle.get()
+        try:
+            return self._timed(task, replica)
+        finally:
+            self._idle.put(replica)
+
+    @staticmethod
+    def _timed(task: Callable[[ModelReplica], Any], replica: ModelReplica) -> Tuple[Any, float]:
+        t0 = time.perf_counter()
+        result = task(replica)
+        return result, round((time.perf_counter() - t0) * 1000.0, 2)
+
+    def run(self, tasks: Sequence[Callable[[ModelReplica], Any]]) -> List[Tuple[Any, float]]:
+        """Görevleri paralel çalıştırır; (sonuç, ms) listesi gönderim sırasıyla."""
+        if self.fixed_assignment:
+            futures = [
+                self._executors[i % self.size].submit(self._timed, task, self._replicas[i % self.size])
+                for i, task in enumerate(tasks)
+            ]
+        else:
+            futures = [self._executors[0].submit(self._execute, task) for task in tasks]
+        return [future.result() for future in futures]
+
+    def predict_sharded(
+        self, sources: Sequence[Any], max_batch: int, **kwargs: Any
+    ) -> List[Tuple[List[Any], float]]:
+        """Kaynakları parçalara bölüp kopyalarda çalıştırır; parça başına (sonuçlar, ms)."""
+        return self.run([
+            (lambda replica, s=start, e=end: replica.predict(source=list(sources[s:e]), **kwargs))
+            for start, end in self.chunks(len(sources), max_batch)
+        ])
+
+    def close(self) -> None:
+        for executor in self._executors:
+            executor.shutdown(wait=False)
@@ -1,8 +1,9 @@
 """Determinizm ve runtime profil yardımcıları."""
 
+import json
 import os
 import random
-from typing import Literal, Optional
+from typing import Any, Dict, List, Literal, Optional, Tuple
 
 import numpy as np
 import torch
@@ -10,7 +11,17 @@ import torch
 from config.settings import Settings
 from src.utils import Logger
 
-ProfileName = Literal["off", "balanced", "max"]
+ProfileName = Literal["off", "balanced", "max", "parallel"]
+
+
+def parallel_worker_layout() -> Tuple[int, int]:
+    """parallel profili için (kopya sayısı, kopya başına intra-op thread)."""
+    intraop = max(1, int(getattr(Settings, "DETERMINISM_PARALLEL_INTRAOP_THREADS", 1)))
+    workers = int(getattr(Settings, "DETERMINISM_PARALLEL_WORKERS", 0))
+    if workers <= 0:
+        workers = max(1, (os.cpu_count() or 1) // intraop)
+    workers = min(workers, max(1, int(getattr(Settings, "DETERMINISM_PARALLEL_MAX_WORKERS", 8))))
+    return workers, intraop
 
 
 def apply_runtime_profile(profile: ProfileName, requested_profile: Optional[str] = None) -> None:
@@ -18,7 +29,7 @@ def apply_runtime_profile(profile: ProfileName, requested_profile: Optional[str]
     requested = (requested_profile or profile or "balanced").strip().lower()
     profile = (profile or "balanced").strip().lower()
 
-    if profile not in {"off", "balanced", "max"}:
+    if profile not in {"off", "balanced", "max", "parallel"}:
         raise ValueError(f"Unsupported deterministic profile: {profile}")
 
     if profile == "off":
@@ -49,19 +60,61 @@ def apply_runtime_profile(profile: ProfileName, requested_profile: Optional[str]
         pass
 
     cpu_threads = max(1, int(Settings.DETERMINISM_CPU_THREADS))
+    if profile == "parallel":
+        # Paralellik sabit iş bölümüyle (model kopyası havuzu, parça i → kopya i % N)
+        # sağlanır; intra-op thread sayısı sabit ve self-test ile doğrulanmış olmalıdır.
+        workers, cpu_threads = parallel_worker_layout()
+        Settings.REPLICA_POOL_SIZE = workers
+        Settings.REPLICA_POOL_THREADS = cpu_threads
+        Settings.REPLICA_POOL_FIXED_ASSIGNMENT = True
     try:
         torch.set_num_threads(cpu_threads)
     except Exception:
         pass
 
     log.info("Applying dynamic runtime overrides to Settings class...")
-    if profile in {"balanced", "max"}:
+    if profile in {"balanced", "max", "parallel"}:
         Settings.AUGMENTED_INFERENCE = False
-    if profile == "max":
+    if profile in {"max", "parallel"}:
         Settings.HALF_PRECISION = False
+        # Plan duvar saatinden değil sabit maliyet tablosundan; aynı girdi aynı planı üretir
+        Settings.SCHEDULER_COST_SOURCE = "static"
 
     log.success(
         f"Deterministic profile applied | requested={requested} | effective={profile} | "
         f"seed={seed} | tta={'off' if not Settings.AUGMENTED_INFERENCE else 'on'} | "
-        f"fp16={'on' if Settings.HALF_PRECISION else 'off'}"
+        f"fp16={'on' if Settings.HALF_PRECISION else 'off'} | threads={cpu_threads}"
+        + (f" | replicas={Settings.REPLICA_POOL_SIZE}" if profile == "parallel" else "")
     )
+
+
+def diff_payload_runs(
+    first: List[Dict[str, Any]], second: List[Dict[str, Any]], limit: int = 10
+) -> List[str]:
+    """İki koşunun kare payload'larını kanonik JSON olarak karşılaştırır.
+
+    Bit-kararlılık beklendiğinden tolerans yoktur; farklı karelerin ilk
+    ``limit`` tanesi için okunabilir satır döndürür (boş liste = özdeş).
+    """
+    diffs: List[str] = []
+    if len(first) != len(second):
+        diffs.append(f"frame count differs: {len(first)} != {len(second)}")
+    for idx, (a, b) in enumerate(zip(first, second)):
+        ja = json.dumps(a, sort_keys=True)
+        jb = json.dumps(b, sort_keys=True)
+        if ja == jb:
+            continue
+        objs_a = a.get("detected_objects", [])
+        objs_b = b.get("detected_objects", [])
+        detail = f"objects {len(objs_a)} vs {len(objs_b)}"
+        for k, (oa, ob) in enumerate(zip(objs_a, objs_b)):
+            if oa != ob:
+                detail = f"object[{k}] {oa} != {ob}"
+                break
+        else:
+            if len(objs_a) == len(objs_b):
+                detail = "translation/undefined objects differ"
+        diffs.append(f"frame {a.get('frame', idx)}: {detail}")
+        if len(diffs) >= limit:
+            break
+    return diffs
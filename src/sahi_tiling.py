@@ -0,0 +1,282 @@
+"""Yoğunluk güdümlü adaptif SAHI tile seçimi ve tile sonuç önbelleği.
+
+Tam kare geçişinin küçük/düşük güvenli tespitleri ve bir önceki karenin
+kamera kaymasıyla ötelenmiş küçük tespitleri "ipucu" olarak kullanılır;
+yalnızca ipucu merkezini içeren tile'lar çalıştırılır. Boş gökyüzü, çatı
+veya düz tarla gibi bölgeler atlanır.
+
+Kaçırma riskine karşı dönen bir keşif (exploration) penceresi her karede
+ızgaranın ceil(T / K) tile'ını sırayla ekler; böylece her tile en geç
+SAHI_ADAPTIVE_MAX_STALE_FRAMES (K) karede bir ziyaret edilir.
+
+Hover/yavaş hareket segmentlerinde TileReuseCache, kamera kayması telafi
+edilmiş küçük gri görüntüde tile başına değişim skoru hesaplar; eşiğin
+altındaki tile'lar modeli çalıştırmak yerine önceki tespitlerini kaydırarak
+yeniden kullanır.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Set, Tuple, Union
+
+import cv2
+import numpy as np
+
+from config.settings import Settings
+from src.detection_batch import DetectionBatch
+from src.utils import FrameContext
+
+Tile = Tuple[int, int, int, int]
+
+
+def _small_object_mask(coords: np.ndarray, max_side_px: float) -> np.ndarray:
+    w = coords[:, 2] - coords[:, 0]
+    h = coords[:, 3] - coords[:, 1]
+    return np.maximum(w, h) <= max_side_px
+
+
+def _centers(coords: np.ndarray) -> np.ndarray:
+    return np.column_stack(
+        ((coords[:, 0] + coords[:, 2]) * 0.5, (coords[:, 1] + coords[:, 3]) * 0.5)
+    )
+
+
+def tiles_containing_points(tiles: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """(T, 4) tile ve (P, 2) nokta için en az bir nokta içeren tile maskesi."""
+    if tiles.shape[0] == 0 or points.shape[0] == 0:
+        return np.zeros(tiles.shape[0], dtype=bool)
+    px = points[None, :, 0]
+    py = points[None, :, 1]
+    inside = (
+        (px >= tiles[:, None, 0]) & (px < tiles[:, None, 2])
+        & (py >= tiles[:, None, 1]) & (py < tiles[:, None, 3])
+    )
+    return inside.any(axis=1)
+
+
+class AdaptiveTilePlanner:
+    """Kare başına çalıştırılacak SAHI tile alt kümesini seçer."""
+
+    def __init__(self) -> None:
+        self._small_side_px = float(getattr(Settings, "SAHI_ADAPTIVE_SMALL_OBJECT_PX", 64.0))
+        self._low_conf = float(getattr(Settings, "SAHI_ADAPTIVE_LOW_CONF", 0.35))
+        self._max_stale = max(1, int(getattr(Settings, "SAHI_ADAPTIVE_MAX_STALE_FRAMES", 6)))
+        self._grid: Optional[Tuple[Tile, ...]] = None
+        self._explore_cursor: int = 0
+        self._prev_centers: Optional[np.ndarray] = None
+        self._last_hits: Set[Tile] = set()
+
+    def reset(self) -> None:
+        self._grid = None
+        self._explore_cursor = 0
+        self._prev_centers = None
+        self._last_hits = set()
+
+    def select(
+        self,
+        tiles: Sequence[Tile],
+        full_frame: DetectionBatch,
+        camera_shift: Tuple[float, float] = (0.0, 0.0),
+    ) -> Tuple[List[int], Dict[str, Any]]:
+        """Çalıştırılacak tile indekslerini (ızgara sırasında) ve sayaçları döndürür."""
+        grid = tuple(tiles)
+        total = len(grid)
+        if grid != self._grid:
+            # Çözünürlük/ayar değişti → geçmiş ipuçları ve keşif imleci geçersiz
+            self._grid = grid
+            self._explore_cursor = 0
+            self._prev_centers = None
+        self._last_hits = set()
+        if total == 0:
+            return [], self._stats(0, 0, 0)
+
+        if self._prev_centers is None:
+            # İlk kare (geçmiş yok): tam ızgara
+            return list(range(total)), self._stats(total, total, 0)
+
+        tile_arr = np.asarray(grid, dtype=np.float64)
+        hint_rows = _small_object_mask(full_frame.coords, self._small_side_px) | (
+            full_frame.scores < self._low_conf
+        )
+        hints = [_centers(full_frame.coords[hint_rows])]
+        if self._prev_centers.shape[0] > 0:
+            hints.append(self._prev_centers + np.asarray(camera_shift, dtype=np.float64))
+        hit = tiles_containing_points(tile_arr, np.concatenate(hints, axis=0))
+
+        explore_count = min(total, int(math.ceil(total / self._max_stale)))
+        explore_idx = (self._explore_cursor + np.arange(explore_count)) % total
+        self._explore_cursor = int((self._explore_cursor + explore_count) % total)
+        selected = hit.copy()
+        selected[explore_idx] = True
+        self._last_hits = {grid[i] for i in np.flatnonzero(hit)}
+
+        n_hit = int(np.count_nonzero(hit))
+        n_selected = int(np.count_nonzero(selected))
+        return np.flatnonzero(selected).tolist(), self._stats(total, n_hit, n_selected - n_hit)
+
+    def limit(self, tiles: Sequence[Tile], max_tiles: int) -> List[Tile]:
+        """Bütçe sınırı: ipucu olan tile'lar keşif tile'larından önce tutulur.
+
+        Sıra (ızgara sırası) korunur; atılan keşif tile'ları sonraki turlarda
+        yeniden sıraya girer.
+        """
+        if len(tiles) <= max_tiles:
+            return list(tiles)
+        ranked = sorted(range(len(tiles)), key=lambda i: tiles[i] not in self._last_hits)
+        keep = sorted(ranked[:max(0, int(max_tiles))])
+        return [tiles[i] for i in keep]
+
+    def remember(self, detections: DetectionBatch) -> None:
+        """Karenin nihai tespitlerinden küçük olanları bir sonraki kare için saklar."""
+        small = _small_object_mask(detections.coords, self._small_side_px)
+        self._prev_centers = _centers(detections.coords[small])
+
+    @staticmethod
+    def _stats(total: int, hit: int, explore: int) -> Dict[str, Any]:
+        return {
+            "tiles_grid": int(total),
+            "tiles_hit": int(hit),
+            "tiles_explore": int(explore),
+            "tiles_skipped": int(total - hit - explore),
+        }
+
+
+@dataclass
+class _TileEntry:
+    detections: DetectionBatch  # tile'ın son model çıktısı (kare koordinatlarında)
+    reference: np.ndarray  # o anki küçük gri tile kırpıntısı
+    shift: np.ndarray  # model çalıştığından beri biriken kamera kayması (px)
+    age: int = 0  # model çalıştığından beri geçen kare
+
+
+class TileReuseCache:
+    """Değişmeyen tile'lar için önceki tespitleri kamera kaymasıyla öteleyerek yeniden kullanır.
+
+    Bayatlamaya karşı iki sınır vardır: bir tile en fazla
+    SAHI_REUSE_MAX_AGE_FRAMES kare yeniden kullanılır ve her
+    SAHI_REUSE_FORCE_REFRESH_FRAMES karede bir tüm tile'lar yeniden çalıştırılır.
+    """
+
+    def __init__(self) -> None:
+        self._scale = min(1.0, max(0.02, float(getattr(Settings, "SAHI_REUSE_DOWNSCALE", 0.125))))
+        self._threshold = float(getattr(Settings, "SAHI_REUSE_CHANGE_THRESHOLD", 4.0))
+        self._max_age = max(0, int(getattr(Settings, "SAHI_REUSE_MAX_AGE_FRAMES", 4)))
+        self._refresh_every = max(1, int(getattr(Settings, "SAHI_REUSE_FORCE_REFRESH_FRAMES", 15)))
+        self._max_shift = float(getattr(Settings, "SAHI_REUSE_MAX_SHIFT_PX", 48.0))
+        self._entries: Dict[Tile, _TileEntry] = {}
+        self._signature: Optional[Hashable] = None
+        self._last_frame_index: Optional[int] = None
+        self._frames_since_refresh = 0
+        self._forced_refresh = False
+        self._gray: Optional[np.ndarray] = None
+
+    def reset(self) -> None:
+        self._entries.clear()
+        self._signature = None
+        self._last_frame_index = None
+        self._frames_since_refresh = 0
+        self._gray = None
+
+    def begin_frame(
+        self,
+        frame: Union[np.ndarray, FrameContext],
+        camera_shift: Tuple[float, float],
+        signature: Hashable,
+        frame_index: int,
+    ) -> None:
+        """Kareyi küçültür, önbellek girdilerini yaşlandırır ve kaymayı biriktirir.
+
+        camera_shift önceki kare → bu kare kaymasıdır (MovementEstimator.camera_shift_for);
+        girdilerin referansına göre toplam kayma bu değerlerin birikimidir.
+        signature (çıkarım ayarları + kare boyutu) değişirse veya kare atlanmışsa
+        (SAHI o karede çalışmadıysa) önbellek boşaltılır.
+        """
+        frame_ctx = FrameContext.wrap(frame)
+        h, w = frame_ctx.shape[:2]
+        # INTER_LINEAR 4K'da ~0.5 ms (INTER_AREA ~11 ms). Örtüşme gürültüsü skoru
+        # çoğunlukla artırır (gereksiz yeniden çalıştırma); gözden kaçan küçük
+        # değişimlerin etkisi yaş sınırı ve zorunlu yenileme ile sınırlıdır.
+        # Tam çözünürlük gri, hareket kestirimiyle FrameContext üzerinden paylaşılır.
+        self._gray = frame_ctx.gray_level(
+            (max(1, int(round(w * self._scale))), max(1, int(round(h * self._scale)))),
+            cv2.INTER_LINEAR,
+        )
+
+        contiguous = self._last_frame_index is not None and frame_index == self._last_frame_index + 1
+        if signature != self._signature or not contiguous:
+            self._entries.clear()
+            self._signature = signature
+            self._frames_since_refresh = 0
+        self._last_frame_index = frame_index
+
+        self._frames_since_refresh += 1
+        self._forced_refresh = self._frames_since_refresh >= self._refresh_every
+        if self._forced_refresh:
+            self._frames_since_refresh = 0
+
+        shift = np.asarray(camera_shift, dtype=np.float64)
+        for entry in self._entries.values():
+            entry.shift = entry.shift + shift
+            entry.age += 1
+
+    def change_score(self, tile: Tile, entry: _TileEntry) -> float:
+        """Kayma telafili ortalama mutlak gri fark (0-255); kare dışına taşarsa inf."""
+        if self._gray is None:
+            return float("inf")
+        x1, y1, x2, y2 = self._small_rect(tile)
+        dx, dy = (int(round(v * self._scale)) for v in entry.shift)
+        gh, gw = self._gray.shape[:2]
+        if x1 + dx < 0 or y1 + dy < 0 or x2 + dx > gw or y2 + dy > gh:
+            return float("inf")
+        current = self._gray[y1 + dy:y2 + dy, x1 + dx:x2 + dx]
+        if current.shape != entry.reference.shape or current.size == 0:
+            return float("inf")
+        return float(cv2.absdiff(current, entry.reference).mean())
+
+    def partition(
+        self, tiles: Sequence[Tile]
+    ) -> Tuple[List[Tile], DetectionBatch, Dict[str, Any]]:
+        """(çalıştırılacak tile'lar, ötelenmiş yeniden kullanılan tespitler, sayaçlar)."""
+        run: List[Tile] = []
+        reused: List[DetectionBatch] = []
+        for tile in tiles:
+            entry = self._entries.get(tile)
+            if (
+                self._forced_refresh
+                or entry is None
+                or entry.age > self._max_age
+                or float(np.abs(entry.shift).max()) > self._max_shift
+                or self.change_score(tile, entry) >= self._threshold
+            ):
+                run.append(tile)
+                continue
+            reused.append(self._translated(entry))
+
+        stats = {
+            "tiles_reused": len(tiles) - len(run),
+            "reuse_forced_refresh": bool(self._forced_refresh),
+        }
+        return run, DetectionBatch.concat(reused), stats
+
+    def store(self, tiles: Sequence[Tile], detections: Sequence[DetectionBatch]) -> None:
+        """Model çalıştırılan tile'ların çıktısını ve referans kırpıntısını saklar."""
+        if self._gray is None:
+            return
+        for tile, batch in zip(tiles, detections):
+            x1, y1, x2, y2 = self._small_rect(tile)
+            self._entries[tile] = _TileEntry(
+                detections=batch,
+                reference=self._gray[y1:y2, x1:x2].copy(),
+                shift=np.zeros(2, dtype=np.float64),
+            )
+
+    def _small_rect(self, tile: Tile) -> Tuple[int, int, int, int]:
+        return tuple(int(round(v * self._scale)) for v in tile)  # type: ignore[return-value]
+
+    @staticmethod
+    def _translated(entry: _TileEntry) -> DetectionBatch:
+        batch = entry.detections.select(np.arange(len(entry.detections)))
+        offset = np.tile(entry.shift, 2)
+        batch.boxes = batch.boxes + offset
+        batch.coords = np.round(batch.coords + offset, 2)
+        return batch
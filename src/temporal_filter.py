@@ -1,46 +1,47 @@
 """Zamansal tutarlılık filtresi: anlık FP (1–2 kare görünüp kaybolan) bastırma.
 Gerçek nesnelere odaklanmak için son N karede en az K kez görünen tespitleri kabul eder."""
 
-from collections import deque
-from typing import Deque, Dict, List, Tuple
+from typing import Dict, List
 
 import numpy as np
 
 from config.settings import Settings
+from src.detection_batch import DetectionBatch
 from src.utils import Logger
 
 log = Logger("TemporalFilter")
 
 
-def _bbox(det: Dict) -> Tuple[float, float, float, float]:
-    return (
-        float(det.get("top_left_x", 0)),
-        float(det.get("top_left_y", 0)),
-        float(det.get("bottom_right_x", 0)),
-        float(det.get("bottom_right_y", 0)),
-    )
-
-
-def _iou(a: Tuple[float, ...], b: Tuple[float, ...]) -> float:
-    x1 = max(a[0], b[0])
-    y1 = max(a[1], b[1])
-    x2 = min(a[2], b[2])
-    y2 = min(a[3], b[3])
-    inter = max(0, x2 - x1) * max(0, y2 - y1)
-    if inter == 0:
-        return 0.0
-    area_a = max(1, (a[2] - a[0]) * (a[3] - a[1]))
-    area_b = max(1, (b[2] - b[0]) * (b[3] - b[1]))
-    return inter / (area_a + area_b - inter)
+def _iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """(N, 4) ve (M, 4) kutular için (N, M) IoU; kesişimsiz çiftler 0."""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.maximum(0, x2 - x1) * np.maximum(0, y2 - y1)
+    area_a = np.maximum(1, (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1]))
+    area_b = np.maximum(1, (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1]))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        iou = inter / (area_a[:, None] + area_b[None, :] - inter)
+    return np.where(inter == 0, 0.0, iou)
 
 
 class TemporalConsistencyFilter:
-    """Anlık yanlış tespitleri bastırmak için zamansal tutarlılık filtresi."""
+    """Anlık yanlış tespitleri bastırmak için zamansal tutarlılık filtresi.
+
+    Geçmiş, (pencere × MAX_DETECTIONS) boyutlu önceden ayrılmış numpy halka
+    tamponunda tutulur; her kare yalnızca bir slotun üzerine yazar.
+    """
 
     def __init__(self) -> None:
-        self._history: Deque[List[Dict]] = deque(
-            maxlen=max(2, int(getattr(Settings, "TEMPORAL_FILTER_WINDOW_FRAMES", 5)))
-        )
+        self._window = max(2, int(getattr(Settings, "TEMPORAL_FILTER_WINDOW_FRAMES", 5)))
+        self._slot_capacity = max(1, int(getattr(Settings, "MAX_DETECTIONS", 300)))
+        self._boxes = np.zeros((self._window, self._slot_capacity, 4), dtype=np.float64)
+        self._cls_ids = np.full((self._window, self._slot_capacity), -1, dtype=np.int64)
+        self._slot_counts = np.zeros(self._window, dtype=np.int64)
+        self._head = 0  # bir sonraki yazılacak slot
+        self._filled = 0  # dolu slot sayısı (≤ pencere)
+
         self._min_appearances = max(1, int(getattr(Settings, "TEMPORAL_FILTER_MIN_APPEARANCES", 2)))
         self._iou_threshold = float(getattr(Settings, "TEMPORAL_FILTER_IOU_THRESHOLD", 0.3))
         self._conf_exempt = float(getattr(Settings, "TEMPORAL_FILTER_CONFIDENCE_EXEMPT", 0.7))
@@ -50,53 +51,61 @@ class TemporalConsistencyFilter:
         self._suppressed_count = 0
 
     def filter(self, detections: List[Dict]) -> List[Dict]:
-        if not getattr(Settings, "TEMPORAL_FILTER_ENABLED", True):
-            self._history.append(detections)
-            return detections
-
-        if not detections:
-            self._history.append([])
-            return []
-
-        result: List[Dict] = []
-        for det in detections:
-            if self._is_exempt(det):
-                result.append(det)
+        """List[Dict] uyumluluk sarmalayıcısı (keep_mask ile aynı karar)."""
+        keep = self.keep_mask(DetectionBatch.from_dicts(detections))
+        return [det for det, ok in zip(detections, keep.tolist()) if ok]
+
+    def keep_mask(self, batch: DetectionBatch) -> np.ndarray:
+        """Bu karede korunacak tespitlerin maskesi; kareyi geçmişe ekler."""
+        keep = np.ones(len(batch), dtype=bool)
+        if not getattr(Settings, "TEMPORAL_FILTER_ENABLED", True) or len(batch) == 0:
+            self._remember(batch)
+            return keep
+
+        exempt = batch.class_mask(self._exempt_classes) | (batch.scores >= self._conf_exempt)
+        candidates = np.flatnonzero(~exempt)
+        if candidates.size > 0:
+            matches = self._count_matches(batch.coords[candidates], batch.cls_ids[candidates])
+            rejected = candidates[matches < self._min_appearances - 1]
+            keep[rejected] = False
+            self._suppressed_count += int(rejected.size)
+
+        self._remember(batch)
+        return keep
+
+    def _remember(self, batch: DetectionBatch) -> None:
+        n = len(batch)
+        rows = np.arange(n)
+        if n > self._slot_capacity:
+            # Slot sınırı: en yüksek güvenli tespitler saklanır (sıra korunur)
+            rows = np.sort(np.argsort(-batch.scores, kind="stable")[: self._slot_capacity])
+            n = self._slot_capacity
+        slot = self._head
+        self._boxes[slot, :n] = batch.coords[rows]
+        self._cls_ids[slot, :n] = batch.cls_ids[rows]
+        self._slot_counts[slot] = n
+        self._head = (slot + 1) % self._window
+        self._filled = min(self._window, self._filled + 1)
+
+    def _count_matches(self, boxes: np.ndarray, cls_ids: np.ndarray) -> np.ndarray:
+        """Her kutunun kaç geçmiş karede aynı sınıftan IoU eşleşmesi bulduğu."""
+        counts = np.zeros(boxes.shape[0], dtype=np.int64)
+        for slot in range(self._filled):
+            m = int(self._slot_counts[slot])
+            if m == 0:
                 continue
-
-            cls_key = str(det.get("cls", det.get("cls_int", "")))
-            matches = self._count_matches(det, cls_key)
-            if matches >= self._min_appearances - 1:
-                result.append(det)
-            else:
-                self._suppressed_count += 1
-
-        self._history.append(list(detections))
-        return result
-
-    def _is_exempt(self, det: Dict) -> bool:
-        cls_key = str(det.get("cls", det.get("cls_int", "")))
-        if cls_key in self._exempt_classes:
-            return True
-        conf = float(det.get("confidence", det.get("_confidence", 0.0)))
-        return conf >= self._conf_exempt
-
-    def _count_matches(self, det: Dict, cls_key: str) -> int:
-        box = _bbox(det)
-        count = 0
-        for frame_dets in self._history:
-            for prev in frame_dets:
-                if str(prev.get("cls", prev.get("cls_int", ""))) != cls_key:
-                    continue
-                prev_box = _bbox(prev)
-                if _iou(box, prev_box) >= self._iou_threshold:
-                    count += 1
-                    break
-        return count
+            same_cls = cls_ids[:, None] == self._cls_ids[slot, None, :m]
+            if not same_cls.any():
+                continue
+            hit = same_cls & (_iou_matrix(boxes, self._boxes[slot, :m]) >= self._iou_threshold)
+            counts += hit.any(axis=1)
+        return counts
 
     def get_stats(self) -> Dict[str, int]:
         return {"temporal_suppressed": self._suppressed_count}
 
     def reset(self) -> None:
-        self._history.clear()
+        self._slot_counts[:] = 0
+        self._head = 0
+        self._filled = 0
         self._suppressed_count = 0
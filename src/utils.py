@@ -6,7 +6,7 @@ import re
 import subprocess
 import sys
 from datetime import datetime
-from typing import List, Dict, Optional, Any, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import cv2
 import numpy as np
@@ -52,17 +52,87 @@ def normalize_gps_health(
 
 # ─── FrameContext (frame_context.py birleşik) ────────────────────────────────
 class FrameContext:
-    """Frame için ortak hesaplamalar (gray conversion). Detection, movement, localization tekrar hesaplamasın."""
+    """Kare başına türetilmiş görüntülerin tembel önbelleği (gri, çözünürlük seviyeleri, LAB).
 
-    def __init__(self, frame: np.ndarray) -> None:
+    Detection, movement, localization ve Görev 3 aynı dönüşümü tekrar hesaplamasın:
+    her türetme ilk istekte bir kez üretilir ve bu bağlamda tutulur. Türetme başına
+    isabet/ıska sayaçları (derivation_stats) bir dönüşümün iki kez yapılmadığını
+    doğrulamak içindir — aynı anahtar için ıska en fazla 1 olur.
+
+    motion_service (FrameMotionService) verilirse hareket ve odometri aynı optik
+    akış sonucunu paylaşır.
+    """
+
+    def __init__(self, frame: np.ndarray, motion_service: Optional[Any] = None) -> None:
         self.frame = frame
-        self._gray: Optional[np.ndarray] = None
+        self.motion_service = motion_service
+        self._cache: Dict[Tuple[str, Any], Any] = {}
+        self._counters: Dict[str, List[int]] = {}
+
+    @classmethod
+    def wrap(cls, frame: Any) -> "FrameContext":
+        """FrameContext veya ham kare; ham kare için yeni bağlam."""
+        return frame if isinstance(frame, FrameContext) else cls(frame)
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.frame.shape
+
+    def derive(self, name: str, factory: Callable[[], Any], key: Any = None) -> Any:
+        """(name, key) türetmesini kare başına bir kez hesaplar; isabet/ıska sayılır."""
+        counter = self._counters.setdefault(name, [0, 0])
+        cache_key = (name, key)
+        if cache_key in self._cache:
+            counter[0] += 1
+            return self._cache[cache_key]
+        counter[1] += 1
+        value = factory()
+        self._cache[cache_key] = value
+        return value
+
+    def derivation_stats(self) -> Dict[str, Dict[str, int]]:
+        return {name: {"hits": hit, "misses": miss} for name, (hit, miss) in self._counters.items()}
 
     @property
     def gray(self) -> np.ndarray:
-        if self._gray is None:
-            self._gray = cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY)
-        return self._gray
+        return self.derive(
+            "gray",
+            lambda: (
+                cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY) if self.frame.ndim == 3 else self.frame
+            ),
+        )
+
+    @property
+    def lab(self) -> np.ndarray:
+        """Tam çözünürlük LAB (CLAHE); tile'lar bu görüntünün kırpıntısını kullanır."""
+        return self.derive("lab", lambda: cv2.cvtColor(self.frame, cv2.COLOR_BGR2LAB))
+
+    def resized(
+        self,
+        size: Tuple[int, int],
+        interpolation: int = cv2.INTER_LINEAR,
+        dst: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """BGR çözünürlük seviyesi (w, h). dst verilirse sonuç o tampona yazılır."""
+        size = (int(size[0]), int(size[1]))
+        if size == (self.frame.shape[1], self.frame.shape[0]):
+            return self.frame
+        return self.derive(
+            "resized",
+            lambda: cv2.resize(self.frame, size, dst=dst, interpolation=interpolation),
+            key=(size, interpolation),
+        )
+
+    def gray_level(self, size: Tuple[int, int], interpolation: int = cv2.INTER_AREA) -> np.ndarray:
+        """Gri çözünürlük seviyesi (w, h): tam çözünürlük gri görüntüden küçültülür."""
+        size = (int(size[0]), int(size[1]))
+        if size == (self.frame.shape[1], self.frame.shape[0]):
+            return self.gray
+        return self.derive(
+            "gray_level",
+            lambda: cv2.resize(self.gray, size, interpolation=interpolation),
+            key=(size, interpolation),
+        )
 
 
 # ─── Display / Logger ──────────────────────────────────────────────────────
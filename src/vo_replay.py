@@ -0,0 +1,238 @@
+"""Görev 2 için yalnızca görsel odometri (VO) replay'i: tespit yığını olmadan sürüklenme ölçümü.
+
+Görüntü dizisi (veya video) ve kare başına gerçek konum (CSV) okunur. Kareler
+tam hızda VisualOdometry.update'e verilir; GPS kesintisi OutageSchedule ile
+simüle edilir (varsayılan: mock sunucu ile aynı 450 kare sağlıklı + 300 karelik
+döngü, döngünün ilk 100 karesi sağlıklı). GPS=0 karelerinde sunucu gibi "NaN"
+gönderilir.
+
+Hız kestirimi kare zamanıyla (indeks / fps) beslenir. GPS=0 karelerinde
+gönderilecek konum, yarışma akışındaki gibi LATENCY_COMP_* ile öne projekte
+edilir. Metrikler bu gönderilen konum üzerinden hesaplanır:
+
+    mean_err_m          tüm karelerde ortalama 3B hata
+    outage_mean_err_m   GPS=0 karelerinde ortalama 3B hata
+    drift_m_per_min     kesinti sonu hatası / kesinti süresi (dakika, tüm kesintiler)
+    ms_per_frame        VisualOdometry.update ortalama süresi (p95 ayrıca)
+
+run_sweep, VO_* / LATENCY_COMP_* / MOTION_COMP_* ayar ızgarasını süreç havuzunda
+paralel koşturur. Her koşu ayarları kendi sürecinde uygular ve bitince geri alır.
+"""
+
+import csv
+import itertools
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Sequence
+
+import cv2
+import numpy as np
+
+from config.settings import Settings
+from src.frame_motion import FrameMotionService
+from src.localization import VisualOdometry
+from src.utils import FrameContext
+
+SWEEP_PREFIXES = ("VO_", "LATENCY_COMP_", "MOTION_COMP_")
+
+
+@dataclass(frozen=True)
+class OutageSchedule:
+    """warmup_frames boyunca GPS=1; sonra period karelik döngünün ilk healthy_frames'i GPS=1."""
+
+    warmup_frames: int = 450
+    period: int = 300
+    healthy_frames: int = 100
+
+    @classmethod
+    def parse(cls, spec: str) -> "OutageSchedule":
+        """"mock" | "off" (hep GPS=0) | "on" (hep GPS=1) | "WARMUP:PERIOD:HEALTHY"."""
+        spec = str(spec).strip().lower()
+        if spec == "mock":
+            return cls()
+        if spec == "off":
+            return cls(0, 1, 0)
+        if spec == "on":
+            return cls(0, 1, 1)
+        parts = spec.split(":")
+        if len(parts) != 3:
+            raise ValueError(f"GPS kesinti deseni anlaşılamadı: {spec!r}")
+        warmup, period, healthy = (int(p) for p in parts)
+        if period < 1 or not 0 <= healthy <= period or warmup < 0:
+            raise ValueError(f"Geçersiz GPS kesinti deseni: {spec!r}")
+        return cls(warmup, period, healthy)
+
+    def health(self, frame_idx: int) -> int:
+        if frame_idx < self.warmup_frames:
+            return 1
+        return 1 if (frame_idx - self.warmup_frames) % self.period < self.healthy_frames else 0
+
+
+@dataclass(frozen=True)
+class ReplayConfig:
+    source: str  # görüntü dizini veya video dosyası
+    ground_truth: str  # translation_x, translation_y, translation_z sütunlu CSV
+    schedule: str = "mock"
+    fps: float = 7.5  # 450 kare = 1 dk (şartname)
+    latency_ms: float = 80.0  # kare alımından gönderime simüle gecikme
+    max_frames: int = 0  # 0 = tümü
+    overrides: Dict[str, Any] = field(default_factory=dict)
+
+
+def load_ground_truth(path: str) -> List[Dict[str, float]]:
+    """CSV satırları kare sırasıyla; translation_x/y/z (veya x/y/z) sütunları."""
+    rows: List[Dict[str, float]] = []
+    with open(path, newline="", encoding="utf-8") as handle:
+        for row in csv.DictReader(handle):
+            rows.append(
+                {
+                    axis: float(row.get(f"translation_{axis}", row.get(axis, "nan")))
+                    for axis in ("x", "y", "z")
+                }
+            )
+    return rows
+
+
+def iter_frames(source: str) -> Iterator[np.ndarray]:
+    """Dizindeki görüntüler (ad sırasıyla) veya video kareleri."""
+    if os.path.isdir(source):
+        exts = tuple(e.lower() for e in Settings.IMAGE_EXTENSIONS)
+        for name in sorted(f for f in os.listdir(source) if f.lower().endswith(exts)):
+            frame = cv2.imread(os.path.join(source, name))
+            if frame is not None:
+                yield frame
+        return
+    capture = cv2.VideoCapture(source)
+    try:
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                return
+            yield frame
+    finally:
+        capture.release()
+
+
+def coerce_setting(name: str, value: Any) -> Any:
+    """Izgara değerini ayarın mevcut tipine çevirir; yalnızca SWEEP_PREFIXES ayarları."""
+    if not name.startswith(SWEEP_PREFIXES) or not hasattr(Settings, name):
+        raise ValueError(f"Taranamayan ayar: {name} (izinli önekler: {', '.join(SWEEP_PREFIXES)})")
+    current = getattr(Settings, name)
+    if isinstance(value, str):
+        if isinstance(current, bool):
+            return value.strip().lower() in {"1", "true", "yes", "on"}
+        if isinstance(current, int):
+            return int(value)
+        if isinstance(current, float):
+            return float(value)
+    return value
+
+
+def expand_sweep(specs: Sequence[str]) -> List[Dict[str, Any]]:
+    """["VO_X=1,2", "LATENCY_COMP_Y=a,b"] → kartezyen çarpım; boş girdi tek boş koşu."""
+    axes = []
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        name = name.strip()
+        if not values:
+            raise ValueError(f"Tarama tanımı NAME=v1,v2 biçiminde olmalı: {spec!r}")
+        axes.append([(name, coerce_setting(name, v)) for v in values.split(",")])
+    return [dict(combo) for combo in itertools.product(*axes)]
+
+
+def run_replay(config: ReplayConfig) -> Dict[str, Any]:
+    """Diziyi VisualOdometry ile oynatır; metrikler + uygulanan ayarlar."""
+    originals = {name: getattr(Settings, name) for name in config.overrides}
+    try:
+        for name, value in config.overrides.items():
+            setattr(Settings, name, coerce_setting(name, value))
+        return _replay(config)
+    finally:
+        for name, value in originals.items():
+            setattr(Settings, name, value)
+
+
+def _replay(config: ReplayConfig) -> Dict[str, Any]:
+    schedule = OutageSchedule.parse(config.schedule)
+    truth = load_ground_truth(config.ground_truth)
+    fps = max(1e-3, float(config.fps))
+    latency_s = max(0.0, float(config.latency_ms)) / 1000.0
+    max_dt_s = max(0.0, float(Settings.LATENCY_COMP_MAX_MS)) / 1000.0
+    max_delta_m = max(0.0, float(Settings.LATENCY_COMP_MAX_DELTA_M))
+
+    odometry = VisualOdometry()
+    service = FrameMotionService()
+    errors: List[float] = []
+    healths: List[int] = []
+    update_ms: List[float] = []
+    for idx, frame in enumerate(iter_frames(config.source)):
+        if idx >= len(truth) or (config.max_frames and idx >= config.max_frames):
+            break
+        gt = truth[idx]
+        gps_health = schedule.health(idx)
+        server_data: Dict[str, Any] = {"gps_health": gps_health, "gps_health_status": gps_health}
+        for axis in ("x", "y", "z"):
+            server_data[f"translation_{axis}"] = gt[axis] if gps_health == 1 else "NaN"
+
+        ctx = FrameContext(frame, motion_service=service)
+        t0 = time.perf_counter()
+        position = odometry.update(ctx, server_data, sample_monotonic=idx / fps)
+        update_ms.append((time.perf_counter() - t0) * 1000.0)
+        if gps_health == 0 and bool(Settings.LATENCY_COMP_ENABLED):
+            position, _, _ = odometry.project_position_with_latency(
+                position=position,
+                dt_sec=latency_s,
+                max_dt_sec=max_dt_s,
+                max_delta_m=max_delta_m,
+            )
+        errors.append(
+            math.sqrt(sum((float(position[a]) - gt[a]) ** 2 for a in ("x", "y", "z")))
+        )
+        healths.append(gps_health)
+
+    err = np.asarray(errors, dtype=np.float64)
+    outage = np.asarray(healths, dtype=np.int64) == 0
+    # Kesinti parçaları: her parçanın sonundaki hata / parça süresi
+    end_errors, outage_minutes = 0.0, 0.0
+    start = None
+    for i, off in enumerate(list(outage) + [False]):
+        if off and start is None:
+            start = i
+        elif not off and start is not None:
+            end_errors += float(err[i - 1])
+            outage_minutes += (i - start) / fps / 60.0
+            start = None
+    ms = np.asarray(update_ms, dtype=np.float64)
+    return {
+        "overrides": dict(config.overrides),
+        "frames": int(len(err)),
+        "outage_frames": int(outage.sum()),
+        "mean_err_m": round(float(err.mean()), 4) if len(err) else float("nan"),
+        "outage_mean_err_m": round(float(err[outage].mean()), 4) if outage.any() else 0.0,
+        "drift_m_per_min": round(end_errors / outage_minutes, 4) if outage_minutes > 0 else 0.0,
+        "ms_per_frame": round(float(ms.mean()), 3) if len(ms) else 0.0,
+        "p95_ms": round(float(np.percentile(ms, 95)), 3) if len(ms) else 0.0,
+    }
+
+
+def _init_worker() -> None:
+    # Paralel koşular çekirdekleri paylaşır; ms/kare koşular arasında karşılaştırılabilir kalsın
+    cv2.setNumThreads(1)
+
+
+def run_sweep(
+    base: ReplayConfig, grid: Sequence[Dict[str, Any]], workers: int = 0
+) -> List[Dict[str, Any]]:
+    """Izgaradaki her ayar kombinasyonu için run_replay; sonuçlar ızgara sırasıyla."""
+    configs = [
+        ReplayConfig(**{**base.__dict__, "overrides": {**base.overrides, **overrides}})
+        for overrides in grid
+    ]
+    workers = int(workers) if workers else min(len(configs), os.cpu_count() or 1)
+    if workers <= 1 or len(configs) <= 1:
+        return [run_replay(config) for config in configs]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        return list(pool.map(run_replay, configs))
@@ -248,6 +248,33 @@ class TestRuntimeProfile:
         assert Settings.AUGMENTED_INFERENCE is False
         assert Settings.HALF_PRECISION is False
 
+    def test_parallel(self):
+        keys = ("REPLICA_POOL_SIZE", "REPLICA_POOL_THREADS", "REPLICA_POOL_FIXED_ASSIGNMENT",
+                "DETERMINISM_PARALLEL_WORKERS", "DETERMINISM_PARALLEL_INTRAOP_THREADS")
+        orig = {k: getattr(Settings, k) for k in keys}
+        try:
+            Settings.HALF_PRECISION = True
+            Settings.DETERMINISM_PARALLEL_WORKERS = 4
+            Settings.DETERMINISM_PARALLEL_INTRAOP_THREADS = 2
+            apply_runtime_profile("parallel")
+            assert Settings.HALF_PRECISION is False
+            assert (Settings.REPLICA_POOL_SIZE, Settings.REPLICA_POOL_THREADS) == (4, 2)
+            assert Settings.REPLICA_POOL_FIXED_ASSIGNMENT is True
+        finally:
+            for key, value in orig.items():
+                setattr(Settings, key, value)
+
+    def test_payload_run_diff(self):
+        from src.runtime_profile import diff_payload_runs
+
+        obj = {"cls": "0", "top_left_x": 1.0}
+        run = [{"frame": 0, "detected_objects": [obj]}, {"frame": 1, "detected_objects": []}]
+        assert diff_payload_runs(run, copy.deepcopy(run)) == []
+        changed = copy.deepcopy(run)
+        changed[0]["detected_objects"][0]["top_left_x"] = 1.0000001
+        diffs = diff_payload_runs(run, changed)
+        assert len(diffs) == 1 and diffs[0].startswith("frame 0: object[0]")
+
     def test_invalid(self):
         with pytest.raises(ValueError):
             apply_runtime_profile("invalid_profile")
@@ -314,8 +341,6 @@ class TestEdgeMarginRatio(unittest.TestCase):
             Settings.EDGE_MARGIN_RATIO = orig
 
     def test_uap_uai_conflict_suppression_keeps_high_confidence(self):
-        from src.detection import ObjectDetector
-
         orig_iou = getattr(Settings, "UAP_UAI_CONFLICT_IOU_THRESHOLD", 0.55)
         orig_gap = getattr(Settings, "UAP_UAI_CONFLICT_MIN_CONF_GAP", 0.12)
         orig_ratio = getattr(Settings, "UAP_UAI_CONFLICT_MIN_AREA_RATIO", 1.30)
@@ -325,8 +350,7 @@ class TestEdgeMarginRatio(unittest.TestCase):
         Settings.UAP_UAI_CONFLICT_MIN_AREA_RATIO = 1.30
         Settings.DEBUG = False
         try:
-            detector = ObjectDetector.__new__(ObjectDetector)
-            detector.log = Logger("DetectorTest")
+            detector = _make_test_detector()
             detections = [
                 {
                     "cls_int": 2,
@@ -372,8 +396,6 @@ class TestEdgeMarginRatio(unittest.TestCase):
             Settings.DEBUG = orig_debug
 
     def test_uap_uai_conflict_suppression_keeps_ambiguous_overlap(self):
-        from src.detection import ObjectDetector
-
         orig_iou = getattr(Settings, "UAP_UAI_CONFLICT_IOU_THRESHOLD", 0.55)
         orig_gap = getattr(Settings, "UAP_UAI_CONFLICT_MIN_CONF_GAP", 0.12)
         orig_ratio = getattr(Settings, "UAP_UAI_CONFLICT_MIN_AREA_RATIO", 1.30)
@@ -383,8 +405,7 @@ class TestEdgeMarginRatio(unittest.TestCase):
         Settings.UAP_UAI_CONFLICT_MIN_AREA_RATIO = 1.30
         Settings.DEBUG = False
         try:
-            detector = ObjectDetector.__new__(ObjectDetector)
-            detector.log = Logger("DetectorTest")
+            detector = _make_test_detector()
             detections = [
                 {
                     "cls_int": 2,
@@ -419,8 +440,6 @@ class TestEdgeMarginRatio(unittest.TestCase):
             Settings.DEBUG = orig_debug
 
     def test_should_run_uap_uai_focused_pass_rescue_absent_streak(self):
-        from src.detection import ObjectDetector
-
         orig_interval = getattr(Settings, "UAP_UAI_FOCUSED_PASS_INTERVAL", 2)
         orig_rescue_enabled = getattr(Settings, "UAP_UAI_RESCUE_ENABLED", True)
         orig_rescue_streak = getattr(Settings, "UAP_UAI_RESCUE_ABSENT_STREAK", 2)
@@ -429,7 +448,7 @@ class TestEdgeMarginRatio(unittest.TestCase):
             Settings.UAP_UAI_RESCUE_ENABLED = True
             Settings.UAP_UAI_RESCUE_ABSENT_STREAK = 2
 
-            detector = ObjectDetector.__new__(ObjectDetector)
+            detector = _make_test_detector()
             detector._frame_count = 3
             detector._uap_uai_absent_streak = 2
             detector._prev_raw_has_uap_uai = False
@@ -443,9 +462,7 @@ class TestEdgeMarginRatio(unittest.TestCase):
             Settings.UAP_UAI_RESCUE_ABSENT_STREAK = orig_rescue_streak
 
     def test_build_pipeline_metrics_reports_uap_uai_drop(self):
-        from src.detection import ObjectDetector
-
-        detector = ObjectDetector.__new__(ObjectDetector)
+        detector = _make_test_detector()
         detector._uap_uai_absent_streak = 1
         detector._uap_uai_absent_streak_max = 4
         detector._last_uap_uai_missing_landing_status_count = 0
@@ -475,6 +492,1345 @@ class TestEdgeMarginRatio(unittest.TestCase):
         self.assertEqual(metrics["uap_uai_drop_by_stage"]["confidence_filter"], 1)
 
 
+class _FakeBoxes:
+    """ultralytics Boxes taklidi: toplu (xyxy/conf/cls) ve kutu-kutu erişim."""
+
+    def __init__(self, rows):
+        data = np.asarray(rows, dtype=np.float32).reshape(-1, 6)
+        self.xyxy = data[:, :4]
+        self.conf = data[:, 4]
+        self.cls = data[:, 5]
+
+    def __len__(self):
+        return int(self.xyxy.shape[0])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield type("_Box", (), {
+                "xyxy": self.xyxy[i:i + 1],
+                "conf": self.conf[i:i + 1],
+                "cls": self.cls[i:i + 1],
+            })()
+
+
+class _FakeResult:
+    def __init__(self, rows):
+        self.boxes = _FakeBoxes(rows)
+
+
+class _TileModel:
+    """Her kaynak görüntü için sabit bir kutu döndüren sahte model."""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, source, **kwargs):
+        sources = source if isinstance(source, list) else [source]
+        self.calls.append(len(sources))
+        return [_FakeResult([[10.0, 20.0, 50.0, 60.0, 0.9, 0.0]]) for _ in sources]
+
+
+def _make_test_detector(model=None):
+    """Model yüklemeden ObjectDetector: __init__ ile aynı durum alanları (_init_state)."""
+    from src.detection import ObjectDetector
+
+    detector = ObjectDetector.__new__(ObjectDetector)
+    detector.log = Logger("DetectorTest")
+    detector._init_state()
+    detector.device = "cpu"
+    detector.model = model
+    detector._model_class_map = {0: 0, 1: 1, 2: 2, 3: 3}
+    detector._lean_pending = False  # sahte modellerde AutoBackend yok
+    return detector
+
+
+@unittest.skipUnless(main_module is not None, "main runtime missing")
+class TestSahiBatching(unittest.TestCase):
+    def setUp(self):
+        self._orig = {
+            "SAHI_SLICE_SIZE": Settings.SAHI_SLICE_SIZE,
+            "SAHI_OVERLAP_RATIO": Settings.SAHI_OVERLAP_RATIO,
+            "SAHI_BATCH_SIZE": getattr(Settings, "SAHI_BATCH_SIZE", 8),
+            "DEBUG": Settings.DEBUG,
+        }
+        Settings.SAHI_SLICE_SIZE = 640
+        Settings.SAHI_OVERLAP_RATIO = 0.35
+        Settings.DEBUG = False
+
+    def tearDown(self):
+        for key, value in self._orig.items():
+            setattr(Settings, key, value)
+
+    def test_tile_plan_matches_legacy_grid(self):
+        from src.detection import ObjectDetector
+
+        h, w, size, overlap = 2160, 3840, 640, 0.35
+        step = int(size * (1 - overlap))
+        legacy = []
+        for y in range(0, h, step):
+            for x in range(0, w, step):
+                x2, y2 = min(x + size, w), min(y + size, h)
+                if (x2 - x) < size // 2 or (y2 - y) < size // 2:
+                    continue
+                legacy.append((x, y, x2, y2))
+        self.assertEqual(ObjectDetector._plan_sahi_tiles(h, w, size, overlap), legacy)
+
+    def test_sliced_inference_batches_tiles_and_offsets_boxes(self):
+        from src.detection import ObjectDetector
+
+        Settings.SAHI_BATCH_SIZE = 4
+        detector = _make_test_detector(_TileModel())
+        frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        cfg = {"conf": 0.2, "iou": 0.5, "max_det": 300, "augment": False}
+
+        dets = detector._sliced_inference(frame, inference_cfg=cfg).to_dicts()
+        tiles = ObjectDetector._plan_sahi_tiles(1080, 1920, 640, 0.35)
+
+        self.assertEqual(sum(detector.model.calls), len(tiles))
+        self.assertTrue(all(n <= 4 for n in detector.model.calls))
+        self.assertEqual(len(detector.model.calls), -(-len(tiles) // 4))
+        self.assertEqual(len(dets), len(tiles))
+        for det, (x1, y1, _, _) in zip(dets, tiles):
+            self.assertAlmostEqual(det["top_left_x"], 10.0 + x1)
+            self.assertAlmostEqual(det["bottom_right_y"], 60.0 + y1)
+            self.assertEqual(det["bbox"][0], det["top_left_x"])
+
+        stats = detector._last_sahi_stats
+        self.assertEqual(stats["tile_count"], len(tiles))
+        self.assertEqual(stats["batch_count"], len(detector.model.calls))
+        self.assertEqual(len(stats["batch_ms"]), stats["batch_count"])
+
+
+class TestAdaptiveTilePlanner(unittest.TestCase):
+    def setUp(self):
+        self._orig = {
+            k: getattr(Settings, k, None)
+            for k in (
+                "SAHI_ADAPTIVE_ENABLED", "SAHI_ADAPTIVE_MAX_STALE_FRAMES",
+                "SAHI_SLICE_SIZE", "SAHI_OVERLAP_RATIO", "DEBUG",
+            )
+        }
+        Settings.SAHI_ADAPTIVE_ENABLED = True
+        Settings.DEBUG = False
+
+    def tearDown(self):
+        for key, value in self._orig.items():
+            setattr(Settings, key, value)
+
+    @staticmethod
+    def _batch(rows):
+        from src.detection_batch import DetectionBatch
+
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, 5)
+        return DetectionBatch.from_arrays(
+            boxes=rows[:, :4], coords=rows[:, :4], scores=rows[:, 4],
+            cls_ids=np.zeros(len(rows)), source_cls_ids=np.zeros(len(rows)),
+            trace_ids=[""] * len(rows),
+        )
+
+    def test_exploration_visits_every_tile_within_k_frames(self):
+        from src.sahi_tiling import AdaptiveTilePlanner
+
+        Settings.SAHI_ADAPTIVE_MAX_STALE_FRAMES = 4
+        tiles = [(x, y, x + 100, y + 100) for y in (0, 100, 200) for x in (0, 100, 200, 300)]
+        planner = AdaptiveTilePlanner()
+        first, _ = planner.select(tiles, self._batch([]))
+        self.assertEqual(first, list(range(12)))
+
+        planner.remember(self._batch([]))
+        visited = set()
+        for _ in range(4):
+            selected, stats = planner.select(tiles, self._batch([]))
+            self.assertEqual(stats["tiles_explore"], 3)
+            self.assertEqual(stats["tiles_skipped"], 9)
+            visited.update(selected)
+        self.assertEqual(visited, set(range(12)))
+
+    def test_previous_detection_is_shifted_by_camera_motion(self):
+        from src.sahi_tiling import AdaptiveTilePlanner
+
+        Settings.SAHI_ADAPTIVE_MAX_STALE_FRAMES = 100
+        tiles = [(0, 0, 100, 100), (100, 0, 200, 100), (200, 0, 300, 100)]
+        planner = AdaptiveTilePlanner()
+        planner.select(tiles, self._batch([]))
+        planner.remember(self._batch([[180.0, 40.0, 200.0, 60.0, 0.9]]))
+
+        selected, stats = planner.select(tiles, self._batch([]), camera_shift=(30.0, 0.0))
+        self.assertEqual(stats["tiles_hit"], 1)
+        self.assertIn(2, selected)
+        self.assertNotIn(1, selected)
+
+    @unittest.skipUnless(main_module is not None, "main runtime missing")
+    def test_sahi_detect_skips_tiles_and_reports_metrics(self):
+        from src.detection import ObjectDetector
+
+        Settings.SAHI_SLICE_SIZE = 640
+        Settings.SAHI_OVERLAP_RATIO = 0.35
+        Settings.SAHI_ADAPTIVE_MAX_STALE_FRAMES = 6
+        detector = _make_test_detector(_TileModel())
+        frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        cfg = {"conf": 0.2, "iou": 0.5, "max_det": 300, "augment": False, "imgsz": 640}
+        grid = len(ObjectDetector._plan_sahi_tiles(1080, 1920, 640, 0.35))
+
+        detector._sahi_detect(frame, inference_cfg=cfg)
+        self.assertEqual(detector._last_sahi_stats["tile_count"], grid)
+        detector._tile_planner.remember(self._batch([]))
+
+        detector._sahi_detect(frame, inference_cfg=cfg, camera_shift=(0.0, 0.0))
+        stats = detector._last_sahi_stats
+        # Tam kare geçişindeki küçük kutu (10,20)-(50,60) → yalnızca ilk tile ipucu alır
+        self.assertEqual(stats["tiles_hit"], 1)
+        self.assertLess(stats["tile_count"], grid)
+        self.assertEqual(stats["tiles_skipped"], grid - stats["tile_count"])
+        self.assertGreaterEqual(stats["saved_ms"], 0.0)
+
+
+@unittest.skipUnless(main_module is not None, "main runtime missing")
+class TestTileReuseCache(unittest.TestCase):
+    _KEYS = (
+        "SAHI_ADAPTIVE_ENABLED", "SAHI_TILE_REUSE_ENABLED", "SAHI_REUSE_MAX_AGE_FRAMES",
+        "SAHI_REUSE_FORCE_REFRESH_FRAMES", "SAHI_SLICE_SIZE", "SAHI_OVERLAP_RATIO", "DEBUG",
+    )
+
+    def setUp(self):
+        self._orig = {k: getattr(Settings, k, None) for k in self._KEYS}
+        Settings.SAHI_ADAPTIVE_ENABLED = False
+        Settings.SAHI_TILE_REUSE_ENABLED = True
+        Settings.SAHI_REUSE_MAX_AGE_FRAMES = 2
+        Settings.SAHI_REUSE_FORCE_REFRESH_FRAMES = 100
+        Settings.SAHI_SLICE_SIZE = 640
+        Settings.SAHI_OVERLAP_RATIO = 0.35
+        Settings.DEBUG = False
+        self.detector = _make_test_detector(_TileModel())
+        self.cfg = {"conf": 0.2, "iou": 0.5, "max_det": 300, "augment": False, "imgsz": 640}
+        self.frame = np.random.default_rng(5).integers(0, 255, size=(1080, 1920, 3), dtype=np.uint8)
+
+    def tearDown(self):
+        for key, value in self._orig.items():
+            setattr(Settings, key, value)
+
+    def _run(self, frame, shift=(0.0, 0.0)):
+        out = self.detector._sahi_detect(frame, inference_cfg=self.cfg, camera_shift=shift)
+        self.detector._frame_count += 1
+        return out, dict(self.detector._last_sahi_stats)
+
+    def test_static_tiles_are_reused_until_max_age(self):
+        from src.detection import ObjectDetector
+
+        grid = len(ObjectDetector._plan_sahi_tiles(1080, 1920, 640, 0.35))
+        first, stats = self._run(self.frame)
+        self.assertEqual(stats["tile_count"], grid)
+
+        for _ in range(2):
+            again, stats = self._run(self.frame)
+            self.assertEqual(stats["tiles_reused"], grid)
+            self.assertEqual(stats["tile_count"], 0)
+            np.testing.assert_array_equal(np.sort(again.coords, axis=0), np.sort(first.coords, axis=0))
+
+        # Yaş sınırı aşıldı → tüm tile'lar yeniden çalışır
+        _, stats = self._run(self.frame)
+        self.assertEqual(stats["tiles_reused"], 0)
+        self.assertEqual(stats["tile_count"], grid)
+
+    def test_shifted_tiles_reuse_translated_boxes_and_changed_tile_reruns(self):
+        first, _ = self._run(self.frame)
+        tile_rows = first.coords[1:]  # ilk satır tam kare geçişi
+
+        moved = np.roll(self.frame, shift=(8, 16), axis=(0, 1))
+        moved[700:900, 1500:1700] = 0  # yalnızca sağ alt tile'lar değişir
+        out, stats = self._run(moved, shift=(16.0, 8.0))
+
+        self.assertGreater(stats["tiles_reused"], 0)
+        self.assertGreater(stats["tile_count"], 0)
+        reused = out.coords[1 + stats["tile_count"]:]
+        self.assertEqual(len(reused), stats["tiles_reused"])
+        expected = {tuple(row) for row in np.round(tile_rows + [16.0, 8.0, 16.0, 8.0], 2).tolist()}
+        self.assertTrue({tuple(row) for row in reused.tolist()} <= expected)
+
+    def test_reuse_follows_current_pair_shift_when_motion_changes(self):
+        first, _ = self._run(self.frame)
+        tile_rows = first.coords[1:]
+        frame1 = np.roll(self.frame, shift=(8, 16), axis=(0, 1))
+        frame2 = np.roll(frame1, shift=(24, -8), axis=(0, 1))  # kayma değişti
+        _, stats = self._run(frame1, shift=(16.0, 8.0))
+        self.assertGreater(stats["tiles_reused"], 0)
+
+        snapshot = copy.deepcopy(self.detector._tile_cache)
+        count = self.detector._frame_count
+        # Bir kare geride kalan kayma (16, 8) değişmemiş tile'ları da değişmiş gösterir
+        _, stale = self._run(frame2, shift=(16.0, 8.0))
+        self.assertEqual(stale["tiles_reused"], 0)
+
+        self.detector._tile_cache, self.detector._frame_count = snapshot, count
+        out, stats = self._run(frame2, shift=(-8.0, 24.0))
+        self.assertGreater(stats["tiles_reused"], 0)
+        reused = out.coords[1 + stats["tile_count"]:]
+        # Saklanan kutular iki karenin kayması toplamıyla (8, 32) ötelenir
+        expected = {tuple(row) for row in np.round(tile_rows + [8.0, 32.0, 8.0, 32.0], 2).tolist()}
+        self.assertTrue({tuple(row) for row in reused.tolist()} <= expected)
+
+    def test_reused_rows_get_fresh_trace_ids(self):
+        first, _ = self._run(self.frame)
+        again, stats = self._run(self.frame)
+        self.assertGreater(stats["tiles_reused"], 0)
+        ids = again.trace_ids.tolist()
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertFalse(set(ids) & set(first.trace_ids.tolist()))
+
+    def test_model_variant_switch_invalidates_cached_tiles(self):
+        self._run(self.frame)
+        self.detector.inference_quantization = "int8"
+        _, stats = self._run(self.frame)
+        self.assertEqual(stats["tiles_reused"], 0)
+
+    def test_session_frame_index_gap_drops_cached_tiles(self):
+        orig_sahi = Settings.SAHI_ENABLED
+        Settings.SAHI_ENABLED = True
+        try:
+            self.detector.detect_batch(self.frame, frame_index=0)
+            self.detector.detect_batch(self.frame, frame_index=1)
+            self.assertGreater(self.detector._last_sahi_stats["tiles_reused"], 0)
+            # 2-3 taşındı (dedektör çağrılmadı): önbellek ara karelerin hareketini bilemez
+            self.detector.detect_batch(self.frame, frame_index=4)
+            stats = dict(self.detector._last_sahi_stats)
+        finally:
+            Settings.SAHI_ENABLED = orig_sahi
+        self.assertEqual(stats["tiles_reused"], 0)
+        self.assertEqual(self.detector._frame_count, 5)
+
+
+class TestResolutionAwarePreprocess(unittest.TestCase):
+    def setUp(self):
+        self._orig = {
+            k: getattr(Settings, k, None)
+            for k in ("CLAHE_ENABLED", "PREPROCESS_RESOLUTION_AWARE")
+        }
+        Settings.CLAHE_ENABLED = True
+        Settings.PREPROCESS_RESOLUTION_AWARE = True
+
+    def tearDown(self):
+        for key, value in self._orig.items():
+            setattr(Settings, key, value)
+
+    def test_thumbnail_classification_matches_full_frame(self):
+        from src.preprocessing import FramePreprocessor
+
+        rng = np.random.default_rng(1)
+        gray = rng.integers(40, 220, size=(1080, 1920), dtype=np.uint8)
+        frames = {
+            "thermal": np.dstack([gray, gray, gray]),
+            "dark": rng.integers(0, 90, size=(1080, 1920, 3), dtype=np.uint8),
+            "normal": rng.integers(30, 230, size=(1080, 1920, 3), dtype=np.uint8),
+        }
+        pre = FramePreprocessor()
+        for name, frame in frames.items():
+            self.assertEqual(
+                pre.classify(frame, thumbnail=True), pre.classify(frame, thumbnail=False), name
+            )
+        self.assertEqual(pre.classify(frames["dark"]), "low_contrast")
+
+    def test_full_frame_input_is_resized_once_and_buffers_are_reused(self):
+        from src.preprocessing import FramePreprocessor
+
+        frame = np.random.default_rng(2).integers(0, 255, size=(2160, 3840, 3), dtype=np.uint8)
+        pre = FramePreprocessor()
+        prepared = pre.begin_frame(frame)
+        image, scale = prepared.full(1280)
+        self.assertEqual(image.shape, (720, 1280, 3))
+        self.assertEqual(scale, (1280 / 3840, 720 / 2160))
+        self.assertIs(prepared.full(1280)[0], image)
+
+        next_image, _ = pre.begin_frame(frame).full(1280)
+        self.assertIs(next_image, image)  # aynı tampon, yeni karede üzerine yazılır
+
+        tile = prepared.tile(640, 0, 1280, 640)
+        self.assertEqual(tile.shape, (640, 640, 3))
+        self.assertFalse(np.shares_memory(tile, frame))
+
+    @staticmethod
+    def _flat(brightness):
+        # Kanallar arası fark 10 → termal değil; ortalama parlaklık = brightness
+        frame = np.empty((720, 1280, 3), dtype=np.uint8)
+        frame[..., 0], frame[..., 1], frame[..., 2] = brightness - 10, brightness, brightness + 10
+        return frame
+
+    def test_mode_cache_applies_hysteresis_and_reevaluates_on_scene_cut(self):
+        from src.preprocessing import FramePreprocessor
+
+        saved = {k: getattr(Settings, k, None) for k in ("PREPROCESS_MODE_REEVAL_FRAMES", "CAMERA_PROFILE")}
+        try:
+            Settings.PREPROCESS_MODE_REEVAL_FRAMES = 1
+            Settings.CAMERA_PROFILE = "rgb"
+            pre = FramePreprocessor()
+            # 80 → karanlık; 94 eşiğin (90) üstü ama histerezis (90+8) içinde → kalır; 100 → normal
+            modes = [pre.begin_frame(self._flat(b)).mode for b in (80, 84, 88, 94, 100, 94)]
+            self.assertEqual(
+                modes,
+                ["low_contrast", "low_contrast", "low_contrast", "low_contrast", "normal", "normal"],
+            )
+            self.assertEqual(pre.stats()["mode_switches"], 1)
+
+            Settings.PREPROCESS_MODE_REEVAL_FRAMES = 30
+            pre = FramePreprocessor()
+            self.assertEqual(pre.begin_frame(self._flat(80)).mode, "low_contrast")
+            self.assertEqual(pre.begin_frame(self._flat(100)).mode, "low_contrast")  # önbellek
+            self.assertEqual(pre.stats()["mode_reason"], "cached")
+            self.assertEqual(pre.begin_frame(self._flat(150)).mode, "normal")  # sahne kesmesi
+            stats = pre.stats()
+            self.assertEqual((stats["mode_reason"], stats["scene_cuts"], stats["mode_evaluations"]), ("scene_cut", 1, 2))
+        finally:
+            for key, value in saved.items():
+                setattr(Settings, key, value)
+
+    def test_preprocess_stats_count_frames_where_clahe_ran(self):
+        from src.preprocessing import FramePreprocessor
+
+        pre = FramePreprocessor()
+        for brightness in (60, 60, 60):
+            prepared = pre.begin_frame(self._flat(brightness))
+            prepared.full(640)
+            prepared.tile(0, 0, 320, 320)
+        stats = pre.stats()
+        self.assertEqual(stats["mode"], "low_contrast")
+        self.assertEqual((stats["frames"], stats["clahe_frames"], stats["clahe_calls_last_frame"]), (3, 3, 2))
+
+    @unittest.skipUnless(main_module is not None, "main runtime missing")
+    def test_standard_inference_maps_boxes_back_to_frame_scale(self):
+        detector = _make_test_detector(_TileModel())
+        frame = np.zeros((2160, 3840, 3), dtype=np.uint8)
+        cfg = {"conf": 0.2, "iou": 0.5, "max_det": 300, "augment": False, "imgsz": 1280}
+
+        dets = detector._standard_inference(
+            frame, inference_cfg=cfg, prepared=detector._prepare_frame(frame)
+        ).to_dicts()
+        # _TileModel kutusu (10, 20, 50, 60) 1280x720 girdide → kare ölçeği ×3
+        self.assertEqual(
+            (dets[0]["top_left_x"], dets[0]["top_left_y"], dets[0]["bottom_right_x"], dets[0]["bottom_right_y"]),
+            (30.0, 60.0, 150.0, 180.0),
+        )
+
+
+class TestInferenceBackend(unittest.TestCase):
+    def test_backend_resolution_and_export_naming(self):
+        from src.inference_backend import exported_model_path, resolve_backend
+
+        self.assertEqual(resolve_backend("ONNX", "cpu"), "onnx")
+        self.assertEqual(resolve_backend("openvino", "cuda"), "torch")
+        self.assertEqual(resolve_backend("tensorrt", "cpu"), "torch")
+        self.assertEqual(exported_model_path("model/best.pt", "onnx"), "model/best.onnx")
+        self.assertEqual(
+            exported_model_path("model/best.pt", "openvino"), "model/best_openvino_model"
+        )
+
+    def test_fresh_export_is_reused_without_reexport(self):
+        import os
+        import tempfile
+
+        from src.inference_backend import ensure_exported
+
+        with tempfile.TemporaryDirectory() as tmp:
+            pt = os.path.join(tmp, "best.pt")
+            onnx = os.path.join(tmp, "best.onnx")
+            for path in (pt, onnx):
+                with open(path, "wb") as fh:
+                    fh.write(b"x")
+            os.utime(pt, (1000, 1000))
+            os.utime(onnx, (2000, 2000))
+            with patch("src.inference_backend.YOLO") as yolo:
+                self.assertEqual(ensure_exported(pt, "onnx"), onnx)
+                yolo.assert_not_called()
+
+                os.utime(pt, (3000, 3000))  # .pt daha yeni → yeniden export
+                yolo.return_value.export.return_value = onnx
+                self.assertEqual(ensure_exported(pt, "onnx"), onnx)
+                yolo.return_value.export.assert_called_once()
+
+
+@unittest.skipUnless(main_module is not None, "main runtime missing")
+class TestQuantizationGuard(unittest.TestCase):
+    def setUp(self):
+        self._orig = {
+            k: getattr(Settings, k, None)
+            for k in ("INFERENCE_QUANTIZATION", "QUANT_MIN_AGREEMENT")
+        }
+
+    def tearDown(self):
+        for key, value in self._orig.items():
+            setattr(Settings, key, value)
+
+    def test_agreement_penalizes_missed_shifted_and_misclassified_boxes(self):
+        from src.quantization import detection_agreement, report_passes, summarize_agreement
+
+        ref = np.array([[0, 0, 10, 10], [20, 20, 40, 40], [50, 50, 60, 60]], dtype=np.float64)
+        ref_cls = np.array([0, 1, 2])
+        same = detection_agreement(ref, ref_cls, ref.copy(), ref_cls.copy())
+        self.assertEqual(summarize_agreement([same])["agreement"], 1.0)
+
+        # 1. kutu hafif kaymış, 2. kutu yanlış sınıf, 3. kutu kaçırılmış
+        test = np.array([[1, 0, 11, 10], [20, 20, 40, 40]], dtype=np.float64)
+        report = summarize_agreement(
+            [same, detection_agreement(ref, ref_cls, test, np.array([0, 3]))]
+        )
+        self.assertEqual(report["ref_count"], 6)
+        self.assertEqual(report["matched"], 5)
+        self.assertAlmostEqual(report["class_match_rate"], 0.8)
+        self.assertAlmostEqual(report["agreement"], round(4 / 6, 4))
+        self.assertLess(report["mean_iou"], 1.0)
+
+        Settings.QUANT_MIN_AGREEMENT = 0.9
+        self.assertFalse(report_passes(report))
+        self.assertFalse(report_passes(None))
+
+    def test_detector_switches_to_prebuilt_int8_variant(self):
+        detector = _make_test_detector()
+        fp32, int8 = Mock(name="fp32"), Mock(name="int8")
+        detector.model = fp32
+        detector.inference_backend = "onnx"
+        detector._model_variants = {
+            "none": (fp32, "onnx", "none"),
+            "int8_static": (int8, "onnx", "int8_static"),
+        }
+
+        Settings.INFERENCE_QUANTIZATION = "int8_static"
+        detector._sync_model_variant()
+        self.assertIs(detector.model, int8)
+        self.assertEqual(detector.inference_quantization, "int8_static")
+
+        Settings.INFERENCE_QUANTIZATION = "none"
+        detector._sync_model_variant()
+        self.assertIs(detector.model, fp32)
+
+        # Zamanlayıcı planının nicemlemesi yalnızca o kareye uygulanır
+        detector._sync_model_variant("int8_static")
+        self.assertIs(detector.model, int8)
+        detector._sync_model_variant(None)
+        self.assertIs(detector.model, fp32)
+
+
+class _ContentModel:
+    """Kutusu kaynak içeriğine bağlı, rastgele gecikmeli sahte model (sıra testi için)."""
+
+    def __init__(self, seed):
+        self._rng = np.random.default_rng(seed)
+
+    def predict(self, source, **kwargs):
+        time.sleep(float(self._rng.uniform(0.0, 0.01)))
+        out = []
+        for src in source if isinstance(source, list) else [source]:
+            v = float(src.mean())
+            out.append(_FakeResult([[v, v, v + 10.0, v + 10.0, 0.9, 0.0]]))
+        return out
+
+
+@unittest.skipUnless(main_module is not None, "main runtime missing")
+class TestReplicaPool(unittest.TestCase):
+    def setUp(self):
+        self._orig = {k: getattr(Settings, k, None) for k in ("SAHI_BATCH_SIZE", "LEAN_PREDICTOR_ENABLED")}
+        Settings.SAHI_BATCH_SIZE = 8
+        Settings.LEAN_PREDICTOR_ENABLED = False
+
+    def tearDown(self):
+        for key, value in self._orig.items():
+            setattr(Settings, key, value)
+
+    def test_sharded_tiles_match_serial_order(self):
+        from src.detection import ObjectDetector
+        from src.replica_pool import ReplicaPool
+
+        frame = np.random.default_rng(3).integers(0, 255, size=(1080, 1920, 3), dtype=np.uint8)
+        tiles = ObjectDetector._plan_sahi_tiles(1080, 1920, 640, 0.35)
+        cfg = {"conf": 0.2, "iou": 0.5, "max_det": 300, "augment": False, "imgsz": 640}
+
+        serial = _make_test_detector(_ContentModel(0))
+        expected = serial._sliced_inference(frame, inference_cfg=cfg, tiles=tiles)
+
+        seeds = iter(range(1, 10))
+        pooled = _make_test_detector(_ContentModel(0))
+        pooled._replica_pool = ReplicaPool(
+            factory=lambda: _ContentModel(next(seeds)), size=3, threads_per_replica=1,
+            device="cpu", quantization="none",
+        )
+        self.assertEqual(pooled._replica_pool.chunks(len(tiles), 8)[0], (0, -(-len(tiles) // 3)))
+        for _ in range(3):
+            got = pooled._sliced_inference(frame, inference_cfg=cfg, tiles=tiles)
+            np.testing.assert_array_equal(got.coords, expected.coords)
+            np.testing.assert_array_equal(got.trace_ids, expected.trace_ids)
+            pooled._trace_seq = 0
+        self.assertEqual(pooled._last_sahi_stats["replicas"], 3)
+        pooled._replica_pool.close()
+
+    def test_fixed_assignment_maps_chunk_to_replica(self):
+        from src.replica_pool import ReplicaPool
+
+        pool = ReplicaPool(
+            factory=lambda: _ContentModel(0), size=3, threads_per_replica=1,
+            device="cpu", quantization="none", fixed_assignment=True,
+        )
+        replicas = [r for r, _ in pool.run([lambda replica: replica for _ in range(7)])]
+        self.assertEqual([pool._replicas.index(r) for r in replicas], [0, 1, 2, 0, 1, 2, 0])
+        pool.close()
+
+    def test_variant_switch_keeps_pool_per_quantization_and_close_shuts_all(self):
+        detector = _make_test_detector()
+        fp32, int8 = Mock(name="fp32"), Mock(name="int8")
+        detector.model = fp32
+        detector._model_variants = {
+            "none": (fp32, "onnx", "none"),
+            "int8_static": (int8, "onnx", "int8_static"),
+        }
+        pool_none, pool_int8 = Mock(quantization="none"), Mock(quantization="int8_static")
+        detector._replica_pool = pool_none
+        detector._replica_pools = {"none": pool_none}
+        detector._build_replica_pool = Mock(return_value=pool_int8)
+
+        detector._sync_model_variant("int8_static")
+        self.assertIs(detector._active_replica_pool(), pool_int8)
+        detector._sync_model_variant("none")
+        self.assertIs(detector._active_replica_pool(), pool_none)
+        detector._sync_model_variant("int8_static")
+        self.assertEqual(detector._build_replica_pool.call_count, 1)
+
+        detector.close()
+        pool_none.close.assert_called_once_with()
+        pool_int8.close.assert_called_once_with()
+        self.assertIsNone(detector._active_replica_pool())
+        detector.close()  # ikinci çağrı zararsız
+
+
+@unittest.skipUnless(main_module is not None, "main runtime missing")
+class TestOfflineBatch(unittest.TestCase):
+    def setUp(self):
+        self._orig = {k: getattr(Settings, k, None) for k in ("LEAN_PREDICTOR_ENABLED", "INFERENCE_SIZE")}
+        Settings.LEAN_PREDICTOR_ENABLED = False
+        Settings.INFERENCE_SIZE = 640
+
+    def tearDown(self):
+        for key, value in self._orig.items():
+            setattr(Settings, key, value)
+
+    def test_prefetched_primary_matches_per_frame(self):
+        rng = np.random.default_rng(5)
+        frames = [rng.integers(0, 255, size=(720, 1280, 3), dtype=np.uint8) for _ in range(3)]
+        cfg = {"conf": 0.2, "iou": 0.5, "max_det": 300, "augment": False, "imgsz": 640}
+
+        serial = _make_test_detector(_ContentModel(0))
+        expected = []
+        for frame in frames:
+            expected.append(serial._standard_inference(frame, cfg, prepared=serial._prepare_frame(frame)))
+            serial._frame_count += 1
+
+        batched = _make_test_detector(_ContentModel(0))
+        calls = []
+        predict = batched.model.predict
+        batched.model.predict = lambda source, **kw: calls.append(len(source)) or predict(source, **kw)
+        prefetched = batched.prefetch_primary(frames)
+        self.assertEqual(calls, [3])
+        for frame, item, exp in zip(frames, prefetched, expected):
+            self.assertIs(item.prepared.frame, frame)
+            got = batched._standard_inference(frame, cfg, prepared=item.prepared, prefetched=item)
+            np.testing.assert_array_equal(got.coords, exp.coords)
+            np.testing.assert_array_equal(got.trace_ids, exp.trace_ids)
+            batched._frame_count += 1
+
+
+@unittest.skipUnless(main_module is not None, "main runtime missing")
+class TestLeanPredictor(unittest.TestCase):
+    def setUp(self):
+        self._orig = {
+            k: getattr(Settings, k, None)
+            for k in ("LEAN_PREDICTOR_ENABLED", "NMS_MODE")
+        }
+        Settings.LEAN_PREDICTOR_ENABLED = True
+        Settings.NMS_MODE = "class_aware"
+
+    def tearDown(self):
+        for key, value in self._orig.items():
+            setattr(Settings, key, value)
+
+    def test_letterbox_geometry_matches_ultralytics_and_round_trips(self):
+        from src.lean_predictor import letterbox_params, scale_boxes_to_source
+
+        # rect (auto) modu: 1920x1080 → 1280x736, dikey 8 px dolgu
+        (new_w, new_h), (top, left), out_hw = letterbox_params((1080, 1920), (1280, 1280), True, 32)
+        self.assertEqual(((new_w, new_h), (top, left), out_hw), ((1280, 720), (8, 0), (736, 1280)))
+        # karışık boyutlu batch: kare girdi
+        self.assertEqual(letterbox_params((640, 480), (640, 640), False, 32)[1:], ((0, 80), (640, 640)))
+
+        src_boxes = np.array([[100.0, 50.0, 900.0, 1000.0], [0.0, 0.0, 1920.0, 1080.0]])
+        gain = new_w / 1920.0
+        in_input = src_boxes * gain + np.array([left, top, left, top])
+        restored = scale_boxes_to_source(in_input.copy(), out_hw, (1080, 1920))
+        np.testing.assert_allclose(restored, src_boxes, atol=1e-6)
+
+    def test_lean_path_feeds_pipeline_identically_and_falls_back_on_error(self):
+        from src.lean_predictor import RawDetections
+
+        rows = [[10.0, 20.0, 50.0, 60.0, 0.9, 0.0], [100.0, 120.0, 180.0, 200.0, 0.7, 1.0]]
+        data = np.asarray(rows, dtype=np.float32)
+        cfg = {"imgsz": 640, "conf": 0.25, "iou": 0.45, "max_det": 300, "augment": False}
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+
+        detector = _make_test_detector()
+        detector.model = Mock()
+        detector.model.predict.return_value = [_FakeResult(rows)]
+        reference = detector._standard_inference(frame, inference_cfg=cfg)
+
+        lean = Mock()
+        lean.predict.return_value = [RawDetections(data[:, :4], data[:, 4], data[:, 5])]
+        detector._lean_predictor = lean
+        detector.model.predict.reset_mock()
+        lean_batch = detector._standard_inference(frame, inference_cfg=cfg)
+        detector.model.predict.assert_not_called()
+        for field in ("coords", "scores", "cls_ids"):
+            np.testing.assert_array_equal(getattr(lean_batch, field), getattr(reference, field))
+
+        lean.predict.side_effect = RuntimeError("boom")
+        fallback = detector._standard_inference(frame, inference_cfg=cfg)
+        detector.model.predict.assert_called_once()
+        self.assertIsNone(detector._lean_predictor)
+        np.testing.assert_array_equal(fallback.coords, reference.coords)
+
+    def test_forward_shared_within_frame_for_same_source_and_size(self):
+        from src.lean_predictor import LeanPredictor
+
+        backend = Mock(stride=32, pt=True, fp16=False)
+        lean = LeanPredictor(backend, "cpu")
+        frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+
+        token = lean.begin_frame()
+        primary = lean.forward(frame, 1280, frame_token=token)
+        focused = lean.forward(frame, 1280, frame_token=token)  # odaklı geçiş, aynı boyut → aynı ham çıktı
+        self.assertIs(primary, focused)
+        self.assertEqual(backend.call_count, 1)
+
+        lean.forward(frame, 960, frame_token=token)  # farklı boyut → ayrı forward
+        lean.forward(frame.copy(), 1280, frame_token=token)  # farklı kaynak
+        self.assertEqual(backend.call_count, 3)
+
+        token = lean.begin_frame()  # yeni kare: önbellek geçersiz
+        lean.forward(frame, 1280, frame_token=token)
+        self.assertEqual(backend.call_count, 4)
+        self.assertEqual(lean.stats()["forward_reused"], 1)
+
+    def test_reused_buffer_with_new_pixels_is_not_served_from_cache(self):
+        from src.lean_predictor import LeanPredictor
+
+        backend = Mock(stride=32, pt=True, fp16=False)
+        lean = LeanPredictor(backend, "cpu")
+        pooled = np.zeros((720, 1280, 3), dtype=np.uint8)  # havuzlu ön-işleme tamponu
+
+        first = lean.begin_frame()
+        fwd_a = lean.forward(pooled, 1280, frame_token=first)
+        self.assertIs(lean.forward(pooled, 1280, frame_token=first), fwd_a)
+
+        pooled[...] = 200  # sonraki kare aynı nesneye yazıldı
+        second = lean.begin_frame()
+        self.assertNotEqual(first, second)
+        fwd_b = lean.forward(pooled, 1280, frame_token=second)
+        self.assertIsNot(fwd_b, fwd_a)
+        self.assertEqual(backend.call_count, 2)
+        self.assertEqual(lean.stats()["letterbox_reused"], 0)
+        self.assertTrue((lean._buffers[(736, 1280)].host[0, 8:728] == 200).all())
+
+        with self.assertRaises(AssertionError):  # kare sınırını kaçıran çağıran
+            lean.forward(pooled, 1280, frame_token=first)
+
+        # Belirteçsiz çağrı önbelleği ne okur ne yazar
+        lean.forward(pooled, 1280)
+        lean.forward(pooled, 1280)
+        self.assertEqual(backend.call_count, 4)
+        self.assertEqual(lean.stats()["forward_reused"], 1)
+
+    def test_detector_threads_frame_token_to_lean_predictor(self):
+        detector = _make_test_detector()
+        lean = Mock()
+        lean.begin_frame.side_effect = [7, 8]
+        lean.predict.return_value = []
+        detector._lean_predictor = lean
+        detector._lean_frame_token = lean.begin_frame()
+        detector._predict(np.zeros((4, 4, 3), dtype=np.uint8), imgsz=640)
+        self.assertEqual(lean.predict.call_args.kwargs["frame_token"], 7)
+
+
+def _real_module_available(name: str) -> bool:
+    """conftest torch/ultralytics'i süreç içinde taklit eder; gerçek kurulum sys.path'te aranır."""
+    import importlib.machinery
+
+    return importlib.machinery.PathFinder.find_spec(name) is not None
+
+
+@unittest.skipUnless(
+    _real_module_available("torch") and _real_module_available("ultralytics"),
+    "real torch/ultralytics missing",
+)
+class TestLeanPredictorEquivalence(unittest.TestCase):
+    def test_matches_model_predict_through_reused_buffer(self):
+        import subprocess
+        import sys
+        from pathlib import Path
+
+        tool = Path(__file__).resolve().parents[1] / "tools" / "verify_lean_predictor.py"
+        # Rastgele ağırlıklı yaml modeli: indirme yok; düşük conf ile kutu üretir
+        proc = subprocess.run(
+            [
+                sys.executable, str(tool), "--model", "yolov8n.yaml", "--synthetic", "4",
+                "--imgsz", "320", "--conf", "0.001", "--device", "cpu", "--strict",
+            ],
+            capture_output=True,
+            text=True,
+            timeout=600,
+        )
+        self.assertEqual(proc.returncode, 0, proc.stdout + proc.stderr)
+
+
+@unittest.skipUnless(main_module is not None, "main runtime missing")
+class TestLandingZoneRoiFocusedPass(unittest.TestCase):
+    def setUp(self):
+        self._orig = {
+            k: getattr(Settings, k, None)
+            for k in (
+                "UAP_UAI_FOCUSED_PASS_ENABLED", "UAP_UAI_FOCUSED_PASS_MODE",
+                "UAP_UAI_FOCUSED_PASS_INTERVAL", "UAP_UAI_RESCUE_ABSENT_STREAK",
+                "UAP_UAI_ROI_SIZE", "UAP_UAI_ROI_MAX_CROPS", "UAP_UAI_ROI_MAX_AGE_FRAMES",
+                "UAP_UAI_FOCUSED_PASS_IMG_SIZE",
+            )
+        }
+        Settings.UAP_UAI_FOCUSED_PASS_IMG_SIZE = 1280
+        Settings.UAP_UAI_FOCUSED_PASS_ENABLED = True
+        Settings.UAP_UAI_FOCUSED_PASS_MODE = "roi"
+        Settings.UAP_UAI_FOCUSED_PASS_INTERVAL = 1
+        Settings.UAP_UAI_RESCUE_ABSENT_STREAK = 2
+        Settings.UAP_UAI_ROI_SIZE = 256
+        Settings.UAP_UAI_ROI_MAX_CROPS = 2
+        Settings.UAP_UAI_ROI_MAX_AGE_FRAMES = 2
+
+    def tearDown(self):
+        for key, value in self._orig.items():
+            setattr(Settings, key, value)
+
+    @staticmethod
+    def _zones(rows):
+        from src.detection_batch import DetectionBatch
+
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, 5)
+        return DetectionBatch.from_arrays(
+            boxes=rows[:, :4], coords=rows[:, :4], scores=np.full(len(rows), 0.9),
+            cls_ids=rows[:, 4], source_cls_ids=rows[:, 4], trace_ids=[""] * len(rows),
+        )
+
+    def test_planner_tracks_zone_with_camera_shift_and_expires(self):
+        from src.landing_zone_roi import LandingZoneRoiPlanner
+
+        planner = LandingZoneRoiPlanner()
+        self.assertIsNone(planner.plan((1080, 1920)))
+        planner.remember(self._zones([[1000, 500, 1040, 540, Settings.CLASS_UAP], [10, 10, 30, 30, 0]]))
+        planner.advance((30.0, -20.0))
+
+        rois = planner.plan((1080, 1920))
+        self.assertEqual(len(rois), 1)  # taşıt (cls 0) izlenmez
+        x1, y1, x2, y2 = rois[0]
+        self.assertEqual((x2 - x1, y2 - y1), (256, 256))
+        self.assertTrue(x1 <= 1030 and y1 <= 480 and x2 >= 1070 and y2 >= 520)
+
+        # Kenara yakın alan: ROI kare içine kaydırılır; sınır aşılırsa tam kare (None)
+        edge = self._zones([[1900, 1070, 1915, 1078, Settings.CLASS_UAI]])
+        self.assertEqual(planner.plan((1080, 1920), edge)[0], (1664, 824, 1920, 1080))
+        many = self._zones([[x, 100, x + 20, 120, Settings.CLASS_UAI] for x in (100, 600, 1100)])
+        self.assertIsNone(planner.plan((1080, 1920), many))
+
+        planner.advance((0.0, 0.0))
+        planner.advance((0.0, 0.0))
+        self.assertIsNone(planner.plan((1080, 1920)))  # yaş sınırı aşıldı
+
+    def test_focused_pass_crops_rois_and_uses_full_frame_on_absent_streak(self):
+        from src.landing_zone_roi import LandingZoneRoiPlanner
+
+        detector = _make_test_detector()
+        detector._uap_uai_model_class_ids = [2, 3]
+        detector._landing_zone_planner = LandingZoneRoiPlanner()
+        detector._landing_zone_planner.remember(
+            self._zones([[400, 300, 440, 340, Settings.CLASS_UAP]])
+        )
+        detector.model = Mock()
+        detector.model.predict.return_value = [_FakeResult([[10.0, 20.0, 50.0, 60.0, 0.5, 2.0]])]
+        cfg = {"imgsz": 1280, "conf": 0.25, "iou": 0.45, "max_det": 300, "augment": False}
+        frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+
+        focused = detector._focused_uap_uai_inference(frame, inference_cfg=cfg)
+        kwargs = detector.model.predict.call_args.kwargs
+        self.assertEqual(kwargs["imgsz"], 256)
+        self.assertEqual([src.shape for src in kwargs["source"]], [(256, 256, 3)])
+        # Kutular kırpıntı ofsetiyle kare koordinatına taşınır (ROI 292,192)
+        np.testing.assert_allclose(focused.coords[0], [302.0, 212.0, 342.0, 252.0])
+
+        detector._uap_uai_absent_streak = 5
+        Settings.UAP_UAI_FOCUSED_PASS_INTERVAL = 1000
+        detector._frame_count = 1
+        detector._focused_uap_uai_inference(frame, inference_cfg=cfg)
+        kwargs = detector.model.predict.call_args.kwargs
+        self.assertEqual(kwargs["imgsz"], 1280)
+        self.assertIs(kwargs["source"], frame)
+
+    def test_large_zone_roi_is_inferred_at_native_size_up_to_focus_imgsz(self):
+        from src.landing_zone_roi import LandingZoneRoiPlanner
+
+        detector = _make_test_detector()
+        detector._uap_uai_model_class_ids = [2, 3]
+        detector._landing_zone_planner = LandingZoneRoiPlanner()
+        # Dolgulu kutu 600 px: ROI roi_size'ı (256) aşar ve 608'de (stride katı) işlenir
+        detector._landing_zone_planner.remember(self._zones([
+            [800, 300, 1100, 520, Settings.CLASS_UAP], [100, 100, 140, 140, Settings.CLASS_UAI],
+        ]))
+        detector.model = Mock()
+        detector.model.predict.side_effect = lambda source, **kw: [
+            _FakeResult([[10.0, 20.0, 50.0, 60.0, 0.5, 2.0]]) for _ in source
+        ]
+        cfg = {"imgsz": 1280, "conf": 0.25, "iou": 0.45, "max_det": 300, "augment": False}
+        frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+
+        focused = detector._focused_uap_uai_inference(frame, inference_cfg=cfg)
+        calls = {
+            c.kwargs["imgsz"]: [src.shape for src in c.kwargs["source"]]
+            for c in detector.model.predict.call_args_list
+        }
+        self.assertEqual(calls, {256: [(256, 256, 3)], 608: [(600, 600, 3)]})
+        # Sonuçlar ROI sırasıyla birleşir: büyük alan (ROI 650,110) önce
+        np.testing.assert_allclose(focused.coords[:, :2], [[660.0, 130.0], [10.0, 20.0]])
+
+        # Odaklı geçiş imgsz'i üst sınır: yalnız büyük kırpıntı 480'e küçültülür
+        Settings.UAP_UAI_FOCUSED_PASS_IMG_SIZE = 480
+        detector.model.predict.reset_mock()
+        detector._focused_uap_uai_inference(frame, inference_cfg=cfg)
+        calls = {
+            c.kwargs["imgsz"]: [src.shape for src in c.kwargs["source"]]
+            for c in detector.model.predict.call_args_list
+        }
+        self.assertEqual(calls, {256: [(256, 256, 3)], 480: [(600, 600, 3)]})
+
+
+@unittest.skipUnless(main_module is not None, "main runtime missing")
+class TestInferenceScheduler(unittest.TestCase):
+    _KEYS = (
+        "SCHEDULER_MIN_FPS", "SCHEDULER_SAFETY_MARGIN", "SCHEDULER_COST_EMA_ALPHA",
+        "INFERENCE_SIZE", "PROTECTIVE_INFERENCE_SIZE", "SAHI_ENABLED",
+        "UAP_UAI_FOCUSED_PASS_ENABLED", "SAHI_ADAPTIVE_ENABLED", "SAHI_TILE_REUSE_ENABLED",
+        "SAHI_SLICE_SIZE", "SAHI_OVERLAP_RATIO", "SCHEDULER_ENABLED", "INFERENCE_QUANTIZATION",
+        "PROTECTIVE_INFERENCE_QUANTIZATION", "SCHEDULER_QUANT_COST_RATIO", "AUGMENTED_INFERENCE",
+        "HALF_PRECISION", "MAX_DETECTIONS", "CONFIDENCE_THRESHOLD", "CONFIDENCE_THRESHOLD_UAP_UAI",
+        "DEGRADE_SEND_INTERVAL_FRAMES", "JSON_LOG_EVERY_N_FRAMES", "LOW_FPS_GUARD_ENABLED",
+        "SCHEDULER_COST_SOURCE", "SCHEDULER_STATIC_COSTS_MS",
+    )
+
+    def setUp(self):
+        self._orig = {k: getattr(Settings, k, None) for k in self._KEYS}
+        Settings.INFERENCE_QUANTIZATION = "none"
+        Settings.PROTECTIVE_INFERENCE_QUANTIZATION = "none"
+        Settings.SCHEDULER_QUANT_COST_RATIO = 0.6
+        Settings.SCHEDULER_MIN_FPS = 1.0
+        Settings.SCHEDULER_SAFETY_MARGIN = 0.15
+        Settings.SCHEDULER_COST_EMA_ALPHA = 1.0
+        Settings.SCHEDULER_COST_SOURCE = "measured"
+        Settings.INFERENCE_SIZE = 1280
+        Settings.PROTECTIVE_INFERENCE_SIZE = 640
+        Settings.SAHI_ENABLED = True
+        Settings.UAP_UAI_FOCUSED_PASS_ENABLED = True
+
+    def tearDown(self):
+        for key, value in self._orig.items():
+            setattr(Settings, key, value)
+
+    def test_plan_steps_down_ladder_to_fit_budget(self):
+        from src.frame_scheduler import InferenceScheduler
+
+        scheduler = InferenceScheduler()
+        plan = scheduler.plan()
+        self.assertEqual(plan.name, "full")  # ölçüm yokken en zengin plan
+        timings = {"primary_ms": 300.0, "tiles_run": 10, "tiles_ms": 1000.0,
+                   "focused_ms": 100.0, "total_ms": 1450.0}
+        scheduler.observe_frame(plan, timings, task3_ms=50.0, vo_ms=20.0)
+
+        # Bütçe 850 ms: SAHI dışı 520 ms → 3 tile sığar
+        plan = scheduler.plan()
+        self.assertEqual((plan.name, plan.max_sahi_tiles), ("tiles_capped", 3))
+        self.assertLessEqual(plan.predicted_ms, plan.budget_ms)
+
+        # Ağ payı 480 ms → bütçe 370 ms; 640 px primary maliyeti piksel oranıyla ölçeklenir
+        scheduler.observe_cycle(2000.0)
+        plan = scheduler.plan()
+        self.assertEqual(plan.name, "protective")
+        cfg = plan.inference_config()
+        self.assertEqual((cfg["imgsz"], cfg["sahi_enabled"], cfg["focused_pass"]), (640, False, False))
+
+        # Hiçbir plan sığmasa da en hafif basamak Görev 3'ü korur (maliyeti tahminde)
+        scheduler.observe_cycle(5000.0)
+        plan = scheduler.plan()
+        self.assertEqual(plan.name, "protective")
+        self.assertAlmostEqual(plan.predicted_ms, 75.0 + 50.0 + 20.0 + 50.0)  # primary+diğer+vo+task3
+
+    def test_protective_quantization_rung(self):
+        from src.frame_scheduler import InferenceScheduler
+
+        Settings.PROTECTIVE_INFERENCE_QUANTIZATION = "int8_dynamic"
+        scheduler = InferenceScheduler()
+        timings = {"primary_ms": 300.0, "tiles_run": 10, "tiles_ms": 1000.0,
+                   "focused_ms": 100.0, "total_ms": 1450.0}
+        scheduler.observe_frame(scheduler.plan(), timings, task3_ms=50.0, vo_ms=20.0)
+        # Bütçe 180 ms: FP32 protective 195 ms sığmaz; INT8 tahmini 75 × 0.6 + 120 = 165 ms
+        scheduler.observe_cycle(2190.0)
+        plan = scheduler.plan()
+        self.assertEqual(plan.name, "protective_quant")
+        self.assertEqual(plan.inference_config()["quantization"], "int8_dynamic")
+        self.assertAlmostEqual(plan.predicted_ms, 165.0)
+
+        # Ölçüm gelince INT8 maliyeti FP32'den ayrı izlenir
+        scheduler.observe_frame(plan, {"primary_ms": 40.0, "total_ms": 90.0}, task3_ms=50.0, vo_ms=20.0)
+        self.assertEqual(scheduler.stats()["costs"]["primary@640/int8_dynamic"], 40.0)
+        self.assertEqual(scheduler.stats()["costs"]["primary@1280"], 300.0)
+
+    def test_deterministic_profiles_plan_from_static_costs(self):
+        from src.frame_scheduler import InferenceScheduler
+
+        Settings.SCHEDULER_ENABLED = False
+        self.assertIsNone(main_module._build_inference_scheduler())
+        Settings.SCHEDULER_ENABLED = True
+
+        # max profili zamanlayıcıyı açık bırakır; plan sabit maliyet tablosundan
+        apply_runtime_profile("max")
+        self.assertEqual(Settings.SCHEDULER_COST_SOURCE, "static")
+        Settings.SCHEDULER_STATIC_COSTS_MS = {
+            "primary@1280": 300.0, "tile": 100.0, "focused": 100.0, "detect_other": 30.0,
+            "task3": 50.0, "vo": 20.0, "io": 0.0,
+        }
+        fast, slow = main_module._build_inference_scheduler(), InferenceScheduler()
+        self.assertIsInstance(fast, InferenceScheduler)
+        plans = []
+        for scheduler, scale in ((fast, 0.1), (slow, 10.0)):
+            names = []
+            for _ in range(3):
+                plan = scheduler.plan()
+                names.append((plan.name, plan.max_sahi_tiles))
+                # Duvar saati farklı, içerikten türeyen tile talebi aynı
+                timings = {"primary_ms": 300.0 * scale, "tiles_run": 6, "tiles_ms": 600.0 * scale,
+                           "focused_ms": 100.0 * scale, "total_ms": 1000.0 * scale}
+                scheduler.observe_frame(plan, timings, task3_ms=50.0 * scale, vo_ms=20.0 * scale)
+                scheduler.observe_cycle(5000.0 * scale)
+            plans.append(names)
+        self.assertEqual(plans[0], plans[1])
+        # Bütçe 850 ms: SAHI dışı 500 ms → 3 tile
+        self.assertEqual(plans[0], [("full", None), ("tiles_capped", 3), ("tiles_capped", 3)])
+        self.assertEqual(slow.stats()["measured"]["primary@1280"], 3000.0)
+
+    def test_low_fps_guard_leaves_quantization_to_scheduler(self):
+        Settings.LOW_FPS_GUARD_ENABLED = True
+        Settings.PROTECTIVE_INFERENCE_QUANTIZATION = "int8_dynamic"
+        guard_state = {"active": False, "recovery_streak": 0}
+        main_module._maybe_toggle_low_fps_guard(
+            Logger("Test"), rolling_fps=0.5, guard_state=guard_state, kpi_counters={}
+        )
+        self.assertTrue(guard_state["active"])
+        self.assertEqual(Settings.INFERENCE_QUANTIZATION, "none")
+
+    def test_detector_applies_plan_without_touching_settings(self):
+        from dataclasses import replace
+
+        from src.frame_scheduler import InferenceScheduler
+
+        Settings.SAHI_ADAPTIVE_ENABLED = True
+        Settings.SAHI_TILE_REUSE_ENABLED = False
+        Settings.SAHI_SLICE_SIZE = 640
+        Settings.SAHI_OVERLAP_RATIO = 0.35
+        detector = _make_test_detector(_TileModel())
+        plan = InferenceScheduler().plan()
+        cfg = detector._build_inference_config(replace(plan, max_sahi_tiles=1, imgsz=640))
+        self.assertEqual(Settings.INFERENCE_SIZE, 1280)
+        self.assertEqual(cfg["imgsz"], 640)
+        frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        detector._sahi_detect(frame, inference_cfg=cfg)
+        detector._tile_planner.remember(TestAdaptiveTilePlanner._batch([]))
+        detector._sahi_detect(frame, inference_cfg=cfg)
+        # Bütçe sınırında ipucu alan tile (tam kare kutusu 10,20) keşif tile'larından önce tutulur
+        self.assertEqual(detector._last_sahi_stats["tile_count"], 1)
+        self.assertGreater(detector._last_sahi_stats["tiles_budget_dropped"], 0)
+        self.assertIn("primary_ms", detector.get_last_stage_timings())
+
+
+@unittest.skipUnless(main_module is not None, "main runtime missing")
+class TestContainmentSuppression(unittest.TestCase):
+    @staticmethod
+    def _legacy_keep(boxes, cls_ints, threshold=0.85):
+        areas = np.maximum((boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1]), 1e-6)
+        order = np.argsort(areas, kind="stable")[::-1]
+        landing_ids = {Settings.CLASS_UAP, Settings.CLASS_UAI}
+        suppressed = np.zeros(len(boxes), dtype=bool)
+        keep = []
+        for pos, i in enumerate(order):
+            if suppressed[i]:
+                continue
+            keep.append(int(i))
+            thr = Settings.LANDING_ZONE_CONTAINMENT_IOU if cls_ints[i] in landing_ids else threshold
+            for j in order[pos + 1:]:
+                if suppressed[j] or cls_ints[j] != cls_ints[i]:
+                    continue
+                iw = max(0.0, min(boxes[i, 2], boxes[j, 2]) - max(boxes[i, 0], boxes[j, 0]))
+                ih = max(0.0, min(boxes[i, 3], boxes[j, 3]) - max(boxes[i, 1], boxes[j, 1]))
+                if (iw * ih) / areas[j] > thr:
+                    suppressed[j] = True
+        return keep
+
+    def test_blocked_matrix_matches_legacy_loop(self):
+        from src.detection import ObjectDetector
+
+        for seed, n, block in ((1, 0, 256), (2, 1, 256), (3, 60, 7), (4, 300, 32)):
+            rng = np.random.default_rng(seed)
+            centers = rng.uniform(0, 800, size=(max(1, n // 4), 2))
+            xy = centers[rng.integers(0, len(centers), size=n)] + rng.normal(0, 8, size=(n, 2))
+            # Tam sayı boyutlar → eşit alanlı kutular (stable sıralama) de sınanır
+            wh = rng.integers(6, 120, size=(n, 2)).astype(np.float64)
+            boxes = np.hstack([xy, xy + wh]).reshape(-1, 4)
+            cls_ints = rng.integers(0, 4, size=n)
+
+            got = ObjectDetector._suppress_contained(boxes, cls_ints, block_size=block)
+            self.assertEqual(got.tolist(), self._legacy_keep(boxes, cls_ints), f"seed={seed}")
+
+
+@unittest.skipUnless(main_module is not None, "main runtime missing")
+class TestVectorizedResultParsing(unittest.TestCase):
+    @staticmethod
+    def _legacy_parse(results, class_map):
+        rows = []
+        for result in results:
+            for box in result.boxes:
+                model_cls_id = int(box.cls[0].item())
+                conf = float(box.conf[0].item())
+                x1, y1, x2, y2 = [float(v) for v in box.xyxy[0].tolist()]
+                tf_id = class_map.get(model_cls_id, -1)
+                rows.append((
+                    tf_id, str(tf_id), model_cls_id, int(conf * 10000) / 10000,
+                    round(x1, 2), round(y1, 2), round(x2, 2), round(y2, 2),
+                    (x1, y1, x2, y2),
+                ))
+        return rows
+
+    def test_parse_matches_legacy_per_box_loop(self):
+        rng = np.random.default_rng(7)
+        results = []
+        for _ in range(3):
+            n = int(rng.integers(0, 40))
+            xy = rng.uniform(0, 1200, size=(n, 2))
+            wh = rng.uniform(4, 200, size=(n, 2))
+            conf = rng.uniform(0.05, 0.99, size=(n, 1))
+            cls = rng.integers(0, 6, size=(n, 1))
+            results.append(_FakeResult(np.hstack([xy, xy + wh, conf, cls])))
+
+        detector = _make_test_detector()
+        detector._model_class_map = {0: 0, 1: 1, 2: 2, 3: 3, 5: 0}
+
+        parsed = detector._parse_results(results).to_dicts()
+        expected = self._legacy_parse(results, detector._model_class_map)
+        got = [
+            (
+                d["cls_int"], d["cls"], d["source_cls_id"], d["confidence"],
+                d["top_left_x"], d["top_left_y"], d["bottom_right_x"],
+                d["bottom_right_y"], d["bbox"],
+            )
+            for d in parsed
+        ]
+        self.assertEqual(got, expected)
+        self.assertEqual(len({d["trace_id"] for d in parsed}), len(parsed))
+        self.assertTrue(all(isinstance(d["cls_int"], int) for d in parsed))
+
+    def test_class_lut_marks_unmapped_ids(self):
+        from src.detection import ObjectDetector
+
+        detector = _make_test_detector()
+        detector._class_lut = ObjectDetector._build_class_lut({2: 3, 7: 1})
+        mapped = detector._map_model_classes_to_teknofest(np.array([0, 2, 7, 9, -1]))
+        self.assertEqual(mapped.tolist(), [-1, 3, 1, -1, -1])
+
+
+class TestGuardrailMatrices(unittest.TestCase):
+    def setUp(self):
+        self._saved = {
+            k: getattr(Settings, k, None)
+            for k in ("GUARDRAIL_OVERLAP_IOU", "GUARDRAIL_OVERLAP_AREA_RATIO")
+        }
+
+    def tearDown(self):
+        for key, value in self._saved.items():
+            setattr(Settings, key, value)
+
+    @staticmethod
+    def _legacy_overlap_suppressed(dets, exempt_ids, iou_thr, ratio_thr):
+        from src.postprocess import _bbox, _iou
+
+        def area(d):
+            return max(1.0, (d["bottom_right_x"] - d["top_left_x"]) * (d["bottom_right_y"] - d["top_left_y"]))
+
+        suppress = set()
+        for i in range(len(dets)):
+            if i in suppress:
+                continue
+            for j in range(i + 1, len(dets)):
+                if j in suppress or dets[i]["cls"] in exempt_ids or dets[j]["cls"] in exempt_ids:
+                    continue
+                if _iou(_bbox(dets[i]), _bbox(dets[j])) < iou_thr:
+                    continue
+                ai, aj = area(dets[i]), area(dets[j])
+                if max(ai, aj) / max(min(ai, aj), 1.0) >= ratio_thr:
+                    suppress.add(i if ai > aj else j)
+        return suppress
+
+    def test_overlap_matrix_matches_legacy_pair_loop(self):
+        from src.detection_batch import DetectionBatch
+        from src.postprocess import _overlap_resolution
+
+        Settings.GUARDRAIL_OVERLAP_IOU = 0.05
+        Settings.GUARDRAIL_OVERLAP_AREA_RATIO = 3.0
+        for seed in range(6):
+            rng = np.random.default_rng(seed)
+            n = int(rng.integers(2, 90))
+            xy = rng.uniform(0, 600, size=(n, 2))
+            wh = rng.uniform(4, 260, size=(n, 2))
+            dets = [
+                {
+                    "cls": str(int(c)), "confidence": 0.5,
+                    "top_left_x": float(x1), "top_left_y": float(y1),
+                    "bottom_right_x": float(x1 + w), "bottom_right_y": float(y1 + h),
+                }
+                for (x1, y1), (w, h), c in zip(xy, wh, rng.integers(0, 4, size=n))
+            ]
+            keep, removed = _overlap_resolution(DetectionBatch.from_dicts(dets))
+            expected = self._legacy_overlap_suppressed(dets, {"2", "3"}, 0.05, 3.0)
+            self.assertEqual(set(np.flatnonzero(~keep).tolist()), expected, f"seed={seed}")
+            self.assertEqual(removed, len(expected))
+
+
+class TestTemporalRingBuffer(unittest.TestCase):
+    def setUp(self):
+        self._saved = {
+            k: getattr(Settings, k, None)
+            for k in ("TEMPORAL_FILTER_WINDOW_FRAMES", "MAX_DETECTIONS", "TEMPORAL_FILTER_ENABLED")
+        }
+        Settings.TEMPORAL_FILTER_ENABLED = True
+
+    def tearDown(self):
+        for key, value in self._saved.items():
+            setattr(Settings, key, value)
+
+    @staticmethod
+    def _frame(rng, n):
+        from src.detection_batch import DetectionBatch
+
+        xy = rng.uniform(0, 300, size=(n, 2))
+        coords = np.round(np.hstack([xy, xy + rng.uniform(10, 60, size=(n, 2))]), 2)
+        return DetectionBatch.from_arrays(
+            boxes=coords, coords=coords, scores=rng.uniform(0.3, 0.69, size=n),
+            cls_ids=rng.integers(0, 2, size=n), source_cls_ids=np.zeros(n),
+            trace_ids=[str(i) for i in range(n)],
+        )
+
+    def test_ring_buffer_matches_per_detection_history_scan(self):
+        from collections import deque
+        from src.temporal_filter import TemporalConsistencyFilter, _iou_matrix
+
+        Settings.TEMPORAL_FILTER_WINDOW_FRAMES = 3
+        filt = TemporalConsistencyFilter()
+        history = deque(maxlen=3)
+        rng = np.random.default_rng(11)
+        for _ in range(8):
+            batch = self._frame(rng, int(rng.integers(0, 25)))
+            expected = []
+            for box, cls_id in zip(batch.coords, batch.cls_ids):
+                matches = sum(
+                    bool(np.any(_iou_matrix(box[None], prev[prev_cls == cls_id]) >= 0.3))
+                    for prev, prev_cls in history
+                )
+                expected.append(matches >= 1)
+            self.assertEqual(filt.keep_mask(batch).tolist(), expected)
+            history.append((batch.coords.copy(), batch.cls_ids.copy()))
+
+    def test_slot_memory_is_bounded_by_max_detections(self):
+        from src.temporal_filter import TemporalConsistencyFilter
+
+        Settings.TEMPORAL_FILTER_WINDOW_FRAMES = 4
+        Settings.MAX_DETECTIONS = 10
+        filt = TemporalConsistencyFilter()
+        rng = np.random.default_rng(3)
+        for _ in range(6):
+            batch = self._frame(rng, 25)
+            filt.keep_mask(batch)
+        self.assertEqual(filt._boxes.shape, (4, 10, 4))
+        self.assertEqual(filt._slot_counts.tolist(), [10, 10, 10, 10])
+        top_rows = np.sort(np.argsort(-batch.scores)[:10])
+        last_slot = (filt._head - 1) % 4
+        np.testing.assert_array_equal(filt._boxes[last_slot], batch.coords[top_rows])
+
+
+class TestDetectionBatch(unittest.TestCase):
+    @staticmethod
+    def _det(cls_id, conf, box, trace):
+        x1, y1, x2, y2 = box
+        return {
+            "cls_int": cls_id, "cls": str(cls_id), "confidence": conf,
+            "top_left_x": x1, "top_left_y": y1, "bottom_right_x": x2,
+            "bottom_right_y": y2, "bbox": box, "trace_id": trace,
+        }
+
+    def test_select_and_competition_dicts_keep_order(self):
+        from src.detection_batch import DetectionBatch
+
+        batch = DetectionBatch.from_dicts([
+            self._det(0, 0.9, (10.0, 10.0, 50.0, 40.0), "a"),
+            self._det(2, 0.5, (200.0, 200.0, 300.0, 300.0), "b"),
+            self._det(-1, 0.8, (5.0, 5.0, 9.0, 9.0), "c"),
+        ])
+        sub = batch.select(np.array([2, 0]))
+        self.assertEqual(sub.trace_ids.tolist(), ["c", "a"])
+        self.assertEqual(batch.class_counts()["unknown"], 1)
+
+        out = batch.select(batch.cls_ids != -1).to_competition_dicts()
+        self.assertEqual([d["trace_id"] for d in out], ["a", "b"])
+        self.assertEqual(out[0]["motion_status"], "-1")
+        self.assertEqual(out[1]["top_left_x"], 200.0)
+        self.assertNotIn("cls_int", out[0])
+
+        # Hesaplanmamış iniş durumu (LANDING_UNSET) telde "-1"; hesaplanan değer korunur
+        sub = batch.select(np.array([0, 1]))
+        sub.landing_status[1] = 1
+        self.assertEqual([d["landing_status"] for d in sub.to_competition_dicts()], ["-1", "1"])
+
+    def test_landing_status_wrapper_matches_batch_result(self):
+        from src.detection_batch import DetectionBatch
+        from src.uap_uai import determine_landing_status, determine_landing_status_batch
+
+        dets = [
+            self._det(2, 0.9, (400.0, 400.0, 500.0, 500.0), "clear"),
+            self._det(3, 0.9, (0.0, 100.0, 80.0, 180.0), "edge"),
+            self._det(2, 0.9, (700.0, 700.0, 800.0, 800.0), "blocked"),
+            self._det(1, 0.9, (805.0, 750.0, 830.0, 790.0), "person"),
+        ]
+        batch = determine_landing_status_batch(
+            DetectionBatch.from_dicts(dets), 1920, 1080, None
+        )
+        out = determine_landing_status(dets, 1920, 1080, None)
+        self.assertEqual([d["landing_status"] for d in out], ["1", "0", "0", "-1"])
+        self.assertEqual(batch.landing_status.tolist(), [1, 0, 0, -1])
+
+    @unittest.skipUnless(MovementEstimator is not None, "movement deps missing")
+    def test_movement_annotate_converts_batch_once(self):
+        from src.detection_batch import DetectionBatch
+
+        batch = DetectionBatch.from_dicts([
+            self._det(0, 0.9, (10.0, 10.0, 50.0, 40.0), "car"),
+            self._det(1, 0.9, (100.0, 100.0, 120.0, 140.0), "person"),
+        ])
+        out = MovementEstimator().annotate(batch, frame_ctx=None)
+        self.assertIsInstance(out, list)
+        self.assertEqual([d["trace_id"] for d in out], ["car", "person"])
+        self.assertIn(out[0]["motion_status"], {"0", "1"})
+        self.assertEqual(out[1]["motion_status"], "-1")
+
+
 class TestMainAckStateMachine:
     @staticmethod
     def _counters():
@@ -784,6 +2140,239 @@ class TestMovementCompensation(unittest.TestCase):
         self.assertEqual(out[0]["motion_status"], "0")
 
 
+@unittest.skipUnless(
+    cv2 is not None and MovementEstimator is not None, "opencv/runtime deps missing"
+)
+class TestFrameMotionService(unittest.TestCase):
+    def setUp(self):
+        self._orig = {k: getattr(Settings, k) for k in ("MOTION_COMP_ENABLED", "MOTION_COMP_SEED_MAX_CELLS")}
+        Settings.MOTION_COMP_ENABLED = True
+
+    def tearDown(self):
+        for key, value in self._orig.items():
+            setattr(Settings, key, value)
+
+    @staticmethod
+    def _frame(dx: int, dy: int):
+        rng = np.random.default_rng(11)
+        base = np.zeros((360, 640, 3), dtype=np.uint8)
+        for _ in range(900):
+            x, y = int(rng.integers(5, 635)), int(rng.integers(5, 355))
+            cv2.circle(base, (x, y), 2, (255, 255, 255), -1)
+        return cv2.warpAffine(base, np.float32([[1, 0, dx], [0, 1, dy]]), (640, 360))
+
+    def test_movement_and_odometry_share_one_flow_per_frame(self):
+        from src.frame_motion import FrameMotionService
+        from src.localization import VisualOdometry
+        from src.utils import FrameContext
+
+        service = FrameMotionService()
+        movement = MovementEstimator()
+        odometry = VisualOdometry()
+        for i in range(4):
+            ctx = FrameContext(self._frame(-6 * i, 3 * i), motion_service=service)
+            odometry.update(ctx, {"gps_health": 0, "translation_z": 50.0})
+            movement.annotate([], frame_ctx=ctx)
+            if i:
+                dx, dy = movement.get_last_camera_shift()
+                self.assertAlmostEqual(dx, -6.0, delta=0.5)
+                self.assertAlmostEqual(dy, 3.0, delta=0.5)
+                self.assertEqual(odometry.get_runtime_meta()["state_source"], "optical_flow")
+        self.assertEqual(service.stats()["frames"], 4)
+        self.assertEqual(service.stats()["flow_runs"], 3)
+
+    def test_camera_shift_for_detection_is_current_pair(self):
+        from src.frame_motion import FrameMotionService
+        from src.utils import FrameContext
+
+        service = FrameMotionService()
+        movement = MovementEstimator()
+        offsets = [(0, 0), (-6, 3), (4, 3), (4, -5)]  # kayma kareden kareye değişir
+        for i, (x, y) in enumerate(offsets):
+            ctx = FrameContext(self._frame(x, y), motion_service=service)
+            before = main_module._current_camera_shift(movement, ctx)
+            movement.annotate([], frame_ctx=ctx)
+            self.assertEqual(movement.get_last_camera_shift(), before)  # akış bir kez
+            if i:
+                px, py = offsets[i - 1]
+                self.assertAlmostEqual(before[0], x - px, delta=0.5)
+                self.assertAlmostEqual(before[1], y - py, delta=0.5)
+        self.assertEqual(service.stats()["flow_runs"], 3)
+
+    def test_grid_seeder_keeps_tracks_and_fills_only_empty_cells(self):
+        from src.frame_motion import GridFeatureSeeder
+
+        gray = cv2.cvtColor(self._frame(0, 0), cv2.COLOR_BGR2GRAY)
+        seeder = GridFeatureSeeder()
+        seeder._max_cells = 0  # sınırsız: tüm boş hücreler
+        existing = np.float32([[10, 10], [30, 40], [50, 20]]).reshape(-1, 1, 2)  # hepsi hücre 0
+        points = seeder.seed(gray, existing)
+        np.testing.assert_array_equal(points[:3], existing)
+        cells = seeder._cell_index(points[3:].reshape(-1, 2), 640, 360)
+        self.assertNotIn(0, cells)
+        counts = np.bincount(cells, minlength=seeder._rows * seeder._cols)
+        self.assertLessEqual(int(counts.max()), seeder._per_cell)
+        self.assertGreater(int(np.count_nonzero(counts)), seeder._rows * seeder._cols // 2)
+
+        seeder._max_cells = 1  # bütçe: yalnızca ilk boş hücre
+        points = seeder.seed(gray, None)
+        self.assertEqual(len(np.unique(seeder._cell_index(points.reshape(-1, 2), 640, 360))), 1)
+        self.assertEqual(seeder.budget_hits, 1)
+
+    def test_grid_seeder_budget_is_deterministic(self):
+        from src.frame_motion import GridFeatureSeeder
+
+        Settings.MOTION_COMP_SEED_MAX_CELLS = 2
+        gray = cv2.cvtColor(self._frame(0, 0), cv2.COLOR_BGR2GRAY)
+        runs = [GridFeatureSeeder().seed(gray, None) for _ in range(2)]
+        self.assertIsNotNone(runs[0])
+        np.testing.assert_array_equal(runs[0], runs[1])
+
+
+@unittest.skipUnless(
+    cv2 is not None and MovementEstimator is not None, "opencv/runtime deps missing"
+)
+class TestFrameContext(unittest.TestCase):
+    _KEYS = ("MOTION_COMP_ENABLED", "MOTION_COMP_DOWNSCALE", "CLAHE_ENABLED", "PREPROCESS_RESOLUTION_AWARE")
+
+    def setUp(self):
+        self._orig = {k: getattr(Settings, k, None) for k in self._KEYS}
+        Settings.MOTION_COMP_ENABLED = True
+        Settings.MOTION_COMP_DOWNSCALE = 0.5
+        Settings.CLAHE_ENABLED = True
+        Settings.PREPROCESS_RESOLUTION_AWARE = True
+
+    def tearDown(self):
+        for key, value in self._orig.items():
+            setattr(Settings, key, value)
+
+    def test_gray_is_converted_once_across_consumers(self):
+        from src.frame_motion import FrameMotionService
+        from src.preprocessing import FramePreprocessor
+        from src.sahi_tiling import TileReuseCache
+        from src.utils import FrameContext
+
+        gray = np.random.default_rng(3).integers(0, 255, size=(720, 1280), dtype=np.uint8)
+        ctx = FrameContext(cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR), motion_service=FrameMotionService())
+        MovementEstimator().annotate([], frame_ctx=ctx)
+        TileReuseCache().begin_frame(ctx, (0.0, 0.0), signature="s", frame_index=0)
+        prepared = FramePreprocessor().begin_frame(ctx)
+        self.assertEqual(prepared.mode, "thermal")
+        prepared.tile(0, 0, 640, 640)
+        prepared.tile(640, 0, 1280, 640)
+        prepared.full(640)
+        prepared.full(640)
+
+        stats = ctx.derivation_stats()
+        self.assertEqual(stats["gray"]["misses"], 1)
+        self.assertGreaterEqual(stats["gray"]["hits"], 3)
+        for name in ("gray_level", "resized", "frame_motion"):
+            self.assertEqual(stats[name]["hits"], 0, name)
+        self.assertEqual(stats["gray_level"]["misses"], 2)  # akış + SAHI yeniden kullanım seviyesi
+        np.testing.assert_array_equal(ctx.gray, gray)
+
+
+@unittest.skipUnless(
+    cv2 is not None and MovementEstimator is not None, "opencv/runtime deps missing"
+)
+class TestKeyframePropagation(unittest.TestCase):
+    _KEYS = ("MOTION_COMP_ENABLED", "KEYFRAME_MAX_PROPAGATION_FRAMES", "KEYFRAME_CONF_DECAY")
+
+    def setUp(self):
+        self._orig = {k: getattr(Settings, k, None) for k in self._KEYS}
+        Settings.MOTION_COMP_ENABLED = True
+        Settings.KEYFRAME_MAX_PROPAGATION_FRAMES = 2
+        Settings.KEYFRAME_CONF_DECAY = 0.9
+
+    def tearDown(self):
+        for key, value in self._orig.items():
+            setattr(Settings, key, value)
+
+    @staticmethod
+    def _frame(shift_x: int = 0, seed: int = 42):
+        rng = np.random.default_rng(seed)
+        base = np.zeros((320, 320, 3), dtype=np.uint8)
+        for _ in range(600):
+            cv2.circle(base, (int(rng.integers(5, 315)), int(rng.integers(5, 315))), 1, (255, 255, 255), -1)
+        return cv2.warpAffine(base, np.float32([[1, 0, shift_x], [0, 1, 0]]), (320, 320))
+
+    @staticmethod
+    def _keyframe():
+        from src.detection_batch import DetectionBatch
+
+        rows = np.array([[100, 100, 140, 140], [150, 150, 260, 260]], dtype=np.float64)
+        batch = DetectionBatch.from_arrays(
+            boxes=rows, coords=rows, scores=[0.9, 0.95], cls_ids=[0, Settings.CLASS_UAP],
+            source_cls_ids=[0, 2], trace_ids=["a", "b"],
+        )
+        batch.landing_status = np.array([-1, 1], dtype=np.int8)
+        return batch
+
+    def test_boxes_follow_flow_with_decay_until_max_length(self):
+        from src.keyframe_propagation import KeyframePropagator
+        from src.utils import FrameContext
+
+        movement = MovementEstimator()
+        propagator = KeyframePropagator()
+        movement.annotate(self._keyframe(), frame_ctx=FrameContext(self._frame(0)))
+        propagator.remember_keyframe(self._keyframe())
+
+        for step in (1, 2):
+            ctx = FrameContext(self._frame(12 * step))
+            out = propagator.propagate(ctx, movement)
+            self.assertIsNotNone(out)
+            np.testing.assert_allclose(out.coords[0], [100 + 12 * step, 100, 140 + 12 * step, 140], atol=1.0)
+            self.assertAlmostEqual(float(out.scores[0]), round(0.9 * 0.9 ** step, 4), places=4)
+            self.assertIn(int(out.landing_status[1]), (0, 1))
+            dicts = movement.annotate(out, frame_ctx=ctx)
+            self.assertEqual(dicts[0]["motion_status"], "0")  # kamera kayması kadar taşındı
+
+        self.assertIsNone(propagator.propagate(FrameContext(self._frame(36)), movement))
+        self.assertEqual(propagator.stats()["forced"], {"max_length": 1})
+
+    def test_scene_change_forces_redetect(self):
+        from src.keyframe_propagation import KeyframePropagator
+        from src.utils import FrameContext
+
+        movement = MovementEstimator()
+        propagator = KeyframePropagator()
+        movement.annotate([], frame_ctx=FrameContext(self._frame(0)))
+        propagator.remember_keyframe(self._keyframe())
+        self.assertIsNone(propagator.propagate(FrameContext(self._frame(0, seed=7)), movement))
+        self.assertEqual(propagator.stats()["propagated"], 0)
+
+    def test_next_keyframe_gets_session_index_and_accumulated_shift(self):
+        from src.determinism_selftest import collect_payloads
+
+        keyframe = self._keyframe
+        calls = []
+
+        class _RecordingDetector:
+            def detect_batch(self, frame, **kwargs):
+                calls.append(kwargs)
+                return keyframe()
+
+        frames = (
+            {
+                "frame": self._frame(12 * i),
+                "frame_idx": i,
+                "server_data": {"frame_id": i, "gps_health": 0, "gps_health_status": 0},
+            }
+            for i in range(4)
+        )
+        orig_mode = getattr(Settings, "KEYFRAME_MODE_ENABLED", False)
+        Settings.KEYFRAME_MODE_ENABLED = True
+        try:
+            payloads = collect_payloads(frames, _RecordingDetector(), max_frames=4)
+        finally:
+            Settings.KEYFRAME_MODE_ENABLED = orig_mode
+        self.assertEqual(len(payloads), 4)
+        # 1 ve 2 taşındı: dedektör yalnız 0 ve 3'ü görür, 3 aradaki kaymaların toplamını alır
+        self.assertEqual([c["frame_index"] for c in calls], [0, 3])
+        self.assertAlmostEqual(calls[1]["camera_shift"][0], 36.0, delta=1.5)
+        self.assertAlmostEqual(calls[1]["camera_shift"][1], 0.0, delta=1.5)
+
+
 @unittest.skipUnless(
     NetworkManager is not None and FrameFetchStatus is not None, "network deps missing"
 )
@@ -1383,11 +2972,15 @@ class TestErrorPolicy(unittest.TestCase):
 
 class _DummyDetector:
     detect_calls = 0
+    close_calls = 0
 
     def detect(self, frame, runtime_profile="default"):
         _DummyDetector.detect_calls += 1
         return []
 
+    def close(self):
+        _DummyDetector.close_calls += 1
+
 
 class _DummyMovement:
     def annotate(self, detections, frame_ctx=None):
@@ -1419,6 +3012,7 @@ class _FakeNetwork:
         cls.download_calls = 0
         cls.send_calls = 0
         _DummyDetector.detect_calls = 0
+        _DummyDetector.close_calls = 0
 
     def start_session(self):
         return True
@@ -1527,6 +3121,7 @@ class TestCompetitionLoopHardening(unittest.TestCase):
         self.assertEqual(_FakeNetwork.download_calls, 2)
         self.assertEqual(_FakeNetwork.send_calls, 2)
         self.assertEqual(_DummyDetector.detect_calls, 2)
+        self.assertEqual(_DummyDetector.close_calls, 1)
         self.assertEqual(
             self.summary_calls[-1]["kpi_counters"]["frame_duplicate_drop"], 1
         )
@@ -1980,6 +3575,156 @@ class TestVisualOdometryPredictOnly(unittest.TestCase):
             self.assertEqual(meta["state_source"], "vision_predict")
 
 
+class TestVisualOdometrySimilarityFit(unittest.TestCase):
+    def test_fit_recovers_center_shift_and_scale_despite_outliers(self):
+        from src.localization import VisualOdometry
+
+        rng = np.random.default_rng(4)
+        old = rng.uniform(0, 768, size=(120, 2)).astype(np.float32)
+        center = (384.0, 216.0)
+        # Merkez etrafında %2 yakınlaşma + (5, -3) piksel öteleme
+        new = (old - center) * 1.02 + center + np.float32([5.0, -3.0])
+        new[:20] += rng.uniform(-40, 40, size=(20, 2)).astype(np.float32)  # bağımsız hareket
+        dx, dy, scale = VisualOdometry._fit_similarity(old, new, center)
+        self.assertAlmostEqual(dx, 5.0, delta=0.05)
+        self.assertAlmostEqual(dy, -3.0, delta=0.05)
+        self.assertAlmostEqual(scale, 1.02, delta=1e-3)
+        self.assertIsNone(VisualOdometry._fit_similarity(old[:4], new[:4], center))
+        self.assertAlmostEqual(VisualOdometry._centroid_scale(old[20:], new[20:]), 1.02, delta=1e-3)
+
+    def test_reprojection_threshold_is_in_full_resolution_pixels(self):
+        from src.localization import VisualOdometry
+
+        old = np.random.default_rng(5).uniform(0, 460, size=(60, 2)).astype(np.float32)
+        original = Settings.VO_SIMILARITY_REPROJ_PX
+        Settings.VO_SIMILARITY_REPROJ_PX = 1.2
+        try:
+            with patch.object(cv2, "estimateAffinePartial2D", wraps=cv2.estimateAffinePartial2D) as fit:
+                VisualOdometry._fit_similarity(old, old + 2.0, (230.0, 130.0), inv_scale=1.0 / 0.6)
+        finally:
+            Settings.VO_SIMILARITY_REPROJ_PX = original
+        # 1.2 px tam çözünürlük → 0.6 ölçekli akış seviyesinde 0.72 px
+        self.assertAlmostEqual(fit.call_args.kwargs["ransacReprojThreshold"], 0.72, places=6)
+
+
+@unittest.skipUnless(cv2 is not None, "opencv missing")
+class TestVoReplay(unittest.TestCase):
+    def test_mock_outage_schedule_and_sweep_grid(self):
+        from src.vo_replay import OutageSchedule, expand_sweep
+
+        mock = OutageSchedule.parse("mock")
+        self.assertEqual([mock.health(i) for i in (0, 449, 450, 549, 550, 749, 750)], [1, 1, 1, 1, 0, 0, 1])
+        self.assertEqual(OutageSchedule.parse("off").health(0), 0)
+        grid = expand_sweep(["VO_SIMILARITY_REPROJ_PX=0.5,1", "LATENCY_COMP_ENABLED=false"])
+        self.assertEqual(grid, [
+            {"VO_SIMILARITY_REPROJ_PX": 0.5, "LATENCY_COMP_ENABLED": False},
+            {"VO_SIMILARITY_REPROJ_PX": 1.0, "LATENCY_COMP_ENABLED": False},
+        ])
+        with self.assertRaises(ValueError):
+            expand_sweep(["CONFIDENCE_THRESHOLD=0.1"])
+
+    def test_replay_reports_drift_and_restores_settings(self):
+        import tempfile
+
+        from src.vo_replay import ReplayConfig, run_replay
+
+        rng = np.random.default_rng(2)
+        base = rng.integers(0, 255, size=(300, 500, 3), dtype=np.uint8)
+        base = cv2.GaussianBlur(base, (5, 5), 0)
+        original = Settings.VO_SIMILARITY_REPROJ_PX
+        with tempfile.TemporaryDirectory() as tmp:
+            rows = ["translation_x,translation_y,translation_z"]
+            for i in range(8):
+                cv2.imwrite(f"{tmp}/{i:03d}.png", np.ascontiguousarray(base[:240, 2 * i:2 * i + 320]))
+                rows.append(f"{0.1 * i},0.0,50.0")
+            with open(f"{tmp}/gt.csv", "w", encoding="utf-8") as handle:
+                handle.write("\n".join(rows))
+            result = run_replay(ReplayConfig(
+                source=tmp, ground_truth=f"{tmp}/gt.csv", schedule="3:100:0",
+                overrides={"VO_SIMILARITY_REPROJ_PX": "1.0"},
+            ))
+        self.assertEqual((result["frames"], result["outage_frames"]), (8, 5))
+        for key in ("mean_err_m", "outage_mean_err_m", "drift_m_per_min", "ms_per_frame"):
+            self.assertTrue(np.isfinite(result[key]), key)
+        self.assertEqual(Settings.VO_SIMILARITY_REPROJ_PX, original)
+
+
+class _SelftestModel:
+    """Kutusu kaynak içeriğine bağlı sahte model (boyut filtresinden geçecek kadar büyük)."""
+
+    def predict(self, source, **kwargs):
+        out = []
+        for src in source if isinstance(source, list) else [source]:
+            x = float(int(src[:, :, 0].mean()) % 200)
+            out.append(_FakeResult([[x, 20.0, x + 40.0, 60.0, 0.8, 0.0]]))
+        return out
+
+
+@unittest.skipUnless(main_module is not None and cv2 is not None, "main runtime missing")
+class TestDeterminismSelftest(unittest.TestCase):
+    _KEYS = ("SCHEDULER_ENABLED", "SCHEDULER_COST_SOURCE")
+
+    def setUp(self):
+        self._orig = {k: getattr(Settings, k) for k in self._KEYS}
+        Settings.SCHEDULER_ENABLED = True
+        Settings.SCHEDULER_COST_SOURCE = "static"
+
+    def tearDown(self):
+        for key, value in self._orig.items():
+            setattr(Settings, key, value)
+
+    @staticmethod
+    def _frames():
+        rng = np.random.default_rng(4)
+        base = cv2.GaussianBlur(rng.integers(0, 255, size=(300, 520, 3), dtype=np.uint8), (5, 5), 0)
+        for i in range(6):
+            gps = 1 if i < 2 else 0
+            yield {
+                "frame": np.ascontiguousarray(base[:240, 3 * i:3 * i + 320]),
+                "frame_idx": i,
+                "server_data": {
+                    "frame_id": i, "gps_health": gps, "gps_health_status": gps,
+                    "translation_x": 0.5 * i if gps else "NaN",
+                    "translation_y": 0.0 if gps else "NaN",
+                    "translation_z": 50.0 if gps else "NaN",
+                },
+            }
+
+    def test_competition_step_payloads_repeat_bit_identical(self):
+        from src.determinism_selftest import collect_payloads, compare_runs
+
+        detectors = []
+        for _ in range(2):
+            detector = _make_test_detector(_SelftestModel())
+            detector.detect_batch = Mock(wraps=detector.detect_batch)
+            detectors.append(detector)
+        runs = [collect_payloads(self._frames(), d, max_frames=10) for d in detectors]
+        self.assertEqual(len(runs[0]), 6)
+        self.assertEqual(compare_runs(runs), [])
+        self.assertEqual(runs[0][0]["detected_objects"][0]["cls"], "0")
+        kwargs = detectors[0].detect_batch.call_args.kwargs
+        self.assertIn("camera_shift", kwargs)
+        self.assertEqual(kwargs["runtime_profile"].name, "full")  # statik maliyetli zamanlayıcı planı
+        changed = copy.deepcopy(runs[1])
+        changed[4]["detected_translations"][0]["translation_x"] += 1e-9
+        self.assertEqual(len(compare_runs([runs[0], changed])), 1)
+
+    def test_repetitions_run_in_separate_processes(self):
+        import sys
+
+        from src.determinism_selftest import compare_runs, run_isolated
+
+        worker = [
+            sys.executable, "-c",
+            "import json, os, sys; json.dump([{'frame': 0, 'detected_objects': [], "
+            "'pid': os.getpid()}], open(sys.argv[-1], 'w'))",
+        ]
+        runs = run_isolated(worker, repetitions=2, timeout_s=8.0)
+        self.assertEqual(len(runs), 2)
+        self.assertNotEqual(runs[0][0]["pid"], runs[1][0]["pid"])
+        self.assertEqual(len(compare_runs(runs)), 1)
+
+
 class TestFlowPolicy(unittest.TestCase):
     def test_degrade_fetch_strategy_matrix(self):
         from src.flow_policy import FetchStrategy, decide_degrade_fetch_strategy
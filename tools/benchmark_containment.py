@@ -0,0 +1,101 @@
+"""Kapsama bastırma (_suppress_contained) mikro-benchmark'ı.
+
+Eski satır-satır Python döngüsü ile bloklu IoA matris sürümünü aynı kutu
+kümeleri üzerinde karşılaştırır; korunan küme birebir aynı olmalıdır.
+
+Kullanım:
+    python tools/benchmark_containment.py [--sizes 50 200 1000] [--repeat 20]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from config.settings import Settings  # noqa: E402
+from src.detection import ObjectDetector  # noqa: E402
+
+
+def legacy_suppress_contained(
+    boxes: np.ndarray, cls_ints: np.ndarray, threshold: float = 0.85
+) -> List[int]:
+    """Vektörleştirme öncesi referans sürüm (karşılaştırma için)."""
+    areas = np.maximum((boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1]), 1e-6)
+    order = np.argsort(areas, kind="stable")[::-1]
+    keep: List[int] = []
+    is_suppressed = np.zeros(len(boxes), dtype=bool)
+    landing_zone_ids = {Settings.CLASS_UAP, Settings.CLASS_UAI}
+    for i_idx, i in enumerate(order):
+        if is_suppressed[i]:
+            continue
+        keep.append(int(i))
+        remaining = order[i_idx + 1:]
+        valid = remaining[~is_suppressed[remaining] & (cls_ints[remaining] == cls_ints[i])]
+        if len(valid) == 0:
+            continue
+        box_a = boxes[i]
+        inter_w = np.maximum(0.0, np.minimum(box_a[2], boxes[valid, 2]) - np.maximum(box_a[0], boxes[valid, 0]))
+        inter_h = np.maximum(0.0, np.minimum(box_a[3], boxes[valid, 3]) - np.maximum(box_a[1], boxes[valid, 1]))
+        ios = (inter_w * inter_h) / areas[valid]
+        thr = Settings.LANDING_ZONE_CONTAINMENT_IOU if cls_ints[i] in landing_zone_ids else threshold
+        mask = np.zeros(len(valid), dtype=bool)
+        for k, b in enumerate(valid):
+            if ios[k] > thr:
+                if cls_ints[i] in landing_zone_ids and cls_ints[b] not in landing_zone_ids:
+                    continue
+                mask[k] = True
+        is_suppressed[valid[mask]] = True
+    return keep
+
+
+def make_boxes(n: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """SAHI birleşimine benzeyen kümelenmiş kutular (iç içe + tekrarlı)."""
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(0, 3840, size=(max(1, n // 4), 2))
+    picks = centers[rng.integers(0, len(centers), size=n)]
+    xy = picks + rng.normal(0, 12, size=(n, 2))
+    wh = rng.uniform(8, 220, size=(n, 2))
+    boxes = np.hstack([xy, xy + wh]).astype(np.float64)
+    cls_ints = rng.integers(0, 4, size=n)
+    return boxes, cls_ints
+
+
+def _time_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, (time.perf_counter() - t0) * 1000.0)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'n':>6} {'legacy_ms':>10} {'blocked_ms':>11} {'speedup':>8} {'kept':>6}")
+    for n in args.sizes:
+        boxes, cls_ints = make_boxes(n, seed=n)
+        legacy = legacy_suppress_contained(boxes, cls_ints)
+        blocked = ObjectDetector._suppress_contained(boxes, cls_ints).tolist()
+        if legacy != blocked:
+            raise SystemExit(f"n={n}: korunan küme farklı! legacy={len(legacy)} blocked={len(blocked)}")
+
+        legacy_ms = _time_ms(lambda: legacy_suppress_contained(boxes, cls_ints), args.repeat)
+        blocked_ms = _time_ms(lambda: ObjectDetector._suppress_contained(boxes, cls_ints), args.repeat)
+        print(
+            f"{n:>6} {legacy_ms:>10.2f} {blocked_ms:>11.2f} "
+            f"{legacy_ms / max(blocked_ms, 1e-9):>7.1f}x {len(blocked):>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Görev 1 CPU çıkarım arka ucu benchmark'ı (torch / onnx / openvino).
+
+Her arka uç için modeli src.inference_backend.load_model ile yükler (gerekirse
+tek seferlik export yapar) ve INFERENCE_SIZE 1280/960/640 için kare başına
+ortalama ve p95 süreyi ölçer. Kaynak kareler datasets/ altındaki görüntülerden
+alınır; bulunamazsa sabit tohumlu rastgele kare kullanılır.
+
+Kullanım:
+    python tools/benchmark_inference_backend.py [--backends torch onnx openvino]
+        [--sizes 1280 960 640] [--frames 30] [--warmup 3] [--quantization int8_static]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from config.settings import Settings  # noqa: E402
+from src.inference_backend import SUPPORTED_BACKENDS, load_model  # noqa: E402
+
+
+def load_frames(count: int) -> List[np.ndarray]:
+    import cv2
+
+    paths = sorted(
+        p for p in (PROJECT_ROOT / "datasets").rglob("*")
+        if p.suffix.lower() in {".jpg", ".jpeg", ".png"}
+    )[:count]
+    frames = [img for img in (cv2.imread(str(p)) for p in paths) if img is not None]
+    if frames:
+        return frames
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, size=(1080, 1920, 3), dtype=np.uint8) for _ in range(count)]
+
+
+def bench(
+    backend: str, sizes: List[int], frames: List[np.ndarray], warmup: int, quantization: str
+) -> None:
+    model, active, quant = load_model(Settings.MODEL_PATH, "cpu", backend, quantization)
+    if active != backend:
+        print(f"{backend:>9}: yüklenemedi (etkin: {active}), atlandı")
+        return
+    label = backend if quant == "none" else f"{backend}+{quant}"
+    for imgsz in sizes:
+        for frame in frames[:warmup]:
+            model.predict(source=frame, imgsz=imgsz, conf=Settings.CONFIDENCE_THRESHOLD, verbose=False)
+        timings = []
+        for frame in frames:
+            t0 = time.perf_counter()
+            model.predict(source=frame, imgsz=imgsz, conf=Settings.CONFIDENCE_THRESHOLD, verbose=False)
+            timings.append((time.perf_counter() - t0) * 1000.0)
+        arr = np.asarray(timings)
+        print(
+            f"{label:>9} imgsz={imgsz:>4}: {arr.mean():8.1f} ms/kare  "
+            f"p95={np.percentile(arr, 95):8.1f} ms  (n={len(arr)})"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="CPU inference backend benchmark")
+    parser.add_argument("--backends", nargs="+", default=list(SUPPORTED_BACKENDS), choices=SUPPORTED_BACKENDS)
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1280, 960, 640])
+    parser.add_argument("--frames", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument(
+        "--quantization", default="none", choices=["none", "int8_dynamic", "int8_static"],
+        help="onnx arka ucu için INT8 profili",
+    )
+    args = parser.parse_args()
+
+    frames = load_frames(max(1, args.frames))
+    print(f"Model: {Settings.MODEL_PATH}  kare: {len(frames)}  boyut: {frames[0].shape[1]}x{frames[0].shape[0]}")
+    for backend in args.backends:
+        quant = args.quantization if backend == "onnx" else "none"
+        bench(backend, args.sizes, frames, max(0, args.warmup), quant)
+
+
+if __name__ == "__main__":
+    main()
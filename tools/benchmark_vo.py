@@ -0,0 +1,183 @@
+"""Görsel odometri (GPS=0) replay benchmark'ı: benzerlik uydurma vs eski kestirici.
+
+Dokulu bir mozaik üzerinde bilinen yörüngeyle (öteleme + irtifa değişimi)
+sentetik bir kare dizisi üretilir; karelerin bir kısmına bağımsız hareket
+eden lekeler (aykırı akış) eklenir. Aynı dizi iki VisualOdometry ile oynatılır:
+
+    - similarity: estimateAffinePartial2D (RANSAC) ile öteleme + ölçek
+    - legacy:     IQR-medyan kayma + N×N ikili uzaklık oranı medyanı (eski sürüm)
+
+İlk iki kare GPS=1 (çapa), sonrası GPS=0. EMA kapatılır (alpha=1) ki fark kestiriciden
+gelsin. Sürüklenme: son karedeki konum hatası (metre); gecikme: kare başına
+kestirici süresi (akış iki yolda ortak olduğundan ayrı ölçülür).
+
+Kullanım:
+    python tools/benchmark_vo.py [--frames 120] [--outliers 12] [--repeat 20]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from config.settings import Settings  # noqa: E402
+from src.frame_motion import FrameMotionService  # noqa: E402
+from src.localization import VisualOdometry  # noqa: E402
+from src.utils import FrameContext  # noqa: E402
+
+_FRAME_SIZE = (1280, 720)
+
+
+def legacy_pairwise_scale(old: np.ndarray, new: np.ndarray) -> float:
+    """Benzerlik uydurması öncesi referans ölçek kestirimi (N×N×2 tensör)."""
+    if len(new) < 3:
+        return 1.0
+    dist_old = np.sqrt(np.sum((old[:, np.newaxis, :] - old[np.newaxis, :, :]) ** 2, axis=-1))
+    dist_new = np.sqrt(np.sum((new[:, np.newaxis, :] - new[np.newaxis, :, :]) ** 2, axis=-1))
+    iu = np.triu_indices(len(old), k=1)
+    old_vals = dist_old[iu]
+    new_vals = dist_new[iu]
+    valid = old_vals > 5.0
+    if not np.any(valid):
+        return 1.0
+    return float(np.median(new_vals[valid] / old_vals[valid]))
+
+
+class LegacyVisualOdometry(VisualOdometry):
+    """Eski kestirici: uydurma yok, medyan kayma + ikili uzaklık ölçeği."""
+
+    @staticmethod
+    def _fit_similarity(old, new, center, inv_scale=1.0):
+        return None
+
+    @staticmethod
+    def _centroid_scale(old, new):
+        return legacy_pairwise_scale(old, new)
+
+
+def make_replay(
+    frames: int, outliers: int, seed: int
+) -> Tuple[List[np.ndarray], List[Dict[str, float]]]:
+    """(kareler, kare başına gerçek konum) — x/y metre, z irtifa."""
+    rng = np.random.default_rng(seed)
+    w, h = _FRAME_SIZE
+    mosaic = np.zeros((h * 3, w * 3, 3), dtype=np.uint8)
+    for _ in range(20000):
+        x, y = int(rng.integers(0, w * 3)), int(rng.integers(0, h * 3))
+        color = tuple(int(v) for v in rng.integers(40, 255, 3))
+        cv2.circle(mosaic, (x, y), int(rng.integers(1, 4)), color, -1)
+    mosaic = cv2.GaussianBlur(mosaic, (3, 3), 0)
+
+    focal = float(Settings.FOCAL_LENGTH_PX)
+    sign_x = 1 if int(getattr(Settings, "VO_SIGN_X", -1)) >= 0 else -1
+    sign_y = 1 if int(getattr(Settings, "VO_SIGN_Y", -1)) >= 0 else -1
+    base_alt = 50.0
+    center = np.array([w / 2.0, h / 2.0])
+    cam = np.array([w * 1.5, h * 1.5])
+    blobs = rng.uniform([0, 0], [w, h], size=(outliers, 2))
+    blob_v = rng.uniform(-12, 12, size=(outliers, 2))
+
+    images: List[np.ndarray] = []
+    truth: List[Dict[str, float]] = []
+    pos = {"x": 0.0, "y": 0.0, "z": base_alt}
+    prev_cam, prev_zoom = cam.copy(), 1.0
+    for k in range(frames):
+        zoom = 1.0 + 0.15 * np.sin(k / 25.0)  # irtifa = base_alt / zoom
+        cam = cam + np.array([3.0 * np.cos(k / 40.0), 2.0 + np.sin(k / 17.0)])
+        if k:
+            # Önceki karenin merkezindeki mozaik noktası bu karede ne kadar kaydı
+            disp = zoom * (prev_cam - cam)
+            altitude = base_alt / zoom
+            pos["x"] += sign_x * disp[0] * altitude / focal
+            pos["y"] += sign_y * disp[1] * altitude / focal
+            pos["z"] += altitude - base_alt / prev_zoom
+        prev_cam, prev_zoom = cam.copy(), zoom
+        matrix = np.float32([
+            [zoom, 0, center[0] - zoom * cam[0]],
+            [0, zoom, center[1] - zoom * cam[1]],
+        ])
+        image = cv2.warpAffine(mosaic, matrix, (w, h))
+        blobs = (blobs + blob_v) % [w, h]
+        for bx, by in blobs:
+            cv2.rectangle(image, (int(bx), int(by)), (int(bx) + 60, int(by) + 40), (255, 255, 255), -1)
+            cv2.circle(image, (int(bx) + 15, int(by) + 15), 6, (0, 0, 0), -1)
+        images.append(image)
+        truth.append(dict(pos))
+    return images, truth
+
+
+def replay(
+    odometry: VisualOdometry, images: List[np.ndarray], truth: List[Dict[str, float]]
+) -> Tuple[List[Dict[str, float]], List[Tuple[np.ndarray, np.ndarray, Tuple[float, float], float]]]:
+    odometry._ema_alpha = 1.0
+    service = FrameMotionService()
+    positions: List[Dict[str, float]] = []
+    pairs = []
+    for k, (image, gt) in enumerate(zip(images, truth)):
+        ctx = FrameContext(image, motion_service=service)
+        if k < 2:  # ilk GPS karesi yumuşak çapalanır; ikincisi konumu oturtur
+            server = {"gps_health": 1, "translation_x": gt["x"], "translation_y": gt["y"],
+                      "translation_z": gt["z"]}
+        else:
+            server = {"gps_health": 0, "translation_z": gt["z"]}
+        positions.append(odometry.update(ctx, server))
+        motion = service.step(ctx)
+        if k >= 2:
+            h, w = motion.gray.shape[:2]
+            old, new = motion.pairs()
+            pairs.append((old, new, (w / 2.0, h / 2.0), motion.inv_scale))
+    return positions, pairs
+
+
+def _time_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, (time.perf_counter() - t0) * 1000.0)
+    return best
+
+
+def _drift(positions: List[Dict[str, float]], truth: List[Dict[str, float]]) -> Tuple[float, float]:
+    err = np.array([[p[a] - t[a] for a in ("x", "y", "z")] for p, t in zip(positions, truth)])
+    return float(np.linalg.norm(err[-1, :2])), float(np.abs(err[:, 2]).mean())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=120)
+    parser.add_argument("--outliers", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    images, truth = make_replay(args.frames, args.outliers, args.seed)
+    rows = []
+    for name, cls in (("legacy", LegacyVisualOdometry), ("similarity", VisualOdometry)):
+        positions, pairs = replay(cls(), images, truth)
+
+        def estimate(cls=cls, pairs=pairs):
+            for old, new, center, inv_scale in pairs:
+                if cls._fit_similarity(old, new, center, inv_scale=inv_scale) is None:
+                    cls._centroid_scale(old, new)
+                    np.median(new - old, axis=0)
+
+        xy_drift, z_err = _drift(positions, truth)
+        rows.append((name, xy_drift, z_err, _time_ms(estimate, args.repeat) / max(1, len(pairs))))
+
+    print(f"frames={args.frames} outliers={args.outliers} "
+          f"pairs/frame~{np.mean([len(p[0]) for p in pairs]):.0f}")
+    print(f"{'estimator':>11} {'xy_drift_m':>11} {'mean_|z|_m':>11} {'est_ms/frame':>13}")
+    for name, xy_drift, z_err, est_ms in rows:
+        print(f"{name:>11} {xy_drift:>11.3f} {z_err:>11.3f} {est_ms:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
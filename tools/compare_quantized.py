@@ -0,0 +1,86 @@
+"""FP32 ↔ INT8 tespit uyumu karşılaştırması (yarışma öncesi güven kontrolü).
+
+Referans (.pt, PyTorch FP32) ve INT8 ONNX modelini aynı karelerde çalıştırır;
+IoU eşleştirmesiyle kutu eşleşme oranı, sınıf uyum oranı, ortalama IoU ve
+toplam uyum (agreement) raporlar. INT8 grafiği yoksa önce üretilir.
+
+Kullanım:
+    python tools/compare_quantized.py [--mode int8_static] [--sequence DIR]
+        [--frames 200] [--imgsz 1280] [--json rapor.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from ultralytics import YOLO  # noqa: E402
+
+from config.settings import Settings  # noqa: E402
+from src.inference_backend import BACKEND_ONNX, ensure_exported  # noqa: E402
+from src.quantization import (  # noqa: E402
+    QUANT_INT8_DYNAMIC,
+    QUANT_INT8_STATIC,
+    _read_frames,
+    compare_models,
+    ensure_quantized,
+    list_dataset_images,
+    quantized_model_path,
+    report_passes,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="FP32 vs INT8 detection agreement")
+    parser.add_argument("--mode", default=QUANT_INT8_STATIC, choices=[QUANT_INT8_DYNAMIC, QUANT_INT8_STATIC])
+    parser.add_argument("--sequence", default=None, help="Görüntü dizini (varsayılan: datasets/)")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--imgsz", type=int, default=int(Settings.INFERENCE_SIZE))
+    parser.add_argument("--conf", type=float, default=float(Settings.CONFIDENCE_THRESHOLD))
+    parser.add_argument("--iou", type=float, default=float(getattr(Settings, "QUANT_AGREEMENT_IOU", 0.5)))
+    parser.add_argument("--json", default=None, help="Raporu JSON olarak yaz")
+    args = parser.parse_args()
+
+    exported = ensure_exported(Settings.MODEL_PATH, BACKEND_ONNX)
+    quantized = quantized_model_path(exported, args.mode)
+    if not os.path.exists(quantized):
+        ensure_quantized(exported, args.mode, YOLO)
+    if not os.path.exists(quantized):
+        sys.exit(f"INT8 modeli üretilemedi: {quantized}")
+
+    paths = list_dataset_images(args.sequence)[: max(1, args.frames)]
+    frames = _read_frames(paths)
+    if not frames:
+        sys.exit("Karşılaştırma için kare bulunamadı")
+
+    reference = YOLO(Settings.MODEL_PATH)
+    reference.to("cpu")
+    report = compare_models(
+        reference,
+        YOLO(quantized, task="detect"),
+        frames,
+        imgsz=args.imgsz,
+        conf=args.conf,
+        iou_threshold=args.iou,
+    )
+    report.update({"mode": args.mode, "imgsz": args.imgsz, "model": quantized})
+
+    print(f"Kare           : {report['frames']}")
+    print(f"Kutu (FP32/INT8): {report['ref_count']} / {report['test_count']}")
+    print(f"Eşleşme oranı  : {report['match_rate']:.4f} (IoU >= {args.iou})")
+    print(f"Sınıf uyumu    : {report['class_match_rate']:.4f}")
+    print(f"Ortalama IoU   : {report['mean_iou']:.4f}")
+    print(f"Uyum (agreement): {report['agreement']:.4f} "
+          f"→ {'GEÇTİ' if report_passes(report) else 'KALDI'} "
+          f"(eşik {getattr(Settings, 'QUANT_MIN_AGREEMENT', 0.90)})")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Determinizm self-test: aynı diziyi ayrı süreçlerde koşturup payload'ları karşılaştırır.
+
+Her tekrar yeni bir Python sürecidir: profil uygulanır, dedektör / hareket /
+odometri / zamanlayıcı sıfırdan kurulur ve kareler yarışma adımından
+(main._fetch_competition_step) geçirilir. Kare başına yarışma payload'ları
+kanonik JSON olarak birebir karşılaştırılır (src/determinism_selftest.py).
+deterministic-profile=parallel için DETERMINISM_PARALLEL_INTRAOP_THREADS > 1
+kullanılacaksa önce bu test ile doğrulanmalıdır.
+
+Kullanım:
+    python tools/determinism_selftest.py [--profile parallel] [--sequence DIR]
+        [--frames 30] [--seed 42] [--intraop-threads 1] [--workers 0] [--repeat 2]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from config.settings import Settings  # noqa: E402
+from src.determinism_selftest import (  # noqa: E402
+    collect_payloads,
+    compare_runs,
+    run_isolated,
+    write_payloads,
+)
+
+
+def _run_worker(args: argparse.Namespace) -> None:
+    """Tek tekrar (alt süreç): yarışma adımı payload'larını args.worker_output'a yazar."""
+    from src.data_loader import DatasetLoader
+    from src.detection import ObjectDetector
+    from src.runtime_profile import apply_runtime_profile
+
+    apply_runtime_profile(args.profile, requested_profile=args.profile)
+    loader = DatasetLoader(prefer_vid=True, seed=args.seed, sequence=args.sequence)
+    if not loader.is_ready:
+        sys.exit("Veri seti yüklenemedi")
+    image_matcher = None
+    if Settings.TASK3_ENABLED:
+        from src.image_matcher import ImageMatcher
+
+        image_matcher = ImageMatcher()
+        if image_matcher.load_references_from_directory() == 0:
+            image_matcher = None
+    detector = ObjectDetector()
+    try:
+        payloads = collect_payloads(loader, detector, args.frames, image_matcher=image_matcher)
+    finally:
+        detector.close()
+    write_payloads(args.worker_output, payloads)
+
+
+def _worker_argv(args: argparse.Namespace) -> List[str]:
+    argv = [
+        sys.executable, str(Path(__file__).resolve()),
+        "--profile", args.profile,
+        "--frames", str(args.frames),
+        "--seed", str(args.seed),
+    ]
+    if args.sequence:
+        argv += ["--sequence", args.sequence]
+    if args.intraop_threads is not None:
+        argv += ["--intraop-threads", str(args.intraop_threads)]
+    if args.workers is not None:
+        argv += ["--workers", str(args.workers)]
+    return argv
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run-to-run determinism self-test")
+    parser.add_argument("--profile", default="parallel", choices=["balanced", "max", "parallel"])
+    parser.add_argument("--sequence", default=None, help="Görüntü dizini / video (varsayılan: datasets/)")
+    parser.add_argument("--frames", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=int(Settings.DETERMINISM_SEED))
+    parser.add_argument("--intraop-threads", type=int, default=None,
+                        help="DETERMINISM_PARALLEL_INTRAOP_THREADS override")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="DETERMINISM_PARALLEL_WORKERS override")
+    parser.add_argument("--repeat", type=int, default=2, help="Süreç sayısı (>= 2)")
+    parser.add_argument("--worker-output", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.intraop_threads is not None:
+        Settings.DETERMINISM_PARALLEL_INTRAOP_THREADS = max(1, args.intraop_threads)
+    if args.workers is not None:
+        Settings.DETERMINISM_PARALLEL_WORKERS = max(0, args.workers)
+
+    if args.worker_output:
+        _run_worker(args)
+        return
+
+    t0 = time.perf_counter()
+    runs = run_isolated(_worker_argv(args), repetitions=args.repeat)
+    elapsed = time.perf_counter() - t0
+    diffs = compare_runs(runs)
+    objects = sum(len(p["detected_objects"]) for p in runs[0])
+    print(
+        f"profile={args.profile} runs={len(runs)} frames={len(runs[0])} objects={objects} "
+        f"total_s={elapsed:.1f}"
+    )
+    if diffs:
+        print("NON-DETERMINISTIC:")
+        for line in diffs:
+            print(f"  {line}")
+        sys.exit(1)
+    print("OK: payloads bit-identical across processes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""LeanPredictor ↔ ultralytics predict() eşdeğerlik ve hız kontrolü.
+
+Aynı modelin predict() çıktısı ile LeanPredictor çıktısını tam kare ve SAHI
+tile batch'leri üzerinde karşılaştırır; kutu eşleşme/sınıf uyumu, en büyük
+koordinat farkı ve çağrı başı süreyi raporlar.
+
+LeanPredictor'a kareler, ön-işleme havuzundaki gibi her karede yeniden
+yazılan tek bir tampon üzerinden ve begin_frame belirteciyle verilir. Aynı
+nesnenin yeni pikselleri önbellekten dönerse eşleşme bozulur. --strict ile
+tam eşleşme sağlanmazsa çıkış kodu 1 olur (tests/ gerçek torch varsa bunu
+kullanır). --synthetic N veri seti yerine sabit tohumlu N gürültü karesi üretir.
+
+Kullanım:
+    python tools/verify_lean_predictor.py [--sequence DIR] [--frames 50]
+        [--imgsz 1280] [--device cpu] [--model yolov8n.yaml] [--conf 0.25]
+        [--synthetic 0] [--strict]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from ultralytics import YOLO  # noqa: E402
+
+from config.settings import Settings  # noqa: E402
+from src.lean_predictor import LeanPredictor  # noqa: E402
+from src.quantization import (  # noqa: E402
+    _read_frames,
+    detection_agreement,
+    list_dataset_images,
+    summarize_agreement,
+)
+
+
+def _arrays(result) -> tuple:
+    boxes = getattr(result, "boxes", result)
+    if boxes is None or len(boxes) == 0:
+        return np.zeros((0, 4)), np.zeros((0,)), np.zeros((0,))
+    as_np = [v.cpu().numpy() if hasattr(v, "cpu") else np.asarray(v) for v in (boxes.xyxy, boxes.conf, boxes.cls)]
+    return as_np[0].reshape(-1, 4), as_np[1].reshape(-1), as_np[2].reshape(-1)
+
+
+def _synthetic_frames(count: int, seed: int = 0) -> List[np.ndarray]:
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, size=(360, 640, 3), dtype=np.uint8) for _ in range(count)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="LeanPredictor equivalence check")
+    parser.add_argument("--sequence", default=None, help="Görüntü dizini (varsayılan: datasets/)")
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--imgsz", type=int, default=int(Settings.INFERENCE_SIZE))
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--model", default=Settings.MODEL_PATH)
+    parser.add_argument("--conf", type=float, default=float(Settings.CONFIDENCE_THRESHOLD))
+    parser.add_argument("--synthetic", type=int, default=0, help="N > 0: veri seti yerine N gürültü karesi")
+    parser.add_argument("--strict", action="store_true", help="Tam eşleşme yoksa çıkış kodu 1")
+    args = parser.parse_args()
+
+    if args.synthetic > 0:
+        frames = _synthetic_frames(args.synthetic)
+    else:
+        frames = _read_frames(list_dataset_images(args.sequence)[: max(1, args.frames)])
+    if not frames:
+        sys.exit("Karşılaştırma için kare bulunamadı")
+
+    model = YOLO(args.model)
+    model.to(args.device)
+    kwargs = dict(
+        imgsz=args.imgsz,
+        conf=float(args.conf),
+        iou=float(Settings.NMS_IOU_THRESHOLD),
+        max_det=int(Settings.MAX_DETECTIONS),
+        classes=None,
+        agnostic_nms=False,
+    )
+    model.predict(source=frames[0], device=args.device, verbose=False, **kwargs)
+    lean = LeanPredictor.from_model(model, args.device)
+    if lean is None:
+        sys.exit("AutoBackend kurulamadı")
+
+    per_frame = []
+    max_delta = 0.0
+    conf_delta = 0.0
+    t_ref: List[float] = []
+    t_lean: List[float] = []
+    pooled: Optional[np.ndarray] = None
+    for frame in frames:
+        t0 = time.perf_counter()
+        ref = model.predict(source=frame, device=args.device, verbose=False, **kwargs)[0]
+        t_ref.append((time.perf_counter() - t0) * 1000.0)
+        # Havuzlu ön-işleme tamponu gibi: aynı nesne, her karede yeni pikseller
+        if pooled is None or pooled.shape != frame.shape:
+            pooled = np.empty_like(frame)
+        np.copyto(pooled, frame)
+        t0 = time.perf_counter()
+        token = lean.begin_frame()
+        out = lean.predict(pooled, frame_token=token, **kwargs)[0]
+        t_lean.append((time.perf_counter() - t0) * 1000.0)
+
+        rb, rc, rk = _arrays(ref)
+        lb, lc, lk = _arrays(out)
+        per_frame.append(detection_agreement(rb, rk, lb, lk, iou_threshold=0.99))
+        if rb.shape == lb.shape and len(rb):
+            max_delta = max(max_delta, float(np.abs(rb - lb).max()))
+            conf_delta = max(conf_delta, float(np.abs(rc - lc).max()))
+
+    report = summarize_agreement(per_frame)
+    print(f"Kare             : {report['frames']}")
+    print(f"Kutu (predict/lean): {report['ref_count']} / {report['test_count']}")
+    print(f"Eşleşme (IoU≥0.99): {report['match_rate']:.4f}  sınıf uyumu: {report['class_match_rate']:.4f}")
+    print(f"Maks. koordinat farkı: {max_delta:.3f} px  maks. conf farkı: {conf_delta:.5f}")
+    print(f"predict(): {np.mean(t_ref):.1f} ms/çağrı  lean: {np.mean(t_lean):.1f} ms/çağrı")
+    if args.strict and (
+        report["ref_count"] != report["test_count"]
+        or report["match_rate"] < 1.0
+        or report["class_match_rate"] < 1.0
+        or max_delta > 0.01
+        or conf_delta > 1e-4
+    ):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Görev 2 VO replay: tespit yığını olmadan GPS kesintili sürüklenme ölçümü.
+
+Görüntü dizisi + gerçek konum CSV'si (translation_x, translation_y,
+translation_z; kare sırasıyla) yalnızca VisualOdometry.update'e verilir.
+--sweep ile VO_* / LATENCY_COMP_* / MOTION_COMP_* ayar ızgarası süreç
+havuzunda koşturulur; sonuçlar ortalama 3B hataya göre sıralanır.
+
+Kullanım:
+    python tools/vo_replay.py --sequence datasets/seq01 [--gt datasets/seq01/groundtruth.csv]
+        [--schedule mock|off|on|WARMUP:PERIOD:HEALTHY] [--fps 7.5] [--latency-ms 80]
+        [--sweep VO_SIMILARITY_REPROJ_PX=0.8,1.6 --sweep LATENCY_COMP_EMA_ALPHA=0.2,0.35]
+        [--workers 0] [--json sonuc.json]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.vo_replay import ReplayConfig, expand_sweep, run_sweep  # noqa: E402
+
+_COLUMNS = ("mean_err_m", "outage_mean_err_m", "drift_m_per_min", "ms_per_frame", "p95_ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="VO-only headless replay")
+    parser.add_argument("--sequence", required=True, help="Görüntü dizini veya video dosyası")
+    parser.add_argument("--gt", default=None, help="Gerçek konum CSV (varsayılan: <sequence>/groundtruth.csv)")
+    parser.add_argument("--schedule", default="mock", help="GPS kesinti deseni")
+    parser.add_argument("--fps", type=float, default=7.5)
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--frames", type=int, default=0, help="0 = tüm dizi")
+    parser.add_argument("--sweep", action="append", default=[], help="NAME=v1,v2 (tekrarlanabilir)")
+    parser.add_argument("--workers", type=int, default=0, help="0 = min(koşu, CPU)")
+    parser.add_argument("--json", default=None, help="Sonuçları JSON olarak yaz")
+    args = parser.parse_args()
+
+    gt = args.gt or str(Path(args.sequence) / "groundtruth.csv")
+    base = ReplayConfig(
+        source=args.sequence,
+        ground_truth=gt,
+        schedule=args.schedule,
+        fps=args.fps,
+        latency_ms=args.latency_ms,
+        max_frames=args.frames,
+    )
+    try:
+        grid = expand_sweep(args.sweep)
+    except ValueError as exc:
+        sys.exit(str(exc))
+    results = run_sweep(base, grid, workers=args.workers)
+    results.sort(key=lambda r: r["mean_err_m"])
+
+    print(f"frames={results[0]['frames']} outage_frames={results[0]['outage_frames']} "
+          f"schedule={args.schedule} runs={len(results)}")
+    print(" ".join(f"{c:>17}" for c in _COLUMNS) + "  overrides")
+    for row in results:
+        print(" ".join(f"{row[c]:>17}" for c in _COLUMNS) + f"  {row['overrides'] or '-'}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()